@@ -6,6 +6,15 @@ Backend-Paket für Venookah2.
 Um die Anwendung zu starten:
 FLASK_APP=backend.app flask run
 oder `create_app()` im WSGI verwenden.
+
+`create_app` wird erst beim Zugriff importiert: `import backend.services.http_client`
+(z. B. im Telegram-Bot) soll keine App erzeugen.
 """
 
-from .app import create_app  # noqa: F401
+
+def __getattr__(name):
+    if name == "create_app":
+        from .app import create_app
+
+        return create_app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
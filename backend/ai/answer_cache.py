@@ -0,0 +1,225 @@
+# file: backend/ai/answer_cache.py
+
+"""
+Antwort-Cache für den Storefront-Chat (/api/chat, /api/chat/stream).
+
+- Fragen werden normalisiert (Unicode, Groß-/Kleinschreibung, Satzzeichen,
+  Leerraum); identische Fragen kommen aus einem LRU-Speicher mit TTL.
+- Optional beantwortet ein TF-IDF-Index (Wörter + Zeichen-Trigramme) auch fast
+  gleiche Fragen, wenn die Kosinus-Ähnlichkeit über AI_ANSWER_CACHE_SIMILARITY
+  liegt und die Zahlen in beiden Fragen übereinstimmen ("3 kg" ≠ "5 kg").
+- Schlüssel enthalten Modell und Hash des System-Prompts; `invalidate()` (Admin
+  speichert den Prompt) leert den Cache in allen Prozessen über den
+  DB-Generationszähler "ai_answers".
+- Zähler für exakte/ähnliche Treffer und Fehlschläge: `stats()`.
+"""
+
+import hashlib
+import math
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+
+from flask import current_app, has_app_context
+
+from ..services.cache_service import GenerationTracker
+
+GENERATION_NAME = "ai_answers"
+
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)?")
+
+
+def normalize(question: str) -> str:
+    text = unicodedata.normalize("NFKC", question or "").casefold()
+    return " ".join(_WORD.findall(text))
+
+
+def _features(normalized: str) -> Counter:
+    terms = Counter()
+    for word in normalized.split():
+        terms["w:" + word] += 1
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            terms[padded[i:i + 3]] += 1
+    return terms
+
+
+def _scope(system_prompt: str, model: str) -> str:
+    return hashlib.sha256(f"{model}\0{system_prompt}".encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class _Entry:
+    expires: float
+    answer: str
+    terms: Counter
+    numbers: frozenset
+
+
+class AnswerCache:
+    """LRU/TTL-Speicher mit invertiertem Index für die Ähnlichkeitssuche (thread-sicher)."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 21600.0, similarity: float = 0.85) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.similarity = similarity
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self._data: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._postings: dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def get(self, scope: str, normalized: str) -> str | None:
+        key = (scope, normalized)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry.expires <= now:
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry.answer
+            if self.similarity > 0:
+                key = self._most_similar(scope, normalized, now)
+                if key is not None:
+                    self._data.move_to_end(key)
+                    self.similar_hits += 1
+                    return self._data[key].answer
+            self.misses += 1
+            return None
+
+    def set(self, scope: str, normalized: str, answer: str) -> None:
+        key = (scope, normalized)
+        entry = _Entry(
+            expires=time.monotonic() + self.ttl,
+            answer=answer,
+            terms=_features(normalized),
+            numbers=frozenset(_NUMBER.findall(normalized)),
+        )
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = entry
+            for term in entry.terms:
+                self._postings.setdefault(term, set()).add(key)
+            while len(self._data) > self.maxsize:
+                self._remove(next(iter(self._data)))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._postings.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.similar_hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.similar_hits) / total, 3) if total else 0.0,
+        }
+
+    def _remove(self, key) -> None:
+        entry = self._data.pop(key)
+        for term in entry.terms:
+            keys = self._postings.get(term)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._postings[term]
+
+    def _most_similar(self, scope: str, normalized: str, now: float):
+        query = _features(normalized)
+        numbers = frozenset(_NUMBER.findall(normalized))
+        candidates = set()
+        for term in query:
+            candidates.update(self._postings.get(term, ()))
+        if not candidates:
+            return None
+
+        documents = len(self._data) + 1
+
+        def idf(term: str) -> float:
+            return math.log(documents / (len(self._postings.get(term, ())) + 1)) + 1.0
+
+        weights = {term: (1 + math.log(count)) * idf(term) for term, count in query.items()}
+        query_norm = math.sqrt(sum(w * w for w in weights.values()))
+
+        best_key, best_score = None, self.similarity
+        for key in candidates:
+            entry = self._data[key]
+            if key[0] != scope or entry.numbers != numbers or entry.expires <= now:
+                continue
+            dot = norm = 0.0
+            for term, count in entry.terms.items():
+                weight = (1 + math.log(count)) * idf(term)
+                norm += weight * weight
+                dot += weight * weights.get(term, 0.0)
+            score = dot / (query_norm * math.sqrt(norm)) if norm else 0.0
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+
+_cache = AnswerCache()
+_generation = GenerationTracker(GENERATION_NAME, on_change=_cache.clear)
+
+
+def _configure() -> bool:
+    """Übernimmt Größe/TTL/Schwelle aus der Konfiguration; False, wenn der Cache deaktiviert ist."""
+    if not has_app_context():
+        return False
+    config = current_app.config
+    if not config.get("AI_ANSWER_CACHE_ENABLED", True):
+        return False
+    _cache.maxsize = int(config.get("AI_ANSWER_CACHE_MAX_ENTRIES", 1024))
+    _cache.ttl = float(config.get("AI_ANSWER_CACHE_TTL", 21600))
+    _cache.similarity = float(config.get("AI_ANSWER_CACHE_SIMILARITY", 0.85))
+    _generation.sync(float(config.get("AI_ANSWER_CACHE_SYNC_SECONDS", 5)))
+    return True
+
+
+def _cacheable(question: str) -> str | None:
+    normalized = normalize(question)
+    if not normalized or len(normalized) > int(current_app.config.get("AI_ANSWER_CACHE_MAX_QUESTION", 300)):
+        return None
+    return normalized
+
+
+def lookup(question: str, system_prompt: str, model: str) -> str | None:
+    """Gecachte Antwort auf `question` (exakt oder ähnlich) oder None."""
+    if not _configure():
+        return None
+    normalized = _cacheable(question)
+    if normalized is None:
+        return None
+    return _cache.get(_scope(system_prompt, model), normalized)
+
+
+def store(question: str, system_prompt: str, model: str, answer: str) -> None:
+    """Merkt sich eine vollständige, erfolgreiche Antwort des Modells."""
+    if not answer or not _configure():
+        return
+    normalized = _cacheable(question)
+    if normalized is not None:
+        _cache.set(_scope(system_prompt, model), normalized, answer)
+
+
+def invalidate() -> None:
+    """Verwirft alle Antworten in allen Prozessen (z. B. nach Änderung des System-Prompts)."""
+    _generation.bump()
+
+
+def stats() -> dict:
+    return _cache.stats()
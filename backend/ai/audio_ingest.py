@@ -0,0 +1,198 @@
+# file: backend/ai/audio_ingest.py
+
+"""
+Audio-Upload für die Transkription ohne Mehrfachkopien im Speicher.
+
+- `spool()` liest den Upload blockweise (höchstens `max_bytes`), berechnet dabei
+  SHA-256 und Größe; bereits seekbare Dateien (Werkzeug legt größere Uploads in
+  eine Temp-Datei) werden nicht kopiert, alles andere landet in einer
+  `SpooledTemporaryFile` (ab 1 MB auf der Platte).
+- `ogg_duration()` liest die Dauer aus der letzten Ogg-Seite (Opus/Vorbis,
+  z. B. Telegram-Sprachnachrichten), ohne die Datei zu dekodieren.
+- `MultipartFile` ist ein multipart/form-data-Body mit bekannter Länge, den
+  `requests` blockweise aus der Datei sendet.
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_MEMORY_LIMIT = 1024 * 1024
+# so viele Bytes vom Dateiende reichen für die letzte Ogg-Seite (max. ~64 KB)
+OGG_TAIL_BYTES = 80 * 1024
+
+
+class AudioRejected(ValueError):
+    """Upload verletzt ein Limit; `reason` ist "too_large", "too_long" oder "empty"."""
+
+    def __init__(self, reason: str, detail: str):
+        super().__init__(detail)
+        self.reason = reason
+        self.detail = detail
+
+
+@dataclass
+class SpooledAudio:
+    file: BinaryIO
+    size: int
+    sha256: str
+    duration: float | None
+    # nur selbst angelegte Spool-Dateien schließen, nicht den Upload des Aufrufers
+    owned: bool
+
+    def close(self) -> None:
+        if self.owned:
+            self.file.close()
+
+
+def _seekable(fileobj) -> bool:
+    try:
+        return bool(fileobj.seekable())
+    except Exception:
+        return False
+
+
+def spool(source, max_bytes: int) -> SpooledAudio:
+    """
+    Liest `source` (Datei-Objekt, z. B. `FileStorage.stream`, oder bytes) höchstens bis
+    `max_bytes` und gibt eine auf Position 0 stehende Datei samt Hash/Größe zurück.
+    Wirft `AudioRejected`, sobald das Limit überschritten ist (ohne den Rest zu lesen).
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        if len(source) > max_bytes:
+            raise AudioRejected("too_large", f"audio exceeds {max_bytes} bytes")
+        target = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT)
+        target.write(source)
+        return _finish(target, len(source), hashlib.sha256(source).hexdigest(), owned=True)
+
+    in_place = _seekable(source)
+    start = source.tell() if in_place else 0
+    target = source if in_place else tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise AudioRejected("too_large", f"audio exceeds {max_bytes} bytes")
+            digest.update(chunk)
+            if not in_place:
+                target.write(chunk)
+    except Exception:
+        if not in_place:
+            target.close()
+        raise
+    if in_place:
+        target.seek(start)
+    return _finish(target, size, digest.hexdigest(), owned=not in_place, start=start)
+
+
+def _finish(target, size: int, sha256: str, owned: bool, start: int = 0) -> SpooledAudio:
+    duration = ogg_duration(target, start=start)
+    target.seek(start)
+    if not size:
+        if owned:
+            target.close()
+        raise AudioRejected("empty", "audio file is empty")
+    return SpooledAudio(file=target, size=size, sha256=sha256, duration=duration, owned=owned)
+
+
+def ogg_duration(fileobj, start: int = 0) -> float | None:
+    """
+    Dauer einer Ogg-Opus/Vorbis-Datei in Sekunden (Granule-Position der letzten Seite),
+    None bei anderen Formaten. Die Dateiposition ist danach undefiniert.
+    """
+    fileobj.seek(start)
+    head = fileobj.read(64)
+    if not head.startswith(b"OggS") or len(head) < 28:
+        return None
+    body = head[27 + head[26]:]
+    if body.startswith(b"OpusHead"):
+        rate = 48000  # Opus zählt Granules immer in 48 kHz
+        pre_skip = struct.unpack_from("<H", body, 10)[0] if len(body) >= 12 else 0
+    elif body.startswith(b"\x01vorbis") and len(body) >= 16:
+        rate = struct.unpack_from("<I", body, 12)[0]
+        pre_skip = 0
+    else:
+        return None
+
+    end = fileobj.seek(0, os.SEEK_END)
+    fileobj.seek(max(start, end - OGG_TAIL_BYTES))
+    tail = fileobj.read()
+    index = tail.rfind(b"OggS")
+    if index < 0 or len(tail) < index + 14 or not rate:
+        return None
+    granule = struct.unpack_from("<q", tail, index + 6)[0]
+    if granule < 0:
+        return None
+    return max(0.0, (granule - pre_skip) / rate)
+
+
+class MultipartFile:
+    """
+    multipart/form-data mit Textfeldern und einer Datei als lesbarer Body fester Länge:
+    `requests` setzt Content-Length und liest die Datei in Blöcken, statt den ganzen
+    Body (wie bei `files=`) im Speicher zusammenzubauen. `seek(0)` erlaubt Retries.
+    """
+
+    def __init__(self, fields: dict, field_name: str, filename: str, fileobj: BinaryIO,
+                 size: int, content_type: str = "application/octet-stream"):
+        boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        head = b"".join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode("utf-8")
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{field_name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode("utf-8")
+        self._head = head
+        self._tail = f"\r\n--{boundary}--\r\n".encode("utf-8")
+        self._file = fileobj
+        self._file_start = fileobj.tell()
+        self._size = size
+        self.len = len(head) + size + len(self._tail)
+        self._pos = 0
+
+    def __len__(self) -> int:
+        return self.len
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if offset != 0 or whence != os.SEEK_SET:
+            raise OSError("MultipartFile supports only seek(0)")
+        self._pos = 0
+        self._file.seek(self._file_start)
+        return 0
+
+    def tell(self) -> int:
+        return self._pos
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.len
+        parts = []
+        while size > 0 and self._pos < self.len:
+            head_end = len(self._head)
+            file_end = head_end + self._size
+            if self._pos < head_end:
+                chunk = self._head[self._pos:self._pos + size]
+            elif self._pos < file_end:
+                chunk = self._file.read(min(size, file_end - self._pos))
+                if not chunk:
+                    raise OSError("audio file shorter than announced")
+            else:
+                offset = self._pos - file_end
+                chunk = self._tail[offset:offset + size]
+            parts.append(chunk)
+            self._pos += len(chunk)
+            size -= len(chunk)
+        return b"".join(parts)
@@ -10,11 +10,17 @@ implementation that calls OpenAI's `/audio/transcriptions` endpoint.
 
 from typing import BinaryIO, Union
 import os
-import io
 import requests
 import logging
 from pathlib import Path
 from dotenv import dotenv_values, load_dotenv
+from flask import current_app, has_app_context
+
+from ..services import http_client
+from ..services.cache_service import TTLCache
+from . import audio_ingest
+
+WHISPER_MODEL = 'whisper-1'
 
 
 def _detect_language_simple(text: str) -> str:
@@ -67,48 +73,87 @@ def get_openai_key() -> Union[str, None]:
     return None
 
 
-def transcribe_audio(file_obj: BinaryIO) -> Union[str, dict]:
+_transcriptions = TTLCache(maxsize=512, ttl=86400.0)
+
+
+def _limits() -> tuple[int, float, int, float]:
+    """(max bytes, max seconds, cache entries, cache ttl) from app config, else env/defaults."""
+    if has_app_context():
+        cfg = current_app.config
+    else:
+        cfg = os.environ
+    return (
+        int(cfg.get('AUDIO_MAX_BYTES', 20 * 1024 * 1024)),
+        float(cfg.get('AUDIO_MAX_SECONDS', 600)),
+        int(cfg.get('TRANSCRIPTION_CACHE_MAX_ENTRIES', 512)),
+        float(cfg.get('TRANSCRIPTION_CACHE_TTL', 86400)),
+    )
+
+
+def transcribe_audio(file_obj: BinaryIO, filename: str = 'audio.ogg',
+                     content_type: str = 'audio/ogg') -> Union[str, dict]:
     """
-    Accepts a file-like object (Flask FileStorage or bytes-like). Returns either
-    a dict: {'text': ..., 'language': 'en'|'ru'|'uk'|...}.
+    Accepts a file-like object (e.g. `FileStorage.stream`) or bytes. Returns a dict:
+    {'text': ..., 'language': 'en'|'ru'|'uk'|..., 'bytes': size, 'duration': seconds|None, 'cached': bool}.
+
+    The audio is read in bounded chunks (spooled to disk when large) and streamed into
+    the upload; AUDIO_MAX_BYTES / AUDIO_MAX_SECONDS are enforced before anything is sent
+    (`AudioRejected`). Transcriptions are cached by content hash, so a re-sent voice
+    note is not transcribed again.
     """
-    # Try to read bytes from the provided object
-    audio_bytes = None
+    max_bytes, max_seconds, cache_entries, cache_ttl = _limits()
     try:
-        # Flask's FileStorage supports .read()
-        audio_bytes = file_obj.read()
-    except Exception:
-        try:
-            # maybe it's already raw bytes
-            audio_bytes = bytes(file_obj)
-        except Exception:
-            audio_bytes = None
-
-    if not audio_bytes:
-        return {'text': '', 'language': 'unknown'}
-
-    # Reuse the module-level key resolver (below) to keep behavior consistent
-    # between STT and chat calls.
-    openai_key = get_openai_key()
-    if not openai_key:
-        # fallback mock: return text plus guessed language
-        logging.getLogger(__name__).warning('OPENAI_API_KEY not found or invalid (non-ASCII). Using mock transcription.')
-        text = '[Mock transcription]'
-        lang = _detect_language_simple(text)
-        return {'text': text, 'language': lang}
-
-    # Call OpenAI audio transcription endpoint
+        audio = audio_ingest.spool(file_obj, max_bytes)
+    except audio_ingest.AudioRejected as e:
+        if e.reason == 'empty':
+            return {'text': '', 'language': 'unknown', 'bytes': 0, 'duration': None, 'cached': False}
+        raise
+
     try:
-        url = 'https://api.openai.com/v1/audio/transcriptions'
-        headers = {'Authorization': f'Bearer {openai_key}'}
-        files = {'file': ('audio.ogg', io.BytesIO(audio_bytes), 'audio/ogg')}
-        data = {'model': 'whisper-1'}
-        resp = requests.post(url, headers=headers, files=files, data=data, timeout=60)
-        resp.raise_for_status()
-        j = resp.json()
-        text = j.get('text', '')
-        lang = _detect_language_simple(text)
-        return {'text': text, 'language': lang}
-    except requests.RequestException:
-        # On failure return empty transcription with unknown language
-        return {'text': '', 'language': 'unknown'}
+        if max_seconds and audio.duration is not None and audio.duration > max_seconds:
+            raise audio_ingest.AudioRejected(
+                'too_long', f'audio is {audio.duration:.0f}s long, limit is {max_seconds:.0f}s')
+        meta = {'bytes': audio.size, 'duration': audio.duration}
+
+        # Reuse the module-level key resolver (below) to keep behavior consistent
+        # between STT and chat calls.
+        openai_key = get_openai_key()
+        if not openai_key:
+            # fallback mock: return text plus guessed language
+            logging.getLogger(__name__).warning('OPENAI_API_KEY not found or invalid (non-ASCII). Using mock transcription.')
+            text = '[Mock transcription]'
+            lang = _detect_language_simple(text)
+            return {'text': text, 'language': lang, 'cached': False, **meta}
+
+        _transcriptions.maxsize = cache_entries
+        _transcriptions.ttl = cache_ttl
+        cache_key = (WHISPER_MODEL, audio.sha256)
+        cached = _transcriptions.get(cache_key)
+        if cached is not None:
+            return {**cached, 'cached': True, **meta}
+
+        # Call OpenAI audio transcription endpoint
+        try:
+            url = _transcriptions_url()
+            body = audio_ingest.MultipartFile({'model': WHISPER_MODEL}, 'file', filename, audio.file,
+                                              audio.size, content_type)
+            headers = {'Authorization': f'Bearer {openai_key}', 'Content-Type': body.content_type}
+            resp = http_client.post('openai', url, headers=headers, data=body, timeout=60)
+            resp.raise_for_status()
+            j = resp.json()
+            text = j.get('text', '')
+            result = {'text': text, 'language': _detect_language_simple(text)}
+            if text:
+                _transcriptions.set(cache_key, result)
+            return {**result, 'cached': False, **meta}
+        except requests.RequestException:
+            # On failure return empty transcription with unknown language
+            logging.getLogger(__name__).warning('Transcription request failed', exc_info=True)
+            return {'text': '', 'language': 'unknown', 'cached': False, **meta}
+    finally:
+        audio.close()
+
+
+def _transcriptions_url() -> str:
+    base = (current_app.config.get('OPENAI_BASE_URL') if has_app_context() else None) or 'https://api.openai.com/v1'
+    return base.rstrip('/') + '/audio/transcriptions'
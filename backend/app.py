@@ -2,14 +2,15 @@
 
 import logging
 import os
-import sys
 import threading
-import subprocess
 
 from flask import Flask, jsonify
 from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
 
 from .config import get_config_class
+from .cli import register_commands
+from .database import configure_engines
 from .extensions import init_extensions
 
 
@@ -26,102 +27,17 @@ def create_app() -> Flask:
     app.config.from_object(get_config_class(config_name))
 
     setup_logging(app)
+    x_for = int(app.config.get("PROXY_FIX_X_FOR", 0))
+    if x_for > 0:
+        # Client-IP aus den vom Proxy angehängten X-Forwarded-For-Einträgen (nicht vom Client wählbar)
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=x_for)
+    configure_engines(app)
     init_extensions(app)
     register_blueprints(app)
+    register_commands(app)
 
-    # Optionally ensure basic shop categories exist (useful for local/dev instances)
-    # Controlled via env var `ENSURE_DEFAULT_CATEGORIES` (default: '1' for dev convenience).
-    def _ensure_default_categories():
-        try:
-                from .models.product import Category
-                from .extensions import db as _db
-                from sqlalchemy import inspect
-
-                with app.app_context():
-                    enabled = os.getenv('ENSURE_DEFAULT_CATEGORIES', '1').lower()
-                    if enabled not in ('1', 'true', 'yes'):
-                        return
-
-                    inspector = inspect(_db.engine)
-                    # If the categories table doesn't exist yet (migrations not applied), skip.
-                    if not inspector.has_table(Category.__tablename__):
-                        app.logger.info("Skipping default category creation: table does not exist yet")
-                        return
-
-                    # Create 'coal' and 'tobacco' categories if missing
-                    if not Category.query.filter_by(slug='coal').first():
-                        app.logger.info("Creating default category: coal / Kohle")
-                        c = Category(name='Kohle', slug='coal')
-                        _db.session.add(c)
-                        _db.session.commit()
-
-                    if not Category.query.filter_by(slug='tobacco').first():
-                        app.logger.info("Creating default category: tobacco / Tabak")
-                        c = Category(name='Tabak (Shisha)', slug='tobacco')
-                        _db.session.add(c)
-                        _db.session.commit()
-        except Exception:
-            app.logger.exception("Failed to ensure default categories")
-
-    _ensure_default_categories()
-
-    # Start the Telegram bot as a background subprocess when the app starts.
-    # Controlled via `START_TELEGRAM_BOT` env var (default: '1').
-    # We guard against the Flask reloader starting the bot twice by checking
-    # the `WERKZEUG_RUN_MAIN` environment variable — only start in the
-    # reloader child (`'true'`) or when not using the reloader.
-    def _maybe_start_telegram_bot():
-        start_flag = os.getenv('START_TELEGRAM_BOT', '1').lower()
-        if start_flag not in ('1', 'true', 'yes'):
-            return
-
-        # If the reloader is active, only start in the child process
-        # where WERKZEUG_RUN_MAIN == 'true'. If the env var is not set,
-        # proceed (useful for production servers).
-        reload_flag = os.getenv('WERKZEUG_RUN_MAIN')
-        if reload_flag is not None and reload_flag.lower() != 'true':
-            return
-
-        def _is_pid_running(pid: int) -> bool:
-            try:
-                if os.name == 'nt':
-                    # On Windows, use tasklist to verify PID
-                    res = subprocess.run(['tasklist', '/FI', f'PID eq {pid}'], capture_output=True, text=True)
-                    return str(pid) in res.stdout
-                else:
-                    os.kill(pid, 0)
-                    return True
-            except Exception:
-                return False
-
-        pidfile = os.path.join(os.getenv('TEMP', '.'), 'telegram_bot.pid')
-        if os.path.exists(pidfile):
-            try:
-                with open(pidfile, 'r', encoding='utf-8') as f:
-                    existing_pid = int(f.read().strip())
-                if _is_pid_running(existing_pid):
-                    app.logger.info(f"Telegram bot already running (pid={existing_pid}), skipping start")
-                    return
-                else:
-                    app.logger.info("Found stale telegram_bot.pid, will start a new bot")
-            except Exception:
-                # If anything goes wrong reading pidfile, proceed to start
-                app.logger.exception("Error while checking existing telegram bot PID file")
-
-        def _start():
-            try:
-                python = sys.executable or 'python'
-                repo_root = os.path.dirname(os.path.dirname(__file__))
-                # Run the bot as a module so relative imports work: `-m telegram_bot.bot`
-                proc = subprocess.Popen([python, '-m', 'telegram_bot.bot'], cwd=repo_root)
-                app.logger.info(f"Started telegram bot (pid={proc.pid})")
-            except Exception:
-                app.logger.exception("Failed to start telegram bot")
-
-        t = threading.Thread(target=_start, name='telegram-bot-starter', daemon=True)
-        t.start()
-
-    _maybe_start_telegram_bot()
+    # Keine Arbeit beim Start: Schema/Kategorien -> `flask bootstrap`,
+    # Telegram-Bot -> start_telegram_bot() aus run.py bzw. dem Worker
 
     @app.route("/health", methods=["GET"])
     def healthcheck():
@@ -159,9 +75,56 @@ def register_blueprints(app: Flask) -> None:
     app.register_blueprint(webhooks_bp)
 
 
-app = create_app()
+def start_telegram_bot(app: Flask) -> str:
+    """
+    Start the Telegram bot inside this process (returns the mode).
+    Controlled via `START_TELEGRAM_BOT` (default: '1') and `TELEGRAM_BOT_MODE`:
+    - polling: this process applies for the polling lease, only the holder polls
+    - webhook: the webhook URL is registered once (lock), updates arrive at
+      /webhooks/telegram and the runtime starts with the first update
+    """
+    from telegram_bot import runtime as bot_runtime
+
+    mode = bot_runtime.bot_mode(app.config)
+    if mode == 'off':
+        return mode
+
+    # If the reloader is active, only start in the child process
+    # where WERKZEUG_RUN_MAIN == 'true'. If the env var is not set,
+    # proceed (useful for production servers).
+    reload_flag = os.getenv('WERKZEUG_RUN_MAIN')
+    if reload_flag is not None and reload_flag.lower() != 'true':
+        return 'off'
+
+    if mode == 'polling':
+        bot_runtime.start_polling_leader(app)
+        return mode
+
+    def _register():
+        try:
+            if bot_runtime.register_webhook(app):
+                app.logger.info("Registered Telegram webhook %s", app.config.get('TELEGRAM_WEBHOOK_URL'))
+        except Exception:
+            app.logger.exception("Failed to register Telegram webhook")
+
+    threading.Thread(target=_register, name='telegram-webhook-register', daemon=True).start()
+    return mode
+
+
+_app = None
+
+
+def __getattr__(name):
+    # `backend.app:app` (gunicorn, flask, Skripte): App erst beim Zugriff erzeugen,
+    # `import backend.app` allein hat keine Nebenwirkungen
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    create_app().run(debug=True)
 
@@ -37,6 +37,18 @@ def validate_unique_slug(model, exclude_id=None):
     return _validate_unique_slug
 
 
+def validate_unique_sku(exclude_id=None):
+    def _validate_unique_sku(form, field):
+        if not field.data:
+            return
+        query = Product.query.filter_by(sku=field.data)
+        if exclude_id:
+            query = query.filter(Product.id != exclude_id)
+        if query.first():
+            raise ValidationError(f"SKU '{field.data}' ist bereits einem Produkt zugeordnet.")
+    return _validate_unique_sku
+
+
 class CategoryForm(FlaskForm):
     name = StringField(
         "Name der Kategorie",
@@ -66,6 +78,11 @@ class ProductForm(FlaskForm):
         "Slug (URL-Kennung)",
         validators=[DataRequired(), Length(max=255)],
     )
+    # Lagerartikel im Bestandsbuch; mehrere Produkte können nicht dieselbe SKU haben
+    sku = StringField(
+        "SKU (Lagerartikel)",
+        validators=[Optional(), Length(max=255)],
+    )
     description = TextAreaField("Beschreibung", validators=[Optional()])
 
     category_id = SelectField(
@@ -105,3 +122,4 @@ class ProductForm(FlaskForm):
         super().__init__(*args, **kwargs)
         # Add unique validation
         self.slug.validators.append(validate_unique_slug(Product, kwargs.get('obj').id if kwargs.get('obj') else None))
+        self.sku.validators.append(validate_unique_sku(kwargs.get('obj').id if kwargs.get('obj') else None))
@@ -17,6 +17,7 @@ from werkzeug.utils import secure_filename
 from ...extensions import db
 from ...models.user import User, UserRole
 from ...models.product import Category, Product
+from ...models.inventory import StockBalance
 from ...models.order import Order, OrderItem, CartItem
 from ...models.payment import Payment
 from ...models.warehouse import WarehouseTask
@@ -26,7 +27,8 @@ from ...models.alert import Alert
 from . import bp
 from .forms import CategoryForm, ProductForm, slugify
 from .services import get_admin_dashboard_data
-import requests
+from ...ai import answer_cache
+from ...services import alert_counter, chat_stream, credential_cache, jobs
 import json
 
 
@@ -157,6 +159,8 @@ def ai_prompt():
         prompt = request.form.get('prompt', '')
         with open(path, 'w', encoding='utf-8') as f:
             f.write(prompt)
+        # cached chat answers were generated with the old prompt
+        answer_cache.invalidate()
         flash('Systemanweisung aktualisiert.', 'success')
         return redirect(url_for('admin.ai_prompt'))
 
@@ -337,6 +341,7 @@ def product_create():
         product = Product(
             name=form.name.data,
             slug=slug,
+            sku=(form.sku.data or "").strip() or None,
             description=form.description.data or None,
             category=category,
             price_b2c=form.price_b2c.data,
@@ -374,6 +379,13 @@ def product_edit(product_id: int):
 
         product.name = form.name.data
         product.slug = form.slug.data
+        sku = (form.sku.data or "").strip()
+        if sku and sku != product.sku:
+            if product.sku and StockBalance.query.filter_by(sku=product.sku).first():
+                # Buchungen hängen an der SKU: Umbenennen würde den Bestand abkoppeln
+                flash("SKU mit Lagerbestand kann nicht geändert werden.", "warning")
+            else:
+                product.sku = sku
         product.description = form.description.data or None
         product.category = category
         product.price_b2c = form.price_b2c.data
@@ -553,15 +565,48 @@ def alerts_list():
     return render_template('admin/alerts_list.html', alerts=processed, filter_type=alert_type, pagination=pagination, page=page, per_page=per_page, is_sent=is_sent, date_from=date_from, date_to=date_to)
 
 
+@bp.route('/alerts/count')
+@admin_required
+def alerts_count():
+    """Anzahl nicht gesendeter Alerts für das Navbar-Badge (JSON, gecacht)."""
+    return jsonify({'unsent': alert_counter.get_unsent_count()})
+
+
+@bp.route('/upstreams')
+@admin_required
+def upstreams():
+    """Zustand der ausgehenden Verbindungen dieses Prozesses (Circuit Breaker, Latenzen, Tokens)."""
+    from ...services import http_client  # lädt requests
+
+    return jsonify({'http': http_client.snapshot(), 'credentials': credential_cache.snapshot()})
+
+
+@bp.route('/ai/cache')
+@admin_required
+def ai_cache_stats():
+    """Antwort-Cache des Chat-Assistenten (Treffer/Fehlschläge) und laufende Chats dieses Prozesses."""
+    return jsonify({'answers': answer_cache.stats(), 'chat': chat_stream.stats()})
+
+
+@bp.route('/jobs')
+@admin_required
+def jobs_overview():
+    """Hintergrund-Jobs: offene/laufende je Queue, belegte Sperren, letzte Läufe."""
+    return jsonify(jobs.snapshot(limit=request.args.get('limit', 50, type=int)))
+
+
 @bp.route('/alerts/<int:alert_id>/mark-sent', methods=['POST'])
 @admin_required
 def alert_mark_sent(alert_id: int):
     a = Alert.query.get_or_404(alert_id)
     try:
         from datetime import datetime
+        was_unsent = not a.is_sent
         a.is_sent = True
         a.sent_at = datetime.utcnow()
         db.session.commit()
+        if was_unsent:
+            alert_counter.adjust(-1)
         flash('Alert als gesendet markiert.', 'success')
     except Exception:
         db.session.rollback()
@@ -575,8 +620,11 @@ def alert_mark_sent(alert_id: int):
 def alert_delete(alert_id: int):
     a = Alert.query.get_or_404(alert_id)
     try:
+        was_unsent = not a.is_sent
         db.session.delete(a)
         db.session.commit()
+        if was_unsent:
+            alert_counter.adjust(-1)
         flash('Alert gelöscht.', 'info')
     except Exception:
         db.session.rollback()
@@ -618,20 +666,10 @@ def user_detail(user_id: int):
 @bp.route('/users/<int:user_id>/b2b-check', methods=['POST'])
 @admin_required
 def user_b2b_check(user_id: int):
-    """Admin action: trigger a manual B2B re-check for the given user (runs in background)."""
+    """Admin action: trigger a manual B2B re-check for the given user (runs as background job)."""
     user = User.query.get_or_404(user_id)
     try:
-        from ...services.b2b_checks.b2b_service import run_b2b_checks_for_user
-        import threading
-
-        def _run():
-            try:
-                run_b2b_checks_for_user(user)
-            except Exception:
-                current_app.logger.exception('Manual B2B check failed')
-
-        t = threading.Thread(target=_run, name=f'b2b-check-user-{user_id}', daemon=True)
-        t.start()
+        jobs.enqueue('b2b_check_user', {'user_id': user.id, 'force': True})
         flash('B2B-Prüfung gestartet (im Hintergrund).', 'info')
     except Exception:
         current_app.logger.exception('Failed to start manual B2B check')
@@ -649,18 +687,8 @@ def user_b2b_check_json(user_id: int):
     """
     user = User.query.get_or_404(user_id)
     try:
-        from ...services.b2b_checks.b2b_service import run_b2b_checks_for_user
-        import threading
-
-        def _run():
-            try:
-                run_b2b_checks_for_user(user)
-            except Exception:
-                current_app.logger.exception('Manual B2B check failed (json)')
-
-        t = threading.Thread(target=_run, name=f'b2b-check-user-json-{user_id}', daemon=True)
-        t.start()
-        return jsonify({'started': True}), 202
+        job_id = jobs.enqueue('b2b_check_user', {'user_id': user.id, 'force': True})
+        return jsonify({'started': True, 'job_id': job_id}), 202
     except Exception:
         current_app.logger.exception('Failed to start manual B2B check (json)')
         return jsonify({'started': False}), 500
@@ -6,49 +6,67 @@ Services für das Admin-Panel:
 - Hilfsfunktionen für CRM/Bestellungen
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
 
+from sqlalchemy import func, select
+from sqlalchemy.orm import joinedload
+
+from ...database import reporting_query
+from ...extensions import db
 from ...models.order import Order
 from ...models.payment import Payment
 from ...models.user import User, UserRole
 from ...models.b2b_check import B2BCheckResult
 from ...models.crm import Company
-from ...services.report_service import get_sales_summary, get_top_customers
+from ...services.report_service import (
+    get_sales_by_customer_type,
+    get_sales_summaries,
+    get_top_customers,
+)
 
 
+@reporting_query
 def get_admin_dashboard_data() -> dict:
     """
     Daten für die Admin-Dashboard-Startseite.
+    Zählungen und Summen werden in der DB berechnet (keine ORM-Listen),
+    gelesen über `database.reporting()` (Replica, falls konfiguriert).
     """
     now = datetime.utcnow()
     today_start = datetime(now.year, now.month, now.day)
 
-    orders_today = Order.query.filter(Order.created_at >= today_start).all()
-    payments_today = Payment.query.filter(Payment.created_at >= today_start).all()
-
-    users_total = User.query.count()
-    b2b_users = User.query.filter_by(is_b2b=True).count()
-    companies_total = Company.query.count()
+    counts = db.session.execute(
+        select(
+            select(func.count(Order.id)).where(Order.created_at >= today_start).scalar_subquery(),
+            select(func.count(Payment.id)).where(Payment.created_at >= today_start).scalar_subquery(),
+            select(func.count(User.id)).scalar_subquery(),
+            select(func.count(User.id)).where(User.is_b2b.is_(True)).scalar_subquery(),
+            select(func.count(Company.id)).scalar_subquery(),
+        )
+    ).one()
+    orders_today_count, payments_today_count, users_total, b2b_users, companies_total = counts
 
-    summary_7d = get_sales_summary(days=7)
-    summary_30d = get_sales_summary(days=30)
+    summaries = get_sales_summaries((7, 30))
     top_customers = get_top_customers(limit=5)
+    sales_by_type = get_sales_by_customer_type(days=30)
 
     last_b2b_checks = (
-        B2BCheckResult.query.order_by(B2BCheckResult.created_at.desc())
+        B2BCheckResult.query.options(joinedload(B2BCheckResult.user))
+        .order_by(B2BCheckResult.created_at.desc())
         .limit(10)
         .all()
     )
 
     data = {
-        "orders_today": orders_today,
-        "payments_today": payments_today,
+        "orders_today_count": orders_today_count,
+        "payments_today_count": payments_today_count,
         "users_total": users_total,
         "b2b_users": b2b_users,
         "companies_total": companies_total,
-        "summary_7d": summary_7d,
-        "summary_30d": summary_30d,
+        "summary_7d": summaries[7],
+        "summary_30d": summaries[30],
         "top_customers": top_customers,
+        "sales_by_type": sales_by_type,
         "last_b2b_checks": last_b2b_checks,
     }
     return data
@@ -6,13 +6,13 @@ from flask import (
     url_for,
     flash,
     request,
+    current_app,
 )
 from flask_login import login_user, logout_user, current_user, login_required
 
 from ...extensions import db
 from ...models.user import User, UserRole
-from ...services.b2b_checks.b2b_service import run_b2b_checks_for_user
-import threading
+from ...services import jobs
 from ...services.crm_service import (
     get_or_create_company_for_b2b_user,
     create_primary_contact_for_company,
@@ -93,15 +93,12 @@ def register():
         # ---- AUTO-PRÜFUNG B2B + HINZUFÜGEN ZUR CRM ----
         if is_b2b:
             # 1) Start B2B-Prüfung in Hintergrund (VIES + Register + OSINT/screenshot)
-            # Running in a background thread avoids blocking the registration request
+            # as a background job, so the registration request is not blocked
             try:
-                threading.Thread(target=run_b2b_checks_for_user, args=(user,), daemon=True).start()
+                jobs.enqueue("b2b_check_user", {"user_id": user.id})
             except Exception:
-                # If background thread fails, run synchronously as fallback
-                try:
-                    result = run_b2b_checks_for_user(user)
-                except Exception:
-                    result = None
+                # registration must not fail because of the check; the daily sync picks it up
+                current_app.logger.exception("Failed to enqueue B2B check for user %s", user.id)
 
             # 2) Erstellung der Firma + Hauptkontakt im CRM
             company = get_or_create_company_for_b2b_user(user)
@@ -6,5 +6,9 @@ from wtforms.validators import Optional
 
 
 class SearchForm(FlaskForm):
+    # GET-Suchformular: kein CSRF-Token nötig (keine Zustandsänderung)
+    class Meta:
+        csrf = False
+
     query = StringField("Пошук", validators=[Optional()])
     submit = SubmitField("Шукати")
@@ -1,28 +1,31 @@
 # file: backend/blueprints/shop_public/routes.py
 
-from flask import render_template, abort, redirect, url_for, flash, request, current_app, jsonify
+from flask import render_template, abort, redirect, url_for, flash, request, current_app, jsonify, Response, stream_with_context
 from flask_login import current_user, login_required
 
 from . import bp
 from .forms import SearchForm
-from .services import get_active_products, get_product_by_slug
+from .services import (
+    DEFAULT_PAGE_SIZE,
+    STOREFRONT_SECTIONS,
+    get_product_by_slug,
+    get_storefront_sections,
+    search_products,
+)
 from ...models.product import Category, Product
 from ...models.order import Cart, CartItem, Order, OrderItem, OrderStatus
 from ...models.payment import Payment
 from ...extensions import db
-from ...services.shipping.shipping_service import create_shipment_for_order
-import stripe
+from ...services.response_cache import cached_page
+from ...services import chat_stream, owner_snapshot
+from ...services.cart_pricing import price_cart
+from ...services.order_service import create_order_from_priced_cart
 import os
-import requests
-from ...services.prepare_shipment import prepare_shipment
-from ...ai.whisper_client import transcribe_audio, get_openai_key
-from ...models.warehouse import WarehouseProduct, WarehouseTask
-from ...models.shipping import Shipment
+from ...ai import answer_cache
+from ...ai.audio_ingest import AudioRejected
 from ...models.order import Order, OrderItem
 from ...models.product import Product
 from io import BytesIO
-import io
-import csv
 import textwrap
 
 
@@ -36,36 +39,43 @@ def get_or_create_cart(user_id: int) -> Cart:
 
 
 @bp.route("/", methods=["GET", "POST"])
+@cached_page(catalog=True)
 def index():
-    form = SearchForm()
-    products = get_active_products()
-
-    # Suche vorerst einfach — Filterung nach Name (kann später erweitert werden)
-    if form.validate_on_submit() and form.query.data:
-        q = form.query.data.lower()
-        products = [p for p in products if q in p.name.lower()]
-
-    # Produkte nach Kategorie in Tabak und Kohle aufteilen
-    tobacco_products = []
-    coal_products = []
-    for p in products:
-        if p.category and (
-            'tabak' in p.category.name.lower()
-            or 'tobacco' in p.category.name.lower()
-            or 'tabak' in p.category.name.lower()
-        ):
-            tobacco_products.append(p)
-        elif p.category and (
-            'kohle' in p.category.name.lower()
-            or 'coal' in p.category.name.lower()
-            or 'kohle' in p.category.name.lower()
-        ):
-            coal_products.append(p)
-
-    return render_template("shop/index.html", form=form, products=products, tobacco_products=tobacco_products, coal_products=coal_products)
+    # Suche läuft per GET (`?query=`), damit Ergebnisseiten verlinkbar sind;
+    # POST bleibt für ältere Links/Formulare erlaubt.
+    form = SearchForm(formdata=request.form if request.method == "POST" else request.args)
+    query = (form.query.data or "").strip() or None
+
+    section = request.args.get("section")
+    if section not in STOREFRONT_SECTIONS:
+        section = None
+    after = request.args.get("after") if section else None
+    page_size = current_app.config.get("SHOP_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+
+    # Filterung, Gruppierung und Pagination passieren in der Datenbank
+    sections = get_storefront_sections(query=query, section=section, after=after, limit=page_size)
+    tobacco_products = sections["tobacco"].items
+    coal_products = sections["coal"].items
+
+    # Produkte ohne Tabak-/Kohle-Kategorie nur laden, wenn es keine Abschnitte gibt
+    products = list(tobacco_products) + list(coal_products)
+    if not products and not section:
+        products = search_products(query=query, limit=page_size).items
+
+    return render_template(
+        "shop/index.html",
+        form=form,
+        query=query,
+        products=products,
+        tobacco_products=tobacco_products,
+        coal_products=coal_products,
+        sections=sections,
+        active_section=section,
+    )
 
 
 @bp.route("/product/<slug>")
+@cached_page(catalog=True)
 def product_detail(slug: str):
     product = get_product_by_slug(slug)
     if not product:
@@ -75,47 +85,74 @@ def product_detail(slug: str):
 
 
 @bp.route('/privacy')
+@cached_page()
 def privacy_policy():
     return render_template('pages/privacy.html')
 
 
 @bp.route('/terms')
+@cached_page()
 def terms_and_conditions():
     return render_template('pages/terms.html')
 
 
 @bp.route('/impressum')
+@cached_page()
 def impressum():
     return render_template('pages/impressum.html')
 
 
 @bp.route('/contact')
+@cached_page()
 def contact():
     return render_template('pages/contact.html')
 
 
+def _chat_client_key() -> str:
+    """Limits per logged-in user, otherwise per client IP (remote_addr, set by ProxyFix behind a proxy)."""
+    if current_user.is_authenticated:
+        return f'user:{current_user.id}'
+    return 'ip:' + (request.remote_addr or '-')
+
+
+def _chat_system_prompt() -> str:
+    # System prompt from file (editable by admin; cached until the file changes)
+    return owner_snapshot.read_ai_file('ai_system_prompt.txt')
+
+
+def _chat_messages(system_prompt: str, user_message: str) -> list:
+    messages = []
+    if system_prompt:
+        messages.append({'role': 'system', 'content': system_prompt})
+    messages.append({'role': 'user', 'content': user_message})
+    return messages
+
+
+def _chat_limit_response(exc: chat_stream.ChatLimitExceeded):
+    resp = jsonify({'error': exc.reason})
+    resp.status_code = exc.status
+    resp.headers['Retry-After'] = str(exc.retry_after)
+    return resp
+
+
 @bp.route('/api/chat', methods=['POST'])
 def chat_api():
     """Simple chat endpoint that forwards user message to OpenAI Chat Completions API.
 
     Expects JSON: {"message": "..."}
     Returns JSON: {"reply": "..."}
+    Kept for compatibility; the chat widget uses /api/chat/stream.
     """
     data = request.get_json(force=True) or {}
     user_message = data.get('message', '').strip()
     if not user_message:
         return jsonify({'error': 'Empty message'}), 400
 
-    # Load system prompt from file (editable by admin)
-    prompt_path = os.path.join(current_app.root_path, 'data', 'ai_system_prompt.txt')
-    if os.path.exists(prompt_path):
-        try:
-            with open(prompt_path, 'r', encoding='utf-8') as f:
-                system_prompt = f.read() or ''
-        except Exception:
-            system_prompt = ''
-    else:
-        system_prompt = ''
+    # requests / Whisper-Client erst bei Bedarf laden (Startzeit der Worker)
+    import requests
+
+    from ...ai.whisper_client import get_openai_key
+    from ...services import http_client
 
     # Resolve OpenAI key using the same logic as STT helper (env or .env)
     openai_key = get_openai_key()
@@ -125,32 +162,40 @@ def chat_api():
         # fall back to internal mock if key not configured
         return jsonify({'reply': f'[AI mock] {user_message} (no OPENAI_API_KEY)'}), 200
 
-    url = 'https://api.openai.com/v1/chat/completions'
+    # repeated questions are answered from the cache without touching OpenAI or the limits
+    system_prompt = _chat_system_prompt()
+    cached = answer_cache.lookup(user_message, system_prompt, model)
+    if cached is not None:
+        return jsonify({'reply': cached})
+
+    client = _chat_client_key()
+    try:
+        chat_stream.admit(client)
+    except chat_stream.ChatLimitExceeded as exc:
+        return _chat_limit_response(exc)
+
     headers = {
         'Authorization': f'Bearer {openai_key}',
         'Content-Type': 'application/json'
     }
-
-    messages = []
-    if system_prompt:
-        messages.append({'role': 'system', 'content': system_prompt})
-    messages.append({'role': 'user', 'content': user_message})
-
     payload = {
         'model': model,
-        'messages': messages,
+        'messages': _chat_messages(system_prompt, user_message),
         'temperature': 0.2,
         'max_tokens': 800,
     }
 
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=20)
+        resp = http_client.post('openai', chat_stream.completions_url(), headers=headers, json=payload, timeout=20)
         resp.raise_for_status()
         j = resp.json()
         reply = ''
         # OpenAI response shape: choices[0].message.content
         if 'choices' in j and len(j['choices']) > 0:
             reply = j['choices'][0].get('message', {}).get('content', '')
+            # only complete replies are cached (not ones cut off by max_tokens or a filter)
+            if chat_stream.is_complete(j['choices'][0].get('finish_reason')):
+                answer_cache.store(user_message, system_prompt, model, reply)
         else:
             reply = j.get('error', {}).get('message', 'No reply')
 
@@ -158,6 +203,69 @@ def chat_api():
     except requests.RequestException as e:
         current_app.logger.exception('OpenAI request failed')
         return jsonify({'error': 'OpenAI request failed', 'detail': str(e)}), 500
+    finally:
+        chat_stream.release(client)
+
+
+@bp.route('/api/chat/stream', methods=['POST'])
+def chat_stream_api():
+    """Streaming variant of /api/chat (Server-Sent Events).
+
+    Expects JSON: {"message": "..."}
+    Streams `data: {"delta": "..."}` events while OpenAI generates the reply,
+    then `event: done`; upstream failures end the stream with `event: error`.
+    Limits (per client and per process) are answered with 429/503 JSON before streaming.
+    """
+    data = request.get_json(silent=True) or {}
+    user_message = (data.get('message') or '').strip()
+    if not user_message:
+        return jsonify({'error': 'Empty message'}), 400
+
+    import requests
+
+    from ...ai.whisper_client import get_openai_key
+
+    openai_key = get_openai_key()
+    model = current_app.config.get('OPENAI_MODEL') or os.getenv('OPENAI_MODEL') or 'gpt-4o-mini'
+    system_prompt = _chat_system_prompt()
+    cached = answer_cache.lookup(user_message, system_prompt, model) if openai_key else None
+    upstream = bool(openai_key) and cached is None
+    client = _chat_client_key()
+    if upstream:
+        try:
+            chat_stream.admit(client)
+        except chat_stream.ChatLimitExceeded as exc:
+            return _chat_limit_response(exc)
+    messages = _chat_messages(system_prompt, user_message)
+
+    def events():
+        if not upstream:
+            reply = cached if cached is not None else f'[AI mock] {user_message} (no OPENAI_API_KEY)'
+            yield chat_stream.sse({'delta': reply})
+            yield chat_stream.sse({}, event='done')
+            return
+        try:
+            parts = []
+            outcome = {}
+            for delta in chat_stream.stream_reply(messages, api_key=openai_key, model=model, outcome=outcome):
+                parts.append(delta)
+                yield chat_stream.sse({'delta': delta})
+            # a stream without [DONE] or cut off by max_tokens must not be served from the cache
+            if chat_stream.is_complete(outcome['finish_reason'], outcome['done']):
+                answer_cache.store(user_message, system_prompt, model, ''.join(parts))
+            yield chat_stream.sse({}, event='done')
+        except requests.RequestException:
+            current_app.logger.exception('OpenAI streaming request failed')
+            yield chat_stream.sse({'error': 'OpenAI request failed'}, event='error')
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # keep nginx/Render proxies from buffering the events
+    response.headers['X-Accel-Buffering'] = 'no'
+    if upstream:
+        # also runs when the client disconnects before the stream started
+        response.call_on_close(lambda: chat_stream.release(client))
+    return response
 
 
 @bp.route('/api/ai/owner_query', methods=['POST'])
@@ -167,6 +275,11 @@ def owner_query():
     Accepts multipart/form-data with either 'audio' file or 'message' text and a 'department' field.
     Returns JSON {'reply': '...'}.
     """
+    # Reject oversized uploads before the form (and the audio in it) is parsed
+    max_audio = current_app.config.get('AUDIO_MAX_BYTES', 20 * 1024 * 1024)
+    if request.content_length and request.content_length > max_audio + 64 * 1024:
+        return jsonify({'error': 'audio too large', 'detail': f'audio exceeds {max_audio} bytes'}), 413
+
     # Accept department from form, querystring, or default to 'shop'
     department = (request.form.get('department') or request.args.get('department') or request.values.get('department'))
     if not department:
@@ -188,9 +301,14 @@ def owner_query():
     user_message = None
     if 'audio' in request.files:
         f = request.files['audio']
+        from ...ai.whisper_client import transcribe_audio
+
         try:
-            # transcribe_audio returns either a string or dict {'text','language'}
-            tr = transcribe_audio(f)
+            # transcribe_audio returns either a string or dict {'text','language',...}
+            tr = transcribe_audio(f, filename=f.filename or 'audio.ogg', content_type=f.mimetype or 'audio/ogg')
+        except AudioRejected as e:
+            current_app.logger.info('Audio rejected: %s', e.detail)
+            return jsonify({'error': f'audio {e.reason.replace("_", " ")}', 'detail': e.detail}), 413
         except Exception:
             current_app.logger.exception('Transcription failed')
             return jsonify({'error': 'transcription failed'}), 500
@@ -209,14 +327,9 @@ def owner_query():
         else:
             user_message = tr or ''
             detected_language = None
-        # log audio file size
-        try:
-            f.seek(0, os.SEEK_END)
-            size = f.tell()
-            f.seek(0)
-            current_app.logger.info(f"received audio file, size={size} bytes")
-        except Exception:
-            pass
+        if isinstance(tr, dict):
+            current_app.logger.info("received audio file, size=%s bytes duration=%s cached=%s",
+                                    tr.get('bytes'), tr.get('duration'), tr.get('cached'))
         # If transcription returned the mock placeholder or empty text, inform the user
         if not user_message or not str(user_message).strip() or str(user_message).strip() == '[Mock transcription]':
             current_app.logger.warning('Transcription returned empty or mock text')
@@ -247,14 +360,7 @@ def owner_query():
         return jsonify({'error': 'empty message', 'detail': 'no message provided in form/text/json or audio provided'}), 400
 
     # Load system prompt
-    prompt_path = os.path.join(current_app.root_path, 'data', 'ai_system_prompt.txt')
-    system_prompt = ''
-    if os.path.exists(prompt_path):
-        try:
-            with open(prompt_path, 'r', encoding='utf-8') as fh:
-                system_prompt = fh.read() or ''
-        except Exception:
-            system_prompt = ''
+    system_prompt = owner_snapshot.read_ai_file('ai_system_prompt.txt')
 
     # Build a small DB snapshot depending on department and also produce a CSV
     snapshot_lines = []
@@ -266,6 +372,8 @@ def owner_query():
             ('sku', 'Stock keeping unit identifier'),
             ('name', 'Product name'),
             ('quantity', 'Current on-hand quantity (integer)'),
+            ('reserved', 'Quantity reserved for open orders (integer)'),
+            ('available', 'Free quantity: quantity minus reserved (integer)'),
             ('location', 'Warehouse location code')
         ],
         'shop': [
@@ -295,64 +403,13 @@ def owner_query():
             schema_explanation = 'No fixed schema is defined for this department.'
     except Exception:
         schema_explanation = ''
+    # Materialized per-department snapshot (services.owner_snapshot): cached with TTL,
+    # invalidated when warehouse/order/shipment rows change
     try:
-        if department.lower() in ('warehouse', 'lager', 'lager'):
-            # Provide a broader inventory snapshot for warehouse: include up to 200 products,
-            # ordered by quantity descending so the model sees both high-stock and low-stock items.
-            products = WarehouseProduct.query.order_by(WarehouseProduct.quantity.desc()).limit(200).all()
-            pending = WarehouseTask.query.filter(WarehouseTask.status == 'pending').count()
-            total_items = len(products)
-            total_quantity = sum([int(p.quantity or 0) for p in products])
-            low = [p for p in products if (p.quantity or 0) <= 10]
-            snapshot_lines.append(f'Inventory snapshot: items_returned={total_items} total_quantity={total_quantity}')
-            snapshot_lines.append(f'Low stock items (<=10) in snapshot: {len(low)}')
-            snapshot_lines.append(f'Pending warehouse tasks: {pending}')
-            for p in (low[:20]):
-                snapshot_lines.append(f'- {p.sku} {p.name}: qty={p.quantity}, location={p.location}')
-
-            # CSV snapshot (sku,name,quantity,location) include the full returned set (capped)
-            out = io.StringIO()
-            writer = csv.writer(out)
-            writer.writerow(['sku', 'name', 'quantity', 'location'])
-            for p in products:
-                writer.writerow([p.sku, p.name, p.quantity, p.location])
-            csv_snap = out.getvalue()
-
-        elif department.lower() in ('shop', 'laden', 'магазин'):
-            recent_orders = Order.query.order_by(Order.created_at.desc()).limit(50).all()
-            total_recent = sum([float(o.total_amount or 0) for o in recent_orders])
-            snapshot_lines.append(f'Recent orders (last {len(recent_orders)}): total_amount_sum={total_recent}')
-            # top products by quantity in recent orders
-            items = (
-                OrderItem.query.join(Product, OrderItem.product_id == Product.id)
-                .order_by(OrderItem.quantity.desc()).limit(50).all()
-            )
-            for it in items:
-                snapshot_lines.append(f'- {it.product.name} x{it.quantity}')
-
-            # CSV snapshot (product_name,quantity)
-            out = io.StringIO()
-            writer = csv.writer(out)
-            writer.writerow(['product_name', 'quantity'])
-            for it in items:
-                writer.writerow([it.product.name, it.quantity])
-            csv_snap = out.getvalue()
-
-        elif department.lower() in ('sea', 'see', 'seefracht', 'seetransport'):
-            upcoming = Shipment.query.filter(Shipment.eta != None).order_by(Shipment.eta.asc()).limit(50).all()
-            snapshot_lines.append(f'Upcoming shipments: {len(upcoming)}')
-            for s in upcoming:
-                eta = s.eta.strftime('%Y-%m-%d') if s.eta else 'n/a'
-                snapshot_lines.append(f'- Order {s.order_id} provider={s.provider} tracking={s.tracking_number} ETA={eta}')
-
-            # CSV snapshot (order_id,provider,tracking_number,eta)
-            out = io.StringIO()
-            writer = csv.writer(out)
-            writer.writerow(['order_id', 'provider', 'tracking_number', 'eta'])
-            for s in upcoming:
-                eta = s.eta.strftime('%Y-%m-%d') if s.eta else ''
-                writer.writerow([s.order_id, s.provider, s.tracking_number, eta])
-            csv_snap = out.getvalue()
+        snapshot = owner_snapshot.get_snapshot(department)
+        if snapshot is not None:
+            snapshot_lines = list(snapshot.lines)
+            csv_snap = snapshot.csv
         else:
             snapshot_lines.append('No department-specific snapshot available.')
     except Exception:
@@ -362,14 +419,7 @@ def owner_query():
     # Compose messages for OpenAI
     messages = []
     # Load department-specific instruction file if present
-    instructions = ''
-    try:
-        instr_path = os.path.join(current_app.root_path, 'data', f'ai_instructions_{department.lower()}.txt')
-        if os.path.exists(instr_path):
-            with open(instr_path, 'r', encoding='utf-8') as ih:
-                instructions = ih.read() or ''
-    except Exception:
-        instructions = ''
+    instructions = owner_snapshot.read_ai_file(f'ai_instructions_{os.path.basename(department.lower())}.txt')
 
     # Combine generic system prompt and department instructions
     if system_prompt:
@@ -427,7 +477,7 @@ def owner_query():
         # mock behavior
         return jsonify({'reply': f'[Mock AI reply for {department}] {user_message}'}), 200
 
-    url = 'https://api.openai.com/v1/chat/completions'
+    url = chat_stream.completions_url()
     headers = {'Authorization': f'Bearer {openai_key}', 'Content-Type': 'application/json'}
 
     # Sanity check: ensure headers are encodable to latin-1 (http.client requirement).
@@ -445,8 +495,12 @@ def owner_query():
             'detail': 'One of the HTTP headers (likely Authorization) contains non-Latin-1 characters. Please check your OPENAI_API_KEY for accidental non-ASCII characters or quotes.'
         }), 500
     payload = {'model': model, 'messages': messages, 'temperature': 0.2, 'max_tokens': 800}
+    import requests
+
+    from ...services import http_client
+
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=30)
+        resp = http_client.post('openai', url, headers=headers, json=payload, timeout=30)
         resp.raise_for_status()
         j = resp.json()
         reply = ''
@@ -461,6 +515,7 @@ def owner_query():
 
 
 @bp.route('/delivery')
+@cached_page()
 def delivery():
     return render_template('pages/delivery.html')
 
@@ -488,9 +543,8 @@ def add_to_cart(product_id: int):
 @login_required
 def view_cart():
     cart = get_or_create_cart(current_user.id)
-    items = cart.items
-    total = sum(item.quantity * (item.product.price_b2b if current_user.is_b2b else item.product.price_b2c) for item in items)
-    return render_template("shop/cart.html", cart=cart, items=items, total=total)
+    priced = price_cart(cart, is_b2b=current_user.is_b2b)
+    return render_template("shop/cart.html", cart=cart, items=priced.lines, total=priced.total)
 
 
 @bp.route("/update-cart/<int:item_id>", methods=["POST"])
@@ -529,13 +583,13 @@ def remove_from_cart(item_id: int):
 @login_required
 def checkout():
     cart = get_or_create_cart(current_user.id)
-    items = cart.items
-    if not items:
+    priced = price_cart(cart, is_b2b=current_user.is_b2b)
+    items = priced.lines
+    if priced.is_empty:
         flash("Корзина порожня.", "warning")
         return redirect(url_for('shop_public.view_cart'))
 
-    total = sum(item.quantity * (item.product.price_b2b if current_user.is_b2b else item.product.price_b2c) for item in items)
-    total_cents = int(total * 100)  # Stripe работает с центами
+    total = priced.total
 
     if request.method == "POST":
         address = request.form.get('address')
@@ -543,36 +597,23 @@ def checkout():
             flash("Адреса доставки обов'язкова.", "danger")
             return redirect(url_for('shop_public.checkout'))
 
-        # Создать заказ без коммита
-        order = Order(
-            user_id=current_user.id,
-            total_amount=total,
-            currency=items[0].product.currency,
-            is_b2b=current_user.is_b2b,
+        # Создать заказ (с позициями) без коммита
+        order = create_order_from_priced_cart(
+            current_user,
+            priced,
             shipping_address={"address": address},
-            status=OrderStatus.NEW
+            commit=False,
         )
-        db.session.add(order)
-        db.session.flush()
-
-        for item in items:
-            price = item.product.price_b2b if current_user.is_b2b else item.product.price_b2c
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                unit_price=price,
-                currency=item.product.currency
-            )
-            db.session.add(order_item)
 
         # Очистить корзину
         CartItem.query.filter_by(cart_id=cart.id).delete()
 
-        # Создать payment intent
+        # Создать payment intent (Stripe-SDK erst hier laden, der Import dauert ~1 s)
+        import stripe
+
         stripe.api_key = current_app.config['STRIPE_SECRET_KEY']
         intent = stripe.PaymentIntent.create(
-            amount=total_cents,
+            amount=priced.total_cents,
             currency=order.currency.lower(),
             metadata={'order_id': order.id},
             # Allow card and SEPA Direct Debit (IBAN) payment methods
@@ -1,20 +1,256 @@
 # file: backend/blueprints/shop_public/services.py
 
-from ...models.product import Product
+import base64
+from dataclasses import dataclass, field
+from datetime import datetime
 
+from flask import has_request_context
+from flask_login import current_user
+from sqlalchemy import and_, column, func, or_, select, text
+from sqlalchemy.orm import contains_eager
 
-def get_active_products(limit: int | None = None):
+from ...extensions import db, get_locale
+from ...models.product import Category, Product
+from ...services import catalog_cache
+from ...services.catalog_cache import ProductSnapshot, snapshot_product
+
+
+# Abschnitte der Storefront: Schlüssel -> Slug/Namensfragmente der Kategorien.
+# Eine Kategorie gehört zu einem Abschnitt, wenn ihr Slug gleich dem Schlüssel ist
+# oder ihr Name eines der Fragmente enthält (z. B. "Tabak (Shisha)").
+STOREFRONT_SECTIONS: dict[str, tuple[str, ...]] = {
+    "tobacco": ("tobacco", "tabak"),
+    "coal": ("coal", "kohle"),
+}
+
+DEFAULT_PAGE_SIZE = 48
+
+
+@dataclass(frozen=True)
+class ProductPage:
+    """Eine Seite Produkte (Keyset-Pagination) plus Cursor für die nächste Seite."""
+
+    items: list = field(default_factory=list)
+    next_cursor: str | None = None
+    # Anzahl aller Treffer (nur wo angefordert, z. B. Abschnitte der Startseite)
+    total: int | None = None
+
+
+def get_active_products(limit: int | None = None) -> list[ProductSnapshot]:
+    """
+    Повертає активні товари для публічного магазину (з кешу каталогу).
+    """
+    def load():
+        q = _active_products_query().order_by(Product.created_at.desc(), Product.id.desc())
+        if limit:
+            q = q.limit(limit)
+        return tuple(snapshot_product(p) for p in q.all())
+
+    return list(catalog_cache.get_or_load(("active", _cache_scope(), limit), load))
+
+
+def get_product_by_slug(slug: str) -> ProductSnapshot | None:
+    """
+    Повертає товар по slug або None (з кешу каталогу).
+    """
+    if not slug:
+        return None
+
+    def load():
+        product = _active_products_query().filter(Product.slug == slug).first()
+        return snapshot_product(product) if product else None
+
+    return catalog_cache.get_or_load(("slug", _cache_scope(), slug), load)
+
+
+# ---------- Suche / Filter ----------
+
+
+def encode_cursor(product) -> str:
+    """Kodiert (created_at, id) des letzten Produkts einer Seite als URL-sicheren Cursor."""
+    raw = f"{product.created_at.isoformat()}|{product.id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> tuple[datetime, int] | None:
+    """Gegenstück zu `encode_cursor`; ungültige Cursor werden ignoriert (None)."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at, product_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(product_id)
+    except Exception:
+        return None
+
+
+def search_products(
+    query: str | None = None,
+    category_ids: list[int] | None = None,
+    after: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> ProductPage:
+    """
+    Sucht aktive Produkte direkt in der Datenbank.
+
+    - `query`: Namenssuche (Postgres: ILIKE über Trigram-Index, SQLite: FTS5 falls vorhanden)
+    - `category_ids`: nur Produkte dieser Kategorien (leere Liste -> leeres Ergebnis)
+    - `after`: Cursor aus einer vorherigen `ProductPage.next_cursor`
+    Kategorien werden im selben Statement mitgeladen (kein N+1 in den Templates).
     """
-    Повертає активні товари для публічного магазину.
+    if category_ids is not None and not category_ids:
+        return ProductPage()
+
+    q = _active_products_query().order_by(Product.created_at.desc(), Product.id.desc())
+
+    name_filter = _name_filter(query)
+    if name_filter is not None:
+        q = q.filter(name_filter)
+
+    if category_ids is not None:
+        q = q.filter(Product.category_id.in_(category_ids))
+
+    position = decode_cursor(after)
+    if position:
+        created_at, product_id = position
+        q = q.filter(
+            or_(
+                Product.created_at < created_at,
+                and_(Product.created_at == created_at, Product.id < product_id),
+            )
+        )
+
+    # Ein Element mehr laden, um zu erkennen, ob es eine nächste Seite gibt
+    rows = q.limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1]) if len(rows) > limit and items else None
+    return ProductPage(items=items, next_cursor=next_cursor)
+
+
+def get_section_category_ids() -> dict[str, list[int]]:
     """
-    q = Product.query.filter_by(is_active=True).order_by(Product.created_at.desc())
-    if limit:
-        q = q.limit(limit)
-    return q.all()
+    Ordnet alle Kategorien (eine Abfrage, nur id/slug/name) den Storefront-Abschnitten zu.
+    """
+    sections: dict[str, list[int]] = {key: [] for key in STOREFRONT_SECTIONS}
+    rows = db.session.query(Category.id, Category.slug, Category.name).all()
+    for category_id, slug, name in rows:
+        slug = (slug or "").lower()
+        name = (name or "").lower()
+        for key, fragments in STOREFRONT_SECTIONS.items():
+            if slug == key or any(fragment in name for fragment in fragments):
+                sections[key].append(category_id)
+                break
+    return sections
 
 
-def get_product_by_slug(slug: str) -> Product | None:
+def get_storefront_sections(
+    query: str | None = None,
+    section: str | None = None,
+    after: str | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+) -> dict[str, ProductPage]:
     """
-    Повертає товар по slug або None.
+    Lädt die Produkte der Startseite gruppiert nach Abschnitt (Tabak/Kohle).
+
+    Ist `section` gesetzt, wird nur dieser Abschnitt ab dem Cursor `after` geladen.
+    Das Ergebnis (Snapshots) kommt aus dem Katalog-Cache.
     """
-    return Product.query.filter_by(slug=slug, is_active=True).first()
+    query = (query or "").strip().lower() or None
+
+    def load():
+        category_ids = get_section_category_ids()
+        pages: dict[str, ProductPage] = {}
+        for key, ids in category_ids.items():
+            if section and key != section:
+                pages[key] = ProductPage()
+                continue
+            page = search_products(
+                query=query,
+                category_ids=ids,
+                after=after if section == key else None,
+                limit=limit,
+            )
+            pages[key] = ProductPage(
+                items=tuple(snapshot_product(p) for p in page.items),
+                next_cursor=page.next_cursor,
+                total=count_products(query=query, category_ids=ids),
+            )
+        return pages
+
+    cache_key = ("sections", _cache_scope(), query, section, after, limit)
+    return catalog_cache.get_or_load(cache_key, load)
+
+
+def count_products(query: str | None = None, category_ids: list[int] | None = None) -> int:
+    """Anzahl aktiver Produkte mit denselben Filtern wie `search_products` (ohne Pagination)."""
+    if category_ids is not None and not category_ids:
+        return 0
+    stmt = select(func.count(Product.id)).where(Product.is_active.is_(True))
+    name_filter = _name_filter(query)
+    if name_filter is not None:
+        stmt = stmt.where(name_filter)
+    if category_ids is not None:
+        stmt = stmt.where(Product.category_id.in_(category_ids))
+    return db.session.execute(stmt).scalar_one()
+
+
+def _cache_scope() -> tuple[str, str]:
+    """(Locale, Preisstufe) des aktuellen Requests als Teil der Cache-Schlüssel."""
+    if not has_request_context():
+        return ("-", "b2c")
+    tier = "b2b" if current_user.is_authenticated and getattr(current_user, "is_b2b", False) else "b2c"
+    return (get_locale(), tier)
+
+
+def _active_products_query():
+    return (
+        Product.query.outerjoin(Product.category)
+        .options(contains_eager(Product.category))
+        .filter(Product.is_active.is_(True))
+    )
+
+
+def _name_filter(query: str | None):
+    """Baut den Namensfilter passend zum Datenbank-Dialekt."""
+    query = (query or "").strip()
+    if not query:
+        return None
+
+    dialect = db.engine.dialect.name
+    if dialect == "sqlite" and _sqlite_has_fts():
+        match = _fts5_match_expression(query)
+        if match:
+            return Product.id.in_(
+                text("SELECT rowid FROM products_fts WHERE products_fts MATCH :match")
+                .bindparams(match=match)
+                .columns(column("rowid"))
+            )
+
+    # Postgres: ILIKE '%q%' nutzt den GIN-Trigram-Index ix_products_name_trgm
+    escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return Product.name.ilike(f"%{escaped}%", escape="\\")
+
+
+_fts_available: dict[str, bool] = {}
+
+
+def _sqlite_has_fts() -> bool:
+    """Prüft (einmal pro Engine) ob die FTS5-Tabelle `products_fts` existiert."""
+    key = str(db.engine.url)
+    if key not in _fts_available:
+        try:
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+                ).first()
+            _fts_available[key] = row is not None
+        except Exception:
+            _fts_available[key] = False
+    return _fts_available[key]
+
+
+def _fts5_match_expression(query: str) -> str:
+    """Wandelt Suchbegriffe in einen FTS5-Ausdruck mit Präfixsuche um ("tab" -> "tab"*)."""
+    tokens = [t.replace('"', "") for t in query.split()]
+    return " ".join(f'"{t}"*' for t in tokens if t)
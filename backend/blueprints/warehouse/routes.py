@@ -7,9 +7,10 @@ from . import bp
 from ...extensions import db
 from ...models.user import UserRole
 from ...models.warehouse import WarehouseTask, WarehouseTaskStatus, WarehouseCategory, WarehouseProduct
-from ...models.inventory import StockItem
+from ...models.inventory import MovementKind, StockBalance
 from ...models.order import Order, OrderStatus
-from ...services.shipping.shipping_service import create_shipment_for_order
+from ...services import inventory_ledger
+from ...services import low_stock as low_stock_service
 from flask import current_app, jsonify
 from flask import url_for, flash
 from ...models.order import Order
@@ -32,7 +33,7 @@ def warehouse_required(view_func):
 @warehouse_required
 def dashboard():
     tasks = WarehouseTask.query.order_by(WarehouseTask.created_at.desc()).limit(50).all()
-    low_stock = WarehouseProduct.query.filter(WarehouseProduct.quantity <= 10).all()
+    low_stock = low_stock_service.current(limit=50)
     return render_template("warehouse/dashboard.html", tasks=tasks, low_stock=low_stock)
 
 
@@ -170,15 +171,42 @@ def ship_task(task_id):
 @bp.route("/inventory")
 @warehouse_required
 def inventory():
-    stocks = WarehouseProduct.query.all()
+    # Bestände je SKU und Lagerort aus dem Bestandsbuch (Lager- und Shop-Artikel)
+    stocks = inventory_ledger.stock_overview()
     return render_template("warehouse/inventory.html", stocks=stocks)
 
 
+@bp.route("/inventory/<int:balance_id>/update", methods=["POST"])
+@warehouse_required
+def update_inventory(balance_id):
+    balance = StockBalance.query.get_or_404(balance_id)
+    quantity = max(0, request.form.get("quantity", type=int) or 0)
+    delta = inventory_ledger.set_on_hand(
+        balance.sku, balance.location, quantity, user_id=current_user.id, note="inventory count"
+    )
+    db.session.commit()
+    flash(f"Остаток {balance.sku} ({balance.location}) обновлен: {delta:+d}.", "success")
+    return redirect(url_for('warehouse.inventory'))
+
+
+def _reorder_point_from_form():
+    # leer = Standard-Meldebestand (LOW_STOCK_REORDER_POINT)
+    value = request.form.get('reorder_point', type=int)
+    return max(0, value) if value is not None else None
+
+
+def _on_hand_by_sku() -> dict[str, int]:
+    totals: dict[str, int] = {}
+    for row in inventory_ledger.stock_overview():
+        totals[row.sku] = totals.get(row.sku, 0) + row.on_hand
+    return totals
+
+
 @bp.route("/products")
 @warehouse_required
 def products():
     products = WarehouseProduct.query.all()
-    return render_template("warehouse/products.html", products=products)
+    return render_template("warehouse/products.html", products=products, quantities=_on_hand_by_sku())
 
 
 @bp.route("/products/create", methods=["GET", "POST"])
@@ -197,16 +225,26 @@ def create_product():
             name=name,
             description=description,
             category_id=category_id if category_id else None,
-            quantity=quantity,
             location=location
         )
         db.session.add(product)
+        if quantity > 0:
+            # Anfangsbestand als Wareneingang im Bestandsbuch
+            inventory_ledger.post(
+                MovementKind.RECEIPT, sku, location or inventory_ledger.DEFAULT_LOCATION,
+                on_hand=quantity, user_id=current_user.id, note="initial stock",
+            )
+        low_stock_service.set_reorder_point(sku, _reorder_point_from_form())
         db.session.commit()
         flash("Товар создан.", "success")
         return redirect(url_for('warehouse.products'))
     
     categories = WarehouseCategory.query.all()
-    return render_template("warehouse/create_product.html", categories=categories)
+    return render_template(
+        "warehouse/create_product.html",
+        categories=categories,
+        default_reorder_point=current_app.config.get("LOW_STOCK_REORDER_POINT"),
+    )
 
 
 @bp.route("/products/<int:product_id>/edit", methods=["GET", "POST"])
@@ -214,18 +252,37 @@ def create_product():
 def edit_product(product_id):
     product = WarehouseProduct.query.get_or_404(product_id)
     if request.method == "POST":
-        product.sku = request.form.get('sku')
+        sku = request.form.get('sku')
+        if sku != product.sku and StockBalance.query.filter_by(sku=product.sku).first():
+            # Buchungen hängen an der SKU: Umbenennen würde den Bestand abkoppeln
+            flash("SKU с остатками на складе нельзя изменить.", "warning")
+        else:
+            product.sku = sku
         product.name = request.form.get('name')
         product.description = request.form.get('description')
         product.category_id = request.form.get('category_id') or None
-        product.quantity = int(request.form.get('quantity', 0))
         product.location = request.form.get('location')
+        # Menge = gezählter Bestand am Lagerplatz des Artikels (Korrekturbuchung)
+        inventory_ledger.set_on_hand(
+            product.sku, product.location or inventory_ledger.DEFAULT_LOCATION,
+            int(request.form.get('quantity', 0)), user_id=current_user.id, note="product edit",
+        )
+        low_stock_service.set_reorder_point(product.sku, _reorder_point_from_form())
         db.session.commit()
         flash("Товар обновлен.", "success")
         return redirect(url_for('warehouse.products'))
     
     categories = WarehouseCategory.query.all()
-    return render_template("warehouse/edit_product.html", product=product, categories=categories)
+    location = product.location or inventory_ledger.DEFAULT_LOCATION
+    balance = StockBalance.query.filter_by(sku=product.sku, location=location).first()
+    return render_template(
+        "warehouse/edit_product.html",
+        product=product,
+        categories=categories,
+        quantity=balance.on_hand if balance else 0,
+        reorder_point=low_stock_service.get_reorder_point(product.sku),
+        default_reorder_point=current_app.config.get("LOW_STOCK_REORDER_POINT"),
+    )
 
 
 @bp.route("/products/<int:product_id>/delete", methods=["POST"])
@@ -1,168 +1,91 @@
 # file: backend/blueprints/webhooks/routes.py
 
+import hashlib
+import hmac
 import json
-import stripe
 import os
-from datetime import datetime
-from flask import Blueprint, request, jsonify, current_app
 
-from ...extensions import db
-from ...models.payment import Payment
-from ...models.order import Order, OrderStatus
-from ...services.prepare_shipment import prepare_shipment
-from ...models.warehouse import WarehouseTask, WarehouseTaskStatus
+from flask import Blueprint, request, jsonify, current_app
 
 bp = Blueprint("webhooks", __name__, url_prefix="/webhooks")
 
 
 @bp.route("/stripe", methods=["POST"])
 def stripe_webhook():
+    """
+    Nimmt Stripe-Ereignisse entgegen: Signatur prüfen, in die Inbox schreiben, 200 antworten.
+    Die Verarbeitung (Payment/Order/Versand) übernimmt nur der Worker
+    (Job process_webhook_inbox -> `webhook_inbox.drain_inbox`, stapelweise).
+    """
+    import stripe  # erst bei Bedarf: der SDK-Import kostet ~1 s Startzeit
+
+    # Inbox -> webhook_logic -> prepare_shipment/Versand-Clients (requests): ebenfalls erst hier
+    from ...services.payments.webhook_inbox import record_event
+
     payload = request.get_data(as_text=True)
     sig_header = request.headers.get("stripe-signature")
     current_app.logger.info("Received Stripe webhook; payload_size=%s", len(payload))
-    # Persist raw webhook payloads to a local log for offline debugging.
-    try:
-        logs_dir = os.path.join(os.path.dirname(__file__), "..", "..", "..", "logs")
-        logs_dir = os.path.abspath(logs_dir)
-        os.makedirs(logs_dir, exist_ok=True)
-        log_path = os.path.join(logs_dir, "webhook_events.log")
-        with open(log_path, "a", encoding="utf-8") as lf:
-            entry = {
-                "ts": datetime.utcnow().isoformat() + "Z",
-                "endpoint": "/webhooks/stripe",
-                "sig_header": sig_header,
-                "payload_preview": payload[:4096],
-            }
-            lf.write(json.dumps(entry, ensure_ascii=False) + "\n")
-    except Exception:
-        current_app.logger.debug("Failed to write webhook payload to file for debugging")
-    # For debugging: log a short preview of the payload
-    try:
-        current_app.logger.debug("Stripe payload preview: %s", payload[:1000])
-    except Exception:
-        current_app.logger.debug("Stripe payload preview: <unavailable>")
 
     try:
         if current_app.config.get("APP_ENV") == "development":
             # Для локального тесту без підпису
             event = json.loads(payload)
         else:
-            event = stripe.Webhook.construct_event(
-                payload, sig_header, current_app.config["STRIPE_WEBHOOK_SECRET"]
+            stripe.Webhook.construct_event(
+                payload,
+                sig_header,
+                current_app.config.get("STRIPE_WEBHOOK_SECRET") or os.getenv("STRIPE_WEBHOOK_SECRET", ""),
             )
-    except ValueError as e:
+            # Signatur ist gültig -> Rohdaten als einfaches dict speichern
+            event = json.loads(payload)
+    except ValueError:
         # Invalid payload
         return jsonify({"error": "Invalid payload"}), 400
-    except stripe.error.SignatureVerificationError as e:
+    except stripe.error.SignatureVerificationError:
         # Invalid signature
         return jsonify({"error": "Invalid signature"}), 400
 
-    # Handle the event types we care about
     event_type = event.get("type")
-    current_app.logger.info("Stripe event received: %s", event_type)
-
-    if event_type == "payment_intent.succeeded":
-        payment_intent = event["data"]["object"]
-        current_app.logger.info("Handling payment_intent.succeeded id=%s", payment_intent.get("id"))
-        try:
-            handle_payment_intent_succeeded(payment_intent)
-        except Exception as e:
-            current_app.logger.exception("Error handling payment_intent.succeeded: %s", e)
-            return jsonify({"error": "internal"}), 500
-    elif event_type == "checkout.session.completed":
-        session = event["data"]["object"]
-        current_app.logger.info("Handling checkout.session.completed id=%s", session.get("id"))
-        try:
-            handle_checkout_session_completed(session)
-        except Exception as e:
-            current_app.logger.exception("Error handling checkout.session.completed: %s", e)
-            return jsonify({"error": "internal"}), 500
-    else:
-        current_app.logger.info("Unhandled Stripe event type: %s", event_type)
-
-    return jsonify({"status": "success"}), 200
-
-
-def handle_checkout_session_completed(session):
-    # Find the payment by session_id
-    current_app.logger.info("handle_checkout_session_completed for session id=%s", session.get("id"))
-
-    # Helpful debug logging
-    current_app.logger.debug("Looking up Payment by provider_session_id=%s", session.get("id"))
-    payment = Payment.query.filter_by(provider_session_id=session.get("id")).first()
-
-    # Fallback: some sessions include a payment_intent id, try to find payment by that
-    if not payment:
-        pi = session.get("payment_intent") or session.get("payment")
-        if pi:
-            current_app.logger.info("No payment by session_id, trying payment_intent=%s", pi)
-            payment = Payment.query.filter_by(provider_payment_id=pi).first()
-
-    if not payment:
-        current_app.logger.warning("No Payment record found for session: %s", session.get("id"))
-        # Try to log any payments recently created for insight
-        recent = Payment.query.order_by(Payment.created_at.desc()).limit(5).all()
-        current_app.logger.debug("Recent payments: %s", [p.id for p in recent])
-        return
-
-    # Update payment status
-    payment.status = "completed"
-    payment.raw_payload = session
-    db.session.commit()
-
-    # Update order status
-    order = payment.order
-    order.status = OrderStatus.PAID
-    db.session.commit()
-    # Ensure a WarehouseTask exists for this order (create if missing)
-    try:
-        existing = WarehouseTask.query.filter_by(order_id=order.id).first()
-        if not existing:
-            t = WarehouseTask(order_id=order.id, status=WarehouseTaskStatus.PENDING)
-            db.session.add(t)
-            db.session.commit()
-            current_app.logger.info("Created WarehouseTask id=%s for order %s (via webhook)", getattr(t, 'id', None), order.id)
-    except Exception as e:
-        current_app.logger.exception("Failed to ensure WarehouseTask for order %s: %s", order.id, e)
-    # Prepare shipment
+    event_id = event.get("id") or "sha1:" + hashlib.sha1(payload.encode("utf-8")).hexdigest()
+    current_app.logger.info("Stripe event received: %s (%s)", event_type, event_id)
+
     try:
-        prepare_shipment(order.id)
-    except Exception as e:
-        current_app.logger.exception("prepare_shipment failed for order %s: %s", order.id, e)
+        _, created = record_event("stripe", event_id, event_type, event)
+    except Exception:
+        current_app.logger.exception("Failed to store Stripe event %s", event_id)
+        # Stripe wiederholt die Zustellung bei 5xx
+        return jsonify({"error": "internal"}), 500
 
+    return jsonify({"status": "success", "duplicate": not created}), 200
 
-def handle_payment_intent_succeeded(payment_intent):
-    # Find the payment by payment_intent id
-    current_app.logger.info("handle_payment_intent_succeeded for intent id=%s", payment_intent.get("id"))
 
-    payment = Payment.query.filter_by(provider_payment_id=payment_intent.get("id")).first()
-    if not payment:
-        current_app.logger.warning("No Payment record found for payment_intent: %s", payment_intent.get("id"))
-        return
+@bp.route("/telegram", methods=["POST"])
+def telegram_webhook():
+    """
+    Nimmt Telegram-Updates entgegen (TELEGRAM_BOT_MODE=webhook): Secret-Header prüfen,
+    Update an die Bot-Laufzeit dieses Prozesses übergeben, sofort 200 antworten.
+    Ist deren Warteschlange voll, antworten wir 503 und Telegram stellt erneut zu.
+    """
+    from telegram_bot import runtime as bot_runtime
 
-    # Update payment status
-    payment.status = "completed"
-    payment.raw_payload = payment_intent
-    db.session.commit()
+    if bot_runtime.bot_mode(current_app.config) != "webhook":
+        return jsonify({"error": "not found"}), 404
 
-    # Update order status
-    order = payment.order
-    order.status = OrderStatus.PAID
-    db.session.commit()
+    secret = bot_runtime.webhook_secret(current_app.config)
+    received = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+    if not secret or not hmac.compare_digest(received.encode("utf-8"), secret.encode("utf-8")):
+        return jsonify({"error": "forbidden"}), 403
+
+    update = request.get_json(silent=True)
+    if not isinstance(update, dict) or "update_id" not in update:
+        return jsonify({"error": "Invalid payload"}), 400
 
-    # Ensure a WarehouseTask exists for this order (create if missing)
-    try:
-        existing = WarehouseTask.query.filter_by(order_id=order.id).first()
-        if not existing:
-            t = WarehouseTask(order_id=order.id, status=WarehouseTaskStatus.PENDING)
-            db.session.add(t)
-            db.session.commit()
-            current_app.logger.info("Created WarehouseTask id=%s for order %s (via webhook)", getattr(t, 'id', None), order.id)
-    except Exception as e:
-        current_app.logger.exception("Failed to ensure WarehouseTask for order %s: %s", order.id, e)
-
-    # Prepare shipment
     try:
-        prepare_shipment(order.id)
-    except Exception as e:
-        current_app.logger.exception("prepare_shipment failed for order %s: %s", order.id, e)
+        accepted = bot_runtime.get_runtime(current_app._get_current_object()).submit(update)
+    except Exception:
+        current_app.logger.exception("Telegram bot runtime unavailable")
+        accepted = False
+    if not accepted:
+        current_app.logger.warning("Telegram update %s rejected: queue full", update.get("update_id"))
+        return jsonify({"error": "busy"}), 503, {"Retry-After": "5"}
+    return jsonify({"status": "accepted"}), 200
@@ -0,0 +1,83 @@
+# file: backend/cli.py
+
+"""
+Einmalige Einrichtung als CLI-Befehl statt bei jedem Prozessstart:
+
+    flask --app backend.app bootstrap              # Schema + Standard-Kategorien + Low-Stock-Abgleich
+    flask --app backend.app bootstrap --migrate    # dazwischen `db upgrade`
+    flask --app backend.app bootstrap --webhook    # zusätzlich Telegram-Webhook anmelden
+"""
+
+import logging
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import inspect
+
+from .extensions import db, ensure_schema_exists
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATEGORIES = (
+    ("coal", "Kohle"),
+    ("tobacco", "Tabak (Shisha)"),
+)
+
+
+def ensure_default_categories() -> list[str]:
+    """Legt fehlende Standard-Kategorien an; gibt die neu angelegten Slugs zurück."""
+    from .models.product import Category
+
+    # Tabelle fehlt (Migrationen nicht angewendet) -> nichts zu tun
+    if not inspect(db.engine).has_table(Category.__tablename__, schema=Category.__table__.schema):
+        logger.info("Skipping default category creation: table does not exist yet")
+        return []
+
+    created = []
+    for slug, name in DEFAULT_CATEGORIES:
+        if not Category.query.filter_by(slug=slug).first():
+            logger.info("Creating default category: %s / %s", slug, name)
+            db.session.add(Category(name=name, slug=slug))
+            created.append(slug)
+    db.session.commit()
+    return created
+
+
+def reconcile_low_stock() -> dict[str, int] | None:
+    """
+    Prüft alle SKUs gegen ihren Meldebestand (services.low_stock). Nach der
+    Migration ist reorder_points leer; ohne Abgleich würden bereits knappe
+    SKUs erst bei ihrer nächsten Bestandsänderung gemeldet.
+    """
+    from .models.inventory import ReorderPoint
+    from .services import low_stock
+
+    if not inspect(db.engine).has_table(ReorderPoint.__tablename__, schema=ReorderPoint.__table__.schema):
+        logger.info("Skipping low stock reconcile: table does not exist yet")
+        return None
+    return low_stock.reconcile()
+
+
+@click.command("bootstrap")
+@click.option("--migrate", "run_migrations", is_flag=True, help="Migrationen anwenden (flask db upgrade)")
+@click.option("--webhook", is_flag=True, help="TELEGRAM_WEBHOOK_URL bei Telegram anmelden")
+@with_appcontext
+def bootstrap_command(run_migrations: bool, webhook: bool) -> None:
+    """Schema, Migrationen und Standarddaten einrichten (idempotent)."""
+    ensure_schema_exists()
+    if run_migrations:
+        from flask_migrate import upgrade
+
+        upgrade()
+    created = ensure_default_categories()
+    click.echo(f"categories created: {', '.join(created) or '-'}")
+    click.echo(f"low stock reconcile: {reconcile_low_stock() or '-'}")
+    if webhook:
+        from telegram_bot import runtime as bot_runtime
+
+        click.echo(f"telegram webhook: {bot_runtime.register_webhook(current_app._get_current_object(), force=True)}")
+
+
+def register_commands(app) -> None:
+    app.cli.add_command(bootstrap_command)
@@ -32,27 +32,156 @@ class BaseConfig:
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-me")
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 
+    # Anzahl vertrauenswürdiger Proxies vor der App (Render/Heroku-Router: 1); nur deren
+    # X-Forwarded-For-Einträge bestimmen request.remote_addr (ProxyFix), 0 = keiner
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", "1"))
+
     # Datenbank
     SQLALCHEMY_DATABASE_URI = _build_sqlalchemy_uri()
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Postgres-Schema der Tabellen (search_path, `flask bootstrap`)
+    DB_SCHEMA = os.getenv("DB_SCHEMA", "venookah2")
+    # Engine (backend/database.py): Pool pro Prozess, Verbindungen nach DB_POOL_RECYCLE
+    # Sekunden erneuern, vor der Ausgabe prüfen (Pre-Ping)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1").lower() in ("1", "true", "yes")
+    # Rolle des Prozesses: "storefront" (Web) oder "reports" (Worker/Scheduler);
+    # bestimmt den statement_timeout (Millisekunden) der Verbindungen
+    DB_ROLE = os.getenv("DB_ROLE", "storefront")
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))
+    DB_REPORTS_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_REPORTS_STATEMENT_TIMEOUT_MS", "120000"))
+    # Optionale Lese-Replica für Berichte, Dashboard und Inhaber-Snapshots (database.reporting)
+    DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "").replace("postgres://", "postgresql+psycopg2://", 1)
+
+    # Storefront: Produkte pro Seite/Abschnitt (Keyset-Pagination)
+    SHOP_PAGE_SIZE = int(os.getenv("SHOP_PAGE_SIZE", "48"))
+
+    # Katalog-Cache (In-Memory pro Worker, Invalidierung über cache_generations)
+    CATALOG_CACHE_ENABLED = os.getenv("CATALOG_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+    CATALOG_CACHE_TTL = int(os.getenv("CATALOG_CACHE_TTL", "300"))
+    CATALOG_CACHE_MAX_ENTRIES = int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "512"))
+    CATALOG_CACHE_SYNC_SECONDS = float(os.getenv("CATALOG_CACHE_SYNC_SECONDS", "2"))
+
+    # Response-Cache für anonyme Storefront-Seiten: memory | filesystem | redis | none
+    RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+    RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", "")
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))
+    RESPONSE_CACHE_STATIC_TTL = int(os.getenv("RESPONSE_CACHE_STATIC_TTL", "3600"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+
+    # Umsatzberichte aus sales_daily_totals/sales_daily_rollup statt aus den Rohdaten lesen
+    REPORTS_USE_ROLLUP = os.getenv("REPORTS_USE_ROLLUP", "1").lower() in ("1", "true", "yes")
+
+    # Admin-Navbar: Cache-Dauer des Zählers nicht gesendeter Alerts (Sekunden)
+    ALERTS_COUNT_TTL = int(os.getenv("ALERTS_COUNT_TTL", "30"))
+
+    # Niedriger Bestand (services.low_stock): Standard-Meldebestand je SKU (freie Menge)
+    # und Hysterese — erneuter Alert erst, nachdem der Bestand über Meldebestand + Hysterese lag
+    LOW_STOCK_REORDER_POINT = int(os.getenv("LOW_STOCK_REORDER_POINT", "10"))
+    LOW_STOCK_HYSTERESIS = int(os.getenv("LOW_STOCK_HYSTERESIS", "5"))
+
+    # Inhaber-Assistent (/api/ai/owner_query): Lebensdauer der Abteilungs-Snapshots
+    # (0 = immer neu bauen); Invalidierung über cache_generations
+    OWNER_SNAPSHOT_TTL = int(os.getenv("OWNER_SNAPSHOT_TTL", "300"))
+    OWNER_SNAPSHOT_SYNC_SECONDS = float(os.getenv("OWNER_SNAPSHOT_SYNC_SECONDS", "2"))
+
+    # Storefront-Chat (services.chat_stream): OpenAI-Basis-URL (z. B. scripts.mock_openai),
+    # gleichzeitige Upstream-Anfragen pro Prozess (unter der Thread-Zahl des Web-Workers halten),
+    # pro Client gleichzeitige Chats und Anfragen pro Minute (0 = unbegrenzt),
+    # Read-Timeout zwischen zwei Stream-Chunks (Sekunden)
+    OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    CHAT_MAX_INFLIGHT = int(os.getenv("CHAT_MAX_INFLIGHT", "4"))
+    CHAT_CLIENT_MAX_CONCURRENT = int(os.getenv("CHAT_CLIENT_MAX_CONCURRENT", "1"))
+    CHAT_CLIENT_RATE_PER_MINUTE = float(os.getenv("CHAT_CLIENT_RATE_PER_MINUTE", "10"))
+    CHAT_STREAM_READ_TIMEOUT = float(os.getenv("CHAT_STREAM_READ_TIMEOUT", "30"))
+
+    # Antwort-Cache des Chats (ai.answer_cache): TTL (Sekunden), Einträge, Mindest-Ähnlichkeit
+    # für fast gleiche Fragen (0 = nur exakte Treffer), max. Fragenlänge (Zeichen)
+    AI_ANSWER_CACHE_ENABLED = os.getenv("AI_ANSWER_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+    AI_ANSWER_CACHE_TTL = int(os.getenv("AI_ANSWER_CACHE_TTL", str(6 * 3600)))
+    AI_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("AI_ANSWER_CACHE_MAX_ENTRIES", "1024"))
+    AI_ANSWER_CACHE_SIMILARITY = float(os.getenv("AI_ANSWER_CACHE_SIMILARITY", "0.85"))
+    AI_ANSWER_CACHE_MAX_QUESTION = int(os.getenv("AI_ANSWER_CACHE_MAX_QUESTION", "300"))
+    AI_ANSWER_CACHE_SYNC_SECONDS = float(os.getenv("AI_ANSWER_CACHE_SYNC_SECONDS", "5"))
+
+    # Sprachnachrichten (ai.whisper_client): max. Größe (Bytes) und Dauer (Sekunden),
+    # Cache der Transkriptionen nach Inhalts-Hash (Einträge, Sekunden)
+    AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", str(20 * 1024 * 1024)))
+    AUDIO_MAX_SECONDS = float(os.getenv("AUDIO_MAX_SECONDS", "600"))
+    TRANSCRIPTION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSCRIPTION_CACHE_MAX_ENTRIES", "512"))
+    TRANSCRIPTION_CACHE_TTL = int(os.getenv("TRANSCRIPTION_CACHE_TTL", "86400"))
 
-def get_table_args():
-    """Return table_args for models - schema only for PostgreSQL."""
-    if _build_sqlalchemy_uri().startswith("postgresql"):
-        return {'schema': os.getenv("DB_SCHEMA", "venookah2")}
-    return {}
+    # Shipping APIs
+    DHL_API_KEY = os.getenv("DHL_API_KEY", "")
+    DHL_BASE_URL = os.getenv("DHL_BASE_URL", "https://api.dhl.com")
 
-    # Erzwinge, dass Postgres den gewünschten search_path verwendet
-    # (damit alle Tabellen in deinem Schema und nicht in "public" erstellt werden)
-    if SQLALCHEMY_DATABASE_URI.startswith("postgresql"):
-        SQLALCHEMY_ENGINE_OPTIONS = {
-            "connect_args": {
-                # dies wird an den psycopg2-Treiber übergeben
-                "options": f"-csearch_path={DB_SCHEMA}"
-            }
-        }
-    else:
-        SQLALCHEMY_ENGINE_OPTIONS = {}
+    DPD_DELIS_ID = os.getenv("DPD_DELIS_ID", "sandboxdpd")
+    DPD_PASSWORD = os.getenv("DPD_PASSWORD", "xMmshh1")
+    DPD_MESSAGE_LANGUAGE = os.getenv("DPD_MESSAGE_LANGUAGE", "de_DE")
+    DPD_BASE_URL = os.getenv("DPD_BASE_URL", "https://public-ws-stage.dpd.com")
+    # DPD-Token so viele Sekunden vor dem Ablauf (03:00 Uhr) erneuern
+    DPD_TOKEN_REFRESH_AHEAD = int(os.getenv("DPD_TOKEN_REFRESH_AHEAD", "1800"))
+
+    # Tracking-Sync (worker/tasks/sync_shipping_status): Sendungen pro Lauf, Threads,
+    # Commit-Größe, Anfragen pro Sekunde je Carrier, DHL-Sammelabfrage
+    SHIPPING_SYNC_MAX_PER_RUN = int(os.getenv("SHIPPING_SYNC_MAX_PER_RUN", "500"))
+    SHIPPING_SYNC_WORKERS = int(os.getenv("SHIPPING_SYNC_WORKERS", "8"))
+    SHIPPING_SYNC_COMMIT_CHUNK = int(os.getenv("SHIPPING_SYNC_COMMIT_CHUNK", "100"))
+    SHIPPING_SYNC_RATE_DHL = float(os.getenv("SHIPPING_SYNC_RATE_DHL", "5"))
+    SHIPPING_SYNC_RATE_DPD = float(os.getenv("SHIPPING_SYNC_RATE_DPD", "5"))
+    SHIPPING_SYNC_DHL_BATCH = int(os.getenv("SHIPPING_SYNC_DHL_BATCH", "20"))
+
+    # Hintergrund-Jobs (services.jobs): "db" = Queue in job_runs, abgearbeitet von
+    # `python -m worker.worker`; "local" = im einstellenden Prozess ausführen
+    JOBS_BACKEND = os.getenv("JOBS_BACKEND", "db")
+    # Queue:max. gleichzeitige Jobs (über alle Worker)
+    JOBS_QUEUES = os.getenv("JOBS_QUEUES", "default:4,sync:2,b2b:2,reports:1")
+    JOBS_POLL_SECONDS = float(os.getenv("JOBS_POLL_SECONDS", "2"))
+    JOBS_HEARTBEAT_SECONDS = float(os.getenv("JOBS_HEARTBEAT_SECONDS", "30"))
+    # Nach dieser Zeit ohne Heartbeat gilt ein laufender Job als verwaist (Worker abgestürzt)
+    JOBS_STALE_SECONDS = int(os.getenv("JOBS_STALE_SECONDS", "300"))
+    JOBS_HISTORY_DAYS = int(os.getenv("JOBS_HISTORY_DAYS", "30"))
+
+    # B2B-Prüfung (services.b2b_checks.pipeline): gleichzeitige Anfragen gesamt / davon OSINT,
+    # Kunden pro Stapel, Cache-Dauer je Quelle (Sekunden)
+    B2B_CHECK_CONCURRENCY = int(os.getenv("B2B_CHECK_CONCURRENCY", "16"))
+    B2B_CHECK_OSINT_CONCURRENCY = int(os.getenv("B2B_CHECK_OSINT_CONCURRENCY", "2"))
+    B2B_CHECK_BATCH_SIZE = int(os.getenv("B2B_CHECK_BATCH_SIZE", "200"))
+    B2B_CACHE_TTL_VIES = int(os.getenv("B2B_CACHE_TTL_VIES", str(7 * 86400)))
+    B2B_CACHE_TTL_REGISTRY = int(os.getenv("B2B_CACHE_TTL_REGISTRY", str(30 * 86400)))
+    B2B_CACHE_TTL_OSINT = int(os.getenv("B2B_CACHE_TTL_OSINT", str(2 * 86400)))
+
+    # OSINT-Snapshots (b2b_checks.snapshot_service): Browser-Kontexte im Snapshot-Prozess,
+    # Deadline pro Seite, Wiederverwendung je URL (Sekunden), Breite der Vorschaubilder
+    OSINT_SNAPSHOT_CONTEXTS = int(os.getenv("OSINT_SNAPSHOT_CONTEXTS", "2"))
+    OSINT_SNAPSHOT_TIMEOUT = float(os.getenv("OSINT_SNAPSHOT_TIMEOUT", "20"))
+    OSINT_SNAPSHOT_CACHE_TTL = int(os.getenv("OSINT_SNAPSHOT_CACHE_TTL", "3600"))
+    OSINT_SNAPSHOT_THUMB_WIDTH = int(os.getenv("OSINT_SNAPSHOT_THUMB_WIDTH", "640"))
+
+    # Stripe-Webhooks: Inbox (webhook_events) + Verarbeitung durch den Worker
+    STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
+    WEBHOOK_INBOX_BATCH_SIZE = int(os.getenv("WEBHOOK_INBOX_BATCH_SIZE", "50"))
+    WEBHOOK_INBOX_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_INBOX_MAX_ATTEMPTS", "8"))
+    WEBHOOK_INBOX_RETRY_SECONDS = int(os.getenv("WEBHOOK_INBOX_RETRY_SECONDS", "60"))
+    # Nach dieser Zeit gilt ein "processing"-Eintrag als verwaist (Worker abgestürzt)
+    WEBHOOK_INBOX_STALE_SECONDS = int(os.getenv("WEBHOOK_INBOX_STALE_SECONDS", "600"))
+
+    # Telegram-Bot im Web-Prozess (telegram_bot.runtime): "webhook" (Updates über
+    # /webhooks/telegram), "polling" (nur der Inhaber der Sperre "telegram_bot:polling")
+    # oder "off"; leer = webhook, wenn TELEGRAM_WEBHOOK_URL gesetzt ist, sonst polling
+    TELEGRAM_BOT_MODE = os.getenv("TELEGRAM_BOT_MODE", "")
+    TELEGRAM_WEBHOOK_URL = os.getenv("TELEGRAM_WEBHOOK_URL", "")
+    # leer = aus dem Bot-Token abgeleitet
+    TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
+    TELEGRAM_WEBHOOK_MAX_CONNECTIONS = int(os.getenv("TELEGRAM_WEBHOOK_MAX_CONNECTIONS", "40"))
+    # Verarbeitung: gleichzeitige Updates pro Prozess, Plätze in der Warteschlange
+    TELEGRAM_UPDATE_WORKERS = int(os.getenv("TELEGRAM_UPDATE_WORKERS", "8"))
+    TELEGRAM_UPDATE_QUEUE_SIZE = int(os.getenv("TELEGRAM_UPDATE_QUEUE_SIZE", "100"))
+    # Lease des Polling-Leaders (Sekunden), verlängert alle TTL/3
+    TELEGRAM_POLLING_LOCK_TTL = int(os.getenv("TELEGRAM_POLLING_LOCK_TTL", "60"))
 
     # Redis (für Worker/Queues, falls benötigt)
     REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
@@ -60,15 +189,15 @@ def get_table_args():
     # Stripe
     STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
     STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY", "")
-    STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 
     # OpenAI / AI
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
     OPENAI_ASSISTANT_ID_SHOP = os.getenv("OPENAI_ASSISTANT_ID_SHOP", "")
     OPENAI_ASSISTANT_ID_BOSS = os.getenv("OPENAI_ASSISTANT_ID_BOSS", "")
 
-    # Telegram-Bot für den Inhaber
+    # Telegram-Bot für den Inhaber; OWNER_TELEGRAM_ID = Chat-ID, an die Alerts gehen
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
+    OWNER_TELEGRAM_ID = os.getenv("OWNER_TELEGRAM_ID", "")
 
     # Mehrsprachigkeit
     BABEL_DEFAULT_LOCALE = os.getenv("BABEL_DEFAULT_LOCALE", "de")
@@ -79,19 +208,19 @@ def get_table_args():
     # Sicherheit / CORS (kann später erweitert werden)
     CORS_ALLOWED_ORIGINS = os.getenv("CORS_ALLOWED_ORIGINS", "*")
 
-    # Shipping APIs
-    DHL_API_KEY = os.getenv("DHL_API_KEY", "")
-    DHL_BASE_URL = os.getenv("DHL_BASE_URL", "https://api.dhl.com")
 
-    DPD_DELIS_ID = os.getenv("DPD_DELIS_ID", "sandboxdpd")
-    DPD_PASSWORD = os.getenv("DPD_PASSWORD", "xMmshh1")
-    DPD_MESSAGE_LANGUAGE = os.getenv("DPD_MESSAGE_LANGUAGE", "de_DE")
-    DPD_BASE_URL = os.getenv("DPD_BASE_URL", "https://public-ws-stage.dpd.com")
+def get_table_args():
+    """Return table_args for models - schema only for PostgreSQL."""
+    if _build_sqlalchemy_uri().startswith("postgresql"):
+        return {'schema': os.getenv("DB_SCHEMA", "venookah2")}
+    return {}
 
 
 class DevelopmentConfig(BaseConfig):
     DEBUG = True
     ENV = "development"
+    # lokal läuft meist kein Worker -> Jobs direkt im Web-Prozess
+    JOBS_BACKEND = os.getenv("JOBS_BACKEND", "local")
 
 
 class ProductionConfig(BaseConfig):
@@ -0,0 +1,158 @@
+# file: backend/database.py
+
+"""
+Datenbank-Engines und Session-Routing.
+
+- `configure_engines(app)` baut SQLALCHEMY_ENGINE_OPTIONS aus den DB_*-Schlüsseln
+  (Pool-Größe, Overflow, Recycle, Pre-Ping; PostgreSQL zusätzlich search_path,
+  statement_timeout und application_name), sofern nicht explizit gesetzt
+- Statement-Timeout je Rolle: "storefront" (Web, kurz) oder "reports" (Worker,
+  Berichte); die Rolle des Prozesses steht in DB_ROLE
+- mit DATABASE_REPLICA_URL gibt es eine zweite Engine (Bind "replica") mit dem
+  Report-Timeout; `RoutingSession` schickt Lese-Abfragen innerhalb von
+  `reporting()` dorthin, Flushes und DML immer an die Primary
+- ohne Replica setzt `reporting()` auf PostgreSQL den Report-Timeout per
+  SET LOCAL für die laufende Transaktion
+"""
+
+import functools
+from contextlib import contextmanager
+
+from flask import current_app
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+
+REPLICA_BIND = "replica"
+ROLES = ("storefront", "reports")
+# session.info: Lese-Abfragen an die Replica / in dieser Transaktion wurde geschrieben
+_REPORTING = "db_reporting"
+_WROTE = "db_wrote"
+
+
+def statement_timeout_ms(config, role: str) -> int:
+    if role == "reports":
+        return int(config.get("DB_REPORTS_STATEMENT_TIMEOUT_MS", 120000))
+    return int(config.get("DB_STATEMENT_TIMEOUT_MS", 15000))
+
+
+def engine_options(uri: str, config, role: str) -> dict:
+    """Engine-Optionen für `uri`; SQLite behält die Pool-Vorgaben von Flask-SQLAlchemy."""
+    options = {"pool_pre_ping": bool(config.get("DB_POOL_PRE_PING", True))}
+    backend = make_url(uri).get_backend_name()
+    if backend == "sqlite":
+        return options
+
+    options.update(
+        pool_size=int(config.get("DB_POOL_SIZE", 5)),
+        max_overflow=int(config.get("DB_MAX_OVERFLOW", 10)),
+        pool_recycle=int(config.get("DB_POOL_RECYCLE", 1800)),
+        pool_timeout=float(config.get("DB_POOL_TIMEOUT", 10)),
+    )
+    if backend == "postgresql":
+        pg_options = [f"-c statement_timeout={statement_timeout_ms(config, role)}"]
+        schema = config.get("DB_SCHEMA")
+        if schema and schema != "public":
+            # damit alle Tabellen in unserem Schema und nicht in "public" landen
+            pg_options.insert(0, f"-c search_path={schema},public")
+        options["connect_args"] = {
+            # wird an libpq (psycopg2) übergeben
+            "options": " ".join(pg_options),
+            "application_name": f"venookah2-{role}",
+        }
+    return options
+
+
+def configure_engines(app) -> None:
+    """Setzt Engine-Optionen und die Replica-Bind, bevor `db.init_app` die Engines erzeugt."""
+    config = app.config
+    role = (config.get("DB_ROLE") or "storefront").lower()
+    if role not in ROLES:
+        raise ValueError(f"DB_ROLE must be one of {ROLES}, got {role!r}")
+    config["DB_ROLE"] = role
+
+    if not config.get("SQLALCHEMY_ENGINE_OPTIONS"):
+        config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(config["SQLALCHEMY_DATABASE_URI"], config, role)
+
+    replica_url = config.get("DATABASE_REPLICA_URL")
+    if replica_url:
+        binds = dict(config.get("SQLALCHEMY_BINDS") or {})
+        binds.setdefault(REPLICA_BIND, {"url": replica_url, **engine_options(replica_url, config, "reports")})
+        config["SQLALCHEMY_BINDS"] = binds
+
+
+class RoutingSession(FlaskSession):
+    """Flask-SQLAlchemy-Session, die Lese-Abfragen in `reporting()` an die Replica gibt."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and self.info.get(_REPORTING)
+            and not self.info.get(_WROTE)
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+        ):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def _note_write(session, flush_context) -> None:
+    # nach einem Schreibzugriff liest die Transaktion ihre eigenen Änderungen von der Primary
+    session.info[_WROTE] = True
+
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _reset_write(session, transaction) -> None:
+    if transaction.parent is None:
+        session.info.pop(_WROTE, None)
+
+
+def replica_configured() -> bool:
+    from .extensions import db
+
+    return REPLICA_BIND in db.engines
+
+
+@contextmanager
+def reporting():
+    """
+    Lesende Berichts-/Dashboard-Abfragen: an die Replica (falls konfiguriert),
+    sonst an die Primary mit dem Report-Timeout. Verschachtelung ist erlaubt.
+    """
+    from .extensions import db
+
+    session = db.session()
+    if session.info.get(_REPORTING):
+        yield session
+        return
+
+    config = current_app.config
+    raise_timeout = (
+        not replica_configured()
+        and config.get("DB_ROLE") != "reports"
+        and db.engine.dialect.name == "postgresql"
+    )
+    session.info[_REPORTING] = True
+    try:
+        if raise_timeout:
+            session.execute(text(f"SET LOCAL statement_timeout = {statement_timeout_ms(config, 'reports')}"))
+        yield session
+        # nach einem Fehler wird die Transaktion ohnehin zurückgerollt
+        if raise_timeout and session.in_transaction():
+            session.execute(text(f"SET LOCAL statement_timeout = {statement_timeout_ms(config, config['DB_ROLE'])}"))
+    finally:
+        session.info.pop(_REPORTING, None)
+
+
+def reporting_query(fn):
+    """Dekorator: die Funktion läuft in `reporting()`."""
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with reporting():
+            return fn(*args, **kwargs)
+
+    return wrapper
@@ -1,20 +1,24 @@
 # file: backend/extensions.py
 
+import click
 from flask import current_app, request
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from flask_babel import Babel
 from sqlalchemy import text
 
+from .database import RoutingSession
+
 # Initialisierung der Extension-Objekte (ohne App)
-db = SQLAlchemy()
-migrate = Migrate()
+# RoutingSession: Lese-Abfragen in `database.reporting()` ggf. an die Replica
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+# Flask-Migrate (zieht Alembic nach sich) nur für die `flask`-CLI, siehe init_migrate
+migrate = None
 login_manager = LoginManager()
 babel = Babel()
 
 
-def _ensure_schema_exists():
+def ensure_schema_exists():
     """
     Створює схему в Postgres, якщо її ще немає.
     Працює тільки якщо драйвер Postgres.
@@ -39,12 +43,11 @@ def _ensure_schema_exists():
 def init_extensions(app):
     """Binde Erweiterungen an die Flask-Anwendung."""
     db.init_app(app)
+    # Schema anlegen (Postgres) erledigt `flask bootstrap`, nicht jeder Prozessstart
 
-    with app.app_context():
-        # Створюємо схему в Postgres (якщо потрібно)
-        _ensure_schema_exists()
-
-    migrate.init_app(app, db)
+    # `flask db ...`: App wird innerhalb eines click-Kontexts erzeugt
+    if click.get_current_context(silent=True) is not None:
+        init_migrate(app)
 
     login_manager.init_app(app)
     login_manager.login_view = "auth.login"
@@ -66,28 +69,29 @@ def init_extensions(app):
     def load_user(user_id):
         return User.query.get(int(user_id))
 
-    # Inject alerts count into template context for admin UI (defensive)
-    try:
-        from .models.alert import Alert  # noqa: WPS433,F401
-
-        @app.context_processor
-        def inject_alerts_count():
-            try:
-                # Count unsent alerts to show a badge in the navbar
-                cnt = 0
-                try:
-                    cnt = Alert.query.filter_by(is_sent=False).count()
-                except Exception:
-                    # Some local setups (SQLite without schema) may fail; swallow errors
-                    cnt = 0
-                return {'alerts_count': cnt}
-            except Exception:
-                return {'alerts_count': 0}
-    except Exception:
-        # If importing Alert fails (missing models/migrations), don't break startup
-        @app.context_processor
-        def inject_alerts_count():
-            return {'alerts_count': 0}
+    # Alert-Badge in der Navbar: nur für Admins, Zähler gecacht (services.alert_counter)
+    @app.context_processor
+    def inject_alerts_count():
+        from flask_login import current_user
+
+        try:
+            if not current_user.is_authenticated or current_user.role not in ("admin", "superadmin"):
+                return {"alerts_count": 0}
+            from .services.alert_counter import get_unsent_count
+
+            return {"alerts_count": get_unsent_count()}
+        except Exception:
+            return {"alerts_count": 0}
+
+
+def init_migrate(app):
+    """Registriert Flask-Migrate (und damit `flask db`) an der App."""
+    global migrate
+    from flask_migrate import Migrate
+
+    if migrate is None:
+        migrate = Migrate()
+    migrate.init_app(app, db)
 
 
 def get_locale():
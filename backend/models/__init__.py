@@ -6,13 +6,18 @@
 
 from .user import User  # noqa: F401
 from .product import Product, Category  # noqa: F401
-from .inventory import StockItem  # noqa: F401
+from .inventory import ReorderPoint, StockBalance, StockMovement, StockReservation  # noqa: F401
 from .order import Order, OrderItem  # noqa: F401
 from .payment import Payment  # noqa: F401
 from .shipping import Shipment  # noqa: F401
 from .container import Container  # noqa: F401
-from .b2b_check import B2BCheckResult  # noqa: F401
+from .b2b_check import B2BCheckResult, B2BSourceCache  # noqa: F401
 from .crm import Company, Contact  # noqa: F401
 from .alert import Alert  # noqa: F401
 from .audit import AuditLog  # noqa: F401
 from .warehouse import WarehouseTask, WarehouseCategory, WarehouseProduct  # noqa: F401
+from .cache import CacheGeneration, CachedCredential  # noqa: F401
+from .webhook import WebhookEvent  # noqa: F401
+from .report import SalesDailyRollup, SalesDailyTotal, SalesRollupDirtyDay  # noqa: F401
+from .job import JobRun, JobLock  # noqa: F401
+from .telegram import TelegramDepartment  # noqa: F401
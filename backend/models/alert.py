@@ -7,8 +7,10 @@ from ..extensions import db
 
 class Alert(db.Model):
     __tablename__ = "alerts"
-
-    
+    __table_args__ = (
+        # offene Alerts (Badge im Admin, Versand an Telegram)
+        db.Index("ix_alerts_is_sent_created", "is_sent", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
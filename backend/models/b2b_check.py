@@ -11,8 +11,10 @@ class B2BCheckResult(db.Model):
     """
 
     __tablename__ = "b2b_check_results"
-
-    
+    __table_args__ = (
+        # letzte Prüfung pro Kunde
+        db.Index("ix_b2b_check_results_user_created", "user_id", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -33,5 +35,27 @@ class B2BCheckResult(db.Model):
 
     score = db.Column(db.Integer, nullable=True)  # 0–100
     screenshot_path = db.Column(db.String(512), nullable=True)
+    # Fingerabdruck der geprüften Kundendaten (USt-ID, Land, Firma, Register, Website)
+    input_hash = db.Column(db.String(64), nullable=True)
+    # Fingerabdruck des Ergebnisses (Probleme + Score); gleich wie zuvor -> kein neuer Alert
+    result_hash = db.Column(db.String(64), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class B2BSourceCache(db.Model):
+    """
+    Zwischengespeicherte Antwort einer Prüfquelle (vies / registry / osint).
+
+    `key` ist ein Hash der für die Quelle relevanten Eingaben, z. B. USt-ID + Land;
+    bis `expires_at` wird die Quelle für dieselben Eingaben nicht erneut gefragt.
+    """
+
+    __tablename__ = "b2b_source_cache"
+
+    key = db.Column(db.String(64), primary_key=True)
+    source = db.Column(db.String(16), nullable=False)
+    result = db.Column(db.JSON, nullable=False)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
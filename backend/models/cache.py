@@ -0,0 +1,41 @@
+# file: backend/models/cache.py
+
+from datetime import datetime
+
+from ..extensions import db
+
+
+class CacheGeneration(db.Model):
+    """
+    Generationszähler für prozesslokale Caches.
+
+    Jeder Gunicorn-Worker hält eigene In-Memory-Caches; ändert sich der Zähler
+    eines Namens (z. B. "catalog"), verwerfen alle Worker ihren Cache.
+    """
+
+    __tablename__ = "cache_generations"
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.BigInteger, nullable=False, default=0)
+
+    updated_at = db.Column(
+        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+    )
+
+
+class CachedCredential(db.Model):
+    """
+    Gemeinsam genutzte, kurzlebige Zugangsdaten (z. B. DPD-Login-Token).
+
+    Alle Prozesse lesen das Token aus dieser Zeile; erneuert wird es nur von dem
+    Prozess, der die Lease hält (`locked_at`, siehe services.credential_cache).
+    """
+
+    __tablename__ = "cached_credentials"
+
+    name = db.Column(db.String(64), primary_key=True)
+    token = db.Column(db.Text, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True)
+
+    refreshed_at = db.Column(db.DateTime, nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
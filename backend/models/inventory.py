@@ -5,30 +5,119 @@ from datetime import datetime
 from ..extensions import db
 
 
-class StockItem(db.Model):
+class MovementKind:
+    RECEIPT = "receipt"  # Wareneingang
+    ADJUSTMENT = "adjustment"  # Inventurkorrektur
+    RESERVATION = "reservation"
+    RELEASE = "release"  # Reservierung freigegeben (Storno)
+    PICK = "pick"  # für den Versand entnommen (verbraucht die Reservierung)
+
+
+class StockMovement(db.Model):
     """
-    Lagerbestände für jedes Produkt.
+    Eine Buchung im Bestandsbuch (services.inventory_ledger). Zeilen werden nur
+    angehängt, nie geändert; die Summe aller Buchungen je (SKU, Lagerort)
+    ergibt den Stand in `StockBalance`.
     """
 
-    __tablename__ = "stock_items"
-
-    
+    __tablename__ = "stock_movements"
+    __table_args__ = (
+        db.Index("ix_stock_movements_sku_location", "sku", "location"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
-    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=False)
-    product = db.relationship("Product", backref="stock_items")
+    sku = db.Column(db.String(255), nullable=False)
+    location = db.Column(db.String(255), nullable=False)
+    kind = db.Column(db.String(16), nullable=False)
 
-    # Gesamtbestand für dieses Lager
-    quantity_total = db.Column(db.Integer, nullable=False, default=0)
-    quantity_reserved = db.Column(db.Integer, nullable=False, default=0)
+    # Änderung des physischen Bestands bzw. der reservierten Menge
+    delta_on_hand = db.Column(db.Integer, nullable=False, default=0)
+    delta_reserved = db.Column(db.Integer, nullable=False, default=0)
 
-    location = db.Column(db.String(255), nullable=True)  # Lagername / Bereich
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=True, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    note = db.Column(db.String(255), nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(
-        db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
+
+
+class StockBalance(db.Model):
+    """
+    Laufender Bestand je SKU und Lagerort, gepflegt von `inventory_ledger.post`
+    in derselben Transaktion wie die Buchung.
+    """
+
+    __tablename__ = "stock_balances"
+    __table_args__ = (
+        db.UniqueConstraint("sku", "location", name="uq_stock_balances_sku_location"),
     )
 
+    id = db.Column(db.Integer, primary_key=True)
+
+    sku = db.Column(db.String(255), nullable=False)
+    location = db.Column(db.String(255), nullable=False)
+
+    on_hand = db.Column(db.Integer, nullable=False, default=0)
+    reserved = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    @property
     def available(self) -> int:
-        return max(0, self.quantity_total - self.quantity_reserved)
+        return max(0, self.on_hand - self.reserved)
+
+
+class ReorderPoint(db.Model):
+    """
+    Meldebestand je SKU und Alarmzustand (services.low_stock). `reorder_point`
+    NULL = LOW_STOCK_REORDER_POINT aus der Konfiguration. `is_low` wird beim
+    Erreichen des Meldebestands gesetzt (genau ein Alert) und erst oberhalb von
+    Meldebestand + LOW_STOCK_HYSTERESIS wieder gelöscht.
+    """
+
+    __tablename__ = "reorder_points"
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    sku = db.Column(db.String(255), nullable=False, unique=True)
+    reorder_point = db.Column(db.Integer, nullable=True)
+
+    is_low = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    # freie Menge bei der letzten Zustandsänderung bzw. solange `is_low`
+    available = db.Column(db.Integer, nullable=True)
+    low_since = db.Column(db.DateTime, nullable=True)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ReservationStatus:
+    ACTIVE = "active"
+    RELEASED = "released"
+    PICKED = "picked"
+
+
+class StockReservation(db.Model):
+    """
+    Reservierte Menge eines Lagerstands für eine Bestellung
+    (services.stock_reservation). Aktive Reservierungen sind in
+    `StockBalance.reserved` enthalten; Storno gibt sie frei, der Versand
+    verbucht sie als Entnahme. `closed_at` = Zeitpunkt von Freigabe/Entnahme.
+    """
+
+    __tablename__ = "stock_reservations"
+    __table_args__ = (
+        db.Index("ix_stock_reservations_order_status", "order_id", "status"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
+    balance_id = db.Column(db.Integer, db.ForeignKey("stock_balances.id"), nullable=False, index=True)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=False)
+
+    quantity = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(16), nullable=False, default=ReservationStatus.ACTIVE)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    closed_at = db.Column(db.DateTime, nullable=True)
@@ -0,0 +1,67 @@
+# file: backend/models/job.py
+
+from datetime import datetime
+
+from ..extensions import db
+
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class JobRun(db.Model):
+    """
+    Hintergrund-Job: Warteschlange und Historie in einer Tabelle.
+
+    Offene Einträge (queued) werden vom Worker beansprucht (services.jobs);
+    abgeschlossene bleiben mit Dauer, Ergebnis und Fehler als Historie stehen,
+    bis `prune_job_history` sie nach JOBS_HISTORY_DAYS löscht.
+    """
+
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        db.Index("ix_job_runs_queue_status_run_after", "queue", "status", "run_after"),
+        db.Index("ix_job_runs_name_created", "name", "created_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    name = db.Column(db.String(128), nullable=False)
+    queue = db.Column(db.String(64), nullable=False, default="default")
+    args = db.Column(db.JSON, nullable=True)
+
+    status = db.Column(db.String(16), nullable=False, default=JobStatus.QUEUED)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=3)
+    # frühester Start (Verzögerung, Backoff nach Fehlern)
+    run_after = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    locked_by = db.Column(db.String(128), nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    duration_ms = db.Column(db.Integer, nullable=True)
+
+    result = db.Column(db.JSON, nullable=True)
+    last_error = db.Column(db.Text, nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class JobLock(db.Model):
+    """
+    Verteilte Sperre mit Ablaufzeit (Lease), z. B. "job:sync_shipping_status".
+
+    Erworben wird per INSERT bzw. UPDATE auf eine abgelaufene Zeile; der Worker
+    verlängert die Sperren laufender Jobs, bis sie fertig sind.
+    """
+
+    __tablename__ = "job_locks"
+
+    name = db.Column(db.String(191), primary_key=True)
+    owner = db.Column(db.String(128), nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    acquired_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -1,11 +1,12 @@
 # file: backend/models/order.py
 
 from datetime import datetime
+from itertools import chain
 
-from ..extensions import db
-from sqlalchemy import inspect
-
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 
+from ..extensions import db
 
 
 class OrderStatus:
@@ -19,8 +20,12 @@ class OrderStatus:
 
 class Order(db.Model):
     __tablename__ = "orders"
-
-    
+    __table_args__ = (
+        # "Meine Bestellungen" / Admin-Kundenansicht
+        db.Index("ix_orders_user_created", "user_id", "created_at"),
+        # Lager: bezahlte/in Bearbeitung befindliche Bestellungen
+        db.Index("ix_orders_status_created", "status", "created_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -39,7 +44,7 @@ class Order(db.Model):
 
     stripe_payment_intent_id = db.Column(db.String(255), nullable=True)
 
-    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
@@ -52,10 +57,10 @@ class OrderItem(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
     order = db.relationship("Order", backref="items")
 
-    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=False)
+    product_id = db.Column(db.Integer, db.ForeignKey("products.id"), nullable=False, index=True)
     product = db.relationship("Product")
 
     quantity = db.Column(db.Integer, nullable=False, default=1)
@@ -70,7 +75,7 @@ class Cart(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
     user = db.relationship("User", backref="cart")
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -81,8 +86,9 @@ class Cart(db.Model):
 
 class CartItem(db.Model):
     __tablename__ = "cart_items"
-
-    
+    __table_args__ = (
+        db.Index("ix_cart_items_cart_product", "cart_id", "product_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -100,22 +106,141 @@ class CartItem(db.Model):
     )
 
 
-# Listen for status changes to automatically prepare shipment when order becomes PAID
-def _after_order_update(mapper, connection, target):
-    try:
-        hist = inspect(target).attrs.status.history
-        # If status changed and new value is PAID
-        if hist.has_changes() and hist.added and list(hist.added)[-1] == OrderStatus.PAID:
-            # Import here to avoid circular imports at module import time
-            from ..services.prepare_shipment import prepare_shipment
+# Bestellungen in diesen Status gelten als Umsatz (Berichte, sales_daily_rollup)
+SALES_STATUSES = (
+    OrderStatus.PAID,
+    OrderStatus.PROCESSING,
+    OrderStatus.SHIPPED,
+    OrderStatus.COMPLETED,
+)
+
+
+# ändern sich diese Felder einer gezählten Bestellung, stimmen die Rollups ihres Tages nicht mehr
+ROLLUP_FIELDS = ("total_amount", "currency", "is_b2b", "created_at")
+# session.info-Schlüssel, die die before_commit-Hooks unten abarbeiten
+_ROLLUP_KEYS = ("sales_rollup", "sales_rollup_days", "sales_rollup_items")
+_SETTLE_KEYS = ("release_reservations", "pick_reservations")
 
-            # Call preparation (it will check order status and create task)
-            prepare_shipment(target.id)
-    except Exception:
-        import logging
 
-        logging.getLogger(__name__).exception("Error in order after_update listener")
+def _note_sales_change(target, delta: int) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("sales_rollup", []).append((target.id, delta))
 
 
-from sqlalchemy import event
-event.listen(Order, 'after_update', _after_order_update)
+def _has_changes(session, keys: tuple[str, ...], types: tuple[type, ...]) -> bool:
+    """Vorgemerkte Arbeit oder noch nicht geflushte Objekte dieser Typen in der Session?"""
+    if any(key in session.info for key in keys):
+        return True
+    return any(isinstance(obj, types) for obj in chain(session.new, session.dirty, session.deleted))
+
+
+def _after_order_insert(mapper, connection, target):
+    if target.status in SALES_STATUSES:
+        _note_sales_change(target, +1)
+
+
+# Listen for status changes: when an order enters (or leaves) a sales status, the
+# daily rollup is adjusted right before the commit, in the same transaction.
+def _after_order_update(mapper, connection, target):
+    state = inspect(target)
+    _note_changed_days(target, state)
+    hist = state.attrs.status.history
+    if not hist.has_changes():
+        return
+    old = hist.deleted[0] if hist.deleted else None
+    delta = int(target.status in SALES_STATUSES) - int(old in SALES_STATUSES)
+    if delta:
+        _note_sales_change(target, delta)
+    settle = {OrderStatus.CANCELLED: "release_reservations", OrderStatus.SHIPPED: "pick_reservations"}
+    if target.status in settle and old != target.status:
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(settle[target.status], set()).add(target.id)
+
+
+def _note_changed_days(target, state) -> None:
+    # Betrag, Währung oder Datum einer (bisher oder jetzt) gezählten Bestellung geändert:
+    # die betroffenen Tage werden zum Neuberechnen vorgemerkt (services.sales_rollup)
+    histories = [state.attrs[name].history for name in ROLLUP_FIELDS]
+    if not any(h.has_changes() for h in histories):
+        return
+    status = state.attrs.status.history
+    if not any(s in SALES_STATUSES for s in chain(status.deleted, status.unchanged, status.added)):
+        return
+    session = object_session(target)
+    if session is None:
+        return
+    created = state.attrs.created_at.history
+    days = {value.date() for value in chain(created.deleted, created.unchanged, created.added) if value}
+    session.info.setdefault("sales_rollup_days", set()).update(days)
+
+
+def _note_item_change(mapper, connection, target):
+    # Positionen geändert: ob die Bestellung gezählt ist, prüft der before_commit-Hook
+    session = object_session(target)
+    if session is not None and target.order_id:
+        session.info.setdefault("sales_rollup_items", set()).add(target.order_id)
+
+
+def _load_previous_status(target, value, oldvalue, initiator):
+    # Nur registriert, damit der alte Status (active_history) auch nach einem Commit geladen wird.
+    return value
+
+
+def _apply_sales_rollup(session):
+    # Commits ohne Bestellungen (die meisten) kosten weder Flush noch Abfrage
+    if not _has_changes(session, _ROLLUP_KEYS, (Order, OrderItem)):
+        return
+    # Positionen neuer Bestellungen werden evtl. erst im letzten Flush geschrieben
+    session.flush()
+    pending = session.info.pop("sales_rollup", None)
+    days = session.info.pop("sales_rollup_days", set())
+    item_orders = session.info.pop("sales_rollup_items", None)
+    if not pending and not days and not item_orders:
+        return
+    # Import here to avoid circular imports at module import time
+    from ..services.sales_rollup import apply_order_deltas, mark_dirty_days, sales_days
+
+    connection = session.connection()
+    if pending:
+        apply_order_deltas(connection, pending)
+    # neu gezählte Bestellungen hat apply_order_deltas schon mit ihren Positionen erfasst
+    item_orders = (item_orders or set()) - {order_id for order_id, _ in pending or ()}
+    if item_orders:
+        days |= sales_days(connection, item_orders)
+    if days:
+        mark_dirty_days(connection, days)
+
+
+def _discard_sales_rollup(session, previous_transaction):
+    for key in _ROLLUP_KEYS + _SETTLE_KEYS:
+        session.info.pop(key, None)
+
+
+# Storno gibt reservierten Bestand frei, Versand bucht ihn als Entnahme aus
+# (Bestandsbuch, in derselben Transaktion wie die Statusänderung)
+def _settle_reservations(session):
+    if not _has_changes(session, _SETTLE_KEYS, (Order,)):
+        return
+    session.flush()
+    cancelled = session.info.pop("release_reservations", None)
+    shipped = session.info.pop("pick_reservations", None)
+    if not cancelled and not shipped:
+        return
+    from ..services.stock_reservation import pick_order, release_order
+
+    for order_id in sorted(cancelled or ()):
+        release_order(order_id, session=session)
+    for order_id in sorted(shipped or ()):
+        pick_order(order_id, session=session)
+
+
+event.listen(Order, "after_insert", _after_order_insert)
+event.listen(Order, "after_update", _after_order_update)
+event.listen(Order.status, "set", _load_previous_status, active_history=True, retval=True)
+for _event in ("after_insert", "after_update", "after_delete"):
+    event.listen(OrderItem, _event, _note_item_change)
+event.listen(Session, "before_commit", _apply_sales_rollup)
+event.listen(Session, "before_commit", _settle_reservations)
+event.listen(Session, "after_soft_rollback", _discard_sales_rollup)
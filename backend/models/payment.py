@@ -12,12 +12,12 @@ class Payment(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
     order = db.relationship("Order", backref="payments")
 
     provider = db.Column(db.String(64), nullable=False, default="stripe")
-    provider_payment_id = db.Column(db.String(255), nullable=True)
-    provider_session_id = db.Column(db.String(255), nullable=True)
+    provider_payment_id = db.Column(db.String(255), nullable=True, index=True)
+    provider_session_id = db.Column(db.String(255), nullable=True, index=True)
 
     amount = db.Column(db.Numeric(10, 2), nullable=False, default=0)
     currency = db.Column(db.String(8), nullable=False, default="EUR")
@@ -2,6 +2,8 @@
 
 from datetime import datetime
 
+from sqlalchemy import event
+
 from ..extensions import db
 
 
@@ -32,6 +34,10 @@ class Product(db.Model):
     """
 
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset-Pagination der Storefront (siehe shop_public.services.search_products)
+        db.Index("ix_products_active_created_id", "is_active", "created_at", "id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -39,6 +45,9 @@ class Product(db.Model):
     slug = db.Column(db.String(255), unique=True, nullable=False)
     description = db.Column(db.Text)
 
+    # Lagerartikel im Bestandsbuch (services.inventory_ledger), z. B. "VEN-COAL-10KG"
+    sku = db.Column(db.String(255), unique=True, nullable=True)
+
     category_id = db.Column(db.Integer, db.ForeignKey("categories.id"), nullable=True)
     category = db.relationship("Category", backref="products")
 
@@ -61,3 +70,16 @@ class Product(db.Model):
 
     def __repr__(self):
         return f"<Product {self.id} {self.name}>"
+
+
+def default_sku(slug: str) -> str:
+    return (slug or "").upper()
+
+
+def _assign_default_sku(mapper, connection, target):
+    # ohne eigene SKU wird das Produkt unter seinem Slug geführt
+    if not target.sku and target.slug:
+        target.sku = default_sku(target.slug)
+
+
+event.listen(Product, "before_insert", _assign_default_sku)
@@ -0,0 +1,70 @@
+# file: backend/models/report.py
+
+from datetime import datetime
+
+from ..extensions import db
+
+
+class SalesDailyRollup(db.Model):
+    """
+    Voraggregierte Verkäufe pro Tag, Währung, B2B-Flag und Produkt (inkl. Kategorie).
+    Wird inkrementell gepflegt (services.sales_rollup), wenn eine Bestellung bezahlt wird.
+    """
+
+    __tablename__ = "sales_daily_rollup"
+    __table_args__ = (
+        db.UniqueConstraint("day", "currency", "is_b2b", "product_id", name="uq_sales_daily_rollup_key"),
+        db.Index("ix_sales_daily_rollup_category_day", "category_id", "day"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    day = db.Column(db.Date, nullable=False, index=True)
+    currency = db.Column(db.String(8), nullable=False, default="EUR")
+    is_b2b = db.Column(db.Boolean, nullable=False, default=False)
+
+    product_id = db.Column(db.Integer, nullable=False)
+    # Kategorie zum Zeitpunkt des Verkaufs (kein FK: Historie bleibt beim Löschen erhalten)
+    category_id = db.Column(db.Integer, nullable=True)
+
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class SalesDailyTotal(db.Model):
+    """
+    Bestellungs-Summen pro Tag, Währung und B2B-Flag (eine Bestellung zählt genau einmal,
+    unabhängig von der Anzahl ihrer Positionen).
+    """
+
+    __tablename__ = "sales_daily_totals"
+    __table_args__ = (
+        db.UniqueConstraint("day", "currency", "is_b2b", name="uq_sales_daily_totals_key"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    day = db.Column(db.Date, nullable=False, index=True)
+    currency = db.Column(db.String(8), nullable=False, default="EUR")
+    is_b2b = db.Column(db.Boolean, nullable=False, default=False)
+
+    orders_count = db.Column(db.Integer, nullable=False, default=0)
+    total_amount = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class SalesRollupDirtyDay(db.Model):
+    """
+    Tage, deren Rollups nach einer Änderung an einer bereits gezählten Bestellung
+    (Betrag, Währung, Datum, Positionen) neu berechnet werden müssen.
+    Abgearbeitet von services.sales_rollup.repair_dirty_days (täglicher Job).
+    """
+
+    __tablename__ = "sales_rollup_dirty_days"
+
+    day = db.Column(db.Date, primary_key=True)
+    marked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
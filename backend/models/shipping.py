@@ -4,6 +4,11 @@ from datetime import datetime
 
 from ..extensions import db
 
+# Status, die vom Lager gesetzt werden (Paket noch nicht beim Carrier)
+PRE_DISPATCH_STATUSES = ("created", "assembling", "packing")
+# Endstatus — diese Sendungen werden nicht mehr beim Carrier abgefragt
+TERMINAL_STATUSES = ("delivered", "returned", "cancelled")
+
 
 class Shipment(db.Model):
     __tablename__ = "shipments"
@@ -12,7 +17,7 @@ class Shipment(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
     order = db.relationship("Order", backref="shipments")
 
     provider = db.Column(db.String(64), nullable=False)  # dhl, dpd, etc.
@@ -22,7 +27,9 @@ class Shipment(db.Model):
     label_url = db.Column(db.String(512), nullable=True)
     raw_payload = db.Column(db.JSON, nullable=True)
 
-    eta = db.Column(db.DateTime, nullable=True)
+    eta = db.Column(db.DateTime, nullable=True, index=True)
+    # Letzte Abfrage beim Carrier, anfangs Erstellzeit (Tracking-Sync: älteste zuerst)
+    tracking_checked_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(
@@ -0,0 +1,21 @@
+# file: backend/models/telegram.py
+
+from datetime import datetime
+
+from ..extensions import db
+
+
+class TelegramDepartment(db.Model):
+    """
+    Gewählte Abteilung pro Telegram-Nutzer.
+
+    Gemeinsam für alle Prozesse: im Webhook-Modus verarbeitet jeder Web-Worker
+    Updates mit eigener Bot-Laufzeit (telegram_bot.services.department_store).
+    """
+
+    __tablename__ = "telegram_departments"
+
+    telegram_user_id = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    department = db.Column(db.String(32), nullable=False)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
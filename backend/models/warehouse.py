@@ -20,7 +20,7 @@ class WarehouseTask(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
 
-    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False)
+    order_id = db.Column(db.Integer, db.ForeignKey("orders.id"), nullable=False, index=True)
     order = db.relationship("Order", backref="warehouse_tasks")
 
     status = db.Column(db.String(32), nullable=False, default=WarehouseTaskStatus.PENDING)
@@ -66,7 +66,8 @@ class WarehouseProduct(db.Model):
     category_id = db.Column(db.Integer, db.ForeignKey("warehouse_categories.id"), nullable=True)
     category = db.relationship("WarehouseCategory", back_populates="products")
 
-    quantity = db.Column(db.Integer, nullable=False, default=0)
+    # Bestand steht im Bestandsbuch (stock_balances, Schlüssel sku);
+    # location = Standard-Lagerplatz für Zugänge
     location = db.Column(db.String(255), nullable=True)  # место на складе
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,44 @@
+# file: backend/models/webhook.py
+
+from datetime import datetime
+
+from ..extensions import db
+
+
+class WebhookEventStatus:
+    PENDING = "pending"
+    PROCESSING = "processing"
+    PROCESSED = "processed"
+    FAILED = "failed"
+
+
+class WebhookEvent(db.Model):
+    """
+    Eingangs-Postfach (Inbox) für Webhooks externer Anbieter (derzeit Stripe).
+
+    Der Webhook-Endpunkt speichert nur das verifizierte Ereignis und antwortet sofort;
+    die Verarbeitung erfolgt danach (Worker / nach der Antwort). Die Kombination
+    (provider, event_id) ist eindeutig -> doppelte Zustellungen werden verworfen.
+    """
+
+    __tablename__ = "webhook_events"
+    __table_args__ = (
+        db.UniqueConstraint("provider", "event_id", name="uq_webhook_events_provider_event"),
+        db.Index("ix_webhook_events_status_created", "status", "created_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    provider = db.Column(db.String(32), nullable=False, default="stripe")
+    event_id = db.Column(db.String(255), nullable=False)
+    event_type = db.Column(db.String(128), nullable=True)
+
+    payload = db.Column(db.JSON, nullable=False)
+
+    status = db.Column(db.String(32), nullable=False, default=WebhookEventStatus.PENDING)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+
+    locked_at = db.Column(db.DateTime, nullable=True)
+    processed_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,53 @@
+# file: backend/services/alert_counter.py
+
+"""
+Zähler für nicht gesendete Alerts (Badge in der Admin-Navigation).
+
+Der Wert wird pro Prozess kurz gecacht (ALERTS_COUNT_TTL) und von den Stellen,
+die Alerts anlegen/versenden/löschen, inkrementell angepasst. Änderungen aus
+anderen Prozessen (Worker, weitere Web-Worker) werden spätestens nach Ablauf
+der TTL sichtbar.
+"""
+
+import logging
+
+from flask import current_app
+
+from ..models.alert import Alert
+from .cache_service import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_KEY = "unsent"
+_cache = TTLCache(maxsize=1, ttl=30)
+
+
+def _ttl() -> float:
+    try:
+        return float(current_app.config.get("ALERTS_COUNT_TTL", 30))
+    except RuntimeError:
+        return _cache.ttl
+
+
+def get_unsent_count() -> int:
+    """Anzahl nicht gesendeter Alerts (gecacht)."""
+    cached = _cache.get(_KEY)
+    if cached is not None:
+        return cached
+    try:
+        count = Alert.query.filter_by(is_sent=False).count()
+    except Exception:
+        # z. B. lokale SQLite ohne Schema
+        logger.debug("Counting unsent alerts failed", exc_info=True)
+        return 0
+    _cache.set(_KEY, count, ttl=_ttl())
+    return count
+
+
+def adjust(delta: int) -> None:
+    """Passt den gecachten Zähler an (nur wenn gerade ein Wert gecacht ist)."""
+    _cache.update(_KEY, lambda value: max(value + delta, 0))
+
+
+def invalidate() -> None:
+    _cache.pop(_KEY)
@@ -3,12 +3,23 @@
 from datetime import datetime
 from typing import Literal
 
+from flask import current_app
+
 from ..extensions import db
 from ..models.alert import Alert
+from . import alert_counter
 
 Channel = Literal["telegram", "email", "signal"]
 
 
+def owner_chat_id() -> str | None:
+    """
+    Telegram chat ID власника (OWNER_TELEGRAM_ID) — ціль алертів для власника.
+    None, якщо не налаштовано.
+    """
+    return str(current_app.config.get("OWNER_TELEGRAM_ID") or "").strip() or None
+
+
 def create_alert(
     type_: str,
     channel: Channel,
@@ -28,6 +39,7 @@ def create_alert(
     )
     db.session.add(alert)
     db.session.commit()
+    alert_counter.adjust(+1)
     return alert
 
 
@@ -35,6 +47,9 @@ def mark_alert_sent(alert: Alert) -> None:
     """
     Позначає алерт як відправлений.
     """
+    was_unsent = not alert.is_sent
     alert.is_sent = True
     alert.sent_at = datetime.utcnow()
     db.session.commit()
+    if was_unsent:
+        alert_counter.adjust(-1)
@@ -0,0 +1,355 @@
+# file: backend/services/b2b_checks/pipeline.py
+
+"""
+Prüf-Pipeline für B2B-Kunden: VIES, Register und OSINT.
+
+- die drei Quellen eines Kunden laufen parallel
+- jede Antwort wird pro Quelle und Eingabe in `b2b_source_cache` abgelegt
+  (VIES: USt-ID + Land, Register: Firma + Registernummer + Land, OSINT: USt-ID +
+  Firma + Website) und bis zum Ablauf der TTL (B2B_CACHE_TTL_*) wiederverwendet
+- Kunden, deren Daten seit der letzten Prüfung unverändert sind und deren
+  Quellen noch frisch im Cache liegen, werden übersprungen
+- `verify_users` arbeitet in Stapeln (B2B_CHECK_BATCH_SIZE); insgesamt laufen
+  höchstens B2B_CHECK_CONCURRENCY Anfragen gleichzeitig, davon OSINT (startet evtl.
+  einen Browser) in einem eigenen, kleineren Pool (B2B_CHECK_OSINT_CONCURRENCY);
+  gleiche Eingaben mehrerer Kunden werden nur einmal abgefragt
+- Ergebnisse und Alerts werden pro Stapel in einer Transaktion geschrieben; ein
+  Alert entsteht nur, wenn sich das Ergebnis (Probleme + Score) gegenüber der
+  letzten Prüfung des Kunden geändert hat (`result_hash`)
+
+Fehler einer Quelle werden nicht gecacht; der Kunde wird dann in diesem Lauf
+nicht neu bewertet (letzte Prüfung bleibt gültig) und als Fehler gezählt.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ...extensions import db
+from ...models.alert import Alert
+from ...models.b2b_check import B2BCheckResult, B2BSourceCache
+from ...models.user import User
+from .. import alert_counter
+from .osint_client import check_sanctions
+from .registry_clients import check_company_in_registry
+from .vies_client import check_vat
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CheckInput:
+    user_id: int
+    vat_number: str
+    country: str
+    company_name: str
+    handelsregister: str
+    website: str
+
+    @classmethod
+    def from_user(cls, user: User) -> "CheckInput":
+        return cls(
+            user_id=user.id,
+            vat_number=(user.vat_number or "").strip(),
+            country=(user.country or "").strip(),
+            company_name=(user.company_name or "").strip(),
+            handelsregister=(user.handelsregister or "").strip(),
+            website=(getattr(user, "company_website", None) or "").strip(),
+        )
+
+    def fingerprint(self) -> str:
+        return _hash("input", self.vat_number, self.country, self.company_name, self.handelsregister, self.website)
+
+
+@dataclass(frozen=True)
+class Source:
+    fetch: Callable[[CheckInput], dict[str, Any]]
+    # Eingaben, die das Ergebnis bestimmen (= Cache-Schlüssel)
+    parts: Callable[[CheckInput], tuple]
+    ttl_key: str
+    # Config-Key für einen eigenen Pool mit dieser Größe (sonst gemeinsamer Pool)
+    limit_key: str | None = None
+
+
+SOURCES: dict[str, Source] = {
+    "vies": Source(
+        fetch=lambda i: check_vat(vat_number=i.vat_number, country_code=i.country),
+        parts=lambda i: (i.vat_number.upper().replace(" ", ""), i.country.upper()),
+        ttl_key="B2B_CACHE_TTL_VIES",
+    ),
+    "registry": Source(
+        fetch=lambda i: check_company_in_registry(
+            company_name=i.company_name or None,
+            handelsregister=i.handelsregister or None,
+            country_code=i.country,
+        ),
+        parts=lambda i: (i.company_name.lower(), i.handelsregister.upper(), i.country.upper()),
+        ttl_key="B2B_CACHE_TTL_REGISTRY",
+    ),
+    "osint": Source(
+        fetch=lambda i: check_sanctions(
+            vat_number=i.vat_number, company_name=i.company_name or None, website=i.website or None
+        ),
+        parts=lambda i: (i.vat_number.upper(), i.company_name.lower(), i.website.lower()),
+        ttl_key="B2B_CACHE_TTL_OSINT",
+        limit_key="B2B_CHECK_OSINT_CONCURRENCY",
+    ),
+}
+
+
+def _hash(*parts) -> str:
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def source_key(source: str, check_input: CheckInput) -> str:
+    return _hash(source, *SOURCES[source].parts(check_input))
+
+
+def score(vies: dict, registry: dict, osint: dict) -> int:
+    """Einfaches Scoring 0–100: USt-ID gültig 40, im Register 40, keine Sanktionen 20."""
+    points = 0
+    if vies.get("is_valid"):
+        points += 40
+    if registry.get("is_found"):
+        points += 40
+    if not osint.get("is_sanctioned"):
+        points += 20
+    return points
+
+
+def problems(vies: dict, registry: dict, osint: dict, points: int) -> list[str]:
+    found = []
+    if osint.get("is_sanctioned"):
+        found.append("sanctioned")
+    if not vies.get("is_valid"):
+        found.append("invalid_vat")
+    if not registry.get("is_found"):
+        found.append("not_in_registry")
+    if points < 50:
+        found.append("low_score")
+    return found
+
+
+# ---------- Cache ----------
+
+def _load_cached(keys: list[str], now: datetime) -> dict[str, tuple[dict, datetime]]:
+    cached = {}
+    for i in range(0, len(keys), 500):
+        rows = db.session.execute(
+            select(B2BSourceCache.key, B2BSourceCache.result, B2BSourceCache.fetched_at)
+            .where(B2BSourceCache.key.in_(keys[i:i + 500]), B2BSourceCache.expires_at > now)
+        )
+        cached.update((row.key, (row.result, row.fetched_at)) for row in rows)
+    return cached
+
+
+def _store_cached(rows: list[dict]) -> None:
+    if not rows:
+        return
+    dialect = db.engine.dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert if dialect == "sqlite" else None
+    if insert is None:
+        for row in rows:
+            db.session.merge(B2BSourceCache(**row))
+        return
+    stmt = insert(B2BSourceCache.__table__)
+    db.session.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={col: stmt.excluded[col] for col in ("source", "result", "fetched_at", "expires_at")},
+        ),
+        rows,
+    )
+
+
+def result_fingerprint(found: list[str], points: int) -> str:
+    return _hash("result", sorted(found), points)
+
+
+def _latest_checks(user_ids: list[int]) -> dict[int, tuple[str | None, str | None, datetime]]:
+    """Letzte Prüfung je Kunde: (input_hash, result_hash, created_at)."""
+    latest = (
+        select(B2BCheckResult.user_id, func.max(B2BCheckResult.created_at).label("created_at"))
+        .where(B2BCheckResult.user_id.in_(user_ids))
+        .group_by(B2BCheckResult.user_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(
+            B2BCheckResult.user_id, B2BCheckResult.input_hash, B2BCheckResult.result_hash, B2BCheckResult.created_at
+        ).join(
+            latest,
+            (B2BCheckResult.user_id == latest.c.user_id) & (B2BCheckResult.created_at == latest.c.created_at),
+        )
+    )
+    return {row.user_id: (row.input_hash, row.result_hash, row.created_at) for row in rows}
+
+
+# ---------- Ausführung ----------
+
+def _fetch(app, source: str, check_input: CheckInput) -> dict:
+    with app.app_context():
+        return SOURCES[source].fetch(check_input)
+
+
+def _pools(config) -> dict[str, ThreadPoolExecutor]:
+    """Ein Pool je Quelle mit `limit_key`, der Rest der Gesamtgrenze als gemeinsamer Pool ("*")."""
+    total = max(1, int(config.get("B2B_CHECK_CONCURRENCY", 16)))
+    pools = {}
+    for name, source in SOURCES.items():
+        if source.limit_key:
+            size = max(1, int(config.get(source.limit_key, 1)))
+            pools[name] = ThreadPoolExecutor(max_workers=size, thread_name_prefix=f"b2b-{name}")
+            total -= size
+    pools["*"] = ThreadPoolExecutor(max_workers=max(1, total), thread_name_prefix="b2b-check")
+    return pools
+
+
+def _verify_batch(app, pools, inputs: list[CheckInput], force: bool, stats: dict) -> list[B2BCheckResult]:
+    config = app.config
+    now = datetime.utcnow()
+    keys = {(i.user_id, s): source_key(s, i) for i in inputs for s in SOURCES}
+    cached = {} if force else _load_cached(sorted(set(keys.values())), now)
+    latest = _latest_checks([i.user_id for i in inputs])
+    # Lesetransaktion beenden, bevor die (langsamen) Quellen abgefragt werden
+    db.session.commit()
+
+    todo = []
+    for i in inputs:
+        last = latest.get(i.user_id)
+        fresh = last is not None and last[0] == i.fingerprint() and all(
+            keys[(i.user_id, s)] in cached and cached[keys[(i.user_id, s)]][1] <= last[2] for s in SOURCES
+        )
+        if fresh:
+            stats["skipped"] += 1
+        else:
+            todo.append(i)
+
+    futures = {}
+    for i in todo:
+        for s in SOURCES:
+            key = keys[(i.user_id, s)]
+            if key in cached:
+                stats["cache_hits"] += 1
+            elif key not in futures:
+                pool = pools.get(s) or pools["*"]
+                futures[key] = (s, pool.submit(_fetch, app, s, i))
+    wait([f for _s, f in futures.values()])
+
+    answers = {key: result for key, (result, _fetched_at) in cached.items()}
+    cache_rows = []
+    for key, (s, future) in futures.items():
+        stats["requests"] += 1
+        try:
+            answers[key] = future.result()
+        except Exception as e:
+            logger.warning("B2B source %s failed: %s", s, e)
+            continue
+        cache_rows.append({
+            "key": key,
+            "source": s,
+            "result": answers[key],
+            "fetched_at": now,
+            "expires_at": now + timedelta(seconds=int(config.get(SOURCES[s].ttl_key, 86400))),
+        })
+
+    results, alerts = [], []
+    for i in todo:
+        try:
+            vies, registry, osint = (answers[keys[(i.user_id, s)]] for s in ("vies", "registry", "osint"))
+        except KeyError:
+            stats["errors"] += 1
+            continue
+        points = score(vies, registry, osint)
+        found = problems(vies, registry, osint, points)
+        outcome = result_fingerprint(found, points)
+        result = B2BCheckResult(
+            user_id=i.user_id,
+            vat_number=i.vat_number or None,
+            handelsregister=i.handelsregister or None,
+            country=i.country or None,
+            is_valid_vat=bool(vies.get("is_valid")),
+            is_company_found=bool(registry.get("is_found")),
+            is_sanctioned=bool(osint.get("is_sanctioned")),
+            raw_vies=vies,
+            raw_registry=registry,
+            raw_osint=osint,
+            screenshot_path=osint.get("screenshot"),
+            score=points,
+            input_hash=i.fingerprint(),
+            result_hash=outcome,
+        )
+        results.append(result)
+        # nach Ablauf der Cache-TTL wird erneut geprüft: unverändertes Ergebnis nicht noch einmal melden
+        last = latest.get(i.user_id)
+        if found and (last is None or last[1] != outcome):
+            alerts.append(Alert(
+                type="b2b_check",
+                channel="admin",
+                target=None,
+                payload={
+                    "user_id": i.user_id,
+                    "problems": found,
+                    "score": points,
+                    "raw_vies": vies,
+                    "raw_registry": registry,
+                    "raw_osint": osint,
+                },
+                is_sent=False,
+            ))
+
+    _store_cached(cache_rows)
+    db.session.add_all(results + alerts)
+    db.session.commit()
+    if alerts:
+        alert_counter.adjust(+len(alerts))
+    stats["checked"] += len(results)
+    stats["alerts"] += len(alerts)
+    return results
+
+
+def verify_users(user_ids: list[int] | None = None, force: bool = False, batch_size: int | None = None) -> dict:
+    """
+    Prüft die angegebenen (Standard: alle) B2B-Kunden.
+
+    `force=True` ignoriert Cache und Überspringen (manuelle Prüfung im Admin).
+    Gibt Kennzahlen zurück: {"users", "checked", "skipped", "cache_hits", "requests",
+    "errors", "alerts", "seconds"}.
+    """
+    app = current_app._get_current_object()
+    config = app.config
+    batch_size = batch_size or int(config.get("B2B_CHECK_BATCH_SIZE", 200))
+    started = time.monotonic()
+
+    if user_ids is None:
+        user_ids = list(db.session.execute(select(User.id).where(User.is_b2b.is_(True)).order_by(User.id)).scalars())
+    stats = {"users": 0, "checked": 0, "skipped": 0, "cache_hits": 0, "requests": 0, "errors": 0, "alerts": 0}
+    pools = _pools(config)
+    try:
+        for start in range(0, len(user_ids), batch_size):
+            batch = user_ids[start:start + batch_size]
+            users = db.session.execute(select(User).where(User.id.in_(batch), User.is_b2b.is_(True))).scalars().all()
+            inputs = [CheckInput.from_user(u) for u in users]
+            stats["users"] += len(inputs)
+            if inputs:
+                _verify_batch(app, pools, inputs, force, stats)
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+
+    stats["seconds"] = round(time.monotonic() - started, 2)
+    logger.info(
+        "B2B verification: %(users)d users, %(checked)d checked, %(skipped)d skipped, "
+        "%(requests)d source requests, %(errors)d errors in %(seconds).2fs",
+        stats,
+    )
+    return stats
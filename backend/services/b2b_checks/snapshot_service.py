@@ -0,0 +1,357 @@
+# file: backend/services/b2b_checks/snapshot_service.py
+
+"""
+Snapshot-Dienst für Websites (OSINT): Screenshots aus einem eigenen Prozess.
+
+- ein Kindprozess hält Chromium mit einem Pool warmer Browser-Kontexte offen
+  (Playwright, async); Aufträge kommen über eine Queue, Ergebnisse über eine zweite
+- jeder Auftrag hat eine Deadline: abgelaufene werden gar nicht erst gestartet,
+  laufende abgebrochen; der Aufrufer wartet höchstens bis zur Deadline
+- Deduplizierung: gleiche normalisierte URL -> ein Auftrag (auch parallel) und
+  kurzzeitig gecachtes Ergebnis; Dateien heißen nach dem Hash des Seiteninhalts,
+  bei gleichem Inhalt entfällt der Screenshot ganz
+- gespeichert wird ein Vorschaubild (WebP, braucht Pillow); ohne Pillow wird kein
+  Screenshot gemacht, sondern das HTML der Seite gespeichert (mit Warnung im Log)
+- ohne Playwright (oder ohne installierten Browser) speichert der Dienst das HTML
+  der Seite (bisheriger Fallback)
+
+Unabhängig von Flask (der Kindprozess importiert nur dieses Modul); die
+App-Anbindung steckt in osint_browser.capture_site_snapshot.
+Lokal testen: `python -m scripts.snapshot_check`.
+"""
+
+import asyncio
+import hashlib
+import io
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+logger = logging.getLogger(__name__)
+
+VIEWPORT = {"width": 1280, "height": 800}
+# Tracking-Parameter ändern den Seiteninhalt nicht
+_IGNORED_QUERY_PREFIXES = ("utm_",)
+_IGNORED_QUERY_KEYS = {"fbclid", "gclid"}
+
+
+def normalize_url(url: str) -> str:
+    """Schema ergänzen, Host klein, Standard-Port/Fragment/Tracking-Parameter weg, Query sortiert."""
+    url = (url or "").strip()
+    if "://" not in url:
+        url = "http://" + url
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    netloc = host if port is None or (scheme, port) in (("http", 80), ("https", 443)) else f"{host}:{port}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in _IGNORED_QUERY_KEYS and not k.startswith(_IGNORED_QUERY_PREFIXES)
+    )
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
+
+
+# ---------- Speicher ----------
+
+def _existing(directory: str, digest: str) -> str | None:
+    for ext in ("webp", "png", "html"):
+        name = f"{digest[:32]}.{ext}"
+        if os.path.exists(os.path.join(directory, name)):
+            return name
+    return None
+
+
+def _write(directory: str, name: str, data: bytes) -> None:
+    # erst temporär schreiben, dann umbenennen: parallele Leser sehen nie halbe Dateien
+    path = os.path.join(directory, name)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _has_pillow() -> bool:
+    try:
+        import PIL  # noqa: F401  (optionale Abhängigkeit)
+    except ImportError:
+        return False
+    return True
+
+
+def _thumbnail(png: bytes, width: int) -> bytes:
+    from PIL import Image
+
+    image = Image.open(io.BytesIO(png))
+    image.thumbnail((width, width * 4))
+    out = io.BytesIO()
+    image.save(out, "WEBP", quality=80, method=4)
+    return out.getvalue()
+
+
+# ---------- Renderer (im Kindprozess) ----------
+
+class _HtmlRenderer:
+    """Fallback ohne Browser: HTML der Seite speichern."""
+
+    kind = "html"
+
+    async def open(self, contexts: int) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    async def capture(self, slot: int, url: str, timeout: float, options: dict) -> dict:
+        from .. import http_client
+
+        response = await asyncio.to_thread(http_client.get, "web", url, timeout=max(0.5, timeout))
+        html = response.content
+        digest = hashlib.sha256(html).hexdigest()
+        name = _existing(options["directory"], digest)
+        if name is None:
+            name = f"{digest[:32]}.html"
+            await asyncio.to_thread(_write, options["directory"], name, html)
+            return {"success": True, "file": name, "content_hash": digest, "detail": "html"}
+        return {"success": True, "file": name, "content_hash": digest, "detail": "html (duplicate)"}
+
+
+class _PlaywrightRenderer:
+    """Chromium mit je einem Browser-Kontext pro Pool-Platz."""
+
+    kind = "screenshot"
+
+    async def open(self, contexts: int) -> None:
+        from playwright.async_api import async_playwright
+
+        self._thumbnails = _has_pillow()
+        if not self._thumbnails:
+            logger.warning("Pillow not installed, snapshots store the page HTML instead of a thumbnail")
+        self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._contexts = [await self._new_context() for _ in range(contexts)]
+        except Exception:
+            await self._playwright.stop()
+            raise
+
+    async def _new_context(self):
+        return await self._browser.new_context(viewport=VIEWPORT, ignore_https_errors=True)
+
+    async def close(self) -> None:
+        try:
+            await self._browser.close()
+        finally:
+            await self._playwright.stop()
+
+    async def capture(self, slot: int, url: str, timeout: float, options: dict) -> dict:
+        deadline = time.monotonic() + timeout
+        context = self._contexts[slot]
+        try:
+            page = await context.new_page()
+        except Exception:
+            # Kontext defekt (z. B. nach einem Renderer-Absturz) -> ersetzen
+            self._contexts[slot] = context = await self._new_context()
+            page = await context.new_page()
+        try:
+            await page.goto(url, timeout=timeout * 1000, wait_until="load")
+            try:
+                remaining = deadline - time.monotonic()
+                await page.wait_for_load_state("networkidle", timeout=max(0.1, min(5.0, remaining - 1)) * 1000)
+            except Exception:
+                pass
+            html = (await page.content()).encode("utf-8")
+            digest = hashlib.sha256(html).hexdigest()
+            name = _existing(options["directory"], digest)
+            if name is not None:
+                return {"success": True, "file": name, "content_hash": digest, "detail": "screenshot (duplicate)"}
+            if not self._thumbnails:
+                name = f"{digest[:32]}.html"
+                await asyncio.to_thread(_write, options["directory"], name, html)
+                return {"success": True, "file": name, "content_hash": digest, "detail": "html (no Pillow)"}
+            png = await page.screenshot(type="png")
+        finally:
+            await page.close()
+
+        data = await asyncio.to_thread(_thumbnail, png, options["thumb_width"])
+        name = f"{digest[:32]}.webp"
+        await asyncio.to_thread(_write, options["directory"], name, data)
+        return {"success": True, "file": name, "content_hash": digest, "detail": "screenshot"}
+
+
+async def _open_renderer(contexts: int):
+    try:
+        renderer = _PlaywrightRenderer()
+        await renderer.open(contexts)
+        return renderer
+    except ImportError:
+        logger.info("Playwright not installed, snapshots fall back to HTML")
+    except Exception:
+        logger.warning("Browser could not be started, snapshots fall back to HTML", exc_info=True)
+    return _HtmlRenderer()
+
+
+async def _work(slot: int, queue: asyncio.Queue, renderer, results, options: dict) -> None:
+    while True:
+        job = await queue.get()
+        if job is None:
+            queue.put_nowait(None)  # Stopp-Signal an die übrigen Plätze weiterreichen
+            return
+        remaining = job["deadline"] - time.time()
+        if remaining <= 0:
+            result = {"success": False, "detail": "deadline exceeded before start"}
+        else:
+            try:
+                result = await asyncio.wait_for(renderer.capture(slot, job["url"], remaining, options), remaining)
+            except asyncio.TimeoutError:
+                result = {"success": False, "detail": "deadline exceeded"}
+            except Exception as e:
+                result = {"success": False, "detail": f"{type(e).__name__}: {e}"[:500]}
+        results.put({"id": job["id"], **result})
+
+
+async def _serve(jobs, results, options: dict) -> None:
+    renderer = await _open_renderer(options["contexts"])
+    queue: asyncio.Queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+
+    def pump():
+        # blockierendes multiprocessing.Queue.get außerhalb der Event-Loop
+        while True:
+            job = jobs.get()
+            loop.call_soon_threadsafe(queue.put_nowait, job)
+            if job is None:
+                return
+
+    threading.Thread(target=pump, name="snapshot-jobs", daemon=True).start()
+    results.put({"id": None, "ready": renderer.kind})
+    try:
+        await asyncio.gather(*(_work(i, queue, renderer, results, options) for i in range(options["contexts"])))
+    finally:
+        await renderer.close()
+
+
+def _service_main(jobs, results, options: dict) -> None:
+    logging.basicConfig(level=options.get("log_level", "INFO"))
+    asyncio.run(_serve(jobs, results, options))
+
+
+# ---------- Client (im aufrufenden Prozess) ----------
+
+class SnapshotService:
+    """
+    Startet den Kindprozess bei Bedarf (auch neu, falls er gestorben ist) und
+    verteilt dessen Ergebnisse an die wartenden Aufrufer.
+    """
+
+    def __init__(self, directory: str, contexts: int = 2, cache_ttl: float = 3600.0, thumb_width: int = 640):
+        self.options = {"directory": directory, "contexts": max(1, contexts), "thumb_width": thumb_width}
+        self.cache_ttl = cache_ttl
+        self.renderer: str | None = None
+        self.stats = {"requests": 0, "deduplicated": 0, "cache_hits": 0, "submitted": 0, "failed": 0}
+        self._process = None
+        self._jobs = None
+        self._ids = itertools.count(1)
+        self._pending: dict[int, Future] = {}
+        self._inflight: dict[str, Future] = {}
+        self._recent: dict[str, tuple[float, dict]] = {}
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        # Aufrufer hält self._lock
+        if self._process is not None and self._process.is_alive():
+            return
+        if self._process is not None:
+            logger.warning("Snapshot process exited (code %s), restarting", self._process.exitcode)
+            for future in self._pending.values():
+                future.set_result({"success": False, "detail": "snapshot process died"})
+            self._pending.clear()
+        os.makedirs(self.options["directory"], exist_ok=True)
+        # "spawn": kein geerbter Zustand (DB-Verbindungen, Threads) aus dem Elternprozess
+        ctx = multiprocessing.get_context("spawn")
+        self._jobs, results = ctx.Queue(), ctx.Queue()
+        self._process = ctx.Process(
+            target=_service_main, args=(self._jobs, results, self.options), name="osint-snapshots", daemon=True
+        )
+        self._process.start()
+        threading.Thread(target=self._read_results, args=(results,), name="snapshot-results", daemon=True).start()
+
+    def _read_results(self, results) -> None:
+        while True:
+            try:
+                message = results.get()
+            except (EOFError, OSError):
+                return
+            if message is None:
+                return
+            if message.get("id") is None:
+                self.renderer = message.get("ready")
+                continue
+            with self._lock:
+                future = self._pending.pop(message.pop("id"), None)
+            if future is not None and not future.done():
+                future.set_result(message)
+
+    def capture(self, url: str, timeout: float = 20.0) -> dict:
+        """
+        Snapshot von `url` (blockiert höchstens `timeout` Sekunden).
+
+        Ergebnis: {"success", "file" (Dateiname im Zielordner), "content_hash", "detail", "url"}.
+        """
+        key = normalize_url(url)
+        now = time.monotonic()
+        with self._lock:
+            self.stats["requests"] += 1
+            cached = self._recent.get(key)
+            if cached and now - cached[0] < self.cache_ttl:
+                self.stats["cache_hits"] += 1
+                return dict(cached[1])
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["deduplicated"] += 1
+            else:
+                self._ensure_started()
+                future = self._inflight[key] = Future()
+                job_id = next(self._ids)
+                self._pending[job_id] = future
+                self.stats["submitted"] += 1
+                self._jobs.put({"id": job_id, "url": key, "deadline": time.time() + timeout})
+
+        try:
+            result = dict(future.result(timeout=timeout + 1.0))
+        except FutureTimeout:
+            result = {"success": False, "detail": "deadline exceeded"}
+        result["url"] = key
+
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+                if result.get("success"):
+                    if len(self._recent) >= 1024:
+                        cutoff = time.monotonic() - self.cache_ttl
+                        self._recent = {k: v for k, v in self._recent.items() if v[0] > cutoff}
+                    self._recent[key] = (time.monotonic(), result)
+                else:
+                    self.stats["failed"] += 1
+        return result
+
+    def clear_cache(self) -> None:
+        """Vergisst die zuletzt aufgenommenen URLs (laufende Abrufe bleiben bestehen)."""
+        with self._lock:
+            self._recent.clear()
+
+    def stop(self) -> None:
+        with self._lock:
+            process, self._process = self._process, None
+            if process is None:
+                return
+            self._jobs.put(None)
+        process.join(timeout=10)
+        if process.is_alive():
+            process.terminate()
@@ -0,0 +1,197 @@
+# file: backend/services/cache_service.py
+
+"""
+Gemeinsame Cache-Bausteine:
+- `TTLCache`: thread-sicherer In-Memory-Cache mit TTL und LRU-Verdrängung
+- Generationszähler in der DB (`cache_generations`), damit mehrere Worker-Prozesse
+  ihre lokalen Caches gemeinsam invalidieren können
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Hashable
+
+from sqlalchemy import insert, select, update
+
+from ..extensions import db
+from ..models.cache import CacheGeneration
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU-Cache mit Ablaufzeit pro Eintrag. Alle Operationen sind thread-sicher."""
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300.0) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires, value = entry
+            if expires <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any], ttl: float | None = None) -> Any:
+        """Liefert den gecachten Wert oder ruft `loader()` (außerhalb des Locks) auf."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        self.set(key, value, ttl=ttl)
+        return value
+
+    def update(self, key: Hashable, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        """
+        Wendet `fn` atomar auf einen vorhandenen Eintrag an; die Ablaufzeit bleibt erhalten.
+        Fehlt der Eintrag (oder ist er abgelaufen), passiert nichts und `default` wird zurückgegeben.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= now:
+                return default
+            value = fn(entry[1])
+            self._data[key] = (entry[0], value)
+            return value
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = len(self._data)
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+# ---------- Generationszähler (prozessübergreifend) ----------
+
+
+def read_generation(name: str) -> int | None:
+    """
+    Liest den Generationszähler `name` aus der DB.
+    Gibt None zurück, wenn die Tabelle (noch) nicht existiert oder die DB nicht erreichbar ist.
+    """
+    try:
+        with db.engine.connect() as conn:
+            return conn.execute(
+                select(CacheGeneration.value).where(CacheGeneration.name == name)
+            ).scalar_one_or_none() or 0
+    except Exception:
+        logger.debug("Cache generation %s not readable", name, exc_info=True)
+        return None
+
+
+def bump_generation(name: str) -> int | None:
+    """
+    Erhöht den Generationszähler `name` in einer eigenen kurzen Transaktion.
+    Fehler (z. B. fehlende Migration) werden geloggt, aber nicht weitergereicht.
+    """
+    try:
+        with db.engine.begin() as conn:
+            now = datetime.utcnow()
+            result = conn.execute(
+                update(CacheGeneration)
+                .where(CacheGeneration.name == name)
+                .values(value=CacheGeneration.value + 1, updated_at=now)
+            )
+            if not result.rowcount:
+                conn.execute(insert(CacheGeneration).values(name=name, value=1, updated_at=now))
+            return conn.execute(
+                select(CacheGeneration.value).where(CacheGeneration.name == name)
+            ).scalar_one()
+    except Exception:
+        logger.warning("Failed to bump cache generation %s", name, exc_info=True)
+        return None
+
+
+class GenerationTracker:
+    """
+    Merkt sich die zuletzt gesehene Generation eines Namens und prüft höchstens
+    alle `sync_seconds` gegen die DB, ob ein anderer Prozess invalidiert hat.
+    """
+
+    def __init__(self, name: str, on_change: Callable[[], None]) -> None:
+        self.name = name
+        self._on_change = on_change
+        self._local_changes = 0
+        self._seen: int | None = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def sync(self, sync_seconds: float) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < sync_seconds:
+            return
+        with self._lock:
+            if now - self._checked_at < sync_seconds:
+                return
+            self._checked_at = now
+        current = read_generation(self.name)
+        if current is None:
+            return
+        if self._seen is not None and current != self._seen:
+            self._changed()
+        self._seen = current
+
+    def bump(self) -> None:
+        """Lokal sofort invalidieren und die neue Generation für andere Prozesse publizieren."""
+        self._changed()
+        value = bump_generation(self.name)
+        if value is not None:
+            self._seen = value
+
+    @property
+    def version(self) -> str:
+        """Aktuelle Generation; ohne DB-Tabelle ein prozesslokaler Zähler."""
+        if self._seen is not None:
+            return str(self._seen)
+        return f"local-{self._local_changes}"
+
+    def _changed(self) -> None:
+        self._local_changes += 1
+        self._on_change()
@@ -0,0 +1,101 @@
+# file: backend/services/cart_pricing.py
+
+"""
+Preisberechnung für Warenkorb und Bestellung.
+
+Lädt Positionen + Produkte gebündelt (kein Lazy-Load pro Zeile) und liefert ein
+unveränderliches `PricedCart`, das Warenkorb-Ansicht, Checkout und
+`order_service` gemeinsam verwenden.
+"""
+
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable
+
+from sqlalchemy.orm import selectinload
+
+from ..models.order import Cart, CartItem
+from ..models.product import Product
+from .catalog_cache import ProductSnapshot, snapshot_product
+
+ZERO = Decimal("0.00")
+CENT = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class PricedLine:
+    """Eine bepreiste Position; `id` ist die CartItem-ID (None bei freien Positionen)."""
+
+    id: int | None
+    product_id: int
+    product: ProductSnapshot
+    quantity: int
+    unit_price: Decimal
+    line_total: Decimal
+    currency: str
+
+
+@dataclass(frozen=True)
+class PricedCart:
+    cart_id: int | None
+    is_b2b: bool
+    lines: tuple[PricedLine, ...]
+    total: Decimal
+    currency: str
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.lines
+
+    @property
+    def total_cents(self) -> int:
+        """Gesamtbetrag in Cent (Stripe)."""
+        return int((self.total * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def _price_lines(rows: Iterable[tuple[int | None, Product, int]], is_b2b: bool) -> tuple[tuple[PricedLine, ...], Decimal]:
+    lines = []
+    total = ZERO
+    for item_id, product, quantity in rows:
+        price = product.price_b2b if is_b2b else product.price_b2c
+        unit_price = Decimal(price or 0)
+        line_total = (unit_price * quantity).quantize(CENT, rounding=ROUND_HALF_UP)
+        lines.append(
+            PricedLine(
+                id=item_id,
+                product_id=product.id,
+                product=snapshot_product(product, with_category=False),
+                quantity=quantity,
+                unit_price=unit_price,
+                line_total=line_total,
+                currency=product.currency,
+            )
+        )
+        total += line_total
+    return tuple(lines), total
+
+
+def price_cart(cart: Cart | int, is_b2b: bool) -> PricedCart:
+    """
+    Bepreist einen Warenkorb: eine Abfrage für die Positionen, eine für alle Produkte.
+    """
+    cart_id = cart if isinstance(cart, int) else cart.id
+    items = (
+        CartItem.query.filter_by(cart_id=cart_id)
+        .options(selectinload(CartItem.product))
+        .order_by(CartItem.id.asc())
+        .all()
+    )
+    lines, total = _price_lines(((i.id, i.product, int(i.quantity)) for i in items), is_b2b)
+    currency = lines[0].currency if lines else "EUR"
+    return PricedCart(cart_id=cart_id, is_b2b=is_b2b, lines=lines, total=total, currency=currency)
+
+
+def price_items(items: list[dict], is_b2b: bool, currency: str = "EUR") -> PricedCart:
+    """
+    Bepreist freie Positionen im Format von `order_service.create_order`:
+    [{"product": <Product>, "quantity": 10}, ...]
+    """
+    rows = ((None, item["product"], int(item.get("quantity", 1))) for item in items)
+    lines, total = _price_lines(rows, is_b2b)
+    return PricedCart(cart_id=None, is_b2b=is_b2b, lines=lines, total=total, currency=currency)
@@ -0,0 +1,161 @@
+# file: backend/services/catalog_cache.py
+
+"""
+In-Memory-Cache für den Produktkatalog der Storefront.
+
+- Einträge sind unveränderliche Snapshots (`ProductSnapshot`), keine ORM-Objekte,
+  damit sie sicher zwischen Requests und Threads geteilt werden können.
+- Schlüssel enthalten Locale und Preisstufe (b2b/b2c).
+- Änderungen an Product/Category invalidieren nach dem Commit (SQLAlchemy-Events);
+  andere Worker erkennen das über den DB-Generationszähler "catalog".
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Hashable
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from ..models.product import Category, Product
+from .cache_service import GenerationTracker, TTLCache
+
+GENERATION_NAME = "catalog"
+
+
+@dataclass(frozen=True)
+class CategorySnapshot:
+    id: int
+    name: str
+    slug: str
+    image: str | None
+    parent_id: int | None
+
+
+@dataclass(frozen=True)
+class ProductSnapshot:
+    """Schreibgeschützte Kopie eines Produkts (gleiche Attributnamen wie `Product`)."""
+
+    id: int
+    name: str
+    slug: str
+    description: str | None
+    category_id: int | None
+    category: CategorySnapshot | None
+    price_b2c: Decimal
+    price_b2b: Decimal
+    currency: str
+    is_active: bool
+    main_image_url: str | None
+    extra_images: tuple
+    created_at: datetime
+    updated_at: datetime
+
+    def price_for(self, is_b2b: bool) -> Decimal:
+        return self.price_b2b if is_b2b else self.price_b2c
+
+
+def snapshot_category(category: Category | None) -> CategorySnapshot | None:
+    if category is None:
+        return None
+    return CategorySnapshot(
+        id=category.id,
+        name=category.name,
+        slug=category.slug,
+        image=category.image,
+        parent_id=category.parent_id,
+    )
+
+
+def snapshot_product(product: Product, with_category: bool = True) -> ProductSnapshot:
+    """
+    Erzeugt einen Snapshot; `product.category` sollte bereits geladen sein.
+    Mit `with_category=False` wird die Kategorie nicht angefasst (kein Lazy-Load).
+    """
+    return ProductSnapshot(
+        id=product.id,
+        name=product.name,
+        slug=product.slug,
+        description=product.description,
+        category_id=product.category_id,
+        category=snapshot_category(product.category) if with_category else None,
+        price_b2c=product.price_b2c,
+        price_b2b=product.price_b2b,
+        currency=product.currency,
+        is_active=product.is_active,
+        main_image_url=product.main_image_url,
+        extra_images=tuple(product.extra_images or ()),
+        created_at=product.created_at,
+        updated_at=product.updated_at,
+    )
+
+
+_cache = TTLCache(maxsize=512, ttl=300.0)
+_generation = GenerationTracker(GENERATION_NAME, on_change=_cache.clear)
+
+
+def _configure() -> bool:
+    """Übernimmt Größe/TTL aus der Konfiguration; False, wenn der Cache deaktiviert ist."""
+    if not has_app_context():
+        return False
+    config = current_app.config
+    if not config.get("CATALOG_CACHE_ENABLED", True):
+        return False
+    _cache.maxsize = int(config.get("CATALOG_CACHE_MAX_ENTRIES", 512))
+    _cache.ttl = float(config.get("CATALOG_CACHE_TTL", 300))
+    _generation.sync(float(config.get("CATALOG_CACHE_SYNC_SECONDS", 2)))
+    return True
+
+
+def get_or_load(key: Hashable, loader: Callable[[], Any]) -> Any:
+    """
+    Liefert den gecachten Wert für `key` oder lädt ihn über `loader`.
+    `loader` muss Snapshots (keine ORM-Objekte) zurückgeben.
+    """
+    if not _configure():
+        return loader()
+    return _cache.get_or_set(key, loader)
+
+
+def invalidate() -> None:
+    """Verwirft den Katalog-Cache in allen Prozessen (lokal sofort, andere über die DB)."""
+    _generation.bump()
+
+
+def version() -> str:
+    """Aktuelle Katalog-Generation (z. B. als Teil von Response-Cache-Schlüsseln)."""
+    if has_app_context():
+        _generation.sync(float(current_app.config.get("CATALOG_CACHE_SYNC_SECONDS", 2)))
+    return _generation.version
+
+
+def stats() -> dict:
+    return _cache.stats()
+
+
+# ---------- Write-through-Invalidierung ----------
+
+
+def _mark_catalog_dirty(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info["catalog_dirty"] = True
+
+
+def _after_commit(session) -> None:
+    if session.info.pop("catalog_dirty", False):
+        invalidate()
+
+
+def _after_rollback(session, previous_transaction) -> None:
+    session.info.pop("catalog_dirty", None)
+
+
+for _model in (Product, Category):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _mark_catalog_dirty)
+
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_soft_rollback", _after_rollback)
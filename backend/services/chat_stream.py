@@ -0,0 +1,201 @@
+# file: backend/services/chat_stream.py
+
+"""
+Streaming-Proxy zu OpenAI Chat Completions für den Storefront-Chat.
+
+- `stream_reply()` fordert die Antwort mit `stream=True` an und liefert die
+  Text-Deltas, sobald sie eintreffen (über die gepoolte Session aus
+  `http_client`; blockierende Sockets, daher auch unter gevent-Workern nutzbar)
+- `admit()`/`release()` begrenzen gleichzeitige Upstream-Anfragen pro Prozess
+  (CHAT_MAX_INFLIGHT) sowie pro Client Parallelität und Anfragen pro Minute;
+  abgelehnt wird sofort (`ChatLimitExceeded`), damit wartende Chats keine
+  Worker-Threads belegen, die z. B. der Checkout braucht
+- `sse()` formatiert Server-Sent Events
+
+Die Basis-URL ist konfigurierbar (OPENAI_BASE_URL), z. B. für `scripts.mock_openai`.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections.abc import Iterator
+
+from flask import current_app
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+# ab so vielen Clients werden inaktive Einträge verworfen
+MAX_TRACKED_CLIENTS = 10000
+
+
+class ChatLimitExceeded(Exception):
+    """Anfrage abgelehnt: `reason` ist "busy", "rate_limited" oder "overloaded"."""
+
+    def __init__(self, reason: str, status: int, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _ClientState:
+    __slots__ = ("active", "tokens", "updated")
+
+    def __init__(self, capacity: float):
+        self.active = 0
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+
+_lock = threading.Lock()
+_inflight = 0
+_clients: dict[str, _ClientState] = {}
+
+
+def _limits() -> tuple[int, int, float]:
+    config = current_app.config
+    return (
+        int(config.get("CHAT_MAX_INFLIGHT", 4)),
+        int(config.get("CHAT_CLIENT_MAX_CONCURRENT", 1)),
+        float(config.get("CHAT_CLIENT_RATE_PER_MINUTE", 10)),
+    )
+
+
+def _prune(capacity: float, now: float) -> None:
+    # Clients ohne laufenden Chat, deren Bucket wieder voll wäre, bringen keine Information mehr
+    per_second = capacity / 60.0
+    for key in [
+        key for key, state in _clients.items()
+        if not state.active and state.tokens + (now - state.updated) * per_second >= capacity
+    ]:
+        del _clients[key]
+
+
+def admit(client: str) -> None:
+    """
+    Reserviert einen Upstream-Slot für `client` oder wirft `ChatLimitExceeded`.
+    Jedes erfolgreiche `admit()` muss mit genau einem `release()` beendet werden.
+    """
+    global _inflight
+    max_inflight, max_concurrent, per_minute = _limits()
+    now = time.monotonic()
+    with _lock:
+        state = _clients.get(client)
+        if state is None:
+            if len(_clients) >= MAX_TRACKED_CLIENTS:
+                _prune(per_minute, now)
+            state = _clients[client] = _ClientState(per_minute)
+
+        if max_concurrent > 0 and state.active >= max_concurrent:
+            raise ChatLimitExceeded("busy", 429, 1)
+        if per_minute > 0:
+            state.tokens = min(per_minute, state.tokens + (now - state.updated) * per_minute / 60.0)
+            state.updated = now
+            if state.tokens < 1:
+                raise ChatLimitExceeded("rate_limited", 429, int((1 - state.tokens) * 60.0 / per_minute) + 1)
+        if max_inflight > 0 and _inflight >= max_inflight:
+            raise ChatLimitExceeded("overloaded", 503, 2)
+
+        if per_minute > 0:
+            state.tokens -= 1
+        state.active += 1
+        _inflight += 1
+
+
+def release(client: str) -> None:
+    global _inflight
+    with _lock:
+        _inflight = max(0, _inflight - 1)
+        state = _clients.get(client)
+        if state is not None and state.active:
+            state.active -= 1
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "inflight": _inflight,
+            "clients": len(_clients),
+            "active_clients": sum(1 for state in _clients.values() if state.active),
+        }
+
+
+def completions_url() -> str:
+    base = current_app.config.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL
+    return base.rstrip("/") + "/chat/completions"
+
+
+def stream_reply(
+    messages: list[dict],
+    *,
+    api_key: str,
+    model: str,
+    temperature: float = 0.2,
+    max_tokens: int = 800,
+    outcome: dict | None = None,
+) -> Iterator[str]:
+    """
+    Liefert die Text-Deltas der Antwort. Fehler des Upstreams (Verbindung, HTTP-Status)
+    werden als `requests.RequestException` weitergereicht; die Verbindung wird auch beim
+    vorzeitigen Schließen des Generators (Client weg) sofort freigegeben.
+
+    `outcome` (falls übergeben) erhält "done" (True erst nach [DONE]) und "finish_reason"
+    des Upstreams; nur eine Antwort mit beidem ("stop") ist vollständig (`is_complete`).
+    """
+    from . import http_client  # lädt requests, erst beim ersten Aufruf
+
+    read_timeout = float(current_app.config.get("CHAT_STREAM_READ_TIMEOUT", 30))
+    response = http_client.post(
+        "openai",
+        completions_url(),
+        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+        json={
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+        },
+        stream=True,
+        # Read-Timeout gilt pro Chunk, nicht für die ganze Antwort
+        timeout=read_timeout,
+    )
+    if outcome is not None:
+        outcome.update(done=False, finish_reason=None)
+    try:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line.startswith(b"data:"):
+                continue
+            data = line[5:].strip()
+            if data == b"[DONE]":
+                if outcome is not None:
+                    outcome["done"] = True
+                break
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                logger.warning("Unparseable stream chunk from OpenAI: %r", data[:200])
+                continue
+            for choice in chunk.get("choices") or ():
+                if outcome is not None and choice.get("finish_reason"):
+                    outcome["finish_reason"] = choice["finish_reason"]
+                delta = (choice.get("delta") or {}).get("content")
+                if delta:
+                    yield delta
+    finally:
+        response.close()
+
+
+def is_complete(finish_reason: str | None, done: bool = True) -> bool:
+    """Antwort regulär beendet (nicht abgeschnitten durch max_tokens, Filter oder Abbruch)?"""
+    return done and finish_reason == "stop"
+
+
+def sse(data: dict, event: str | None = None) -> str:
+    """Ein Server-Sent Event (JSON-Nutzlast)."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data, ensure_ascii=False)}\n\n"
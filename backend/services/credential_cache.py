@@ -0,0 +1,226 @@
+# file: backend/services/credential_cache.py
+
+"""
+Cache für kurzlebige Zugangsdaten (Carrier-Login-Tokens), prozessübergreifend.
+
+- Speicher: eine Zeile in `cached_credentials` pro Name, dazu eine Kopie im Prozess
+- Single-Flight: im Prozess per Lock, zwischen Prozessen über eine Lease auf der
+  Zeile (`locked_at`, gesetzt in einer kurzen Transaktion) — nur ein Login
+  gleichzeitig, die übrigen Prozesse warten (ohne DB-Sperre) und übernehmen danach
+  das neue Token aus der DB. Der Login selbst läuft außerhalb jeder Transaktion,
+  damit er keine Zeilen- bzw. (SQLite) Datenbank-Schreibsperre hält; eine Lease,
+  deren Inhaber abgestürzt ist, verfällt nach `lease` Sekunden
+- Erneuerung `refresh_ahead` Sekunden vor Ablauf; bis dahin nutzen alle anderen
+  Aufrufer weiter das noch gültige Token
+- Kennzahlen (Treffer im Prozess / in der DB, Logins, Fehler) über `snapshot()`
+
+Ohne Tabelle (Migration fehlt) arbeitet der Cache nur prozesslokal.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+
+from sqlalchemy import insert, or_, select, update
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models.cache import CachedCredential
+
+logger = logging.getLogger(__name__)
+
+# fetch() -> (token, expires_at in UTC, naiv) oder None bei Fehler
+Fetcher = Callable[[], tuple[str, datetime] | None]
+
+_registry: dict[str, "CredentialCache"] = {}
+
+
+class CredentialCache:
+    def __init__(self, name: str, fetch: Fetcher, refresh_ahead: float = 1800.0, lease: float = 60.0) -> None:
+        self.name = name
+        self.fetch = fetch
+        self.refresh_ahead = refresh_ahead
+        # länger als der Login (HTTP-Timeout inkl. Retries) dauern kann
+        self.lease = lease
+        self._token: str | None = None
+        self._expires_at: datetime | None = None
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.hits = 0
+        self.shared_hits = 0
+        self.refreshes = 0
+        self.failures = 0
+        _registry[name] = self
+
+    # ---------- öffentliche API ----------
+
+    def get(self) -> str | None:
+        """Gültiges Token (ggf. nach Login) oder None, wenn keines beschafft werden kann."""
+        now = datetime.utcnow()
+        self.lookups += 1
+        token = self._valid_token(now, ahead=True)
+        if token:
+            self.hits += 1
+            return token
+
+        token = self._valid_token(now, ahead=False)
+        if token:
+            # Im Erneuerungsfenster: nur ein Thread erneuert, alle anderen nehmen das alte Token
+            self.hits += 1
+            if self._lock.acquire(blocking=False):
+                try:
+                    self._refresh(now, wait=False)
+                finally:
+                    self._lock.release()
+            return self._valid_token(datetime.utcnow(), ahead=False) or token
+
+        with self._lock:
+            # evtl. hat ein anderer Thread inzwischen erneuert
+            token = self._valid_token(datetime.utcnow(), ahead=False)
+            if token:
+                self.hits += 1
+                return token
+            self._refresh(now, wait=True)
+            return self._valid_token(datetime.utcnow(), ahead=False)
+
+    def invalidate(self, token: str | None = None) -> None:
+        """Token verwerfen (z. B. nach HTTP 401), lokal und — falls es noch gespeichert ist — in der DB."""
+        with self._lock:
+            if token is None or token == self._token:
+                self._token = self._expires_at = None
+        try:
+            with db.engine.begin() as conn:
+                stmt = update(CachedCredential).where(CachedCredential.name == self.name)
+                if token is not None:
+                    stmt = stmt.where(CachedCredential.token == token)
+                conn.execute(stmt.values(expires_at=datetime.utcnow()))
+        except Exception:
+            logger.debug("Credential %s: invalidation not stored", self.name, exc_info=True)
+
+    def stats(self) -> dict:
+        served = self.hits + self.shared_hits
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "hit_rate": round(served / self.lookups, 3) if self.lookups else 0.0,
+            "expires_at": self._expires_at.isoformat() if self._expires_at else None,
+        }
+
+    # ---------- intern ----------
+
+    def _valid_token(self, now: datetime, ahead: bool) -> str | None:
+        token, expires_at = self._token, self._expires_at
+        if not token or expires_at is None:
+            return None
+        margin = timedelta(seconds=self.refresh_ahead if ahead else 0)
+        return token if now + margin < expires_at else None
+
+    def _adopt(self, token: str | None, expires_at: datetime | None, now: datetime) -> bool:
+        """Übernimmt ein Token aus der DB, wenn es noch außerhalb des Erneuerungsfensters liegt."""
+        if token and expires_at and now + timedelta(seconds=self.refresh_ahead) < expires_at:
+            self._token, self._expires_at = token, expires_at
+            return True
+        return False
+
+    def _read(self) -> tuple[str | None, datetime | None] | None:
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(CachedCredential.token, CachedCredential.expires_at).where(CachedCredential.name == self.name)
+            ).first()
+        return (row.token, row.expires_at) if row is not None else None
+
+    def _refresh(self, now: datetime, wait: bool) -> None:
+        # Aufrufer hält self._lock; `wait=False`: ein noch gültiges Token ist vorhanden,
+        # hält ein anderer Prozess die Lease, wird nicht auf ihn gewartet
+        try:
+            deadline = time.monotonic() + self.lease
+            while True:
+                row = self._read()
+                if row is not None and self._adopt(*row, datetime.utcnow()):
+                    self.shared_hits += 1
+                    return
+                lease_at = self._acquire_lease(row is None)
+                if lease_at is not None:
+                    break
+                if not wait:
+                    return
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"lease on {self.name} not released")
+                # ein anderer Prozess meldet sich gerade an
+                time.sleep(0.2)
+        except Exception:
+            logger.debug("Credential %s: shared store unavailable, refreshing locally", self.name, exc_info=True)
+            self._store_local(self._fetch())
+            return
+
+        # Login ohne offene Transaktion, danach Token in einer zweiten kurzen Transaktion speichern
+        result = self._fetch()
+        try:
+            self._release_lease(lease_at, result)
+        except Exception:
+            logger.debug("Credential %s: token not stored", self.name, exc_info=True)
+        self._store_local(result)
+
+    def _acquire_lease(self, missing: bool) -> datetime | None:
+        """Setzt `locked_at`, wenn keine (gültige) Lease besteht; gibt den Zeitstempel oder None zurück."""
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=self.lease)
+        with db.engine.begin() as conn:
+            if missing:
+                try:
+                    with conn.begin_nested():
+                        conn.execute(insert(CachedCredential).values(name=self.name, locked_at=now))
+                    return now
+                except IntegrityError:
+                    pass  # parallel angelegt -> wie eine vorhandene Zeile behandeln
+            claimed = conn.execute(
+                update(CachedCredential)
+                .where(
+                    CachedCredential.name == self.name,
+                    or_(CachedCredential.locked_at.is_(None), CachedCredential.locked_at < stale),
+                )
+                .values(locked_at=now)
+            ).rowcount
+        return now if claimed else None
+
+    def _release_lease(self, lease_at: datetime, result: tuple[str, datetime] | None) -> None:
+        with db.engine.begin() as conn:
+            if result is not None:
+                conn.execute(
+                    update(CachedCredential)
+                    .where(CachedCredential.name == self.name)
+                    .values(token=result[0], expires_at=result[1], refreshed_at=datetime.utcnow())
+                )
+            # nur die eigene Lease freigeben (eine verfallene hat evtl. schon ein anderer übernommen)
+            conn.execute(
+                update(CachedCredential)
+                .where(CachedCredential.name == self.name, CachedCredential.locked_at == lease_at)
+                .values(locked_at=None)
+            )
+
+    def _fetch(self) -> tuple[str, datetime] | None:
+        try:
+            result = self.fetch()
+        except Exception:
+            logger.warning("Credential %s: refresh failed", self.name, exc_info=True)
+            result = None
+        if result is None:
+            self.failures += 1
+        else:
+            self.refreshes += 1
+        return result
+
+    def _store_local(self, result: tuple[str, datetime] | None) -> None:
+        # Bei Fehlern bleibt ein noch gültiges altes Token erhalten
+        if result is not None:
+            self._token, self._expires_at = result
+
+
+def snapshot() -> dict:
+    """Kennzahlen aller Credential-Caches dieses Prozesses."""
+    return {name: cache.stats() for name, cache in sorted(_registry.items())}
@@ -0,0 +1,287 @@
+# file: backend/services/http_client.py
+
+"""
+Gemeinsame HTTP-Schicht für alle ausgehenden Aufrufe.
+
+- ein `requests.Session` pro Upstream (Keep-Alive, Pool-Größe aus UPSTREAMS),
+  pro Prozess (nach einem Fork neu aufgebaut)
+- getrennte Connect-/Read-Timeouts
+- Retries mit exponentiellem Backoff: Connect-Timeouts immer, sonstige
+  Verbindungsfehler, Read-Timeouts und 429/5xx nur bei idempotenten Aufrufen
+  (GET oder `idempotent=True`)
+- Circuit Breaker pro Upstream: nach N Fehlern in Folge wird der Upstream für
+  `reset_seconds` nicht mehr angefragt (sofort `CircuitOpenError`), danach ein
+  Probeaufruf
+- Latenz-Histogramm pro Upstream (`snapshot()`)
+
+Unabhängig von Flask, damit auch Bot und Skripte es nutzen können.
+`CircuitOpenError` ist eine `requests.RequestException`, bestehende
+`except requests.RequestException`-Zweige greifen also weiter.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+# Obergrenzen der Histogramm-Buckets (Sekunden); der letzte Bucket ist "+Inf"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass(frozen=True)
+class Upstream:
+    connect_timeout: float = 3.05
+    read_timeout: float = 10.0
+    retries: int = 2
+    backoff: float = 0.3
+    pool_size: int = 10
+    failure_threshold: int = 5
+    reset_seconds: float = 30.0
+    breaker: bool = True
+
+
+UPSTREAMS: dict[str, Upstream] = {
+    "openai": Upstream(read_timeout=60.0, retries=1, backoff=1.0, pool_size=20),
+    "dhl": Upstream(pool_size=16),
+    "dpd": Upstream(pool_size=16),
+    "vies": Upstream(read_timeout=15.0),
+    # beliebige Websites (OSINT): verschiedene Hosts, daher kein gemeinsamer Breaker
+    "web": Upstream(read_timeout=15.0, retries=1, breaker=False),
+}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Upstream ist nach wiederholten Fehlern vorübergehend gesperrt."""
+
+
+class CircuitBreaker:
+    """closed -> (N Fehler) -> open -> (reset_seconds) -> half-open -> closed/open."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._probe_running:
+                # genau ein Probeaufruf
+                self._probe_running = True
+                return True
+            return False
+
+    def record(self, ok: bool) -> None:
+        with self._lock:
+            self._probe_running = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, ok: bool) -> None:
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if seconds <= bound), len(LATENCY_BUCKETS))
+        with self._lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.total += seconds
+            if not ok:
+                self.errors += 1
+
+    def reject(self) -> None:
+        with self._lock:
+            self.rejected += 1
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            labels = [str(b) for b in LATENCY_BUCKETS] + ["+Inf"]
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "rejected": self.rejected,
+                "avg_ms": round(self.total / self.count * 1000, 1) if self.count else 0.0,
+                "buckets": dict(zip(labels, self.buckets)),
+            }
+
+
+_lock = threading.Lock()
+_pid = os.getpid()
+_sessions: dict[str, requests.Session] = {}
+_breakers: dict[str, CircuitBreaker] = {}
+_histograms: dict[str, LatencyHistogram] = {}
+
+
+def _config(upstream: str) -> Upstream:
+    return UPSTREAMS.get(upstream) or UPSTREAMS["web"]
+
+
+def _check_fork() -> None:
+    # Sockets des Elternprozesses nicht in Gunicorn-Workern weiterverwenden
+    global _pid
+    if os.getpid() != _pid:
+        with _lock:
+            if os.getpid() != _pid:
+                _sessions.clear()
+                _breakers.clear()
+                _histograms.clear()
+                _pid = os.getpid()
+
+
+def get_session(upstream: str) -> requests.Session:
+    """Gepoolte Session für einen Upstream (lazy, eine pro Prozess)."""
+    _check_fork()
+    session = _sessions.get(upstream)
+    if session is None:
+        with _lock:
+            session = _sessions.get(upstream)
+            if session is None:
+                cfg = _config(upstream)
+                session = requests.Session()
+                # Retries macht request() selbst (abhängig von Idempotenz)
+                adapter = HTTPAdapter(pool_connections=cfg.pool_size, pool_maxsize=cfg.pool_size, max_retries=0)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _sessions[upstream] = session
+                _histograms[upstream] = LatencyHistogram()
+                _breakers[upstream] = CircuitBreaker(cfg.failure_threshold, cfg.reset_seconds)
+    return session
+
+
+def _rewind(kwargs: dict) -> None:
+    # Datei-Uploads (files=...) und gestreamte Bodies (data=<Datei>) vor einem erneuten Versuch zurückspulen
+    files = kwargs.get("files") or {}
+    fileobjs = [value[1] if isinstance(value, tuple) and len(value) > 1 else value
+                for value in (files.values() if isinstance(files, dict) else files)]
+    fileobjs.append(kwargs.get("data"))
+    for fileobj in fileobjs:
+        if hasattr(fileobj, "seek") and hasattr(fileobj, "read"):
+            try:
+                fileobj.seek(0)
+            except Exception:
+                pass
+
+
+def _retry_delay(cfg: Upstream, attempt: int, response: requests.Response | None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), 30.0)
+    return cfg.backoff * (2 ** attempt) * (0.5 + random.random())
+
+
+def request(
+    upstream: str,
+    method: str,
+    url: str,
+    *,
+    idempotent: bool | None = None,
+    timeout: float | tuple[float, float] | None = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    Wie `requests.request`, aber über die gepoolte Session des Upstreams.
+
+    `timeout` überschreibt den Read-Timeout (Zahl) bzw. beide Timeouts (Tupel).
+    Gibt die letzte Antwort zurück (auch 4xx/5xx) — `raise_for_status()` bleibt beim Aufrufer.
+    """
+    method = method.upper()
+    cfg = _config(upstream)
+    session = get_session(upstream)
+    breaker = _breakers[upstream]
+    histogram = _histograms[upstream]
+    if idempotent is None:
+        idempotent = method in IDEMPOTENT_METHODS
+    if timeout is None:
+        timeout = (cfg.connect_timeout, cfg.read_timeout)
+    elif not isinstance(timeout, tuple):
+        timeout = (min(cfg.connect_timeout, timeout), timeout)
+
+    # Breaker zählt einen Aufruf einmal (Endergebnis nach den Retries), nicht jeden Versuch
+    if cfg.breaker and not breaker.allow():
+        histogram.reject()
+        raise CircuitOpenError(f"circuit open for upstream {upstream!r}")
+
+    attempt = 0
+    while True:
+        if attempt:
+            _rewind(kwargs)
+        started = time.monotonic()
+        response = None
+        try:
+            response = session.request(method, url, timeout=timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            histogram.observe(time.monotonic() - started, ok=False)
+            # ConnectTimeout: Anfrage wurde nicht gesendet -> auch nicht-idempotent wiederholbar
+            retryable = idempotent or isinstance(e, requests.exceptions.ConnectTimeout)
+            if attempt >= cfg.retries or not retryable:
+                breaker.record(ok=False)
+                raise
+            logger.info("%s %s (%s) failed: %s — retry %d", method, url, upstream, e, attempt + 1)
+        except Exception:
+            breaker.record(ok=False)
+            raise
+        else:
+            failed = response.status_code >= 500
+            histogram.observe(time.monotonic() - started, ok=not failed)
+            if not (idempotent and response.status_code in RETRY_STATUSES and attempt < cfg.retries):
+                breaker.record(ok=not failed)
+                return response
+            logger.info("%s %s (%s) returned %s — retry %d", method, url, upstream, response.status_code, attempt + 1)
+            response.close()
+
+        time.sleep(_retry_delay(cfg, attempt, response))
+        attempt += 1
+
+
+def get(upstream: str, url: str, **kwargs) -> requests.Response:
+    return request(upstream, "GET", url, **kwargs)
+
+
+def post(upstream: str, url: str, **kwargs) -> requests.Response:
+    return request(upstream, "POST", url, **kwargs)
+
+
+def snapshot() -> dict:
+    """Kennzahlen pro Upstream: Zustand des Breakers und Latenz-Histogramm."""
+    _check_fork()
+    result = {}
+    for name in sorted(_histograms):
+        data = _histograms[name].as_dict()
+        data["circuit"] = _breakers[name].state if _config(name).breaker else "disabled"
+        result[name] = data
+    return result
@@ -0,0 +1,351 @@
+# file: backend/services/inventory_ledger.py
+
+"""
+Bestandsbuch (Ledger) für Shop und Lager, Schlüssel ist die SKU.
+
+- Jede Bestandsänderung ist eine Buchung in `stock_movements` (nur anhängen):
+  Wareneingang, Inventurkorrektur, Reservierung, Freigabe, Entnahme.
+- `stock_balances` hält je (SKU, Lagerort) den laufenden Stand `on_hand` /
+  `reserved`. `post` ändert ihn per bedingtem UPDATE in derselben Transaktion
+  wie die Buchung; Verfügbarkeit ist damit ein Indexzugriff statt einer Summe.
+- Shop-Produkte verweisen über `Product.sku` auf ihren Lagerartikel,
+  `WarehouseProduct` ist der Artikelstamm des Lagers (Name, Kategorie, Platz).
+- `rebuild` berechnet die Stände aus den Buchungen neu, `check` vergleicht sie
+  (scripts/inventory_ledger.py).
+- geänderte SKUs werden vor dem Commit gegen ihren Meldebestand geprüft
+  (services.low_stock).
+"""
+
+import logging
+from datetime import datetime
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import case, event, func, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from ..extensions import db
+from ..models.inventory import MovementKind, ReservationStatus, StockBalance, StockMovement, StockReservation
+from ..models.product import Product
+from ..models.warehouse import WarehouseProduct
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCATION = "main"
+# session.info: in dieser Transaktion geänderte SKUs
+_CHANGED = "stock_changed_skus"
+
+
+class StockConflict(ValueError):
+    """Die Buchung würde den Bestand oder die Reservierungen negativ machen bzw. mehr reservieren als frei ist."""
+
+    def __init__(self, sku: str, location: str, kind: str, on_hand: int, reserved: int):
+        super().__init__(
+            f"Cannot post {kind} ({on_hand:+d} on hand, {reserved:+d} reserved) for {sku} at {location}"
+        )
+        self.sku = sku
+        self.location = location
+        self.kind = kind
+
+
+class Drift(NamedTuple):
+    sku: str
+    location: str
+    field: str
+    expected: int
+    actual: int
+
+
+# ---------- Buchen ----------
+
+
+def mark_changed(session, sku: str) -> None:
+    session.info.setdefault(_CHANGED, set()).add(sku)
+
+
+def ensure_balance(sku: str, location: str = DEFAULT_LOCATION, session=None) -> int:
+    """id des Bestands für (SKU, Lagerort); legt ihn bei Bedarf mit 0 an (parallel sicher)."""
+    session = session or db.session
+    lookup = select(StockBalance.id).where(StockBalance.sku == sku, StockBalance.location == location)
+    balance_id = session.execute(lookup).scalar()
+    if balance_id is not None:
+        return balance_id
+
+    row = {"sku": sku, "location": location, "on_hand": 0, "reserved": 0, "updated_at": datetime.utcnow()}
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        session.execute(insert(StockBalance).values(row).on_conflict_do_nothing(index_elements=["sku", "location"]))
+    else:
+        session.execute(StockBalance.__table__.insert().values(row))
+    return session.execute(lookup).scalar_one()
+
+
+def post(
+    kind: str,
+    sku: str,
+    location: str = DEFAULT_LOCATION,
+    *,
+    on_hand: int = 0,
+    reserved: int = 0,
+    order_id: int | None = None,
+    user_id: int | None = None,
+    note: str | None = None,
+    balance_id: int | None = None,
+    session=None,
+) -> int:
+    """
+    Bucht eine Bestandsänderung (ohne Commit) und gibt die id des Bestands zurück.
+
+    Bestand und Reservierungen bleiben >= 0; außer bei Inventurkorrekturen darf
+    die Buchung die freie Menge nicht unter 0 drücken. Sonst `StockConflict`,
+    und es wurde nichts gebucht.
+    """
+    session = session or db.session
+    if balance_id is None:
+        balance_id = ensure_balance(sku, location, session=session)
+
+    new_on_hand = StockBalance.on_hand + on_hand
+    new_reserved = StockBalance.reserved + reserved
+    guards = [StockBalance.id == balance_id]
+    if on_hand < 0:
+        guards.append(new_on_hand >= 0)
+    if reserved < 0:
+        guards.append(new_reserved >= 0)
+    if kind != MovementKind.ADJUSTMENT and reserved > on_hand:
+        guards.append(new_on_hand - new_reserved >= 0)
+
+    now = datetime.utcnow()
+    result = session.execute(
+        update(StockBalance)
+        .where(*guards)
+        .values(on_hand=new_on_hand, reserved=new_reserved, updated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise StockConflict(sku, location, kind, on_hand, reserved)
+
+    mark_changed(session, sku)
+    session.add(StockMovement(
+        sku=sku,
+        location=location,
+        kind=kind,
+        delta_on_hand=on_hand,
+        delta_reserved=reserved,
+        order_id=order_id,
+        user_id=user_id,
+        note=note,
+        created_at=now,
+    ))
+    return balance_id
+
+
+def set_on_hand(sku: str, location: str, quantity: int, *, user_id: int | None = None,
+                note: str | None = None, session=None) -> int:
+    """Inventur: bucht die Differenz zum gezählten Bestand als Korrektur; Rückgabe: Differenz."""
+    session = session or db.session
+    balance_id = ensure_balance(sku, location, session=session)
+    current = session.execute(
+        select(StockBalance.on_hand).where(StockBalance.id == balance_id).with_for_update()
+    ).scalar_one()
+    delta = max(0, quantity) - current
+    if delta:
+        post(MovementKind.ADJUSTMENT, sku, location, on_hand=delta, user_id=user_id, note=note,
+             balance_id=balance_id, session=session)
+    return delta
+
+
+# ---------- Lesen ----------
+
+_available = case((StockBalance.on_hand > StockBalance.reserved, StockBalance.on_hand - StockBalance.reserved), else_=0)
+
+
+def available(sku: str, location: str | None = None, session=None) -> int:
+    """Freie Menge einer SKU (alle Lagerorte oder einer)."""
+    session = session or db.session
+    stmt = select(func.coalesce(func.sum(_available), 0)).where(StockBalance.sku == sku)
+    if location is not None:
+        stmt = stmt.where(StockBalance.location == location)
+    return int(session.execute(stmt).scalar_one())
+
+
+def available_by_sku(skus: Iterable[str], session=None) -> dict[str, int]:
+    skus = set(skus)
+    if not skus:
+        return {}
+    session = session or db.session
+    rows = session.execute(
+        select(StockBalance.sku, func.sum(_available)).where(StockBalance.sku.in_(skus)).group_by(StockBalance.sku)
+    )
+    return {sku: int(qty or 0) for sku, qty in rows}
+
+
+def available_for_products(product_ids: Iterable[int], session=None) -> dict[int, int]:
+    """Freie Menge je Shop-Produkt über `Product.sku`; Produkte ohne Bestand fehlen im Ergebnis."""
+    product_ids = set(product_ids)
+    if not product_ids:
+        return {}
+    session = session or db.session
+    rows = session.execute(
+        select(Product.id, func.sum(_available))
+        .join(StockBalance, StockBalance.sku == Product.sku)
+        .where(Product.id.in_(product_ids))
+        .group_by(Product.id)
+    )
+    return {product_id: int(qty or 0) for product_id, qty in rows}
+
+
+def stock_overview(max_available: int | None = None, order_by_available: bool = False, limit: int | None = None):
+    """
+    Stände mit Artikelname (Lagerartikel, sonst Shop-Produkt) für Lager-UI und
+    Berichte: Zeilen mit id, sku, name, location, on_hand, reserved, available.
+    """
+    stmt = (
+        select(
+            StockBalance.id,
+            StockBalance.sku,
+            func.coalesce(WarehouseProduct.name, Product.name, StockBalance.sku).label("name"),
+            StockBalance.location,
+            StockBalance.on_hand,
+            StockBalance.reserved,
+            _available.label("available"),
+        )
+        .outerjoin(WarehouseProduct, WarehouseProduct.sku == StockBalance.sku)
+        .outerjoin(Product, Product.sku == StockBalance.sku)
+    )
+    if max_available is not None:
+        stmt = stmt.where(_available <= max_available)
+    if order_by_available:
+        stmt = stmt.order_by(_available.desc(), StockBalance.id)
+    else:
+        stmt = stmt.order_by(StockBalance.sku, StockBalance.location)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return db.session.execute(stmt).all()
+
+
+# ---------- Neuaufbau / Abgleich ----------
+
+
+def _ledger_sums(conn):
+    return conn.execute(
+        select(
+            StockMovement.sku,
+            StockMovement.location,
+            func.sum(StockMovement.delta_on_hand),
+            func.sum(StockMovement.delta_reserved),
+        ).group_by(StockMovement.sku, StockMovement.location)
+    ).all()
+
+
+def rebuild() -> dict[str, int]:
+    """
+    Berechnet alle Stände aus den Buchungen neu. Bestände werden nicht gelöscht
+    (Reservierungen verweisen darauf), sondern auf 0 gesetzt und überschrieben.
+    Auf PostgreSQL ist `stock_balances` währenddessen gegen Buchungen gesperrt.
+    """
+    db.session.flush()
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"LOCK TABLE {StockBalance.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+        conn.execute(update(StockBalance).values(on_hand=0, reserved=0, updated_at=now))
+        rows = [
+            {"sku": sku, "location": location, "on_hand": int(on_hand or 0), "reserved": int(reserved or 0),
+             "updated_at": now}
+            for sku, location, on_hand, reserved in _ledger_sums(conn)
+        ]
+        if rows:
+            dialect = conn.dialect.name
+            if dialect in ("postgresql", "sqlite"):
+                insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+                stmt = insert(StockBalance.__table__)
+                conn.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["sku", "location"],
+                        set_={"on_hand": stmt.excluded.on_hand, "reserved": stmt.excluded.reserved,
+                              "updated_at": stmt.excluded.updated_at},
+                    ),
+                    rows,
+                )
+            else:
+                for row in rows:
+                    result = conn.execute(
+                        update(StockBalance)
+                        .where(StockBalance.sku == row["sku"], StockBalance.location == row["location"])
+                        .values(on_hand=row["on_hand"], reserved=row["reserved"], updated_at=now)
+                    )
+                    if result.rowcount == 0:
+                        conn.execute(StockBalance.__table__.insert(), [row])
+    logger.info("Rebuilt %s stock balances from the ledger", len(rows))
+    return {"balances": len(rows)}
+
+
+def check() -> list[Drift]:
+    """
+    Vergleicht die Stände mit der Summe der Buchungen und `reserved` mit den
+    aktiven Reservierungen. Leere Liste = konsistent.
+    """
+    db.session.flush()
+    with db.engine.connect() as conn:
+        expected = {
+            (sku, location): (int(on_hand or 0), int(reserved or 0))
+            for sku, location, on_hand, reserved in _ledger_sums(conn)
+        }
+        balances = conn.execute(
+            select(StockBalance.id, StockBalance.sku, StockBalance.location, StockBalance.on_hand, StockBalance.reserved)
+        ).all()
+        reservations = dict(conn.execute(
+            select(StockReservation.balance_id, func.sum(StockReservation.quantity))
+            .where(StockReservation.status == ReservationStatus.ACTIVE)
+            .group_by(StockReservation.balance_id)
+        ).all())
+
+    drifts = []
+    seen = set()
+    for balance_id, sku, location, on_hand, reserved in balances:
+        seen.add((sku, location))
+        exp_on_hand, exp_reserved = expected.get((sku, location), (0, 0))
+        if on_hand != exp_on_hand:
+            drifts.append(Drift(sku, location, "on_hand", exp_on_hand, on_hand))
+        if reserved != exp_reserved:
+            drifts.append(Drift(sku, location, "reserved", exp_reserved, reserved))
+        booked = int(reservations.get(balance_id) or 0)
+        if booked != exp_reserved:
+            drifts.append(Drift(sku, location, "active_reservations", exp_reserved, booked))
+    for (sku, location), (on_hand, reserved) in expected.items():
+        if (sku, location) not in seen and (on_hand or reserved):
+            drifts.append(Drift(sku, location, "missing_balance", on_hand, 0))
+    return drifts
+
+
+# ---------- Meldebestand (Commit-Hooks) ----------
+
+
+# Läuft nach den Hooks aus models.order (Storno/Versand buchen dort vor dem Commit),
+# weil dieses Modul die Modelle und damit deren Listener zuerst importiert.
+def _check_low_stock(session) -> None:
+    changed = session.info.pop(_CHANGED, None)
+    if not changed:
+        return
+    from .low_stock import evaluate
+
+    evaluate(changed, session=session)
+
+
+def _after_commit(session) -> None:
+    alerts = session.info.pop("low_stock_alerts", 0)
+    if alerts:
+        from . import alert_counter
+
+        alert_counter.adjust(+alerts)
+
+
+def _after_rollback(session, previous_transaction) -> None:
+    session.info.pop(_CHANGED, None)
+    session.info.pop("low_stock_alerts", None)
+
+
+event.listen(Session, "before_commit", _check_low_stock)
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_soft_rollback", _after_rollback)
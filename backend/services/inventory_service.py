@@ -1,45 +1,65 @@
 # file: backend/services/inventory_service.py
 
-from typing import Optional
+"""
+Bestand aus Sicht eines Shop-Produkts; alle Mengen stehen im Bestandsbuch
+(services.inventory_ledger) unter `Product.sku`.
+"""
+
+from sqlalchemy import select
 
 from ..extensions import db
-from ..models.inventory import StockItem
-from ..models.product import Product
+from ..models.inventory import MovementKind, StockBalance
+from ..models.product import Product, default_sku
+from . import inventory_ledger
+
 
+def product_sku(product: Product) -> str:
+    """SKU des Produkts; fehlt sie, wird die Standard-SKU aus dem Slug gesetzt."""
+    if not product.sku:
+        product.sku = default_sku(product.slug)
+    return product.sku
 
-def get_stock_for_product(product_id: int) -> Optional[StockItem]:
+
+def get_stock_for_product(product_id: int) -> list[StockBalance]:
     """
-    Gibt den Lagerdatensatz für ein Produkt zurück oder None.
+    Gibt die Bestände (je Lagerort) für ein Produkt zurück.
     """
-    return StockItem.query.filter_by(product_id=product_id).first()
+    return (
+        StockBalance.query.join(Product, Product.sku == StockBalance.sku)
+        .filter(Product.id == product_id)
+        .order_by(StockBalance.location)
+        .all()
+    )
+
 
+def get_available_quantity(product_id: int) -> int:
+    return inventory_ledger.available_for_products([product_id]).get(product_id, 0)
 
-def ensure_stock_item(product: Product, location: str | None = None) -> StockItem:
+
+def receive_stock(product: Product, quantity: int, location: str | None = None, note: str | None = None) -> None:
     """
-    Stellt sicher, dass ein Lagerdatensatz für das Produkt existiert.
-    Falls nicht vorhanden, wird ein Eintrag mit Nullbestand angelegt.
+    Bucht einen Wareneingang für das Produkt.
     """
-    stock = StockItem.query.filter_by(product_id=product.id).first()
-    if not stock:
-        stock = StockItem(
-            product_id=product.id,
-            quantity_total=0,
-            quantity_reserved=0,
-            location=location or "main",
-        )
-        db.session.add(stock)
-        db.session.commit()
-    return stock
-
-
-def adjust_stock(product: Product, delta_quantity: int) -> StockItem:
+    inventory_ledger.post(
+        MovementKind.RECEIPT, product_sku(product), location or inventory_ledger.DEFAULT_LOCATION,
+        on_hand=quantity, note=note,
+    )
+    db.session.commit()
+
+
+def adjust_stock(product: Product, delta_quantity: int, location: str | None = None) -> int:
     """
-    Passt die Menge des Produkts im Lager um `delta_quantity` an.
-    Kann positiv oder negativ sein.
+    Passt die Menge des Produkts im Lager um `delta_quantity` an (Korrekturbuchung).
+    Kann positiv oder negativ sein; der Bestand fällt nicht unter 0.
+    Rückgabe: neuer Bestand am Lagerort.
     """
-    stock = ensure_stock_item(product)
-    stock.quantity_total = (stock.quantity_total or 0) + delta_quantity
-    if stock.quantity_total < 0:
-        stock.quantity_total = 0
+    sku = product_sku(product)
+    location = location or inventory_ledger.DEFAULT_LOCATION
+    balance_id = inventory_ledger.ensure_balance(sku, location)
+    current = db.session.execute(
+        select(StockBalance.on_hand).where(StockBalance.id == balance_id).with_for_update()
+    ).scalar_one()
+    target = max(0, current + delta_quantity)
+    inventory_ledger.set_on_hand(sku, location, target, note="adjust_stock")
     db.session.commit()
-    return stock
+    return target
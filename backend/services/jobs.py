@@ -0,0 +1,695 @@
+# file: backend/services/jobs.py
+
+"""
+Hintergrund-Jobs: Warteschlange, Worker, Scheduler und verteilte Sperren.
+
+- Jobs sind in JOBS deklariert: Funktion als "modul:attribut", Queue, Versuche,
+  Backoff, optional Intervall + Jitter für den Scheduler
+- `enqueue` legt einen Eintrag in `job_runs` an (Queue und Historie zugleich);
+  mit JOBS_BACKEND=local — oder wenn die Tabelle fehlt — führt der aufrufende
+  Prozess den Job selbst in einem Thread-Pool aus
+- der Worker (`run_worker`) beansprucht fällige Einträge (PostgreSQL: FOR UPDATE
+  SKIP LOCKED) und führt sie mit App-Kontext aus; je Queue laufen höchstens
+  JOBS_QUEUES[queue] Jobs gleichzeitig, über alle Worker hinweg
+- `singleton`-Jobs laufen nie doppelt: vor dem Start wird eine Sperre in
+  `job_locks` genommen (Lease, verlängert per Heartbeat); ist sie belegt, wird
+  der Job ohne Versuchszählung verschoben
+- Fehler -> neuer Versuch nach backoff * 2^(Versuch-1) Sekunden (mit Jitter),
+  nach `max_attempts` Status failed; Einträge abgestürzter Worker werden nach
+  JOBS_STALE_SECONDS ohne Heartbeat erneut vergeben
+- der Scheduler stellt periodische Jobs ein; geplant wird nur von dem Prozess,
+  der die Sperre "scheduler" hält, ein Job wird nicht erneut eingestellt,
+  solange ein Lauf offen ist
+
+Start: `python -m worker.worker [--with-scheduler]`, Scheduler allein:
+`python -m scheduler.scheduler`.
+"""
+
+import importlib
+import json
+import logging
+import os
+import random
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import and_, delete, func, insert, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models.job import JobLock, JobRun, JobStatus
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class JobSpec:
+    target: str
+    queue: str = "default"
+    max_attempts: int = 3
+    # Sekunden bis zum 2. Versuch, danach jeweils verdoppelt
+    backoff: float = 30.0
+    # nie zwei Läufe gleichzeitig (Sperre je Job bzw. je `lock_key`)
+    singleton: bool = True
+    # Sperrschlüssel mit Job-Argumenten, z. B. "b2b_check_user:{user_id}"
+    lock_key: str | None = None
+    lock_ttl: int = 900
+    # Scheduler: alle `interval` Sekunden, zufällig um bis zu `jitter` Sekunden verzögert
+    interval: int | None = None
+    jitter: int = 0
+
+
+JOBS: dict[str, JobSpec] = {
+    # einzige Verarbeitung der Webhook-Inbox; kurzes Intervall, da Zahlungen darauf warten
+    "process_webhook_inbox": JobSpec("worker.tasks.process_webhook_inbox:run", interval=10, jitter=2),
+    "sync_shipping_status": JobSpec(
+        "worker.tasks.sync_shipping_status:run", queue="sync", interval=900, jitter=120, lock_ttl=1800
+    ),
+    "sync_containers": JobSpec("worker.tasks.sync_containers:run", queue="sync", interval=3600, jitter=300),
+    "sync_b2b_checks": JobSpec(
+        "worker.tasks.sync_b2b_checks:run", queue="b2b", interval=86400, jitter=1800, lock_ttl=3600
+    ),
+    "b2b_check_user": JobSpec(
+        "backend.services.b2b_checks.b2b_service:run_b2b_checks_for_user_id",
+        queue="b2b",
+        backoff=60.0,
+        lock_key="b2b_check_user:{user_id}",
+    ),
+    # nur auf Anforderung: Alerts entstehen beim Commit der Bestandsänderung (services.low_stock)
+    "low_stock_alerts": JobSpec("worker.tasks.low_stock_alerts:run"),
+    "reports_daily": JobSpec(
+        "worker.tasks.reports_daily:run", queue="reports", max_attempts=2, interval=86400, jitter=600
+    ),
+    "prune_job_history": JobSpec("backend.services.jobs:prune_history", max_attempts=1, interval=86400, jitter=600),
+}
+
+# Verschiebung, wenn die Sperre eines Jobs belegt ist (Sekunden)
+LOCK_BUSY_DELAY = 30
+
+
+def queue_limits(config) -> dict[str, int]:
+    """JOBS_QUEUES "default:4,sync:2" -> {"default": 4, "sync": 2}; Queues aus JOBS ohne Eintrag: 1."""
+    limits = {spec.queue: 1 for spec in JOBS.values()}
+    for part in (config.get("JOBS_QUEUES") or "").split(","):
+        name, _, limit = part.strip().partition(":")
+        if name:
+            limits[name] = max(1, int(limit or 1))
+    return limits
+
+
+def worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _resolve(target: str):
+    module, _, attr = target.partition(":")
+    return getattr(importlib.import_module(module), attr)
+
+
+def _lock_name(name: str, spec: JobSpec, args: dict) -> str | None:
+    if not spec.singleton:
+        return None
+    return "job:" + (spec.lock_key.format(**args) if spec.lock_key else name)
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        return json.loads(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return repr(value)[:2000]
+
+
+# ---------- verteilte Sperren ----------
+
+def acquire_lock(name: str, owner: str, ttl: float) -> bool:
+    """
+    Nimmt bzw. verlängert die Sperre `name` für `ttl` Sekunden.
+
+    Gelingt, wenn keine Sperre besteht, sie abgelaufen ist oder schon `owner` gehört.
+    """
+    now = datetime.utcnow()
+    expires_at = now + timedelta(seconds=ttl)
+    with db.engine.begin() as conn:
+        taken = conn.execute(
+            update(JobLock)
+            .where(JobLock.name == name, or_(JobLock.expires_at < now, JobLock.owner == owner))
+            .values(owner=owner, expires_at=expires_at, acquired_at=now)
+        ).rowcount
+        if taken:
+            return True
+        try:
+            with conn.begin_nested():
+                conn.execute(insert(JobLock).values(name=name, owner=owner, expires_at=expires_at, acquired_at=now))
+            return True
+        except IntegrityError:
+            return False
+
+
+def release_lock(name: str, owner: str) -> None:
+    with db.engine.begin() as conn:
+        conn.execute(delete(JobLock).where(JobLock.name == name, JobLock.owner == owner))
+
+
+# ---------- Warteschlange ----------
+
+def _backend(config) -> str:
+    return (config.get("JOBS_BACKEND") or "db").lower()
+
+
+def enqueue(name: str, args: dict | None = None, delay: float = 0) -> int | None:
+    """
+    Stellt den Job `name` mit `args` (JSON-fähig) ein, frühestens nach `delay` Sekunden.
+
+    Gibt die id in `job_runs` zurück (None, wenn ohne Tabelle im Prozess ausgeführt).
+    """
+    spec = JOBS.get(name)
+    if spec is None:
+        raise ValueError(f"Unknown job {name!r}")
+    args = args or {}
+    app = current_app._get_current_object()
+    local = _backend(app.config) == "local"
+
+    try:
+        with db.engine.begin() as conn:
+            run_id = conn.execute(
+                insert(JobRun).values(
+                    name=name,
+                    queue=spec.queue,
+                    args=args,
+                    status=JobStatus.QUEUED,
+                    attempts=0,
+                    max_attempts=spec.max_attempts,
+                    run_after=datetime.utcnow() + timedelta(seconds=delay),
+                    created_at=datetime.utcnow(),
+                )
+            ).inserted_primary_key[0]
+    except Exception:
+        logger.warning("Job queue unavailable, running %s in-process", name, exc_info=True)
+        run_id, local = None, True
+
+    if local:
+        _local_runner(app).start(run_id, name, args, delay, attempt=1)
+    return run_id
+
+
+def _claimable(now: datetime, stale_before: datetime):
+    return or_(
+        and_(JobRun.status == JobStatus.QUEUED, JobRun.run_after <= now),
+        # Worker ohne Heartbeat (abgestürzt) -> neu vergeben, solange Versuche übrig sind
+        and_(
+            JobRun.status == JobStatus.RUNNING,
+            JobRun.heartbeat_at < stale_before,
+            JobRun.attempts < JobRun.max_attempts,
+        ),
+    )
+
+
+def _claim(config, owner: str, queue: str | None, limit: int, ids: list[int] | None = None) -> list:
+    """
+    Beansprucht bis zu `limit` fällige Einträge einer Queue (bzw. die Einträge `ids`).
+
+    Zählt dabei die laufenden Jobs der Queue über alle Worker mit; auf PostgreSQL
+    serialisiert ein Advisory-Lock pro Queue Zählen und Beanspruchen.
+    """
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=int(config.get("JOBS_STALE_SECONDS", 300)))
+    with db.engine.begin() as conn:
+        postgres = conn.dialect.name == "postgresql"
+        stmt = select(JobRun.id).where(_claimable(now, stale_before))
+        if ids is not None:
+            stmt = stmt.where(JobRun.id.in_(ids))
+        else:
+            if postgres:
+                conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:q))"), {"q": f"job_queue:{queue}"})
+            running = conn.execute(
+                select(func.count())
+                .select_from(JobRun)
+                .where(JobRun.queue == queue, JobRun.status == JobStatus.RUNNING, JobRun.heartbeat_at >= stale_before)
+            ).scalar_one()
+            limit = min(limit, queue_limits(config).get(queue, 1) - running)
+            if limit <= 0:
+                return []
+            stmt = stmt.where(JobRun.queue == queue).order_by(JobRun.run_after, JobRun.id).limit(limit)
+        if postgres:
+            stmt = stmt.with_for_update(skip_locked=True)
+        candidates = list(conn.execute(stmt).scalars())
+        if not candidates:
+            return []
+        conn.execute(
+            update(JobRun)
+            .where(JobRun.id.in_(candidates), _claimable(now, stale_before))
+            .values(
+                status=JobStatus.RUNNING,
+                attempts=JobRun.attempts + 1,
+                locked_by=owner,
+                started_at=now,
+                heartbeat_at=now,
+            )
+        )
+        # ohne Zeilensperren (SQLite) kann ein anderer Prozess dazwischengekommen sein
+        return conn.execute(
+            select(JobRun.id, JobRun.name, JobRun.args, JobRun.attempts)
+            .where(JobRun.id.in_(candidates), JobRun.locked_by == owner, JobRun.started_at == now)
+        ).all()
+
+
+def _finish(run_id: int | None, owner: str, **values) -> None:
+    if run_id is None:
+        return
+    try:
+        with db.engine.begin() as conn:
+            # nur schreiben, solange der Eintrag noch diesem Lauf gehört
+            conn.execute(update(JobRun).where(JobRun.id == run_id, JobRun.locked_by == owner).values(**values))
+    except Exception:
+        logger.warning("Job run %s: result not stored", run_id, exc_info=True)
+
+
+def _fail_exhausted(config) -> int:
+    """Verwaiste Einträge ohne verbleibende Versuche als failed abschließen."""
+    now = datetime.utcnow()
+    stale_before = now - timedelta(seconds=int(config.get("JOBS_STALE_SECONDS", 300)))
+    with db.engine.begin() as conn:
+        return conn.execute(
+            update(JobRun)
+            .where(
+                JobRun.status == JobStatus.RUNNING,
+                JobRun.heartbeat_at < stale_before,
+                JobRun.attempts >= JobRun.max_attempts,
+            )
+            .values(status=JobStatus.FAILED, finished_at=now, last_error="worker lost (no heartbeat)")
+        ).rowcount
+
+
+def _pending(conn, name: str) -> bool:
+    return conn.execute(
+        select(JobRun.id).where(JobRun.name == name, JobRun.status.in_((JobStatus.QUEUED, JobStatus.RUNNING))).limit(1)
+    ).first() is not None
+
+
+# ---------- Ausführung ----------
+
+class Runner:
+    """
+    Führt beanspruchte Jobs in Thread-Pools aus (einer pro Queue, Größe = Queue-Limit).
+
+    Ein Heartbeat-Thread hält `heartbeat_at` laufender Einträge und ihre Sperren
+    frisch. `local=True`: Jobs, die dieser Prozess selbst einstellt (JOBS_BACKEND=local),
+    Wiederholungen plant der Runner dann selbst per Timer.
+    """
+
+    def __init__(self, app, owner: str, local: bool = False):
+        self.app = app
+        self.owner = owner
+        self.local = local
+        self.limits = queue_limits(app.config)
+        self.stats = {"succeeded": 0, "failed": 0, "retried": 0, "postponed": 0}
+        self._pools: dict[str, ThreadPoolExecutor] = {}
+        self._active: dict[str, int] = {}
+        # run_key -> (run_id, Sperre oder None, Sperr-Besitzer, ttl); ab dem Einreichen,
+        # damit auch wartende Einträge ihren Heartbeat behalten
+        self._running: dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._heartbeat: threading.Thread | None = None
+
+    # ----- Kapazität -----
+
+    def free_slots(self, queue: str) -> int:
+        with self._lock:
+            return self.limits.get(queue, 1) - self._active.get(queue, 0)
+
+    def idle(self) -> bool:
+        with self._lock:
+            return not any(self._active.values())
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    # ----- Einreichen -----
+
+    def start(self, run_id: int | None, name: str, args: dict, delay: float, attempt: int) -> None:
+        """Lokaler Modus: Eintrag (falls vorhanden) beanspruchen und ausführen, ggf. nach `delay`."""
+        if delay > 0:
+            timer = threading.Timer(delay, self.start, args=(run_id, name, args, 0, attempt))
+            timer.daemon = True
+            timer.start()
+            return
+        if run_id is not None:
+            with self.app.app_context():
+                try:
+                    rows = _claim(self.app.config, self.owner, None, 1, ids=[run_id])
+                except Exception:
+                    logger.warning("Job run %s: claim failed", run_id, exc_info=True)
+                    return
+                finally:
+                    db.session.remove()
+            if not rows:
+                return  # schon von einem Worker übernommen
+            attempt = rows[0].attempts
+        self.submit(run_id, name, args, attempt)
+
+    def submit(self, run_id: int | None, name: str, args: dict | None, attempt: int) -> None:
+        queue = JOBS[name].queue if name in JOBS else "default"
+        run_key = str(run_id) if run_id is not None else uuid.uuid4().hex
+        with self._lock:
+            self._running[run_key] = (run_id, None, None, 0)
+            pool = self._pools.get(queue)
+            if pool is None:
+                pool = self._pools[queue] = ThreadPoolExecutor(
+                    max_workers=self.limits.get(queue, 1), thread_name_prefix=f"job-{queue}"
+                )
+            self._active[queue] = self._active.get(queue, 0) + 1
+            if self._heartbeat is None:
+                self._heartbeat = threading.Thread(target=self._heartbeat_loop, name="job-heartbeat", daemon=True)
+                self._heartbeat.start()
+        pool.submit(self._run, run_key, run_id, name, args or {}, attempt, queue)
+
+    def _run(self, run_key, run_id, name, args, attempt, queue) -> None:
+        try:
+            with self.app.app_context():
+                self._execute(run_key, run_id, name, args, attempt)
+        except Exception:
+            logger.exception("Job %s (run %s) crashed", name, run_id)
+        finally:
+            with self._lock:
+                self._active[queue] -= 1
+                self._running.pop(run_key, None)
+
+    def _execute(self, run_key: str, run_id: int | None, name: str, args: dict, attempt: int) -> None:
+        spec = JOBS.get(name)
+        if spec is None:
+            _finish(run_id, self.owner, status=JobStatus.FAILED, finished_at=datetime.utcnow(),
+                    last_error=f"unknown job {name!r}")
+            self._count("failed")
+            return
+
+        lock_owner = f"{self.owner}:{run_key}"
+        lock = _lock_name(name, spec, args)
+        try:
+            if lock and not acquire_lock(lock, lock_owner, spec.lock_ttl):
+                logger.info("Job %s already running (%s), postponed", name, lock)
+                self._count("postponed")
+                # kein Versuch verbraucht
+                self._retry(run_id, name, args, attempt, LOCK_BUSY_DELAY, attempts=attempt - 1)
+                return
+        except Exception:
+            logger.warning("Job %s: lock store unavailable, running without lock", name, exc_info=True)
+            lock = None
+
+        with self._lock:
+            self._running[run_key] = (run_id, lock, lock_owner, spec.lock_ttl)
+        started = time.monotonic()
+        try:
+            result = _resolve(spec.target)(**args)
+        except Exception as e:
+            db.session.rollback()
+            error = f"{type(e).__name__}: {e}"[:2000]
+            if attempt < spec.max_attempts:
+                delay = spec.backoff * (2 ** (attempt - 1)) * (0.5 + random.random())
+                logger.warning("Job %s failed (attempt %d/%d), retry in %.0fs: %s",
+                               name, attempt, spec.max_attempts, delay, error)
+                self._count("retried")
+                self._retry(run_id, name, args, attempt, delay, last_error=error)
+            else:
+                logger.exception("Job %s failed after %d attempt(s)", name, attempt)
+                self._count("failed")
+                _finish(run_id, self.owner, status=JobStatus.FAILED, finished_at=datetime.utcnow(),
+                        duration_ms=int((time.monotonic() - started) * 1000), last_error=error)
+        else:
+            self._count("succeeded")
+            duration_ms = int((time.monotonic() - started) * 1000)
+            logger.info("Job %s finished in %d ms", name, duration_ms)
+            _finish(run_id, self.owner, status=JobStatus.SUCCEEDED, finished_at=datetime.utcnow(),
+                    duration_ms=duration_ms, result=_jsonable(result), last_error=None)
+        finally:
+            if lock:
+                try:
+                    release_lock(lock, lock_owner)
+                except Exception:
+                    logger.warning("Job %s: lock %s not released (expires by itself)", name, lock, exc_info=True)
+            db.session.remove()
+
+    def _retry(self, run_id, name, args, attempt, delay, **values) -> None:
+        _finish(run_id, self.owner, status=JobStatus.QUEUED, locked_by=None,
+                run_after=datetime.utcnow() + timedelta(seconds=delay), **values)
+        if self.local:
+            next_attempt = attempt + 1 if "attempts" not in values else attempt
+            timer = threading.Timer(delay, self.start, args=(run_id, name, args, 0, next_attempt))
+            timer.daemon = True
+            timer.start()
+
+    # ----- Heartbeat -----
+
+    def _heartbeat_loop(self) -> None:
+        interval = float(self.app.config.get("JOBS_HEARTBEAT_SECONDS", 30))
+        while not self._stopped.wait(interval):
+            try:
+                with self.app.app_context():
+                    self.heartbeat()
+            except Exception:
+                logger.warning("Job heartbeat failed", exc_info=True)
+
+    def heartbeat(self) -> None:
+        with self._lock:
+            running = list(self._running.values())
+        if not running:
+            return
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            run_ids = [run_id for run_id, *_ in running if run_id is not None]
+            if run_ids:
+                conn.execute(
+                    update(JobRun)
+                    .where(JobRun.id.in_(run_ids), JobRun.locked_by == self.owner)
+                    .values(heartbeat_at=now)
+                )
+            for _run_id, lock, lock_owner, ttl in running:
+                if lock:
+                    conn.execute(
+                        update(JobLock)
+                        .where(JobLock.name == lock, JobLock.owner == lock_owner)
+                        .values(expires_at=now + timedelta(seconds=ttl))
+                    )
+
+    def shutdown(self, wait: bool = True) -> None:
+        for pool in list(self._pools.values()):
+            pool.shutdown(wait=wait)
+        self._stopped.set()
+
+
+_local_lock = threading.Lock()
+_local: tuple[int, Runner] | None = None
+
+
+def _local_runner(app) -> Runner:
+    # pro Prozess (nach einem Fork neu), wie die HTTP-Sessions
+    global _local
+    with _local_lock:
+        if _local is None or _local[0] != os.getpid():
+            _local = (os.getpid(), Runner(app, worker_id() + ":local", local=True))
+        return _local[1]
+
+
+# ---------- Scheduler ----------
+
+class Scheduler:
+    """Stellt periodische Jobs (JobSpec.interval) ein; nur der Inhaber der Sperre "scheduler" plant."""
+
+    def __init__(self, owner: str, lease: float = 120.0):
+        self.owner = owner
+        self.lease = lease
+        self._next: dict[str, datetime] = {}
+
+    def _initial_due(self, conn, name: str, spec: JobSpec, now: datetime) -> datetime:
+        # Neustart / neuer Leader: am letzten Lauf orientieren, sonst verteilt starten
+        last = conn.execute(select(func.max(JobRun.created_at)).where(JobRun.name == name)).scalar()
+        if last is not None:
+            return last + timedelta(seconds=spec.interval)
+        return now + timedelta(seconds=random.uniform(0, spec.jitter))
+
+    def tick(self) -> list[str]:
+        """Ein Planungsdurchlauf; gibt die eingestellten Jobs zurück."""
+        if not acquire_lock("scheduler", self.owner, self.lease):
+            self._next.clear()
+            return []
+        now = datetime.utcnow()
+        enqueued = []
+        for name, spec in JOBS.items():
+            if not spec.interval:
+                continue
+            with db.engine.connect() as conn:
+                due = self._next.get(name) or self._initial_due(conn, name, spec, now)
+                if now < due:
+                    self._next[name] = due
+                    continue
+                pending = _pending(conn, name)
+            if not pending:
+                enqueue(name)
+                enqueued.append(name)
+            self._next[name] = now + timedelta(seconds=spec.interval + random.uniform(0, spec.jitter))
+        return enqueued
+
+    def release(self) -> None:
+        release_lock("scheduler", self.owner)
+
+
+def enqueue_periodic() -> list[str]:
+    """Alle periodischen Jobs sofort einstellen (cron-Betrieb), außer sie sind schon offen."""
+    enqueued = []
+    for name, spec in JOBS.items():
+        if not spec.interval:
+            continue
+        with db.engine.connect() as conn:
+            if _pending(conn, name):
+                continue
+        enqueue(name)
+        enqueued.append(name)
+    return enqueued
+
+
+# ---------- Worker ----------
+
+def _install_signal_handlers(stop: threading.Event) -> None:
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+
+def run_worker(
+    queues: list[str] | None = None,
+    with_scheduler: bool = False,
+    once: bool = False,
+    poll: float | None = None,
+) -> dict:
+    """
+    Worker-Schleife (im App-Kontext aufrufen). `once`: nur fällige Jobs abarbeiten, dann beenden.
+
+    SIGTERM/SIGINT: keine neuen Jobs mehr annehmen, laufende zu Ende führen.
+    Gibt die Kennzahlen {"claimed", "succeeded", "failed", "retried", "postponed"} zurück.
+    """
+    app = current_app._get_current_object()
+    config = app.config
+    poll = poll or float(config.get("JOBS_POLL_SECONDS", 2))
+    owner = worker_id()
+    runner = Runner(app, owner)
+    scheduler = Scheduler(owner, lease=max(60.0, poll * 10)) if with_scheduler else None
+    queues = queues or list(runner.limits)
+    stop = threading.Event()
+    _install_signal_handlers(stop)
+    claimed_total = 0
+    sweep_every = float(config.get("JOBS_HEARTBEAT_SECONDS", 30))
+    last_sweep = 0.0
+    logger.info("Job worker %s started, queues %s%s", owner, queues, " + scheduler" if scheduler else "")
+
+    try:
+        while not stop.is_set():
+            claimed = 0
+            try:
+                if scheduler:
+                    scheduler.tick()
+                if time.monotonic() - last_sweep >= sweep_every:
+                    _fail_exhausted(config)
+                    last_sweep = time.monotonic()
+                for queue in queues:
+                    free = runner.free_slots(queue)
+                    if free <= 0:
+                        continue
+                    for row in _claim(config, owner, queue, free):
+                        runner.submit(row.id, row.name, row.args, row.attempts)
+                        claimed += 1
+            except Exception:
+                logger.exception("Job worker loop failed")
+            finally:
+                db.session.remove()
+            claimed_total += claimed
+            if once and not claimed and runner.idle():
+                break
+            stop.wait(0.2 if once else poll)
+    finally:
+        runner.shutdown(wait=True)
+        if scheduler:
+            try:
+                scheduler.release()
+            except Exception:
+                pass
+
+    stats = {"claimed": claimed_total, **runner.stats}
+    logger.info("Job worker %s stopped: %s", owner, stats)
+    return stats
+
+
+def run_scheduler(poll: float | None = None) -> None:
+    """Nur planen (eigener Prozess), ausgeführt wird vom Worker."""
+    poll = poll or float(current_app.config.get("JOBS_POLL_SECONDS", 2))
+    scheduler = Scheduler(worker_id(), lease=max(60.0, poll * 10))
+    stop = threading.Event()
+    _install_signal_handlers(stop)
+    try:
+        while not stop.is_set():
+            try:
+                for name in scheduler.tick():
+                    logger.info("Scheduled job %s", name)
+            except Exception:
+                logger.exception("Scheduler tick failed")
+            finally:
+                db.session.remove()
+            stop.wait(poll)
+    finally:
+        scheduler.release()
+
+
+# ---------- Historie ----------
+
+def prune_history(days: int | None = None) -> dict:
+    """Abgeschlossene Läufe älter als JOBS_HISTORY_DAYS und abgelaufene Sperren löschen."""
+    days = days or int(current_app.config.get("JOBS_HISTORY_DAYS", 30))
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        runs = conn.execute(
+            delete(JobRun).where(
+                JobRun.status.in_((JobStatus.SUCCEEDED, JobStatus.FAILED)),
+                JobRun.created_at < now - timedelta(days=days),
+            )
+        ).rowcount
+        locks = conn.execute(delete(JobLock).where(JobLock.expires_at < now)).rowcount
+    return {"runs_deleted": runs, "locks_deleted": locks}
+
+
+def snapshot(limit: int = 50) -> dict:
+    """Anzahl Einträge je Queue und Status, belegte Sperren und die letzten Läufe."""
+    counts: dict[str, dict[str, int]] = {}
+    for queue, status, count in db.session.execute(
+        select(JobRun.queue, JobRun.status, func.count()).group_by(JobRun.queue, JobRun.status)
+    ):
+        counts.setdefault(queue, {})[status] = count
+    locks = [
+        {"name": lock.name, "owner": lock.owner, "expires_at": lock.expires_at.isoformat()}
+        for lock in db.session.execute(select(JobLock).where(JobLock.expires_at >= datetime.utcnow())).scalars()
+    ]
+    runs = [
+        {
+            "id": run.id,
+            "name": run.name,
+            "queue": run.queue,
+            "status": run.status,
+            "attempts": run.attempts,
+            "run_after": run.run_after.isoformat() if run.run_after else None,
+            "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+            "duration_ms": run.duration_ms,
+            "last_error": run.last_error,
+        }
+        for run in db.session.execute(select(JobRun).order_by(JobRun.id.desc()).limit(limit)).scalars()
+    ]
+    return {"queues": counts, "locks": locks, "runs": runs}
@@ -0,0 +1,188 @@
+# file: backend/services/low_stock.py
+
+"""
+Alerts bei niedrigem Bestand, ausgelöst durch Bestandsänderungen statt Polling.
+
+- `inventory_ledger.post` merkt sich die geänderten SKUs; vor dem Commit prüft
+  `evaluate` nur diese gegen ihren Meldebestand (`reorder_points`), in
+  derselben Transaktion. Der Aufwand wächst mit der Zahl der Änderungen,
+  nicht mit dem Katalog.
+- Hysterese: beim Erreichen des Meldebestands genau ein Alert (`is_low`), der
+  nächste erst, nachdem die freie Menge über Meldebestand + LOW_STOCK_HYSTERESIS
+  gestiegen und wieder gefallen ist. Die Zustandszeilen werden dabei gesperrt,
+  parallele Transaktionen erzeugen keine doppelten Alerts.
+- Alerts werden gesammelt per Bulk-INSERT angelegt.
+- `reconcile` prüft alle SKUs: `flask bootstrap` (legt nach der Migration die
+  Zustände an), nach `inventory_ledger.rebuild` oder einer Änderung des
+  Standard-Meldebestands.
+"""
+
+import logging
+from datetime import datetime
+from typing import Iterable
+
+from flask import current_app
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..extensions import db
+from ..models.alert import Alert
+from ..models.inventory import ReorderPoint, StockBalance
+from ..models.product import Product
+from ..models.warehouse import WarehouseProduct
+from . import inventory_ledger
+from .alert_service import owner_chat_id
+
+logger = logging.getLogger(__name__)
+
+ALERT_TYPE = "low_stock"
+DEFAULT_REORDER_POINT = 10
+DEFAULT_HYSTERESIS = 5
+_CHUNK = 500
+
+
+def _settings() -> tuple[int, int]:
+    try:
+        config = current_app.config
+    except RuntimeError:
+        return DEFAULT_REORDER_POINT, DEFAULT_HYSTERESIS
+    return (
+        int(config.get("LOW_STOCK_REORDER_POINT", DEFAULT_REORDER_POINT)),
+        int(config.get("LOW_STOCK_HYSTERESIS", DEFAULT_HYSTERESIS)),
+    )
+
+
+def _ensure_rows(session, skus: list[str], now: datetime) -> None:
+    """Legt fehlende Zustandszeilen an (Meldebestand = Standard), parallel sicher."""
+    rows = [{"sku": sku, "is_low": False, "updated_at": now} for sku in skus]
+    dialect = session.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert_ = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        session.execute(insert_(ReorderPoint).on_conflict_do_nothing(index_elements=["sku"]), rows)
+        return
+    existing = set(session.execute(select(ReorderPoint.sku).where(ReorderPoint.sku.in_(skus))).scalars())
+    missing = [row for row in rows if row["sku"] not in existing]
+    if missing:
+        session.execute(insert(ReorderPoint), missing)
+
+
+def _names(session, skus: Iterable[str]) -> dict[str, str]:
+    skus = list(skus)
+    names = dict(session.execute(select(Product.sku, Product.name).where(Product.sku.in_(skus))).all())
+    names.update(session.execute(select(WarehouseProduct.sku, WarehouseProduct.name).where(WarehouseProduct.sku.in_(skus))).all())
+    return names
+
+
+def evaluate(skus: Iterable[str], session=None) -> int:
+    """
+    Prüft die SKUs gegen ihren Meldebestand und legt Alerts für neu
+    unterschrittene an (ohne Commit). Rückgabe: Anzahl neuer Alerts.
+    """
+    session = session or db.session
+    skus = sorted(set(skus))
+    if not skus:
+        return 0
+    default_point, hysteresis = _settings()
+    now = datetime.utcnow()
+
+    _ensure_rows(session, skus, now)
+    states = session.execute(
+        select(ReorderPoint.id, ReorderPoint.sku, ReorderPoint.reorder_point, ReorderPoint.is_low)
+        .where(ReorderPoint.sku.in_(skus))
+        .order_by(ReorderPoint.id)
+        .with_for_update()
+    ).all()
+    available = inventory_ledger.available_by_sku(skus, session=session)
+
+    changes = []
+    crossed = []
+    for state_id, sku, point, is_low in states:
+        point = default_point if point is None else point
+        qty = available.get(sku, 0)
+        if not is_low and qty <= point:
+            changes.append({"id": state_id, "is_low": True, "available": qty, "low_since": now, "updated_at": now})
+            crossed.append((sku, qty, point))
+        elif is_low and qty > point + hysteresis:
+            changes.append({"id": state_id, "is_low": False, "available": qty, "low_since": None, "updated_at": now})
+        elif is_low:
+            # Menge für Dashboard/Snapshot aktuell halten, solange der Artikel knapp ist
+            changes.append({"id": state_id, "is_low": True, "available": qty, "updated_at": now})
+    if changes:
+        # UPDATE je Primärschlüssel (executemany)
+        session.execute(update(ReorderPoint), changes)
+    if not crossed:
+        return 0
+
+    names = _names(session, (sku for sku, _, _ in crossed))
+    target = owner_chat_id()
+    session.execute(
+        insert(Alert),
+        [
+            {
+                "type": ALERT_TYPE,
+                "channel": "telegram",
+                "target": target,
+                "payload": {"sku": sku, "name": names.get(sku, sku), "available": qty, "reorder_point": point},
+                "is_sent": False,
+                "created_at": now,
+            }
+            for sku, qty, point in crossed
+        ],
+    )
+    session.info["low_stock_alerts"] = session.info.get("low_stock_alerts", 0) + len(crossed)
+    logger.info("Low stock: %s", ", ".join(f"{sku} ({qty} <= {point})" for sku, qty, point in crossed))
+    return len(crossed)
+
+
+def set_reorder_point(sku: str, reorder_point: int | None, session=None) -> None:
+    """Setzt den Meldebestand einer SKU (None = Standard); geprüft wird beim Commit."""
+    session = session or db.session
+    _ensure_rows(session, [sku], datetime.utcnow())
+    session.execute(
+        update(ReorderPoint)
+        .where(ReorderPoint.sku == sku)
+        .values(reorder_point=reorder_point, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    inventory_ledger.mark_changed(session, sku)
+
+
+def get_reorder_point(sku: str) -> int | None:
+    """Eigener Meldebestand der SKU oder None (= Standard)."""
+    return db.session.execute(select(ReorderPoint.reorder_point).where(ReorderPoint.sku == sku)).scalar()
+
+
+def reconcile() -> dict[str, int]:
+    """Prüft alle SKUs mit Bestand oder Zustandszeile, chunkweise mit Commit."""
+    skus = sorted(set(db.session.execute(select(StockBalance.sku).distinct()).scalars())
+                  | set(db.session.execute(select(ReorderPoint.sku)).scalars()))
+    db.session.commit()
+    alerts = 0
+    for start in range(0, len(skus), _CHUNK):
+        alerts += evaluate(skus[start:start + _CHUNK])
+        db.session.commit()
+    return {"skus": len(skus), "alerts": alerts}
+
+
+def current(limit: int | None = None):
+    """
+    Knappe SKUs (is_low) mit Name, freier Menge und Meldebestand, die knappsten
+    zuerst: Zeilen mit sku, name, available, reorder_point, low_since.
+    """
+    default_point, _ = _settings()
+    stmt = (
+        select(
+            ReorderPoint.sku,
+            func.coalesce(WarehouseProduct.name, Product.name, ReorderPoint.sku).label("name"),
+            ReorderPoint.available,
+            func.coalesce(ReorderPoint.reorder_point, default_point).label("reorder_point"),
+            ReorderPoint.low_since,
+        )
+        .outerjoin(WarehouseProduct, WarehouseProduct.sku == ReorderPoint.sku)
+        .outerjoin(Product, Product.sku == ReorderPoint.sku)
+        .where(ReorderPoint.is_low.is_(True))
+        .order_by(ReorderPoint.available, ReorderPoint.sku)
+    )
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return db.session.execute(stmt).all()
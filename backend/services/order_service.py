@@ -1,12 +1,13 @@
 # file: backend/services/order_service.py
 
-from decimal import Decimal
 from typing import Iterable
 
+from sqlalchemy import insert
+
 from ..extensions import db
 from ..models.order import Order, OrderItem, OrderStatus
-from ..models.product import Product
 from ..models.user import User
+from .cart_pricing import PricedCart, price_items
 
 
 def create_order(
@@ -26,36 +27,53 @@ def create_order(
     if is_b2b is None:
         is_b2b = bool(user.is_b2b)
 
+    priced = price_items(items, is_b2b=is_b2b, currency=currency)
+    return create_order_from_priced_cart(user, priced)
+
+
+def create_order_from_priced_cart(
+    user: User,
+    priced: PricedCart,
+    shipping_address: dict | None = None,
+    commit: bool = True,
+) -> Order:
+    """
+    Legt Bestellung + Positionen aus einem `PricedCart` an (Preise werden nicht neu berechnet).
+
+    Mit `commit=False` wird nur geflusht, damit der Aufrufer (z. B. Checkout)
+    weitere Schritte in derselben Transaktion ausführen kann.
+    """
     order = Order(
         user_id=user.id,
         status=OrderStatus.NEW,
-        currency=currency,
-        is_b2b=is_b2b,
+        currency=priced.currency,
+        is_b2b=priced.is_b2b,
+        total_amount=priced.total,
+        shipping_address=shipping_address,
     )
     db.session.add(order)
     db.session.flush()  # order.id erhalten
 
-    total = Decimal("0.00")
-
-    for item in items:
-        product: Product = item["product"]
-        quantity: int = int(item.get("quantity", 1))
-
-        price = product.price_b2b if is_b2b else product.price_b2c
-        price = price or Decimal("0.00")
-
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=product.id,
-            quantity=quantity,
-            unit_price=price,
-            currency=currency,
+    # ein executemany statt je Position ein INSERT ... RETURNING id
+    if priced.lines:
+        db.session.execute(
+            insert(OrderItem),
+            [
+                {
+                    "order_id": order.id,
+                    "product_id": line.product_id,
+                    "quantity": line.quantity,
+                    "unit_price": line.unit_price,
+                    "currency": line.currency,
+                }
+                for line in priced.lines
+            ],
         )
-        db.session.add(order_item)
-        total += price * quantity
 
-    order.total_amount = total
-    db.session.commit()
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
     return order
 
 
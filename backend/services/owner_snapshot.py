@@ -0,0 +1,287 @@
+# file: backend/services/owner_snapshot.py
+
+"""
+Vorberechnete DB-Snapshots für den Inhaber-Assistenten (/api/ai/owner_query).
+
+- Pro Abteilung (warehouse, shop, sea) werden Zusammenfassungszeilen und CSV einmal
+  gebaut und als unveränderlicher `OwnerSnapshot` im Prozess gecacht (TTL).
+- Schreibzugriffe auf die zugrunde liegenden Modelle invalidieren nach dem Commit
+  nur die betroffene Abteilung; andere Worker erkennen das über die
+  DB-Generationszähler "owner_snapshot:<abteilung>".
+- Prompt-/Instruktionsdateien werden nach (Pfad, mtime, Größe) gecacht; Änderungen
+  über den Admin-Editor greifen damit sofort.
+"""
+
+import csv
+import io
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, object_session
+
+from ..database import reporting
+from ..extensions import db
+from ..models.inventory import StockMovement
+from ..models.order import Order, OrderItem
+from ..models.product import Product
+from ..models.shipping import Shipment
+from ..models.warehouse import WarehouseProduct, WarehouseTask
+from . import inventory_ledger, low_stock
+from .cache_service import GenerationTracker, TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Eingaben aus dem Telegram-Bot -> kanonischer Abteilungsname
+DEPARTMENT_ALIASES = {
+    "warehouse": "warehouse",
+    "lager": "warehouse",
+    "shop": "shop",
+    "laden": "shop",
+    "магазин": "shop",
+    "sea": "sea",
+    "see": "sea",
+    "seefracht": "sea",
+    "seetransport": "sea",
+}
+
+
+@dataclass(frozen=True)
+class OwnerSnapshot:
+    department: str
+    lines: tuple
+    csv: str | None
+    built_at: datetime
+
+
+def canonical_department(department: str | None) -> str | None:
+    return DEPARTMENT_ALIASES.get((department or "").strip().lower())
+
+
+# ---------- Snapshots bauen ----------
+
+
+def _to_csv(header: list[str], rows) -> str:
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+def _build_warehouse() -> tuple[list[str], str]:
+    # bis zu 200 Bestände aus dem Bestandsbuch, nach freier Menge absteigend: hohe und niedrige sichtbar
+    stocks = inventory_ledger.stock_overview(order_by_available=True, limit=200)
+    pending = db.session.execute(
+        select(func.count()).select_from(WarehouseTask).where(WarehouseTask.status == "pending")
+    ).scalar_one()
+    total_quantity = sum(int(s.on_hand or 0) for s in stocks)
+    total_reserved = sum(int(s.reserved or 0) for s in stocks)
+    # SKUs unter ihrem Meldebestand (services.low_stock), unabhängig vom 200er-Ausschnitt
+    low = low_stock.current(limit=20)
+
+    lines = [
+        f"Inventory snapshot: items_returned={len(stocks)} total_quantity={total_quantity} "
+        f"reserved={total_reserved}",
+        f"Low stock SKUs (at or below reorder point, up to 20): {len(low)}",
+        f"Pending warehouse tasks: {pending}",
+    ]
+    lines += [f"- {s.sku} {s.name}: available={s.available}, reorder_point={s.reorder_point}" for s in low]
+    header = ["sku", "name", "quantity", "reserved", "available", "location"]
+    return lines, _to_csv(header, ((s.sku, s.name, s.on_hand, s.reserved, s.available, s.location) for s in stocks))
+
+
+def _build_shop() -> tuple[list[str], str]:
+    recent = db.session.execute(
+        select(Order.total_amount).order_by(Order.created_at.desc()).limit(50)
+    ).scalars().all()
+    total_recent = sum(float(amount or 0) for amount in recent)
+    # Produktname direkt mitselektieren statt `item.product` pro Zeile nachzuladen
+    items = db.session.execute(
+        select(Product.name, OrderItem.quantity)
+        .join(Product, OrderItem.product_id == Product.id)
+        .order_by(OrderItem.quantity.desc())
+        .limit(50)
+    ).all()
+
+    lines = [f"Recent orders (last {len(recent)}): total_amount_sum={total_recent}"]
+    lines += [f"- {name} x{quantity}" for name, quantity in items]
+    return lines, _to_csv(["product_name", "quantity"], (tuple(i) for i in items))
+
+
+def _build_sea() -> tuple[list[str], str]:
+    upcoming = db.session.execute(
+        select(Shipment.order_id, Shipment.provider, Shipment.tracking_number, Shipment.eta)
+        .where(Shipment.eta.isnot(None))
+        .order_by(Shipment.eta.asc())
+        .limit(50)
+    ).all()
+
+    lines = [f"Upcoming shipments: {len(upcoming)}"]
+    rows = []
+    for s in upcoming:
+        eta = s.eta.strftime("%Y-%m-%d") if s.eta else ""
+        lines.append(
+            f"- Order {s.order_id} provider={s.provider} tracking={s.tracking_number} ETA={eta or 'n/a'}"
+        )
+        rows.append((s.order_id, s.provider, s.tracking_number, eta))
+    return lines, _to_csv(["order_id", "provider", "tracking_number", "eta"], rows)
+
+
+BUILDERS: dict[str, Callable[[], tuple[list[str], str]]] = {
+    "warehouse": _build_warehouse,
+    "shop": _build_shop,
+    "sea": _build_sea,
+}
+
+# Modelle, deren Änderungen den Snapshot einer Abteilung ungültig machen
+DEPENDENCIES = {
+    "warehouse": (StockMovement, WarehouseProduct, WarehouseTask),
+    "shop": (Order, OrderItem, Product),
+    "sea": (Shipment,),
+}
+
+
+def build_snapshot(department: str) -> OwnerSnapshot:
+    """Baut den Snapshot einer (kanonischen) Abteilung ohne Cache (Lesen über die Replica, falls konfiguriert)."""
+    with reporting():
+        lines, csv_text = BUILDERS[department]()
+    return OwnerSnapshot(
+        department=department,
+        lines=tuple(lines),
+        csv=csv_text,
+        built_at=datetime.utcnow(),
+    )
+
+
+# ---------- Cache ----------
+
+_cache = TTLCache(maxsize=len(BUILDERS), ttl=300.0)
+_build_locks = {name: threading.Lock() for name in BUILDERS}
+_generations = {
+    name: GenerationTracker(f"owner_snapshot:{name}", on_change=lambda name=name: _cache.pop(name))
+    for name in BUILDERS
+}
+
+
+def get_snapshot(department: str | None) -> OwnerSnapshot | None:
+    """
+    Snapshot für `department` (Aliase wie "lager" oder "seefracht" erlaubt) aus dem
+    Cache oder frisch gebaut. None, wenn es für die Abteilung keinen Snapshot gibt.
+    Gleichzeitige Anfragen nach einer Invalidierung bauen den Snapshot nur einmal.
+    """
+    name = canonical_department(department)
+    if name is None:
+        return None
+    if not has_app_context():
+        return build_snapshot(name)
+
+    config = current_app.config
+    ttl = float(config.get("OWNER_SNAPSHOT_TTL", 300))
+    if ttl <= 0:
+        return build_snapshot(name)
+    _generations[name].sync(float(config.get("OWNER_SNAPSHOT_SYNC_SECONDS", 2)))
+
+    snapshot = _cache.get(name)
+    if snapshot is not None:
+        return snapshot
+    with _build_locks[name]:
+        snapshot = _cache.get(name)
+        if snapshot is None:
+            snapshot = build_snapshot(name)
+            _cache.set(name, snapshot, ttl=ttl)
+    return snapshot
+
+
+def invalidate(*departments: str) -> None:
+    """Verwirft die Snapshots der genannten (ohne Angabe: aller) Abteilungen in allen Prozessen."""
+    for name in departments or tuple(BUILDERS):
+        _generations[name].bump()
+
+
+def stats() -> dict:
+    return {**_cache.stats(), "text_files": len(_text_cache)}
+
+
+# ---------- Prompt-/Instruktionsdateien ----------
+
+_text_cache: dict[str, tuple[tuple[int, int], str]] = {}
+_text_lock = threading.Lock()
+
+
+def read_text_cached(path: str) -> str:
+    """
+    Inhalt einer Textdatei; nur neu gelesen, wenn sich mtime oder Größe geändert haben.
+    Fehlende oder unlesbare Dateien ergeben "".
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        with _text_lock:
+            _text_cache.pop(path, None)
+        return ""
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _text_cache.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            text = fh.read() or ""
+    except Exception:
+        logger.warning("Could not read %s", path, exc_info=True)
+        return ""
+    with _text_lock:
+        _text_cache[path] = (stamp, text)
+    return text
+
+
+def read_ai_file(filename: str) -> str:
+    """Liest eine Datei aus `<app>/data/` (z. B. ai_system_prompt.txt) über den mtime-Cache."""
+    return read_text_cached(os.path.join(current_app.root_path, "data", filename))
+
+
+# ---------- Write-through-Invalidierung ----------
+
+
+def _mark_dirty(department: str):
+    def listener(mapper, connection, target) -> None:
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault("owner_snapshot_dirty", set()).add(department)
+
+    return listener
+
+
+def _after_commit(session) -> None:
+    dirty = session.info.pop("owner_snapshot_dirty", None)
+    if dirty:
+        session.info["owner_snapshot_invalidate"] = dirty
+
+
+def _after_transaction_end(session, transaction) -> None:
+    # erst jetzt: die Session hat ihre Verbindung an den Pool zurückgegeben, das Hochzählen
+    # der Generation (eigene Verbindung) kann den Pool unter Last nicht mehr erschöpfen
+    if transaction.parent is None:
+        dirty = session.info.pop("owner_snapshot_invalidate", None)
+        if dirty:
+            invalidate(*sorted(dirty))
+
+
+def _after_rollback(session, previous_transaction) -> None:
+    session.info.pop("owner_snapshot_dirty", None)
+
+
+for _department, _models in DEPENDENCIES.items():
+    _listener = _mark_dirty(_department)
+    for _model in _models:
+        for _event_name in ("after_insert", "after_update", "after_delete"):
+            event.listen(_model, _event_name, _listener)
+
+event.listen(Session, "after_commit", _after_commit)
+event.listen(Session, "after_transaction_end", _after_transaction_end)
+event.listen(Session, "after_soft_rollback", _after_rollback)
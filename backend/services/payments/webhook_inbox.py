@@ -0,0 +1,179 @@
+# file: backend/services/payments/webhook_inbox.py
+
+"""
+Inbox für eingehende Webhooks.
+
+- `record_event` speichert ein verifiziertes Ereignis genau einmal (eindeutig über
+  provider + event_id); Stripe-Wiederholungen landen nicht doppelt in der Tabelle.
+- Verarbeitet wird nur, wer einen Eintrag per UPDATE von pending/failed auf
+  processing umgestellt hat; fehlgeschlagene Einträge erst nach einer Wartezeit.
+- `drain_inbox` arbeitet offene Einträge stapelweise ab (Worker / Scheduler).
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any
+
+from flask import current_app
+from sqlalchemy import and_, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from ...extensions import db
+from ...models.webhook import WebhookEvent, WebhookEventStatus
+from .webhook_logic import handle_stripe_event
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {
+    "stripe": handle_stripe_event,
+}
+
+
+def record_event(provider: str, event_id: str, event_type: str | None, payload: dict[str, Any]) -> tuple[int, bool]:
+    """
+    Legt ein Ereignis in der Inbox ab.
+
+    Gibt (id, created) zurück; `created=False` bei einer doppelten Zustellung.
+    """
+    row = WebhookEvent(provider=provider, event_id=event_id, event_type=event_type, payload=payload)
+    db.session.add(row)
+    try:
+        db.session.commit()
+        return row.id, True
+    except IntegrityError:
+        db.session.rollback()
+        existing = WebhookEvent.query.filter_by(provider=provider, event_id=event_id).first()
+        logger.info("Duplicate %s webhook event %s ignored", provider, event_id)
+        return existing.id, False
+
+
+def _claimable_condition(now: datetime):
+    max_attempts = int(current_app.config.get("WEBHOOK_INBOX_MAX_ATTEMPTS", 8))
+    stale_before = now - timedelta(seconds=int(current_app.config.get("WEBHOOK_INBOX_STALE_SECONDS", 600)))
+    retry_before = now - timedelta(seconds=int(current_app.config.get("WEBHOOK_INBOX_RETRY_SECONDS", 60)))
+    return and_(
+        WebhookEvent.attempts < max_attempts,
+        or_(
+            WebhookEvent.status == WebhookEventStatus.PENDING,
+            and_(WebhookEvent.status == WebhookEventStatus.FAILED, WebhookEvent.locked_at < retry_before),
+            and_(WebhookEvent.status == WebhookEventStatus.PROCESSING, WebhookEvent.locked_at < stale_before),
+        ),
+    )
+
+
+def _claim(event_pk: int) -> bool:
+    now = datetime.utcnow()
+    result = db.session.execute(
+        update(WebhookEvent)
+        .where(WebhookEvent.id == event_pk, _claimable_condition(now))
+        .values(status=WebhookEventStatus.PROCESSING, locked_at=now, attempts=WebhookEvent.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def _claim_batch(limit: int) -> list[int]:
+    """
+    Beansprucht bis zu `limit` offene Einträge (älteste zuerst) in einer Transaktion.
+
+    Auf PostgreSQL mit FOR UPDATE SKIP LOCKED, damit parallele Worker disjunkte
+    Stapel bekommen statt aufeinander zu warten.
+    """
+    now = datetime.utcnow()
+    query = (
+        db.session.query(WebhookEvent.id)
+        .filter(_claimable_condition(now))
+        .order_by(WebhookEvent.created_at.asc(), WebhookEvent.id.asc())
+        .limit(limit)
+    )
+    if db.engine.dialect.name == "postgresql":
+        query = query.with_for_update(skip_locked=True)
+    ids = [row_id for (row_id,) in query.all()]
+    if not ids:
+        db.session.commit()
+        return []
+
+    result = db.session.execute(
+        update(WebhookEvent)
+        .where(WebhookEvent.id.in_(ids), _claimable_condition(now))
+        .values(status=WebhookEventStatus.PROCESSING, locked_at=now, attempts=WebhookEvent.attempts + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    if result.rowcount != len(ids):
+        # ohne Zeilensperren (SQLite) kann ein anderer Prozess dazwischengekommen sein
+        return [
+            row_id
+            for (row_id,) in db.session.query(WebhookEvent.id)
+            .filter(
+                WebhookEvent.id.in_(ids),
+                WebhookEvent.status == WebhookEventStatus.PROCESSING,
+                WebhookEvent.locked_at == now,
+            )
+            .all()
+        ]
+    return ids
+
+
+def _run_claimed(event_pk: int) -> bool:
+    row = db.session.get(WebhookEvent, event_pk)
+    handler = HANDLERS.get(row.provider)
+    try:
+        if handler is None:
+            raise ValueError(f"No handler for webhook provider {row.provider!r}")
+        handler(row.payload)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception("Processing webhook event %s (%s) failed", row.event_id, row.event_type)
+        row = db.session.get(WebhookEvent, event_pk)
+        row.status = WebhookEventStatus.FAILED
+        row.last_error = f"{type(e).__name__}: {e}"[:2000]
+        db.session.commit()
+        return False
+
+    row = db.session.get(WebhookEvent, event_pk)
+    row.status = WebhookEventStatus.PROCESSED
+    row.processed_at = datetime.utcnow()
+    row.last_error = None
+    db.session.commit()
+    logger.info("Processed webhook event %s (%s)", row.event_id, row.event_type)
+    return True
+
+
+def process_event(event_pk: int) -> bool:
+    """
+    Verarbeitet einen einzelnen Inbox-Eintrag, falls er noch offen ist.
+
+    Gibt True zurück, wenn der Eintrag in diesem Aufruf erfolgreich verarbeitet wurde.
+    """
+    if not _claim(event_pk):
+        return False
+    return _run_claimed(event_pk)
+
+
+def drain_inbox(batch_size: int | None = None, max_batches: int = 20) -> dict[str, int]:
+    """
+    Arbeitet offene Inbox-Einträge in Stapeln ab.
+
+    Gibt Zähler {"processed": .., "failed": ..} zurück.
+    """
+    batch_size = batch_size or int(current_app.config.get("WEBHOOK_INBOX_BATCH_SIZE", 50))
+    stats = {"processed": 0, "failed": 0}
+
+    for _ in range(max_batches):
+        ids = _claim_batch(batch_size)
+        if not ids:
+            break
+        for event_pk in ids:
+            try:
+                ok = _run_claimed(event_pk)
+            except Exception:
+                db.session.rollback()
+                logger.exception("Unexpected error while processing webhook event id=%s", event_pk)
+                ok = False
+            stats["processed" if ok else "failed"] += 1
+        if len(ids) < batch_size:
+            break
+
+    return stats
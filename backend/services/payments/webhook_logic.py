@@ -1,17 +1,99 @@
 # file: backend/services/payments/webhook_logic.py
 
+"""
+Fachliche Verarbeitung von Stripe-Webhook-Ereignissen.
+
+Die Handler sind idempotent: ein bereits abgeschlossenes Payment ändert den
+Bestellstatus nicht erneut, Lageraufgaben werden nur einmal angelegt.
+"""
+
+import logging
 from typing import Any
 
-from .stripe_client import mark_payment_succeeded
+from ...extensions import db
+from ...models.order import OrderStatus
+from ...models.payment import Payment
+from ...models.warehouse import WarehouseTask, WarehouseTaskStatus
+from ..prepare_shipment import prepare_shipment
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_COMPLETED = "completed"
 
 
 def handle_stripe_event(event: dict[str, Any]) -> None:
     """
-    Verarbeitung von Stripe-Webhook-Ereignissen.
-    MVP: nur payment_intent.succeeded über checkout.session.completed.
+    Verteilt ein Stripe-Ereignis auf den passenden Handler.
+    Unbekannte Typen werden nur geloggt.
     """
     event_type = event.get("type")
     data_object = event.get("data", {}).get("object", {})
 
-    if event_type == "checkout.session.completed":
-        mark_payment_succeeded(data_object)
+    if event_type == "payment_intent.succeeded":
+        handle_payment_intent_succeeded(data_object)
+    elif event_type == "checkout.session.completed":
+        handle_checkout_session_completed(data_object)
+    else:
+        logger.info("Unhandled Stripe event type: %s", event_type)
+
+
+def handle_checkout_session_completed(session: dict[str, Any]) -> None:
+    logger.info("handle_checkout_session_completed for session id=%s", session.get("id"))
+
+    payment = Payment.query.filter_by(provider_session_id=session.get("id")).first()
+
+    # Fallback: some sessions include a payment_intent id, try to find payment by that
+    if not payment:
+        pi = session.get("payment_intent") or session.get("payment")
+        if pi:
+            logger.info("No payment by session_id, trying payment_intent=%s", pi)
+            payment = Payment.query.filter_by(provider_payment_id=pi).first()
+
+    if not payment:
+        logger.warning("No Payment record found for session: %s", session.get("id"))
+        return
+
+    _complete_payment(payment, session)
+
+
+def handle_payment_intent_succeeded(payment_intent: dict[str, Any]) -> None:
+    logger.info("handle_payment_intent_succeeded for intent id=%s", payment_intent.get("id"))
+
+    payment = Payment.query.filter_by(provider_payment_id=payment_intent.get("id")).first()
+    if not payment:
+        logger.warning("No Payment record found for payment_intent: %s", payment_intent.get("id"))
+        return
+
+    _complete_payment(payment, payment_intent)
+
+
+def _complete_payment(payment: Payment, raw: dict[str, Any]) -> None:
+    """Payment + Bestellung in einer Transaktion abschließen, dann Versand vorbereiten."""
+    order = payment.order
+    if payment.status == PAYMENT_COMPLETED and order.status != OrderStatus.NEW:
+        logger.info("Payment %s already completed; skipping duplicate event", payment.id)
+        return
+
+    payment.status = PAYMENT_COMPLETED
+    payment.raw_payload = raw
+    if order.status == OrderStatus.NEW:
+        order.status = OrderStatus.PAID
+    db.session.commit()
+
+    # Ensure a WarehouseTask exists for this order (create if missing)
+    try:
+        existing = WarehouseTask.query.filter_by(order_id=order.id).first()
+        if not existing:
+            t = WarehouseTask(order_id=order.id, status=WarehouseTaskStatus.PENDING)
+            db.session.add(t)
+            db.session.commit()
+            logger.info("Created WarehouseTask id=%s for order %s (via webhook)", t.id, order.id)
+    except Exception:
+        db.session.rollback()
+        logger.exception("Failed to ensure WarehouseTask for order %s", order.id)
+
+    try:
+        prepare_shipment(order.id)
+    except Exception:
+        db.session.rollback()
+        logger.exception("prepare_shipment failed for order %s", order.id)
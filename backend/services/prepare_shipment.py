@@ -8,8 +8,9 @@ import logging
 
 from ..extensions import db
 from ..models.order import Order, OrderStatus
-from ..models.inventory import StockItem
 from ..models.warehouse import WarehouseTask, WarehouseTaskStatus
+from . import stock_reservation
+from .alert_service import create_alert, owner_chat_id
 from .shipping.shipping_service import create_shipment_for_order
 
 logger = logging.getLogger(__name__)
@@ -28,20 +29,26 @@ def prepare_shipment(order_id: int):
         logger.info("prepare_shipment: order %s status is not PAID (%s)", order_id, order.status)
         return
 
-    # Резервувати товари на складі
-    for item in order.items:
-        stock = StockItem.query.filter_by(product_id=item.product_id).first()
-        if stock and stock.available() >= item.quantity:
-            stock.quantity_reserved += item.quantity
-            db.session.add(stock)
-            logger.info("Reserved %s units of product_id=%s for order_id=%s", item.quantity, item.product_id, order.id)
-        else:
-            logger.warning("Insufficient stock for product_id=%s for order_id=%s", item.product_id, order.id)
+    # Резервувати товари на складі: усе або нічого (services.stock_reservation)
+    try:
+        stock_reservation.reserve(order.id)
+    except stock_reservation.InsufficientStock as exc:
+        # Замовлення лишається PAID, без відправлення; власник отримує алерт
+        logger.warning("%s", exc)
+        create_alert(
+            "insufficient_stock",
+            channel="telegram",
+            target=owner_chat_id(),
+            payload={"order_id": order.id, "shortages": {str(k): v for k, v in exc.shortages.items()}},
+        )
+        return
 
     # Створити warehouse task
     try:
-        task = WarehouseTask(order_id=order.id, status=WarehouseTaskStatus.PENDING)
-        db.session.add(task)
+        task = WarehouseTask.query.filter_by(order_id=order.id).first()
+        if task is None:
+            task = WarehouseTask(order_id=order.id, status=WarehouseTaskStatus.PENDING)
+            db.session.add(task)
 
         # Оновити статус на processing
         order.status = OrderStatus.PROCESSING
@@ -0,0 +1,334 @@
+# file: backend/services/product_import.py
+
+"""
+Streaming-Import von Produkten aus CSV (Lieferanten-Feeds mit 100k+ Zeilen).
+
+- die Datei wird zeilenweise gelesen (Generator), nie komplett im Speicher
+- vorhandene Produkt-Slugs werden einmal vorab geladen, Kategorien (slug -> id) erst,
+  wenn die Datei eine Spalte category_slug hat oder neue Produkte anlegt (reine
+  Preis-Feeds fassen die Kategorien nicht an)
+- Produkte werden chunkweise per INSERT ... ON CONFLICT (slug) DO UPDATE geschrieben,
+  ein Commit pro Chunk; nach einem Abbruch mit `start_row` = zuletzt gemeldetem
+  `next_row` fortsetzen
+- ungültige Zeilen landen in einer Fehlerdatei (Original-Spalten + `_row`, `_error`),
+  der Import läuft weiter
+- `dry_run` prüft und zählt nur, ohne zu schreiben
+
+Spalten: slug (Pflicht), name (Pflicht für neue Produkte); sku, category_slug, price_b2c, price_b2b,
+currency, description, main_image_url, is_active (optional; ohne sku gilt der Slug in Großbuchstaben). Beim Update werden nur die
+Spalten überschrieben, die in der Datei vorkommen.
+
+SKUs werden vor jedem Chunk geprüft: eine SKU, die schon ein anderes Produkt (oder
+eine frühere Zeile des Chunks) hat, ist ein Zeilenfehler statt eines Abbruchs des
+Chunks; die SKU eines Produkts mit Lagerbestand (Bestandsbuch) bleibt unverändert
+(`sku_kept`), eine leere sku-Zelle ändert die SKU vorhandener Produkte nicht.
+"""
+
+import csv
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Callable, Iterator
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..extensions import db
+from ..models.inventory import StockBalance
+from ..models.product import Category, Product, default_sku
+from . import catalog_cache
+
+DEFAULT_CATEGORY = "other"
+TRUE_VALUES = ("1", "true", "yes", "ja", "y", "x")
+
+# CSV-Spalte -> Produktspalten, die beim Update überschrieben werden
+_UPDATE_COLUMNS = {
+    "name": ("name",),
+    "sku": ("sku",),
+    "description": ("description",),
+    "category_slug": ("category_id",),
+    "price_b2c": ("price_b2c",),
+    "price_b2b": ("price_b2b",),
+    "currency": ("currency",),
+    "main_image_url": ("main_image_url",),
+    "is_active": ("is_active",),
+}
+
+
+def _read_rows(path: Path, start_row: int, delimiter: str) -> Iterator[tuple[int, dict, list[str]]]:
+    """(Zeilennummer ab 1, Zeile, Kopfzeile) — Zeilen bis einschließlich `start_row` werden übersprungen."""
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.DictReader(f, delimiter=delimiter)
+        for number, row in enumerate(reader, start=1):
+            if number > start_row:
+                yield number, row, reader.fieldnames or []
+
+
+def _decimal(row: dict, column: str) -> Decimal:
+    raw = (row.get(column) or "0").strip().replace(",", ".")
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise ValueError(f"{column}: invalid number {raw!r}")
+    if value < 0 or not value.is_finite():
+        raise ValueError(f"{column}: must be >= 0")
+    return value.quantize(Decimal("0.01"))
+
+
+def _parse(row: dict) -> dict:
+    """Prüft eine CSV-Zeile; ValueError mit Grund bei ungültigen Werten."""
+    slug = (row.get("slug") or "").strip()
+    name = (row.get("name") or "").strip()
+    if not slug:
+        raise ValueError("slug is required")
+    if "name" in row and not name:
+        raise ValueError("name is required")
+    if len(slug) > 255 or len(name) > 255:
+        raise ValueError("slug/name longer than 255 characters")
+    sku = (row.get("sku") or "").strip()
+    if len(sku) > 255:
+        raise ValueError("sku longer than 255 characters")
+
+    currency = (row.get("currency") or "EUR").strip().upper()
+    if not (3 <= len(currency) <= 8):
+        raise ValueError(f"currency: invalid value {currency!r}")
+
+    is_active = row.get("is_active")
+    return {
+        "slug": slug,
+        "name": name,
+        # leer: neue Produkte bekommen default_sku, vorhandene behalten ihre SKU (s. _check_skus)
+        "sku": sku or None,
+        "description": row.get("description") or None,
+        "category_slug": (row.get("category_slug") or DEFAULT_CATEGORY).strip(),
+        "price_b2c": _decimal(row, "price_b2c"),
+        "price_b2b": _decimal(row, "price_b2b"),
+        "currency": currency,
+        "main_image_url": (row.get("main_image_url") or "").strip() or None,
+        "is_active": True if is_active is None or not is_active.strip() else is_active.strip().lower() in TRUE_VALUES,
+    }
+
+
+def _insert_for(conn):
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        return postgresql.insert
+    if dialect == "sqlite":
+        return sqlite.insert
+    return None
+
+
+def _ensure_categories(conn, slugs: set[str], categories: dict[str, int], now: datetime) -> int:
+    """Legt fehlende Kategorien an (Name = Slug) und ergänzt `categories`; gibt die Anzahl neuer zurück."""
+    missing = sorted(slugs - categories.keys())
+    if not missing:
+        return 0
+    rows = [{"name": s, "slug": s, "created_at": now, "updated_at": now} for s in missing]
+    insert = _insert_for(conn)
+    if insert is not None:
+        conn.execute(insert(Category.__table__).on_conflict_do_nothing(index_elements=["slug"]), rows)
+    else:
+        conn.execute(Category.__table__.insert(), rows)
+    categories.update(conn.execute(select(Category.slug, Category.id).where(Category.slug.in_(missing))).all())
+    return len(missing)
+
+
+def _check_skus(conn, rows: list[dict]) -> tuple[dict[str, str], int]:
+    """
+    Setzt `sku` jeder Zeile (neu: default_sku, vorhanden ohne Wert / mit Lagerbestand:
+    bisherige SKU) und prüft die Eindeutigkeit vor dem Upsert.
+
+    Gibt ({slug: Fehlertext} für abzulehnende Zeilen, Anzahl beibehaltener SKUs) zurück.
+    """
+    slugs = [r["slug"] for r in rows]
+    current = dict(conn.execute(select(Product.slug, Product.sku).where(Product.slug.in_(slugs))).all())
+    for r in rows:
+        if r["sku"] is None:
+            r["sku"] = current.get(r["slug"]) or default_sku(r["slug"])
+
+    # Buchungen hängen an der SKU: Umbenennen würde den Bestand abkoppeln
+    renamed = {current[r["slug"]] for r in rows if current.get(r["slug"]) and r["sku"] != current[r["slug"]]}
+    stocked = set(
+        conn.execute(select(StockBalance.sku).where(StockBalance.sku.in_(renamed)).distinct()).scalars()
+    ) if renamed else set()
+    kept = 0
+    for r in rows:
+        if current.get(r["slug"]) in stocked and r["sku"] != current[r["slug"]]:
+            r["sku"] = current[r["slug"]]
+            kept += 1
+
+    owners = dict(conn.execute(
+        select(Product.sku, Product.slug).where(Product.sku.in_({r["sku"] for r in rows}))
+    ).all())
+    errors: dict[str, str] = {}
+    claimed: dict[str, str] = {}
+    for r in rows:
+        owner = claimed.get(r["sku"]) or owners.get(r["sku"])
+        if owner is not None and owner != r["slug"]:
+            errors[r["slug"]] = f"sku {r['sku']!r} already used by product {owner!r}"
+            continue
+        claimed[r["sku"]] = r["slug"]
+    return errors, kept
+
+
+def _upsert_products(conn, rows: list[dict], update_columns: tuple[str, ...]) -> None:
+    table = Product.__table__
+    insert = _insert_for(conn)
+    if insert is not None:
+        stmt = insert(table)
+        set_ = {col: stmt.excluded[col] for col in update_columns}
+        set_["updated_at"] = stmt.excluded.updated_at
+        conn.execute(stmt.on_conflict_do_update(index_elements=["slug"], set_=set_), rows)
+        return
+
+    # generischer Fallback (ohne Upsert-Syntax)
+    for row in rows:
+        values = {col: row[col] for col in update_columns}
+        result = conn.execute(update(table).where(table.c.slug == row["slug"]).values(values, updated_at=row["updated_at"]))
+        if result.rowcount == 0:
+            conn.execute(table.insert(), [row])
+
+
+def import_products(
+    csv_path: str | Path,
+    chunk_size: int = 1000,
+    dry_run: bool = False,
+    start_row: int = 0,
+    error_path: str | Path | None = None,
+    delimiter: str = ",",
+    progress: Callable[[dict], None] | None = None,
+) -> dict:
+    """
+    Importiert/aktualisiert Produkte aus `csv_path`.
+
+    Gibt Kennzahlen zurück: {"rows", "inserted", "updated", "duplicates", "invalid",
+    "categories_created", "sku_kept", "next_row", "seconds", "rows_per_second", "error_file"}.
+    `progress(stats)` wird nach jedem Chunk aufgerufen.
+    """
+    path = Path(csv_path)
+    if not path.exists():
+        raise FileNotFoundError(path)
+    error_path = Path(error_path) if error_path else path.with_name(path.stem + ".errors.csv")
+
+    started = time.monotonic()
+    categories: dict[str, int] | None = None
+    existing: set[str] = set(db.session.execute(select(Product.slug)).scalars())
+    # Lesetransaktion beenden; geschrieben wird chunkweise über eigene Verbindungen
+    db.session.commit()
+
+    stats = {
+        "rows": 0,
+        "inserted": 0,
+        "updated": 0,
+        "duplicates": 0,
+        "invalid": 0,
+        "categories_created": 0,
+        "sku_kept": 0,
+        "next_row": start_row,
+        "seconds": 0.0,
+        "rows_per_second": 0.0,
+        "error_file": None,
+    }
+    error_file = None
+    error_writer = None
+    header: list[str] = []
+    update_columns: tuple[str, ...] | None = None
+    with_categories = False
+    chunk: dict[str, dict] = {}
+    # slug -> (Zeilennummer, Original-Zeile) für Fehler, die erst beim Schreiben des Chunks auffallen
+    sources: dict[str, tuple[int, dict]] = {}
+
+    def reject(number: int, row: dict, error: str) -> None:
+        nonlocal error_file, error_writer
+        stats["invalid"] += 1
+        if error_writer is None:
+            append = start_row > 0 and error_path.exists()
+            error_file = error_path.open("a" if append else "w", encoding="utf-8", newline="")
+            error_writer = csv.DictWriter(error_file, fieldnames=list(header) + ["_row", "_error"], extrasaction="ignore")
+            if not append:
+                error_writer.writeheader()
+        error_writer.writerow({**row, "_row": number, "_error": error})
+        stats["error_file"] = str(error_path)
+
+    def prepare(conn) -> list[dict]:
+        """SKUs prüfen; abgelehnte Zeilen landen in der Fehlerdatei, der Rest wird geschrieben."""
+        rows = list(chunk.values())
+        chunk.clear()
+        errors, kept = _check_skus(conn, rows)
+        stats["sku_kept"] += kept
+        for slug, error in errors.items():
+            reject(*sources[slug], error)
+        sources.clear()
+        return [r for r in rows if r["slug"] not in errors]
+
+    def flush(last_row: int) -> None:
+        nonlocal categories
+        now = datetime.utcnow()
+        with db.engine.connect() if dry_run else db.engine.begin() as conn:
+            rows = prepare(conn)
+            # Kategorie wird nur geschrieben, wenn die Datei sie liefert oder das Produkt neu ist
+            resolve = with_categories or any(r["slug"] not in existing for r in rows)
+            slugs = {r["category_slug"] for r in rows} if resolve else set()
+            if resolve and categories is None:
+                categories = dict(conn.execute(select(Category.slug, Category.id)).all())
+            if dry_run:
+                if resolve:
+                    stats["categories_created"] += len(slugs - categories.keys())
+                    categories.update((s, 0) for s in slugs - categories.keys())
+            elif rows:
+                if resolve:
+                    stats["categories_created"] += _ensure_categories(conn, slugs, categories, now)
+                for r in rows:
+                    slug = r.pop("category_slug")
+                    r["category_id"] = categories[slug] if resolve else None
+                    r["created_at"] = r["updated_at"] = now
+                _upsert_products(conn, rows, update_columns)
+        for r in rows:
+            stats["updated" if r["slug"] in existing else "inserted"] += 1
+            existing.add(r["slug"])
+        stats["next_row"] = last_row
+        elapsed = time.monotonic() - started
+        stats["seconds"] = round(elapsed, 2)
+        stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed else 0.0
+        if progress:
+            progress(dict(stats))
+
+    try:
+        number = start_row
+        for number, row, header in _read_rows(path, start_row, delimiter):
+            if update_columns is None:
+                update_columns = tuple(col for csv_col, cols in _UPDATE_COLUMNS.items() if csv_col in header for col in cols)
+                with_categories = "category_slug" in header
+            stats["rows"] += 1
+            try:
+                parsed = _parse(row)
+                if not parsed["name"] and parsed["slug"] not in existing and parsed["slug"] not in chunk:
+                    # Datei ohne name-Spalte: nur vorhandene Produkte aktualisieren
+                    raise ValueError("name is required for new products")
+            except ValueError as e:
+                reject(number, row, str(e))
+                continue
+
+            if parsed["slug"] in chunk:
+                # gleiche Slug mehrfach im Chunk: letzte Zeile gewinnt (ON CONFLICT darf eine Zeile nur einmal treffen)
+                stats["duplicates"] += 1
+            chunk[parsed["slug"]] = parsed
+            sources[parsed["slug"]] = (number, row)
+            if len(chunk) >= chunk_size:
+                flush(number)
+        if chunk:
+            flush(number)
+        stats["next_row"] = number
+    finally:
+        if error_file is not None:
+            error_file.close()
+
+    if not dry_run and (stats["inserted"] or stats["updated"]):
+        # Core-Statements lösen die ORM-Events nicht aus -> Katalog-Cache explizit verwerfen
+        catalog_cache.invalidate()
+
+    elapsed = time.monotonic() - started
+    stats["seconds"] = round(elapsed, 2)
+    stats["rows_per_second"] = round(stats["rows"] / elapsed, 1) if elapsed else 0.0
+    return stats
@@ -1,41 +1,267 @@
 # file: backend/services/report_service.py
 
-from datetime import datetime, timedelta
+"""
+Звіти по продажам.
 
-from ..models.order import Order
+Вся агрегація виконується в БД (GROUP BY / SUM / COUNT); функції повертають
+легкі кортежі (NamedTuple) замість ORM-об'єктів, тож пам'ять не залежить від
+розміру історії замовлень.
+
+Денні звіти читають попередньо агреговані таблиці `sales_daily_totals` /
+`sales_daily_rollup` (O(днів) рядків, див. services.sales_rollup); з
+REPORTS_USE_ROLLUP=0 — напряму з замовлень. Період "N днів" = останні N
+календарних днів (UTC), включно з сьогоднішнім.
+
+Усі публічні функції читають через `database.reporting()` (репліка, якщо
+налаштована, і таймаут для звітів).
+
+Продажем вважається замовлення в одному зі статусів `SALES_STATUSES`
+(оплачені й далі; нові та скасовані не враховуються).
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, NamedTuple
+
+from flask import current_app
+from sqlalchemy import case, func, select
+
+from ..database import reporting_query
+from ..extensions import db
+from ..models.order import Order, OrderItem, SALES_STATUSES
+from ..models.product import Category, Product
+from ..models.report import SalesDailyRollup, SalesDailyTotal
 from ..models.user import User
+from .sales_rollup import as_date
+
+ZERO = Decimal("0")
+
+
+class TopCustomer(NamedTuple):
+    user_id: int
+    email: str
+    company_name: str | None
+    orders_count: int
+    total: float
+
+
+class PeriodSales(NamedTuple):
+    period: date
+    orders_count: int
+    total_amount: float
+
+
+class CategorySales(NamedTuple):
+    category_id: int | None
+    category_name: str | None
+    orders_count: int
+    units: int
+    revenue: float
+
+
+class CustomerTypeSales(NamedTuple):
+    is_b2b: bool
+    orders_count: int
+    total_amount: float
+
+
+def _first_day(days: int) -> date:
+    """Перший календарний день вікна "останні N днів" (включно з сьогоднішнім)."""
+    return datetime.utcnow().date() - timedelta(days=max(days, 1) - 1)
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, datetime.min.time())
+
+
+def _use_rollup() -> bool:
+    return bool(current_app.config.get("REPORTS_USE_ROLLUP", True))
+
 
+def _sales_filter(first_day: date | None = None):
+    conditions = [Order.status.in_(SALES_STATUSES)]
+    if first_day is not None:
+        conditions.append(Order.created_at >= _day_start(first_day))
+    return conditions
 
+
+@reporting_query
 def get_sales_summary(days: int = 7) -> dict:
     """
-    Простий звіт по продажам за останні N днів.
-    Пізніше можна розширити в PDF/Excel.
+    Простий звіт по продажам за останні N днів (один запит COUNT + SUM).
+    """
+    return get_sales_summaries((days,))[days]
+
+
+@reporting_query
+def get_sales_summaries(periods: Iterable[int] = (7, 30)) -> dict[int, dict]:
+    """
+    Кілька періодів одним запитом (умовна агрегація по найдовшому вікну).
+
+    Повертає {days: {"period_days", "orders_count", "total_amount"}}.
     """
-    since = datetime.utcnow() - timedelta(days=days)
-    orders = Order.query.filter(Order.created_at >= since).all()
+    periods = sorted(set(periods))
+    columns = []
+    if _use_rollup():
+        for days in periods:
+            in_window = SalesDailyTotal.day >= _first_day(days)
+            columns.append(func.coalesce(func.sum(case((in_window, SalesDailyTotal.orders_count))), 0))
+            columns.append(func.coalesce(func.sum(case((in_window, SalesDailyTotal.total_amount))), 0))
+        stmt = select(*columns).where(SalesDailyTotal.day >= _first_day(periods[-1]))
+    else:
+        for days in periods:
+            in_window = Order.created_at >= _day_start(_first_day(days))
+            columns.append(func.count(case((in_window, Order.id))))
+            columns.append(func.coalesce(func.sum(case((in_window, Order.total_amount))), 0))
+        stmt = select(*columns).where(*_sales_filter(_first_day(periods[-1])))
 
-    total_amount = sum([o.total_amount or 0 for o in orders])
-    count = len(orders)
+    row = db.session.execute(stmt).one()
 
-    return {
-        "period_days": days,
-        "orders_count": count,
-        "total_amount": float(total_amount),
-    }
+    result = {}
+    for i, days in enumerate(periods):
+        result[days] = {
+            "period_days": days,
+            "orders_count": int(row[2 * i] or 0),
+            "total_amount": float(row[2 * i + 1] or ZERO),
+        }
+    return result
 
 
-def get_top_customers(limit: int = 5) -> list[dict]:
+@reporting_query
+def get_top_customers(limit: int = 5, days: int | None = None) -> list[TopCustomer]:
     """
-    Простий список топ-клієнтів за сумою замовлень.
-    (MVP — дуже спрощено, без складних SQL).
+    Топ-клієнти за сумою замовлень (GROUP BY user_id, ORDER BY SUM DESC LIMIT n).
     """
-    users: list[User] = User.query.all()
-    results: list[dict] = []
+    total = func.sum(Order.total_amount).label("total")
+    stmt = (
+        select(User.id, User.email, User.company_name, func.count(Order.id), total)
+        .join(Order, Order.user_id == User.id)
+        .where(*_sales_filter(_first_day(days) if days else None))
+        .group_by(User.id, User.email, User.company_name)
+        .having(total > 0)
+        .order_by(total.desc())
+        .limit(limit)
+    )
+    return [
+        TopCustomer(user_id, email, company_name, int(count), float(amount or ZERO))
+        for user_id, email, company_name, count, amount in db.session.execute(stmt)
+    ]
 
-    for u in users:
-        total = sum([o.total_amount or 0 for o in u.orders])
-        if total:
-            results.append({"user": u, "total": float(total)})
 
-    results.sort(key=lambda x: x["total"], reverse=True)
-    return results[:limit]
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+@reporting_query
+def get_sales_by_period(days: int = 30, granularity: str = "day") -> list[PeriodSales]:
+    """
+    Продажі по днях або тижнях (з понеділка) за останні N днів.
+    """
+    if granularity not in ("day", "week"):
+        raise ValueError(f"Unsupported granularity: {granularity!r}")
+
+    if _use_rollup():
+        stmt = (
+            select(
+                SalesDailyTotal.day,
+                func.sum(SalesDailyTotal.orders_count),
+                func.coalesce(func.sum(SalesDailyTotal.total_amount), 0),
+            )
+            .where(SalesDailyTotal.day >= _first_day(days))
+            .group_by(SalesDailyTotal.day)
+            .order_by(SalesDailyTotal.day)
+        )
+    else:
+        day = func.date(Order.created_at).label("day")
+        stmt = (
+            select(day, func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0))
+            .where(*_sales_filter(_first_day(days)))
+            .group_by(day)
+            .order_by(day)
+        )
+
+    # höchstens N Tageszeilen -> Wochen in Python zusammenfassen
+    buckets: dict[date, list] = {}
+    for d, count, amount in db.session.execute(stmt):
+        d = as_date(d)
+        key = _week_start(d) if granularity == "week" else d
+        bucket = buckets.setdefault(key, [0, ZERO])
+        bucket[0] += int(count or 0)
+        bucket[1] += Decimal(amount or 0)
+    return [PeriodSales(period, count, float(amount)) for period, (count, amount) in buckets.items()]
+
+
+@reporting_query
+def get_sales_by_category(days: int = 30) -> list[CategorySales]:
+    """
+    Продажі по категоріях (за позиціями замовлень: кількість × ціна).
+
+    `orders_count` — замовлення з товарами категорії; у варіанті з rollup
+    замовлення з кількома товарами однієї категорії рахується по товару.
+    """
+    if _use_rollup():
+        revenue = func.coalesce(func.sum(SalesDailyRollup.revenue), 0).label("revenue")
+        stmt = (
+            select(
+                SalesDailyRollup.category_id,
+                Category.name,
+                func.coalesce(func.sum(SalesDailyRollup.orders_count), 0),
+                func.coalesce(func.sum(SalesDailyRollup.units), 0),
+                revenue,
+            )
+            .outerjoin(Category, Category.id == SalesDailyRollup.category_id)
+            .where(SalesDailyRollup.day >= _first_day(days))
+            .group_by(SalesDailyRollup.category_id, Category.name)
+            .order_by(revenue.desc())
+        )
+    else:
+        revenue = func.coalesce(func.sum(OrderItem.quantity * OrderItem.unit_price), 0).label("revenue")
+        stmt = (
+            select(
+                Category.id,
+                Category.name,
+                func.count(func.distinct(Order.id)),
+                func.coalesce(func.sum(OrderItem.quantity), 0),
+                revenue,
+            )
+            .select_from(OrderItem)
+            .join(Order, Order.id == OrderItem.order_id)
+            .join(Product, Product.id == OrderItem.product_id)
+            .outerjoin(Category, Category.id == Product.category_id)
+            .where(*_sales_filter(_first_day(days)))
+            .group_by(Category.id, Category.name)
+            .order_by(revenue.desc())
+        )
+    return [
+        CategorySales(category_id, name, int(orders), int(units or 0), float(amount or ZERO))
+        for category_id, name, orders, units, amount in db.session.execute(stmt)
+    ]
+
+
+@reporting_query
+def get_sales_by_customer_type(days: int = 30) -> list[CustomerTypeSales]:
+    """
+    Розподіл продажів B2B / B2C.
+    """
+    if _use_rollup():
+        stmt = (
+            select(
+                SalesDailyTotal.is_b2b,
+                func.sum(SalesDailyTotal.orders_count),
+                func.coalesce(func.sum(SalesDailyTotal.total_amount), 0),
+            )
+            .where(SalesDailyTotal.day >= _first_day(days))
+            .group_by(SalesDailyTotal.is_b2b)
+            .order_by(SalesDailyTotal.is_b2b)
+        )
+    else:
+        stmt = (
+            select(Order.is_b2b, func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0))
+            .where(*_sales_filter(_first_day(days)))
+            .group_by(Order.is_b2b)
+            .order_by(Order.is_b2b)
+        )
+    return [
+        CustomerTypeSales(bool(is_b2b), int(count or 0), float(amount or ZERO))
+        for is_b2b, count, amount in db.session.execute(stmt)
+    ]
@@ -0,0 +1,252 @@
+# file: backend/services/response_cache.py
+
+"""
+Response-Cache für anonyme Storefront-Seiten.
+
+- Schlüssel: Pfad + Query-String, Locale, Nutzerstufe und (für Katalogseiten)
+  die Katalog-Generation -> Katalogänderungen invalidieren automatisch.
+- ETag/Last-Modified + Conditional GET (304).
+- Backends: "memory" (pro Worker), "filesystem" (geteilt über ein Verzeichnis),
+  "redis" (über REDIS_URL, nur wenn das Paket `redis` installiert ist), "none".
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import time
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+
+from ..extensions import get_locale
+from . import catalog_cache
+from .cache_service import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Header, die nicht aus dem Cache ausgeliefert werden dürfen
+_SKIP_HEADERS = {"set-cookie", "content-length", "etag", "last-modified", "x-cache"}
+
+
+class MemoryBackend:
+    def __init__(self, maxsize: int = 1024) -> None:
+        self._cache = TTLCache(maxsize=maxsize)
+
+    def get(self, key: str) -> dict | None:
+        return self._cache.get(key)
+
+    def set(self, key: str, entry: dict, ttl: int) -> None:
+        self._cache.set(key, entry, ttl=ttl)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+class FilesystemBackend:
+    """Ein JSON-File pro Eintrag; atomar über os.replace geschrieben."""
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key: str) -> dict | None:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if stored.get("expires", 0) <= time.time():
+            return None
+        return _decode_entry(stored["entry"])
+
+    def set(self, key: str, entry: dict, ttl: int) -> None:
+        stored = {"expires": time.time() + ttl, "entry": _encode_entry(entry)}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(stored, f)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            logger.warning("Failed to write response cache entry", exc_info=True)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def clear(self) -> None:
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+class RedisBackend:
+    def __init__(self, url: str, prefix: str = "venookah2:page:") -> None:
+        import redis  # optionale Abhängigkeit
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._prefix = prefix
+
+    def get(self, key: str) -> dict | None:
+        try:
+            raw = self._client.get(self._prefix + key)
+        except Exception:
+            logger.debug("Redis response cache get failed", exc_info=True)
+            return None
+        return _decode_entry(json.loads(raw)) if raw else None
+
+    def set(self, key: str, entry: dict, ttl: int) -> None:
+        try:
+            self._client.setex(self._prefix + key, ttl, json.dumps(_encode_entry(entry)))
+        except Exception:
+            logger.debug("Redis response cache set failed", exc_info=True)
+
+    def clear(self) -> None:
+        try:
+            for k in self._client.scan_iter(self._prefix + "*"):
+                self._client.delete(k)
+        except Exception:
+            logger.debug("Redis response cache clear failed", exc_info=True)
+
+
+def _encode_entry(entry: dict) -> dict:
+    encoded = dict(entry)
+    encoded["body"] = base64.b64encode(entry["body"]).decode("ascii")
+    return encoded
+
+
+def _decode_entry(entry: dict) -> dict:
+    decoded = dict(entry)
+    decoded["body"] = base64.b64decode(entry["body"])
+    decoded["headers"] = [tuple(h) for h in entry["headers"]]
+    return decoded
+
+
+_backend = None
+_backend_name = None
+
+
+def get_backend():
+    """Erzeugt (einmal pro Prozess) das konfigurierte Backend; None = Cache aus."""
+    global _backend, _backend_name
+    name = (current_app.config.get("RESPONSE_CACHE_BACKEND") or "memory").lower()
+    if _backend is not None and name == _backend_name:
+        return _backend
+
+    backend = None
+    if name == "memory":
+        backend = MemoryBackend(int(current_app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 1024)))
+    elif name == "filesystem":
+        directory = current_app.config.get("RESPONSE_CACHE_DIR") or os.path.join(
+            tempfile.gettempdir(), "venookah2_page_cache"
+        )
+        backend = FilesystemBackend(directory)
+    elif name == "redis":
+        url = current_app.config.get("REDIS_URL") or os.getenv("REDIS_URL")
+        try:
+            backend = RedisBackend(url)
+        except Exception:
+            logger.warning("Redis response cache unavailable, falling back to memory", exc_info=True)
+            backend = MemoryBackend(int(current_app.config.get("RESPONSE_CACHE_MAX_ENTRIES", 1024)))
+
+    _backend, _backend_name = backend, name
+    return backend
+
+
+def clear() -> None:
+    backend = get_backend()
+    if backend is not None:
+        backend.clear()
+
+
+def _user_tier() -> str | None:
+    """Nur anonyme Besucher werden gecacht; für sie ist die Stufe immer "anon"."""
+    if current_user.is_authenticated:
+        return None
+    return "anon"
+
+
+def _is_cacheable_request() -> bool:
+    if request.method not in ("GET", "HEAD"):
+        return False
+    # Flash-Nachrichten sind nutzerspezifisch
+    if "_flashes" in session:
+        return False
+    return True
+
+
+def _cache_key(tier: str, catalog: bool) -> str:
+    parts = [
+        request.path,
+        "&".join(f"{k}={v}" for k, v in sorted(request.args.items(multi=True))),
+        get_locale(),
+        tier,
+    ]
+    if catalog:
+        parts.append("catalog=" + catalog_cache.version())
+    return "|".join(parts)
+
+
+def _serve(entry: dict, hit: bool):
+    response = make_response(entry["body"], entry["status"])
+    for name, value in entry["headers"]:
+        response.headers[name] = value
+    response.set_etag(entry["etag"])
+    response.last_modified = entry["last_modified"]
+    response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    response.headers["Cache-Control"] = "public, max-age=0, must-revalidate"
+    response.vary.update(("Accept-Language", "Cookie"))
+    return response.make_conditional(request)
+
+
+def cached_page(catalog: bool = False, ttl: int | None = None):
+    """
+    Dekorator für Storefront-Views: cacht die fertige Antwort für anonyme Besucher.
+
+    `catalog=True` bindet den Eintrag an die aktuelle Katalog-Generation.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(*args, **kwargs):
+            backend = get_backend()
+            tier = _user_tier()
+            if backend is None or tier is None or not _is_cacheable_request():
+                return view_func(*args, **kwargs)
+
+            key = _cache_key(tier, catalog)
+            entry = backend.get(key)
+            if entry is not None:
+                return _serve(entry, hit=True)
+
+            response = make_response(view_func(*args, **kwargs))
+            if response.status_code != 200 or response.direct_passthrough or "Set-Cookie" in response.headers:
+                return response
+
+            body = response.get_data()
+            entry = {
+                "body": body,
+                "status": response.status_code,
+                "headers": [(k, v) for k, v in response.headers.items() if k.lower() not in _SKIP_HEADERS],
+                "etag": hashlib.sha1(body).hexdigest(),
+                "last_modified": int(time.time()),
+            }
+            if catalog:
+                default_ttl = current_app.config.get("RESPONSE_CACHE_TTL", 60)
+            else:
+                default_ttl = current_app.config.get("RESPONSE_CACHE_STATIC_TTL", 3600)
+            backend.set(key, entry, int(ttl or default_ttl))
+            return _serve(entry, hit=False)
+
+        return wrapped
+
+    return decorator
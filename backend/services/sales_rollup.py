@@ -0,0 +1,408 @@
+# file: backend/services/sales_rollup.py
+
+"""
+Pflege der voraggregierten Umsatztabellen `sales_daily_rollup` (pro Produkt)
+und `sales_daily_totals` (pro Bestellung).
+
+- Inkrementell: `apply_order_deltas` wird am Ende jedes Flushes aufgerufen, in dem
+  eine Bestellung einen Umsatzstatus erreicht oder verlässt (siehe models/order.py);
+  die Änderungen laufen in derselben Transaktion wie die Statusänderung.
+- Ändert sich eine bereits gezählte Bestellung (Betrag, Währung, Datum, Positionen),
+  merkt `mark_dirty_days` ihre Tage in `sales_rollup_dirty_days` vor;
+  `repair_dirty_days` (täglicher Job) berechnet sie neu – unabhängig vom Alter.
+- `rebuild` berechnet einen Zeitraum (oder alles) neu aus den Rohdaten (Backfill).
+- `check` vergleicht die Rollups mit den Rohdaten und liefert Abweichungen.
+
+Tag = Kalendertag (UTC) von `Order.created_at`.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import and_, delete, func, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from ..extensions import db
+from ..models.order import Order, OrderItem, SALES_STATUSES
+from ..models.product import Product
+from ..models.report import SalesDailyRollup, SalesDailyTotal, SalesRollupDirtyDay
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0")
+_CHUNK = 1000
+
+_ROLLUP_KEY = ("day", "currency", "is_b2b", "product_id")
+_TOTALS_KEY = ("day", "currency", "is_b2b")
+
+
+class Mismatch(NamedTuple):
+    day: date
+    currency: str
+    is_b2b: bool
+    field: str
+    expected: Decimal
+    actual: Decimal
+
+
+def as_date(value) -> date:
+    """SQLite liefert date()-Ergebnisse als String, PostgreSQL als date."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+def _upsert_add(conn, table, key: tuple[str, ...], rows: list[dict], add: tuple[str, ...]) -> None:
+    """INSERT ... ON CONFLICT (key) DO UPDATE SET col = col + excluded.col."""
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table)
+        set_ = {col: table.c[col] + stmt.excluded[col] for col in add}
+        set_["updated_at"] = stmt.excluded.updated_at
+        conn.execute(stmt.on_conflict_do_update(index_elements=list(key), set_=set_), rows)
+        return
+
+    # generischer Fallback (ohne Upsert-Syntax)
+    for row in rows:
+        where = and_(*(table.c[col] == row[col] for col in key))
+        result = conn.execute(
+            update(table)
+            .where(where)
+            .values({col: table.c[col] + row[col] for col in add}, updated_at=row["updated_at"])
+        )
+        if result.rowcount == 0:
+            conn.execute(table.insert(), [row])
+
+
+def apply_order_deltas(conn, pending: Iterable[tuple[int, int]]) -> None:
+    """
+    Addiert (+1) bzw. subtrahiert (-1) Bestellungen in den Rollups.
+
+    `pending` = [(order_id, delta), ...] aus dem Flush; mehrere Einträge pro
+    Bestellung werden zusammengefasst.
+    """
+    deltas: dict[int, int] = defaultdict(int)
+    for order_id, delta in pending:
+        deltas[order_id] += delta
+    deltas = {order_id: max(-1, min(1, d)) for order_id, d in deltas.items() if d}
+    if not deltas:
+        return
+
+    now = datetime.utcnow()
+    orders = {
+        row.id: row
+        for row in conn.execute(
+            select(Order.id, Order.created_at, Order.currency, Order.is_b2b, Order.total_amount).where(
+                Order.id.in_(deltas)
+            )
+        )
+    }
+
+    totals: dict[tuple, list] = defaultdict(lambda: [0, ZERO])
+    for order_id, order in orders.items():
+        sign = deltas[order_id]
+        bucket = totals[(order.created_at.date(), order.currency, bool(order.is_b2b))]
+        bucket[0] += sign
+        bucket[1] += sign * Decimal(order.total_amount or 0)
+
+    products: dict[tuple, list] = {}
+    item_rows = conn.execute(
+        select(
+            OrderItem.order_id,
+            OrderItem.product_id,
+            Product.category_id,
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.quantity * OrderItem.unit_price),
+        )
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(OrderItem.order_id.in_(deltas))
+        .group_by(OrderItem.order_id, OrderItem.product_id, Product.category_id)
+    )
+    for order_id, product_id, category_id, units, revenue in item_rows:
+        order = orders.get(order_id)
+        if order is None:
+            continue
+        sign = deltas[order_id]
+        key = (order.created_at.date(), order.currency, bool(order.is_b2b), product_id)
+        bucket = products.setdefault(key, [category_id, 0, 0, ZERO])
+        bucket[1] += sign
+        bucket[2] += sign * int(units or 0)
+        bucket[3] += sign * Decimal(revenue or 0)
+
+    _upsert_add(
+        conn,
+        SalesDailyTotal.__table__,
+        _TOTALS_KEY,
+        [
+            {"day": d, "currency": c, "is_b2b": b, "orders_count": n, "total_amount": amount, "updated_at": now}
+            for (d, c, b), (n, amount) in totals.items()
+        ],
+        ("orders_count", "total_amount"),
+    )
+    _upsert_add(
+        conn,
+        SalesDailyRollup.__table__,
+        _ROLLUP_KEY,
+        [
+            {
+                "day": d,
+                "currency": c,
+                "is_b2b": b,
+                "product_id": product_id,
+                "category_id": category_id,
+                "orders_count": n,
+                "units": units,
+                "revenue": revenue,
+                "updated_at": now,
+            }
+            for (d, c, b, product_id), (category_id, n, units, revenue) in products.items()
+        ],
+        ("orders_count", "units", "revenue"),
+    )
+
+    # leere Zeilen (z. B. nach Storno) entfernen
+    days = {key[0] for key in totals}
+    conn.execute(delete(SalesDailyTotal).where(SalesDailyTotal.day.in_(days), SalesDailyTotal.orders_count <= 0))
+    conn.execute(delete(SalesDailyRollup).where(SalesDailyRollup.day.in_(days), SalesDailyRollup.orders_count <= 0))
+
+
+def sales_days(conn, order_ids: Iterable[int]) -> set[date]:
+    """Tage der Bestellungen aus `order_ids`, die aktuell als Umsatz zählen."""
+    return {
+        created_at.date()
+        for created_at in conn.execute(
+            select(Order.created_at).where(Order.id.in_(set(order_ids)), Order.status.in_(SALES_STATUSES))
+        ).scalars()
+        if created_at is not None
+    }
+
+
+def mark_dirty_days(conn, days: Iterable[date]) -> None:
+    """Merkt Tage zum Neuberechnen vor (Upsert, ein Eintrag pro Tag)."""
+    now = datetime.utcnow()
+    rows = [{"day": d, "marked_at": now} for d in sorted(set(days))]
+    if not rows:
+        return
+    table = SalesRollupDirtyDay.__table__
+    dialect = conn.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table)
+        conn.execute(
+            stmt.on_conflict_do_update(index_elements=["day"], set_={"marked_at": stmt.excluded.marked_at}), rows
+        )
+        return
+
+    # generischer Fallback (ohne Upsert-Syntax)
+    for row in rows:
+        if conn.execute(update(table).where(table.c.day == row["day"]).values(marked_at=now)).rowcount == 0:
+            conn.execute(table.insert(), [row])
+
+
+def repair_dirty_days() -> list[date]:
+    """
+    Berechnet alle vorgemerkten Tage neu und entfernt die Vormerkungen.
+
+    Ein Tag, der während des Rebuilds erneut vorgemerkt wird (marked_at danach),
+    bleibt für den nächsten Lauf stehen.
+    """
+    started = datetime.utcnow()
+    with db.engine.connect() as conn:
+        days = [
+            as_date(d)
+            for d in conn.execute(select(SalesRollupDirtyDay.day).order_by(SalesRollupDirtyDay.day)).scalars()
+        ]
+    for day in days:
+        rebuild(day, day)
+    if days:
+        with db.engine.begin() as conn:
+            conn.execute(
+                delete(SalesRollupDirtyDay).where(
+                    SalesRollupDirtyDay.day.in_(days), SalesRollupDirtyDay.marked_at <= started
+                )
+            )
+    return days
+
+
+def _range_filter(column, start: date | None, end: date | None):
+    conditions = []
+    if start is not None:
+        conditions.append(column >= datetime.combine(start, datetime.min.time()))
+    if end is not None:
+        conditions.append(column < datetime.combine(end + timedelta(days=1), datetime.min.time()))
+    return conditions
+
+
+def _day_range_filter(column, start: date | None, end: date | None):
+    conditions = []
+    if start is not None:
+        conditions.append(column >= start)
+    if end is not None:
+        conditions.append(column <= end)
+    return conditions
+
+
+def _raw_totals(conn, start: date | None, end: date | None):
+    day = func.date(Order.created_at).label("day")
+    return conn.execute(
+        select(day, Order.currency, Order.is_b2b, func.count(Order.id), func.coalesce(func.sum(Order.total_amount), 0))
+        .where(Order.status.in_(SALES_STATUSES), *_range_filter(Order.created_at, start, end))
+        .group_by(day, Order.currency, Order.is_b2b)
+    )
+
+
+def _raw_products(conn, start: date | None, end: date | None):
+    day = func.date(Order.created_at).label("day")
+    return conn.execute(
+        select(
+            day,
+            Order.currency,
+            Order.is_b2b,
+            OrderItem.product_id,
+            Product.category_id,
+            func.count(func.distinct(Order.id)),
+            func.coalesce(func.sum(OrderItem.quantity), 0),
+            func.coalesce(func.sum(OrderItem.quantity * OrderItem.unit_price), 0),
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+        .where(Order.status.in_(SALES_STATUSES), *_range_filter(Order.created_at, start, end))
+        .group_by(day, Order.currency, Order.is_b2b, OrderItem.product_id, Product.category_id)
+    )
+
+
+def _insert_chunked(conn, table, rows: Iterable[dict]) -> int:
+    count = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= _CHUNK:
+            conn.execute(table.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+        count += len(batch)
+    return count
+
+
+def rebuild(start: date | None = None, end: date | None = None) -> dict[str, int]:
+    """
+    Berechnet die Rollups für [start, end] (beide inklusive; None = offen) neu.
+
+    Auf PostgreSQL werden beide Tabellen währenddessen gegen parallele
+    inkrementelle Updates gesperrt, damit keine Änderung verloren geht.
+    """
+    now = datetime.utcnow()
+    with db.engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(
+                text(
+                    f"LOCK TABLE {SalesDailyTotal.__tablename__}, {SalesDailyRollup.__tablename__} "
+                    "IN SHARE ROW EXCLUSIVE MODE"
+                )
+            )
+        conn.execute(delete(SalesDailyTotal).where(*_day_range_filter(SalesDailyTotal.day, start, end)))
+        conn.execute(delete(SalesDailyRollup).where(*_day_range_filter(SalesDailyRollup.day, start, end)))
+
+        totals = _insert_chunked(
+            conn,
+            SalesDailyTotal.__table__,
+            (
+                {
+                    "day": as_date(d),
+                    "currency": currency,
+                    "is_b2b": bool(is_b2b),
+                    "orders_count": int(n),
+                    "total_amount": amount,
+                    "updated_at": now,
+                }
+                for d, currency, is_b2b, n, amount in _raw_totals(conn, start, end).all()
+            ),
+        )
+        rollup = _insert_chunked(
+            conn,
+            SalesDailyRollup.__table__,
+            (
+                {
+                    "day": as_date(d),
+                    "currency": currency,
+                    "is_b2b": bool(is_b2b),
+                    "product_id": product_id,
+                    "category_id": category_id,
+                    "orders_count": int(n),
+                    "units": int(units),
+                    "revenue": revenue,
+                    "updated_at": now,
+                }
+                for d, currency, is_b2b, product_id, category_id, n, units, revenue in _raw_products(
+                    conn, start, end
+                ).all()
+            ),
+        )
+    logger.info("Rebuilt sales rollup %s..%s: %s total rows, %s product rows", start, end, totals, rollup)
+    return {"totals_rows": totals, "rollup_rows": rollup}
+
+
+def check(start: date | None = None, end: date | None = None) -> list[Mismatch]:
+    """
+    Vergleicht Rollups und Rohdaten pro (Tag, Währung, B2B):
+    Anzahl/Summe der Bestellungen und Positionsumsatz. Leere Liste = konsistent.
+    """
+    expected: dict[tuple, dict[str, Decimal]] = defaultdict(lambda: defaultdict(lambda: ZERO))
+    actual: dict[tuple, dict[str, Decimal]] = defaultdict(lambda: defaultdict(lambda: ZERO))
+
+    with db.engine.connect() as conn:
+        for d, currency, is_b2b, n, amount in _raw_totals(conn, start, end):
+            key = (as_date(d), currency, bool(is_b2b))
+            expected[key]["orders_count"] += Decimal(n)
+            expected[key]["total_amount"] += Decimal(amount or 0)
+        for d, currency, is_b2b, _pid, _cid, _n, units, revenue in _raw_products(conn, start, end):
+            key = (as_date(d), currency, bool(is_b2b))
+            expected[key]["units"] += Decimal(units or 0)
+            expected[key]["revenue"] += Decimal(revenue or 0)
+
+        for d, currency, is_b2b, n, amount in conn.execute(
+            select(
+                SalesDailyTotal.day,
+                SalesDailyTotal.currency,
+                SalesDailyTotal.is_b2b,
+                SalesDailyTotal.orders_count,
+                SalesDailyTotal.total_amount,
+            ).where(*_day_range_filter(SalesDailyTotal.day, start, end))
+        ):
+            key = (as_date(d), currency, bool(is_b2b))
+            actual[key]["orders_count"] += Decimal(n)
+            actual[key]["total_amount"] += Decimal(amount or 0)
+        for d, currency, is_b2b, units, revenue in conn.execute(
+            select(
+                SalesDailyRollup.day,
+                SalesDailyRollup.currency,
+                SalesDailyRollup.is_b2b,
+                func.sum(SalesDailyRollup.units),
+                func.sum(SalesDailyRollup.revenue),
+            )
+            .where(*_day_range_filter(SalesDailyRollup.day, start, end))
+            .group_by(SalesDailyRollup.day, SalesDailyRollup.currency, SalesDailyRollup.is_b2b)
+        ):
+            key = (as_date(d), currency, bool(is_b2b))
+            actual[key]["units"] += Decimal(units or 0)
+            actual[key]["revenue"] += Decimal(revenue or 0)
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual)):
+        for field in ("orders_count", "total_amount", "units", "revenue"):
+            exp = expected[key][field]
+            act = actual[key][field]
+            if exp.quantize(Decimal("0.01")) != act.quantize(Decimal("0.01")):
+                mismatches.append(Mismatch(*key, field=field, expected=exp, actual=act))
+    return mismatches
@@ -10,6 +10,8 @@ import requests
 from flask import current_app
 from typing import Any
 
+from .. import http_client
+
 
 def _get_api_key() -> str:
     return current_app.config.get("DHL_API_KEY", "")
@@ -52,23 +54,60 @@ def get_shipment_status(tracking_number: str) -> dict[str, Any]:
     """
     Отримує статус відправлення по номеру.
     """
+    try:
+        return get_shipment_statuses([tracking_number])[tracking_number]
+    except requests.exceptions.RequestException as e:
+        current_app.logger.error(f"DHL tracking error: {e}")
+        return {
+            "tracking_number": tracking_number,
+            "status": "error",
+            "raw": {"error": str(e)},
+        }
+
+
+def get_shipment_statuses(tracking_numbers: list[str]) -> dict[str, dict[str, Any]]:
+    """
+    Статуси кількох відправлень одним запитом (DHL Shipment Tracking, trackingNumber=a,b,c).
+
+    Повертає {tracking_number: {"tracking_number", "status", "events", "raw"}};
+    номери, яких немає у відповіді DHL, отримують статус "unknown".
+    """
     api_key = _get_api_key()
     if not api_key:
         return {
-            "tracking_number": tracking_number,
-            "status": "unknown",
-            "raw": {"mock": True, "reason": "no_api_key"},
+            tn: {"tracking_number": tn, "status": "unknown", "raw": {"mock": True, "reason": "no_api_key"}}
+            for tn in tracking_numbers
         }
 
-    # TODO: Реальний виклик
-    # response = requests.get(f"{_get_base_url()}/track/{tracking_number}", headers={"Authorization": f"Bearer {api_key}"})
+    response = http_client.get(
+        "dhl",
+        f"{_get_base_url()}/track/shipments",
+        params={"trackingNumber": ",".join(tracking_numbers)},
+        headers={"DHL-API-Key": api_key, "Accept": "application/json"},
+    )
+    if response.status_code == 404:
+        # DHL antwortet mit 404, wenn keiner der Nummern bekannt ist
+        data = {"shipments": []}
+    else:
+        response.raise_for_status()
+        data = response.json()
 
-    return {
-        "tracking_number": tracking_number,
-        "status": "in_transit",
-        "events": [
-            {"date": "2023-11-01", "description": "Отправлено"},
-            {"date": "2023-11-02", "description": "В пути"},
-        ],
-        "raw": {"mock": False},
+    result = {
+        tn: {"tracking_number": tn, "status": "unknown", "raw": {"reason": "not_found"}}
+        for tn in tracking_numbers
     }
+    for shipment in data.get("shipments", []):
+        tn = shipment.get("id")
+        if tn not in result:
+            continue
+        status = shipment.get("status") or {}
+        result[tn] = {
+            "tracking_number": tn,
+            "status": status.get("statusCode") or "unknown",
+            "events": [
+                {"date": ev.get("timestamp"), "description": ev.get("description") or ev.get("status", "")}
+                for ev in shipment.get("events", [])
+            ],
+            "raw": shipment,
+        }
+    return result
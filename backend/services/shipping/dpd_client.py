@@ -7,12 +7,19 @@ DPD API client.
 """
 
 import requests
+from datetime import datetime, timedelta, timezone
 from flask import current_app
 from typing import Any, Optional
-import time
 
-# Кеш для токена
-_token_cache = {"token": None, "expires": 0}
+from .. import http_client
+from ..credential_cache import CredentialCache
+
+try:
+    from zoneinfo import ZoneInfo
+
+    _DPD_TZ = ZoneInfo("Europe/Berlin")
+except Exception:  # немає бази часових поясів (напр. Windows без tzdata)
+    _DPD_TZ = timezone(timedelta(hours=1))
 
 
 def _get_api_credentials() -> dict[str, str]:
@@ -27,15 +34,19 @@ def _get_base_url() -> str:
     return current_app.config.get("DPD_BASE_URL", "https://public-ws-stage.dpd.com")
 
 
-def _get_auth_token() -> Optional[str]:
+def token_expiry(now: datetime) -> datetime:
     """
-    Отримує токен аутентифікації DPD.
-    Кешує токен на день.
+    Токен DPD дійсний до наступної 03:00 за німецьким часом.
+    `now` і результат — UTC без tzinfo (як datetime.utcnow()).
     """
-    now = time.time()
-    if _token_cache["token"] and now < _token_cache["expires"]:
-        return _token_cache["token"]
+    local = now.replace(tzinfo=timezone.utc).astimezone(_DPD_TZ)
+    cutoff = local.replace(hour=3, minute=0, second=0, microsecond=0)
+    if cutoff <= local:
+        cutoff += timedelta(days=1)
+    return cutoff.astimezone(timezone.utc).replace(tzinfo=None)
 
+
+def _login() -> Optional[tuple[str, datetime]]:
     credentials = _get_api_credentials()
     url = f"{_get_base_url()}/services/LoginService/V2_0/getAuth"
     payload = {
@@ -44,20 +55,29 @@ def _get_auth_token() -> Optional[str]:
         "messageLanguage": credentials["messageLanguage"],
     }
     try:
-        response = requests.post(url, json=payload, timeout=10)
+        response = http_client.post("dpd", url, json=payload, idempotent=True)
         response.raise_for_status()
-        data = response.json()
-        token = data.get("token")
-        if token:
-            # Токен действителен до 03:00 CET, но для простоты кеш на 24 часа
-            _token_cache["token"] = token
-            _token_cache["expires"] = now + 86400  # 24 hours
-        return token
+        token = response.json().get("token")
+        if not token:
+            return None
+        return token, token_expiry(datetime.utcnow())
     except Exception as e:
         current_app.logger.error(f"DPD auth error: {e}")
         return None
 
 
+# Один токен на всі процеси (таблиця cached_credentials), оновлення до 03:00
+_token_cache = CredentialCache("dpd", _login)
+
+
+def _get_auth_token() -> Optional[str]:
+    """
+    Отримує токен аутентифікації DPD (спільний кеш, див. services.credential_cache).
+    """
+    _token_cache.refresh_ahead = current_app.config.get("DPD_TOKEN_REFRESH_AHEAD", 1800)
+    return _token_cache.get()
+
+
 def create_shipment(order_id: int) -> dict[str, Any]:
     """
     Створює відправлення через DPD API.
@@ -89,7 +109,15 @@ def get_shipment_status(tracking_number: str) -> dict[str, Any]:
     payload = {"parcelLabelNumber": tracking_number}
 
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=10)
+        # getTrackingData ist lesend -> Retries erlaubt
+        response = http_client.post("dpd", url, json=payload, headers=headers, idempotent=True)
+        if response.status_code == 401:
+            # Токен відкликано раніше строку -> один раз з новим токеном
+            _token_cache.invalidate(token)
+            token = _get_auth_token()
+            if token:
+                headers = {"Authorization": f"Bearer {token}"}
+                response = http_client.post("dpd", url, json=payload, headers=headers, idempotent=True)
         response.raise_for_status()
         data = response.json()
 
@@ -0,0 +1,249 @@
+# file: backend/services/shipping/tracking_sync.py
+
+"""
+Tracking-Sync: Versandstatus offener Sendungen bei DHL/DPD abfragen.
+
+- abgefragt werden nur Sendungen beim Carrier (ohne Lager- und Endstatus),
+  die am längsten nicht geprüften zuerst (`tracking_checked_at`)
+- die Anfragen laufen parallel in einem begrenzten Thread-Pool, je Carrier mit
+  eigenem Ratenlimit; DHL per Sammelabfrage (mehrere Nummern pro Request)
+- geschrieben werden nur Sendungen, deren Status sich geändert hat, in Chunks
+  mit eigenem Commit; alle übrigen bekommen nur `tracking_checked_at`
+- jeder Lauf liefert und loggt seine Kennzahlen (Anzahl, Fehler, Sendungen/s)
+
+Die Carrier-URLs kommen aus DHL_BASE_URL / DPD_BASE_URL, lokal z. B. auf
+`python -m scripts.mock_carriers` zeigen.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable
+
+from flask import current_app
+from sqlalchemy import bindparam, select, update
+
+from ...extensions import db
+from ...models.shipping import PRE_DISPATCH_STATUSES, TERMINAL_STATUSES, Shipment
+from . import dhl_client, dpd_client
+
+logger = logging.getLogger(__name__)
+
+# Carrier-Status -> eigener Sendungsstatus (unbekannte Werte werden klein übernommen)
+_STATUS_MAP = {
+    # DHL statusCode
+    "pre-transit": "shipped",
+    "transit": "in_transit",
+    "failure": "exception",
+    # DPD
+    "accepted": "shipped",
+    "at_sending_depot": "in_transit",
+    "on_the_road": "in_transit",
+    "at_delivery_depot": "in_transit",
+}
+# Antworten ohne verwertbare Information ändern den Status nicht
+_NO_INFO = ("", "unknown", "error", "auth_failed")
+
+
+def _fetch_dhl(tracking_numbers: list[str]) -> dict[str, dict[str, Any]]:
+    return dhl_client.get_shipment_statuses(tracking_numbers)
+
+
+def _fetch_dpd(tracking_numbers: list[str]) -> dict[str, dict[str, Any]]:
+    # DPD hat keinen Sammel-Endpunkt: eine Anfrage pro Paket
+    return {tn: dpd_client.get_shipment_status(tn) for tn in tracking_numbers}
+
+
+# provider -> (Abfragefunktion, Config-Key der Batch-Größe oder None)
+FETCHERS: dict[str, tuple[Callable[[list[str]], dict], str | None]] = {
+    "dhl": (_fetch_dhl, "SHIPPING_SYNC_DHL_BATCH"),
+    "dpd": (_fetch_dpd, None),
+}
+
+
+def normalize_status(raw_status: str | None) -> str | None:
+    """Carrier-Status auf den eigenen Status abbilden; None = keine Information."""
+    status = (raw_status or "").strip().lower()
+    if status in _NO_INFO:
+        return None
+    return _STATUS_MAP.get(status, status)
+
+
+class RateLimiter:
+    """Token-Bucket (thread-safe): höchstens `rate` Anfragen pro Sekunde, 0 = unbegrenzt."""
+
+    def __init__(self, rate: float):
+        self.rate = float(rate)
+        self.capacity = max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _select_due(limit: int) -> list:
+    stmt = (
+        select(Shipment.id, Shipment.provider, Shipment.tracking_number, Shipment.status)
+        .where(
+            Shipment.provider.in_(list(FETCHERS)),
+            Shipment.tracking_number.isnot(None),
+            Shipment.status.notin_(PRE_DISPATCH_STATUSES + TERMINAL_STATUSES),
+        )
+        .order_by(Shipment.tracking_checked_at)
+        .limit(limit)
+    )
+    return db.session.execute(stmt).all()
+
+
+def _build_jobs(rows, config) -> list[tuple[str, list[str]]]:
+    by_provider: dict[str, dict[str, None]] = {}
+    for row in rows:
+        by_provider.setdefault(row.provider, {})[row.tracking_number] = None
+
+    jobs = []
+    for provider, unique in by_provider.items():
+        numbers = list(unique)
+        _fetch, batch_key = FETCHERS[provider]
+        size = max(1, int(config.get(batch_key, 1))) if batch_key else 1
+        jobs.extend((provider, numbers[i:i + size]) for i in range(0, len(numbers), size))
+    return jobs
+
+
+def _fetch(app, limiter: RateLimiter, provider: str, tracking_numbers: list[str]) -> dict:
+    limiter.acquire()
+    with app.app_context():
+        fetch, _batch_key = FETCHERS[provider]
+        return fetch(tracking_numbers)
+
+
+# Nur schreiben, wenn der Status seit dem Lesen unverändert ist (Lager/Admin könnten parallel ändern)
+_UPDATE_CHANGED = (
+    update(Shipment.__table__)
+    .where(Shipment.__table__.c.id == bindparam("b_id"))
+    .where(Shipment.__table__.c.status == bindparam("b_old_status"))
+    .values(
+        status=bindparam("b_status"),
+        raw_payload=bindparam("b_raw"),
+        updated_at=bindparam("b_now"),
+        tracking_checked_at=bindparam("b_now"),
+    )
+)
+
+
+def _write(changes: list[dict], checked_ids: list[int], now: datetime) -> None:
+    if changes:
+        db.session.execute(_UPDATE_CHANGED, changes)
+    if checked_ids:
+        db.session.execute(
+            update(Shipment.__table__)
+            .where(Shipment.__table__.c.id.in_(checked_ids))
+            .values(tracking_checked_at=now)
+        )
+    db.session.commit()
+
+
+def sync_tracking(limit: int | None = None) -> dict:
+    """
+    Ein Sync-Lauf. Gibt die Kennzahlen zurück:
+    {"selected", "requests", "changed", "unchanged", "no_info", "errors",
+     "seconds", "per_second", "carriers": {provider: {"requests", "shipments", "errors"}}}
+    """
+    app = current_app._get_current_object()
+    config = app.config
+    limit = limit or config.get("SHIPPING_SYNC_MAX_PER_RUN", 500)
+    chunk_size = max(1, int(config.get("SHIPPING_SYNC_COMMIT_CHUNK", 100)))
+    workers = max(1, int(config.get("SHIPPING_SYNC_WORKERS", 8)))
+
+    started = time.monotonic()
+    rows = _select_due(limit)
+    # Lesetransaktion beenden, bevor die (langsamen) Carrier-Anfragen laufen
+    db.session.commit()
+
+    stats = {
+        "selected": len(rows),
+        "requests": 0,
+        "changed": 0,
+        "unchanged": 0,
+        "no_info": 0,
+        "errors": 0,
+        "carriers": {},
+    }
+    targets: dict[tuple[str, str], list] = {}
+    for row in rows:
+        targets.setdefault((row.provider, row.tracking_number), []).append(row)
+
+    limiters = {p: RateLimiter(config.get(f"SHIPPING_SYNC_RATE_{p.upper()}", 5)) for p in FETCHERS}
+    jobs = _build_jobs(rows, config)
+    changes: list[dict] = []
+    checked_ids: list[int] = []
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(jobs)) or 1) as pool:
+        futures = {pool.submit(_fetch, app, limiters[p], p, numbers): (p, numbers) for p, numbers in jobs}
+        for future in as_completed(futures):
+            provider, numbers = futures[future]
+            carrier = stats["carriers"].setdefault(provider, {"requests": 0, "shipments": 0, "errors": 0})
+            carrier["requests"] += 1
+            stats["requests"] += 1
+            now = datetime.utcnow()
+
+            try:
+                results = future.result()
+            except Exception as e:
+                results = {}
+                logger.warning("Tracking request to %s failed for %d parcel(s): %s", provider, len(numbers), e)
+
+            for tn in numbers:
+                data = results.get(tn) or {}
+                new_status = normalize_status(data.get("status"))
+                for row in targets[(provider, tn)]:
+                    carrier["shipments"] += 1
+                    if new_status is None:
+                        if not data or data.get("status") in ("error", "auth_failed"):
+                            stats["errors"] += 1
+                            carrier["errors"] += 1
+                        else:
+                            stats["no_info"] += 1
+                        checked_ids.append(row.id)
+                    elif new_status == row.status:
+                        stats["unchanged"] += 1
+                        checked_ids.append(row.id)
+                    else:
+                        stats["changed"] += 1
+                        changes.append({
+                            "b_id": row.id,
+                            "b_old_status": row.status,
+                            "b_status": new_status,
+                            "b_raw": data.get("raw"),
+                            "b_now": now,
+                        })
+
+            if len(changes) + len(checked_ids) >= chunk_size:
+                _write(changes, checked_ids, now)
+                changes, checked_ids = [], []
+
+    if changes or checked_ids:
+        _write(changes, checked_ids, datetime.utcnow())
+
+    stats["seconds"] = round(time.monotonic() - started, 3)
+    stats["per_second"] = round(stats["selected"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+    logger.info(
+        "Tracking sync: %(selected)d shipments, %(requests)d requests, %(changed)d changed, "
+        "%(errors)d errors in %(seconds).2fs (%(per_second).1f/s)",
+        stats,
+    )
+    return stats
@@ -0,0 +1,232 @@
+# file: backend/services/stock_reservation.py
+
+"""
+Lagerreservierung für Bestellungen: alles oder nichts, ohne Überverkauf.
+
+- `reserve_order` sperrt zuerst die Bestellung und dann alle Bestände der
+  benötigten SKUs (`Product.sku`) in einem `SELECT ... FOR UPDATE` (nach id
+  sortiert, damit sich parallele Reservierungen nicht gegenseitig blockieren),
+  verteilt die Mengen auf die Lagerorte und bucht sie im Bestandsbuch
+  (services.inventory_ledger). Dessen bedingtes UPDATE schützt auch dort,
+  wo es keine Zeilensperren gibt (SQLite).
+- Fehlt Bestand, wird nichts gebucht (`InsufficientStock` mit den Fehlmengen).
+- Je Bestand entsteht eine Zeile in `stock_reservations`. Ein Storno gibt sie
+  mit `release_order` frei, der Versand bucht sie mit `pick_order` als
+  Entnahme aus (beides ausgelöst in models.order).
+- Erneuter Aufruf für dieselbe Bestellung (doppelte Webhooks) bucht nichts.
+"""
+
+import logging
+import time
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy import exists, func, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from ..extensions import db
+from ..models.inventory import MovementKind, ReservationStatus, StockBalance, StockReservation
+from ..models.order import Order, OrderItem
+from ..models.product import Product
+from . import inventory_ledger
+
+logger = logging.getLogger(__name__)
+
+# Wiederholungen bei Sperrkonflikten (Deadlock, "database is locked")
+RETRY_ATTEMPTS = 3
+RETRY_DELAY = 0.05
+
+
+class InsufficientStock(Exception):
+    """Nicht genug freier Bestand; `shortages` = {product_id: fehlende Menge}."""
+
+    def __init__(self, order_id: int, shortages: dict[int, int]):
+        detail = ", ".join(f"product {pid}: {qty} missing" for pid, qty in sorted(shortages.items()))
+        super().__init__(f"Insufficient stock for order {order_id}: {detail}")
+        self.order_id = order_id
+        self.shortages = shortages
+
+
+class Allocation(NamedTuple):
+    balance_id: int
+    sku: str
+    location: str
+    product_id: int
+    quantity: int
+
+
+def _needed(session, order_id: int) -> dict[int, int]:
+    rows = session.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity))
+        .where(OrderItem.order_id == order_id)
+        .group_by(OrderItem.product_id)
+    )
+    return {product_id: int(qty) for product_id, qty in rows if qty and qty > 0}
+
+
+def _allocate(needed: dict[int, int], skus: dict[int, str], rows) -> tuple[list[Allocation], dict[int, int]]:
+    """Verteilt den Bedarf je Produkt auf die Bestände seiner SKU (nach id)."""
+    remaining = dict(needed)
+    product_by_sku = {sku: pid for pid, sku in skus.items()}
+    allocation = []
+    for balance_id, sku, location, on_hand, reserved in rows:
+        product_id = product_by_sku.get(sku)
+        want = remaining.get(product_id, 0)
+        free = max(0, (on_hand or 0) - (reserved or 0))
+        take = min(want, free)
+        if take:
+            allocation.append(Allocation(balance_id, sku, location, product_id, take))
+            remaining[product_id] = want - take
+    shortages = {pid: qty for pid, qty in remaining.items() if qty > 0}
+    return allocation, shortages
+
+
+def _lock_order(session, order_id: int) -> None:
+    """Gleichzeitige Aufrufe für dieselbe Bestellung laufen nacheinander."""
+    if session.get_bind().dialect.name == "sqlite":
+        # SQLite ignoriert FOR UPDATE: ein leeres UPDATE holt die Schreibsperre der
+        # Datenbank, alle folgenden Lesezugriffe sehen damit den aktuellen Stand
+        session.execute(
+            update(Order).where(Order.id == order_id).values(updated_at=Order.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+    else:
+        session.execute(select(Order.id).where(Order.id == order_id).with_for_update())
+
+
+def has_reservation(order_id: int, session=None) -> bool:
+    session = session or db.session
+    return bool(session.execute(
+        select(exists().where(
+            StockReservation.order_id == order_id,
+            StockReservation.status == ReservationStatus.ACTIVE,
+        ))
+    ).scalar())
+
+
+def reserve_order(order_id: int, session=None) -> list[Allocation]:
+    """
+    Reserviert alle Positionen der Bestellung in der laufenden Transaktion (ohne Commit).
+
+    Gibt die Buchungen zurück, [] wenn schon reserviert.
+    Wirft `InsufficientStock`; dann wurde nichts gebucht, der Aufrufer rollt zurück.
+    Produkte ohne SKU haben keinen Bestand.
+    """
+    session = session or db.session
+    _lock_order(session, order_id)
+    if has_reservation(order_id, session):
+        return []
+
+    needed = _needed(session, order_id)
+    if not needed:
+        return []
+
+    skus = dict(session.execute(
+        select(Product.id, Product.sku).where(Product.id.in_(needed), Product.sku.isnot(None))
+    ).all())
+    rows = session.execute(
+        select(StockBalance.id, StockBalance.sku, StockBalance.location, StockBalance.on_hand, StockBalance.reserved)
+        .where(StockBalance.sku.in_(set(skus.values())))
+        .order_by(StockBalance.id)
+        .with_for_update()
+    ).all()
+    allocation, shortages = _allocate(needed, skus, rows)
+    if shortages:
+        raise InsufficientStock(order_id, shortages)
+
+    now = datetime.utcnow()
+    for item in allocation:
+        try:
+            inventory_ledger.post(
+                MovementKind.RESERVATION, item.sku, item.location,
+                reserved=item.quantity, order_id=order_id, balance_id=item.balance_id, session=session,
+            )
+        except inventory_ledger.StockConflict:
+            # Bestand wurde seit dem Lesen verändert (ohne Zeilensperre)
+            raise InsufficientStock(order_id, {item.product_id: item.quantity})
+
+    session.execute(
+        insert(StockReservation),
+        [
+            {
+                "order_id": order_id,
+                "balance_id": item.balance_id,
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "status": ReservationStatus.ACTIVE,
+                "created_at": now,
+            }
+            for item in allocation
+        ],
+    )
+    return allocation
+
+
+def reserve(order_id: int, attempts: int = RETRY_ATTEMPTS) -> list[Allocation]:
+    """`reserve_order` in eigener Transaktion mit Commit; Sperrkonflikte werden wiederholt."""
+    for attempt in range(1, attempts + 1):
+        try:
+            allocation = reserve_order(order_id)
+            db.session.commit()
+            if allocation:
+                logger.info("Reserved stock for order %s: %s", order_id, [tuple(a) for a in allocation])
+            return allocation
+        except InsufficientStock:
+            db.session.rollback()
+            raise
+        except OperationalError:
+            db.session.rollback()
+            if attempt == attempts:
+                raise
+            logger.info("Stock reservation for order %s hit a lock conflict, retrying", order_id)
+            time.sleep(RETRY_DELAY * attempt)
+    return []
+
+
+def _close_reservations(order_id: int, status: str, kind: str, session) -> int:
+    """Bucht die aktiven Reservierungen der Bestellung aus (ohne Commit); Rückgabe: Menge."""
+    rows = session.execute(
+        select(StockReservation.id, StockReservation.balance_id, StockReservation.quantity,
+               StockBalance.sku, StockBalance.location)
+        .join(StockBalance, StockBalance.id == StockReservation.balance_id)
+        .where(StockReservation.order_id == order_id, StockReservation.status == ReservationStatus.ACTIVE)
+        .order_by(StockReservation.balance_id)
+        .with_for_update(of=StockReservation)
+    ).all()
+    if not rows:
+        return 0
+
+    per_balance: dict[int, list] = {}
+    for _, balance_id, qty, sku, location in rows:
+        entry = per_balance.setdefault(balance_id, [sku, location, 0])
+        entry[2] += qty
+    for balance_id in sorted(per_balance):
+        sku, location, qty = per_balance[balance_id]
+        inventory_ledger.post(
+            kind, sku, location,
+            on_hand=-qty if kind == MovementKind.PICK else 0, reserved=-qty,
+            order_id=order_id, balance_id=balance_id, session=session,
+        )
+    session.execute(
+        update(StockReservation)
+        .where(StockReservation.id.in_([row[0] for row in rows]))
+        .values(status=status, closed_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return sum(qty for _, _, qty in per_balance.values())
+
+
+def release_order(order_id: int, session=None) -> int:
+    """Storno: gibt die Reservierungen der Bestellung frei (ohne Commit); Rückgabe: freigegebene Menge."""
+    released = _close_reservations(order_id, ReservationStatus.RELEASED, MovementKind.RELEASE, session or db.session)
+    if released:
+        logger.info("Released %s reserved units for order %s", released, order_id)
+    return released
+
+
+def pick_order(order_id: int, session=None) -> int:
+    """Versand: bucht die reservierte Ware als Entnahme aus (ohne Commit); Rückgabe: entnommene Menge."""
+    picked = _close_reservations(order_id, ReservationStatus.PICKED, MovementKind.PICK, session or db.session)
+    if picked:
+        logger.info("Picked %s reserved units for order %s", picked, order_id)
+    return picked
@@ -0,0 +1,33 @@
+"""add shipments.tracking_checked_at
+
+Revision ID: a3d7e51c9f02
+Revises: f1b6d0c3a852
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d7e51c9f02'
+down_revision = 'f1b6d0c3a852'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shipments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tracking_checked_at', sa.DateTime(), nullable=True))
+
+    op.execute("UPDATE shipments SET tracking_checked_at = created_at WHERE tracking_checked_at IS NULL")
+
+    with op.batch_alter_table('shipments', schema=None) as batch_op:
+        batch_op.alter_column('tracking_checked_at', existing_type=sa.DateTime(), nullable=False)
+        batch_op.create_index(batch_op.f('ix_shipments_tracking_checked_at'), ['tracking_checked_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('shipments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_shipments_tracking_checked_at'))
+        batch_op.drop_column('tracking_checked_at')
@@ -0,0 +1,42 @@
+"""add stock_reservations table
+
+Revision ID: a4c8e2f71d53
+Revises: d2a8f4b61c37
+Create Date: 2026-10-17 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c8e2f71d53'
+down_revision = 'd2a8f4b61c37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'stock_reservations',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=False),
+        sa.Column('stock_item_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('released_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+        sa.ForeignKeyConstraint(['stock_item_id'], ['stock_items.id']),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_stock_reservations_order_status', 'stock_reservations', ['order_id', 'status'])
+    op.create_index('ix_stock_reservations_stock_item_id', 'stock_reservations', ['stock_item_id'])
+
+
+def downgrade():
+    op.drop_index('ix_stock_reservations_stock_item_id', table_name='stock_reservations')
+    op.drop_index('ix_stock_reservations_order_status', table_name='stock_reservations')
+    op.drop_table('stock_reservations')
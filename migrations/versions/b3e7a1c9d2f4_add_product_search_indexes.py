@@ -0,0 +1,81 @@
+"""add product search indexes (trigram / FTS5) and keyset index
+
+Revision ID: b3e7a1c9d2f4
+Revises: merge_f08cac_ae3b9c2d7f4
+Create Date: 2026-10-17 10:00:00.000000
+
+Postgres: GIN-Trigram-Index auf products.name (für ILIKE '%q%').
+SQLite:   FTS5-Tabelle products_fts (external content) + Trigger zur Synchronisation.
+Beide:    (is_active, created_at, id) für die Keyset-Pagination der Storefront.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e7a1c9d2f4'
+down_revision = 'merge_f08cac_ae3b9c2d7f4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+
+    op.create_index(
+        'ix_products_active_created_id',
+        'products',
+        ['is_active', 'created_at', 'id'],
+        unique=False,
+    )
+
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute(
+            'CREATE INDEX IF NOT EXISTS ix_products_name_trgm '
+            'ON products USING gin (name gin_trgm_ops)'
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts "
+            "USING fts5(name, content='products', content_rowid='id')"
+        )
+        op.execute("INSERT INTO products_fts(rowid, name) SELECT id, name FROM products")
+        op.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            END
+            """
+        )
+        op.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name ON products BEGIN
+                INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name);
+                INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+            END
+            """
+        )
+
+
+def downgrade():
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_products_name_trgm')
+    elif dialect == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS products_fts_au')
+        op.execute('DROP TRIGGER IF EXISTS products_fts_ad')
+        op.execute('DROP TRIGGER IF EXISTS products_fts_ai')
+        op.execute('DROP TABLE IF EXISTS products_fts')
+
+    op.drop_index('ix_products_active_created_id', table_name='products')
@@ -0,0 +1,216 @@
+"""inventory ledger: stock_movements / stock_balances replace stock_items and warehouse_products.quantity
+
+Revision ID: b7d1e4a9c260
+Revises: a4c8e2f71d53
+Create Date: 2026-10-17 23:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d1e4a9c260'
+down_revision = 'a4c8e2f71d53'
+branch_labels = None
+depends_on = None
+
+
+LOCATION = "COALESCE(NULLIF({}, ''), 'main')"
+
+
+def upgrade():
+    # Shop-Produkt -> SKU (Standard: Slug in Großbuchstaben); gleiche Länge wie
+    # warehouse_products.sku, damit jede Lager-SKU ins Bestandsbuch passt
+    # Spalten-/Constraint-Änderungen über batch_alter_table (SQLite: Tabelle kopieren)
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sku', sa.String(length=255), nullable=True))
+    op.execute("UPDATE products SET sku = UPPER(slug) WHERE sku IS NULL")
+    # Slugs, die sich nur in Groß-/Kleinschreibung unterscheiden: spätere Produkte mit -<id>
+    op.execute(
+        """
+        UPDATE products SET sku = SUBSTR(sku, 1, 254 - LENGTH(CAST(id AS VARCHAR(20))))
+                                  || '-' || CAST(id AS VARCHAR(20))
+        WHERE EXISTS (SELECT 1 FROM products q WHERE q.sku = products.sku AND q.id < products.id)
+        """
+    )
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_products_sku', ['sku'])
+
+    op.create_table(
+        'stock_movements',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sku', sa.String(length=255), nullable=False),
+        sa.Column('location', sa.String(length=255), nullable=False),
+        sa.Column('kind', sa.String(length=16), nullable=False),
+        sa.Column('delta_on_hand', sa.Integer(), nullable=False),
+        sa.Column('delta_reserved', sa.Integer(), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('note', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_stock_movements_sku_location', 'stock_movements', ['sku', 'location'])
+    op.create_index('ix_stock_movements_order_id', 'stock_movements', ['order_id'])
+
+    op.create_table(
+        'stock_balances',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sku', sa.String(length=255), nullable=False),
+        sa.Column('location', sa.String(length=255), nullable=False),
+        sa.Column('on_hand', sa.Integer(), nullable=False),
+        sa.Column('reserved', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sku', 'location', name='uq_stock_balances_sku_location'),
+    )
+
+    # Anfangsbestände als Buchungen: Lagerartikel, Shop-Bestände, aktive Reservierungen
+    op.execute(
+        f"""
+        INSERT INTO stock_movements (sku, location, kind, delta_on_hand, delta_reserved, note, created_at)
+        SELECT w.sku, {LOCATION.format('w.location')}, 'receipt', w.quantity, 0,
+               'migrated from warehouse_products', CURRENT_TIMESTAMP
+        FROM warehouse_products w
+        WHERE w.quantity <> 0
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO stock_movements (sku, location, kind, delta_on_hand, delta_reserved, note, created_at)
+        SELECT p.sku, {LOCATION.format('s.location')}, 'receipt', s.quantity_total, 0,
+               'migrated from stock_items', CURRENT_TIMESTAMP
+        FROM stock_items s
+        JOIN products p ON p.id = s.product_id
+        WHERE s.quantity_total <> 0
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO stock_movements
+            (sku, location, kind, delta_on_hand, delta_reserved, order_id, note, created_at)
+        SELECT p.sku, {LOCATION.format('s.location')}, 'reservation', 0, r.quantity, r.order_id,
+               'migrated from stock_reservations', CURRENT_TIMESTAMP
+        FROM stock_reservations r
+        JOIN stock_items s ON s.id = r.stock_item_id
+        JOIN products p ON p.id = s.product_id
+        WHERE r.status = 'active'
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO stock_balances (sku, location, on_hand, reserved, updated_at)
+        SELECT sku, location, SUM(delta_on_hand), SUM(delta_reserved), CURRENT_TIMESTAMP
+        FROM stock_movements
+        GROUP BY sku, location
+        """
+    )
+    # Bestände ohne Menge, auf die (freigegebene) Reservierungen verweisen
+    op.execute(
+        f"""
+        INSERT INTO stock_balances (sku, location, on_hand, reserved, updated_at)
+        SELECT DISTINCT p.sku, {LOCATION.format('s.location')}, 0, 0, CURRENT_TIMESTAMP
+        FROM stock_items s
+        JOIN products p ON p.id = s.product_id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM stock_balances b
+            WHERE b.sku = p.sku AND b.location = {LOCATION.format('s.location')}
+        )
+        """
+    )
+
+    # Reservierungen zeigen auf den Bestand statt auf stock_items
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('balance_id', sa.Integer(), nullable=True))
+    op.execute(
+        f"""
+        UPDATE stock_reservations SET balance_id = (
+            SELECT b.id
+            FROM stock_items s
+            JOIN products p ON p.id = s.product_id
+            JOIN stock_balances b ON b.sku = p.sku AND b.location = {LOCATION.format('s.location')}
+            WHERE s.id = stock_reservations.stock_item_id
+        )
+        """
+    )
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.alter_column('balance_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_stock_reservations_balance_id', 'stock_balances', ['balance_id'], ['id'])
+        batch_op.create_index('ix_stock_reservations_balance_id', ['balance_id'])
+        batch_op.drop_index('ix_stock_reservations_stock_item_id')
+        batch_op.drop_column('stock_item_id')
+        batch_op.alter_column('released_at', new_column_name='closed_at', existing_type=sa.DateTime())
+
+    with op.batch_alter_table('warehouse_products', schema=None) as batch_op:
+        batch_op.drop_column('quantity')
+    op.drop_table('stock_items')
+
+
+def downgrade():
+    op.create_table(
+        'stock_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity_total', sa.Integer(), nullable=False),
+        sa.Column('quantity_reserved', sa.Integer(), nullable=False),
+        sa.Column('location', sa.String(length=255), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_stock_items_product_id', 'stock_items', ['product_id'])
+    op.execute(
+        """
+        INSERT INTO stock_items (product_id, quantity_total, quantity_reserved, location, created_at, updated_at)
+        SELECT p.id, b.on_hand, b.reserved, b.location, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP
+        FROM stock_balances b
+        JOIN products p ON p.sku = b.sku
+        """
+    )
+
+    with op.batch_alter_table('warehouse_products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('quantity', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        """
+        UPDATE warehouse_products SET quantity = COALESCE((
+            SELECT SUM(b.on_hand) FROM stock_balances b WHERE b.sku = warehouse_products.sku
+        ), 0)
+        """
+    )
+
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.alter_column('closed_at', new_column_name='released_at', existing_type=sa.DateTime())
+        batch_op.add_column(sa.Column('stock_item_id', sa.Integer(), nullable=True))
+    op.execute(
+        """
+        UPDATE stock_reservations SET stock_item_id = (
+            SELECT s.id
+            FROM stock_balances b
+            JOIN products p ON p.sku = b.sku
+            JOIN stock_items s ON s.product_id = p.id AND s.location = b.location
+            WHERE b.id = stock_reservations.balance_id
+        )
+        """
+    )
+    # Reservierungen auf reine Lagerartikel (ohne Shop-Produkt) gibt es vorher nicht
+    op.execute("DELETE FROM stock_reservations WHERE stock_item_id IS NULL")
+    with op.batch_alter_table('stock_reservations', schema=None) as batch_op:
+        batch_op.alter_column('stock_item_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_stock_reservations_stock_item_id', 'stock_items', ['stock_item_id'], ['id'])
+        batch_op.create_index('ix_stock_reservations_stock_item_id', ['stock_item_id'])
+        batch_op.drop_index('ix_stock_reservations_balance_id')
+        batch_op.drop_constraint('fk_stock_reservations_balance_id', type_='foreignkey')
+        batch_op.drop_column('balance_id')
+
+    op.drop_table('stock_balances')
+    op.drop_index('ix_stock_movements_order_id', table_name='stock_movements')
+    op.drop_index('ix_stock_movements_sku_location', table_name='stock_movements')
+    op.drop_table('stock_movements')
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_products_sku', type_='unique')
+        batch_op.drop_column('sku')
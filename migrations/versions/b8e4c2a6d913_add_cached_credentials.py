@@ -0,0 +1,32 @@
+"""add cached_credentials table
+
+Revision ID: b8e4c2a6d913
+Revises: a3d7e51c9f02
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e4c2a6d913'
+down_revision = 'a3d7e51c9f02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'cached_credentials',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('token', sa.Text(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade():
+    op.drop_table('cached_credentials')
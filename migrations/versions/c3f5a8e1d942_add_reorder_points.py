@@ -0,0 +1,39 @@
+"""reorder points and low-stock state per SKU
+
+Revision ID: c3f5a8e1d942
+Revises: b7d1e4a9c260
+Create Date: 2026-10-18 01:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f5a8e1d942'
+down_revision = 'b7d1e4a9c260'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Zustände legt `flask bootstrap` an (low_stock.reconcile, meldet bereits
+    # knappe SKUs), danach jeder Commit mit Bestandsänderung für seine SKUs
+    op.create_table(
+        'reorder_points',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('sku', sa.String(length=255), nullable=False),
+        sa.Column('reorder_point', sa.Integer(), nullable=True),
+        sa.Column('is_low', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('available', sa.Integer(), nullable=True),
+        sa.Column('low_since', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('sku'),
+    )
+    op.create_index('ix_reorder_points_is_low', 'reorder_points', ['is_low'])
+
+
+def downgrade():
+    op.drop_index('ix_reorder_points_is_low', table_name='reorder_points')
+    op.drop_table('reorder_points')
@@ -0,0 +1,57 @@
+"""add job_runs and job_locks tables
+
+Revision ID: c9f3a7d25e18
+Revises: b8e4c2a6d913
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9f3a7d25e18'
+down_revision = 'b8e4c2a6d913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'job_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(length=128), nullable=False),
+        sa.Column('queue', sa.String(length=64), nullable=False),
+        sa.Column('args', sa.JSON(), nullable=True),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('max_attempts', sa.Integer(), nullable=False),
+        sa.Column('run_after', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(length=128), nullable=True),
+        sa.Column('heartbeat_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+        sa.Column('duration_ms', sa.Integer(), nullable=True),
+        sa.Column('result', sa.JSON(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_job_runs_queue_status_run_after', 'job_runs', ['queue', 'status', 'run_after'])
+    op.create_index('ix_job_runs_name_created', 'job_runs', ['name', 'created_at'])
+
+    op.create_table(
+        'job_locks',
+        sa.Column('name', sa.String(length=191), nullable=False),
+        sa.Column('owner', sa.String(length=128), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('acquired_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('name'),
+    )
+
+
+def downgrade():
+    op.drop_table('job_locks')
+    op.drop_index('ix_job_runs_name_created', table_name='job_runs')
+    op.drop_index('ix_job_runs_queue_status_run_after', table_name='job_runs')
+    op.drop_table('job_runs')
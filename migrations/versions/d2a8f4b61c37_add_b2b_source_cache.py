@@ -0,0 +1,40 @@
+"""add b2b_source_cache table and b2b_check_results.input_hash
+
+Revision ID: d2a8f4b61c37
+Revises: c9f3a7d25e18
+Create Date: 2026-10-17 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a8f4b61c37'
+down_revision = 'c9f3a7d25e18'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'b2b_source_cache',
+        sa.Column('key', sa.String(length=64), nullable=False),
+        sa.Column('source', sa.String(length=16), nullable=False),
+        sa.Column('result', sa.JSON(), nullable=False),
+        sa.Column('fetched_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+    op.create_index('ix_b2b_source_cache_expires_at', 'b2b_source_cache', ['expires_at'])
+
+    with op.batch_alter_table('b2b_check_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('input_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('b2b_check_results', schema=None) as batch_op:
+        batch_op.drop_column('input_hash')
+
+    op.drop_index('ix_b2b_source_cache_expires_at', table_name='b2b_source_cache')
+    op.drop_table('b2b_source_cache')
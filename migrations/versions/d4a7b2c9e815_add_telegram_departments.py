@@ -0,0 +1,30 @@
+"""telegram_departments: department per Telegram user, shared by all bot runtimes
+
+Revision ID: d4a7b2c9e815
+Revises: c3f5a8e1d942
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a7b2c9e815'
+down_revision = 'c3f5a8e1d942'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'telegram_departments',
+        sa.Column('telegram_user_id', sa.BigInteger(), autoincrement=False, nullable=False),
+        sa.Column('department', sa.String(length=32), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('telegram_user_id'),
+    )
+
+
+def downgrade():
+    op.drop_table('telegram_departments')
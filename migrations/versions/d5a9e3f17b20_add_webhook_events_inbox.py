@@ -0,0 +1,41 @@
+"""add webhook_events inbox table
+
+Revision ID: d5a9e3f17b20
+Revises: c41f8d2b6e07
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5a9e3f17b20'
+down_revision = 'c41f8d2b6e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'webhook_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('provider', sa.String(length=32), nullable=False),
+        sa.Column('event_id', sa.String(length=255), nullable=False),
+        sa.Column('event_type', sa.String(length=128), nullable=True),
+        sa.Column('payload', sa.JSON(), nullable=False),
+        sa.Column('status', sa.String(length=32), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('provider', 'event_id', name='uq_webhook_events_provider_event'),
+    )
+    op.create_index('ix_webhook_events_status_created', 'webhook_events', ['status', 'created_at'])
+
+
+def downgrade():
+    op.drop_index('ix_webhook_events_status_created', table_name='webhook_events')
+    op.drop_table('webhook_events')
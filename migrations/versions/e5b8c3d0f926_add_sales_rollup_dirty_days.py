@@ -0,0 +1,29 @@
+"""sales_rollup_dirty_days: days to rebuild after edits to already counted orders
+
+Revision ID: e5b8c3d0f926
+Revises: d4a7b2c9e815
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5b8c3d0f926'
+down_revision = 'd4a7b2c9e815'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'sales_rollup_dirty_days',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('marked_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('day'),
+    )
+
+
+def downgrade():
+    op.drop_table('sales_rollup_dirty_days')
@@ -0,0 +1,60 @@
+"""add indexes for hot lookup columns
+
+Revision ID: e7c2b4a91f36
+Revises: d5a9e3f17b20
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7c2b4a91f36'
+down_revision = 'd5a9e3f17b20'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns) — Namen entsprechen den Modellen (index=True -> ix_<table>_<column>)
+INDEXES = [
+    ('ix_payments_order_id', 'payments', ['order_id']),
+    ('ix_payments_provider_payment_id', 'payments', ['provider_payment_id']),
+    ('ix_payments_provider_session_id', 'payments', ['provider_session_id']),
+    ('ix_warehouse_tasks_order_id', 'warehouse_tasks', ['order_id']),
+    ('ix_stock_items_product_id', 'stock_items', ['product_id']),
+    ('ix_orders_created_at', 'orders', ['created_at']),
+    ('ix_orders_user_created', 'orders', ['user_id', 'created_at']),
+    ('ix_orders_status_created', 'orders', ['status', 'created_at']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_order_items_product_id', 'order_items', ['product_id']),
+    ('ix_carts_user_id', 'carts', ['user_id']),
+    ('ix_cart_items_cart_product', 'cart_items', ['cart_id', 'product_id']),
+    ('ix_alerts_is_sent_created', 'alerts', ['is_sent', 'created_at']),
+    ('ix_b2b_check_results_user_created', 'b2b_check_results', ['user_id', 'created_at']),
+    ('ix_b2b_check_results_created_at', 'b2b_check_results', ['created_at']),
+    ('ix_shipments_order_id', 'shipments', ['order_id']),
+    ('ix_shipments_eta', 'shipments', ['eta']),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # CONCURRENTLY blockiert keine Schreibzugriffe, darf aber nicht in einer Transaktion laufen
+        with op.get_context().autocommit_block():
+            for name, table, columns in INDEXES:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _columns in reversed(INDEXES):
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, if_exists=True)
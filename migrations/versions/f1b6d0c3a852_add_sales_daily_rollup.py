@@ -0,0 +1,87 @@
+"""add sales_daily_rollup / sales_daily_totals and backfill them
+
+Revision ID: f1b6d0c3a852
+Revises: e7c2b4a91f36
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1b6d0c3a852'
+down_revision = 'e7c2b4a91f36'
+branch_labels = None
+depends_on = None
+
+
+SALES_STATUSES = "('paid', 'processing', 'shipped', 'completed')"
+
+
+def upgrade():
+    op.create_table(
+        'sales_daily_totals',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('currency', sa.String(length=8), nullable=False),
+        sa.Column('is_b2b', sa.Boolean(), nullable=False),
+        sa.Column('orders_count', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'currency', 'is_b2b', name='uq_sales_daily_totals_key'),
+    )
+    op.create_index('ix_sales_daily_totals_day', 'sales_daily_totals', ['day'])
+
+    op.create_table(
+        'sales_daily_rollup',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('currency', sa.String(length=8), nullable=False),
+        sa.Column('is_b2b', sa.Boolean(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('orders_count', sa.Integer(), nullable=False),
+        sa.Column('units', sa.Integer(), nullable=False),
+        sa.Column('revenue', sa.Numeric(14, 2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'currency', 'is_b2b', 'product_id', name='uq_sales_daily_rollup_key'),
+    )
+    op.create_index('ix_sales_daily_rollup_day', 'sales_daily_rollup', ['day'])
+    op.create_index('ix_sales_daily_rollup_category_day', 'sales_daily_rollup', ['category_id', 'day'])
+
+    # Backfill aus den vorhandenen Bestellungen
+    day = "CAST(o.created_at AS DATE)" if op.get_bind().dialect.name == 'postgresql' else "date(o.created_at)"
+    op.execute(
+        f"""
+        INSERT INTO sales_daily_totals (day, currency, is_b2b, orders_count, total_amount, updated_at)
+        SELECT {day}, o.currency, o.is_b2b, COUNT(o.id), COALESCE(SUM(o.total_amount), 0), CURRENT_TIMESTAMP
+        FROM orders o
+        WHERE o.status IN {SALES_STATUSES}
+        GROUP BY {day}, o.currency, o.is_b2b
+        """
+    )
+    op.execute(
+        f"""
+        INSERT INTO sales_daily_rollup
+            (day, currency, is_b2b, product_id, category_id, orders_count, units, revenue, updated_at)
+        SELECT {day}, o.currency, o.is_b2b, oi.product_id, p.category_id,
+               COUNT(DISTINCT o.id), COALESCE(SUM(oi.quantity), 0),
+               COALESCE(SUM(oi.quantity * oi.unit_price), 0), CURRENT_TIMESTAMP
+        FROM order_items oi
+        JOIN orders o ON o.id = oi.order_id
+        LEFT JOIN products p ON p.id = oi.product_id
+        WHERE o.status IN {SALES_STATUSES}
+        GROUP BY {day}, o.currency, o.is_b2b, oi.product_id, p.category_id
+        """
+    )
+
+
+def downgrade():
+    op.drop_index('ix_sales_daily_rollup_category_day', table_name='sales_daily_rollup')
+    op.drop_index('ix_sales_daily_rollup_day', table_name='sales_daily_rollup')
+    op.drop_table('sales_daily_rollup')
+    op.drop_index('ix_sales_daily_totals_day', table_name='sales_daily_totals')
+    op.drop_table('sales_daily_totals')
@@ -0,0 +1,26 @@
+"""b2b_check_results.result_hash: skip repeated alerts for an unchanged outcome
+
+Revision ID: f6c9d4e1a037
+Revises: e5b8c3d0f926
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6c9d4e1a037'
+down_revision = 'e5b8c3d0f926'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('b2b_check_results', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('result_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('b2b_check_results', schema=None) as batch_op:
+        batch_op.drop_column('result_hash')
@@ -9,8 +9,17 @@ sys.path.insert(0, os.path.dirname(__file__))
 from dotenv import load_dotenv
 load_dotenv()
 
-from backend.app import create_app
+from backend.app import create_app, start_telegram_bot
 
 if __name__ == '__main__':
     app = create_app()
+    # Dev convenience: create schema/default categories (`flask bootstrap` in production)
+    if os.getenv('ENSURE_DEFAULT_CATEGORIES', '1').lower() in ('1', 'true', 'yes'):
+        from backend.cli import ensure_default_categories
+        from backend.extensions import ensure_schema_exists
+
+        with app.app_context():
+            ensure_schema_exists()
+            ensure_default_categories()
+    start_telegram_bot(app)
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -1,27 +1,54 @@
 # file: scheduler/scheduler.py
 
 """
-Platzhalter für den Scheduler.
+Scheduler: stellt die periodischen Jobs (JobSpec.interval + Jitter) in die Queue,
+ausgeführt werden sie vom Worker (`python -m worker.worker`).
 
-Später kann APScheduler/cron innerhalb des Containers integriert werden.
+    python -m scheduler.scheduler           # Dauerbetrieb
+    python -m scheduler.scheduler --once    # alle periodischen Jobs jetzt einstellen
+
+Es plant immer nur ein Scheduler (Sperre "scheduler" in job_locks); weitere
+Instanzen warten als Reserve.
 """
 
-from worker.tasks import (
-    sync_b2b_checks,
-    sync_shipping_status,
-    sync_containers,
-    low_stock_alerts,
-    reports_daily,
-)
+import argparse
+import logging
+import os
+import sys
+
+
+def _app():
+    # Worker/Scheduler: Berichts-Timeout statt Storefront-Timeout (database.py)
+    os.environ.setdefault("DB_ROLE", "reports")
+    from backend import create_app
+
+    return create_app()
 
 
 def run_all():
-    sync_b2b_checks.run()
-    sync_shipping_status.run()
-    sync_containers.run()
-    low_stock_alerts.run()
-    reports_daily.run()
+    """Alle periodischen Jobs sofort einstellen (sofern nicht schon offen)."""
+    from backend.services import jobs
+
+    with _app().app_context():
+        return jobs.enqueue_periodic()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--once", action="store_true", help="alle periodischen Jobs einstellen und beenden")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.once:
+        print(run_all())
+        return 0
+
+    from backend.services import jobs
+
+    with _app().app_context():
+        jobs.run_scheduler()
+    return 0
 
 
 if __name__ == "__main__":
-    run_all()
+    sys.exit(main())
@@ -0,0 +1,135 @@
+# file: scripts/check_cart_queries.py
+
+"""
+Anzahl der SQL-Anweisungen beim Bepreisen und Bestellen eines Warenkorbs.
+
+Legt Warenkörbe mit 1, 5 und 10 Positionen an und zählt (before_cursor_execute)
+die Anweisungen für `cart_pricing.price_cart` und für den Checkout-Ablauf
+(`order_service.create_order_from_priced_cart` ohne Commit, Warenkorb leeren,
+Zahlung anlegen, Commit — wie shop_public.checkout, nur ohne Stripe).
+Wächst die Zahl mit der Größe des Warenkorbs (N+1), endet das Skript mit
+Exit-Code 1.
+
+    python -m scripts.check_cart_queries
+    python -m scripts.check_cart_queries --sizes 1 5 10 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Test-Datenbank (Standard: temporäre SQLite-Datei)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 5, 10], help="Positionen pro Warenkorb")
+    return parser.parse_args(argv)
+
+
+@contextmanager
+def count_statements(engine, statements: list[str]):
+    from sqlalchemy import event
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def seed(db, n_products: int) -> int:
+    """Legt Kategorie, Kunde und `n_products` Produkte an; Rückgabe: User-ID."""
+    from backend.models import Category, Product, User
+
+    category = Category(name="Cart check", slug="cart-check")
+    user = User(email="cart-check@example.com", password_hash="x", role="b2c")
+    db.session.add_all([category, user])
+    db.session.flush()
+    db.session.add_all(
+        Product(name=f"Cart product {i}", slug=f"cart-product-{i}", category_id=category.id,
+                price_b2c=f"{i}.99", price_b2b=f"{i}.49", currency="EUR", is_active=True)
+        for i in range(1, n_products + 1)
+    )
+    db.session.commit()
+    return user.id
+
+
+def measure(db, user_id: int, size: int) -> tuple[int, int]:
+    """Anweisungen für (price_cart, Checkout) bei einem Warenkorb mit `size` Positionen."""
+    from backend.models import Payment, Product, User
+    from backend.models.order import Cart, CartItem
+    from backend.services.cart_pricing import price_cart
+    from backend.services.order_service import create_order_from_priced_cart
+
+    cart = Cart(user_id=user_id)
+    db.session.add(cart)
+    db.session.flush()
+    product_ids = db.session.execute(db.select(Product.id).order_by(Product.id).limit(size)).scalars()
+    db.session.add_all(CartItem(cart_id=cart.id, product_id=pid, quantity=2) for pid in product_ids)
+    db.session.commit()
+    cart_id = cart.id
+    # wie in einer neuen Anfrage: nichts im Identity-Map außer dem Kunden
+    db.session.expunge_all()
+    user = db.session.get(User, user_id)
+
+    with count_statements(db.engine, []) as pricing:
+        priced = price_cart(cart_id, is_b2b=False)
+    if len(priced.lines) != size:
+        raise RuntimeError(f"priced {len(priced.lines)} lines for a cart of {size}")
+
+    with count_statements(db.engine, []) as checkout:
+        order = create_order_from_priced_cart(user, priced, shipping_address={"address": "Teststr. 1"}, commit=False)
+        CartItem.query.filter_by(cart_id=cart_id).delete()
+        db.session.add(Payment(order_id=order.id, provider="stripe", provider_payment_id=f"pi_check_{cart_id}",
+                               amount=priced.total, currency=order.currency, status="pending"))
+        db.session.commit()
+    db.session.expunge_all()
+    return len(pricing), len(checkout)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    database_url = args.database_url
+    if not database_url:
+        fd, path = tempfile.mkstemp(prefix="venookah2_cart_", suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{path}"
+        print(f"Using temporary SQLite database {path}")
+    # Muss vor dem Import von backend gesetzt sein (Config liest DATABASE_URL beim Import)
+    os.environ["DATABASE_URL"] = database_url
+
+    from backend.app import create_app
+    from backend.extensions import db
+
+    app = create_app()
+    sizes = sorted(set(args.sizes))
+    with app.app_context():
+        db.create_all()
+        user_id = seed(db, max(sizes))
+        results = {size: measure(db, user_id, size) for size in sizes}
+
+    for size, (pricing, checkout) in results.items():
+        print(f"{size:>4} items: price_cart {pricing} statements, checkout {checkout} statements")
+    smallest = results[sizes[0]]
+    errors = [
+        f"{phase} grows with cart size: {smallest[i]} statements for {sizes[0]} items, {counts[i]} for {size}"
+        for size, counts in results.items()
+        for i, phase in enumerate(("price_cart", "checkout"))
+        if counts[i] > smallest[i]
+    ]
+    for error in errors:
+        print(f"  {error}")
+    if errors:
+        print("FAILED")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
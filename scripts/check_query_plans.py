@@ -0,0 +1,452 @@
+# file: scripts/check_query_plans.py
+
+"""
+Query-Plan-Regressionstest für die Hot-Path-Abfragen.
+
+Legt in einer *separaten* Datenbank ein Schema an, befüllt sie mit realistischen
+Mengen (Standard: 1 Mio. Bestellungen) und prüft per EXPLAIN, dass jede Abfrage
+aus Webhooks, Lager, Admin und Shop einen Index nutzt statt die Tabelle
+sequentiell zu lesen. Exit-Code 1 bei einer Regression (für CI geeignet).
+
+Beispiele:
+    python -m scripts.check_query_plans                          # SQLite-Tempdatei
+    python -m scripts.check_query_plans --orders 100000
+    python -m scripts.check_query_plans --database-url postgresql+psycopg2://.../plans_test
+    python -m scripts.check_query_plans --database-url ... --no-seed   # bereits befüllt
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable
+
+
+@dataclass(frozen=True)
+class HotQuery:
+    name: str
+    # baut das Statement aus den Modellen wie im Blueprint/Service (Parameter: dict, s. main)
+    build: Callable[[dict], Any]
+    tables: tuple[str, ...]
+
+
+def hot_queries() -> list[HotQuery]:
+    """Abfragen aus Webhooks, Lager, Admin und Shop, gebaut aus den echten Modellen/Konstanten."""
+    from sqlalchemy import func, select
+    from sqlalchemy.orm import contains_eager, joinedload
+
+    from backend.models import (
+        Alert,
+        B2BCheckResult,
+        Order,
+        OrderItem,
+        Payment,
+        Product,
+        ReorderPoint,
+        Shipment,
+        StockBalance,
+        StockReservation,
+    )
+    from backend.models.inventory import ReservationStatus
+    from backend.models.order import Cart, CartItem, OrderStatus
+    from backend.models.shipping import PRE_DISPATCH_STATUSES, TERMINAL_STATUSES
+    from backend.models.warehouse import WarehouseProduct, WarehouseTask
+    from backend.services.inventory_ledger import DEFAULT_LOCATION
+    from backend.services.low_stock import DEFAULT_REORDER_POINT
+    from backend.services.shipping.tracking_sync import FETCHERS
+
+    available = StockBalance.on_hand - StockBalance.reserved
+    return [
+        HotQuery(
+            "webhook: payment by payment_intent",
+            lambda p: select(Payment).filter_by(provider_payment_id=p["pi"]).limit(1),
+            ("payments",),
+        ),
+        HotQuery(
+            "webhook: payment by checkout session",
+            lambda p: select(Payment).filter_by(provider_session_id=p["cs"]).limit(1),
+            ("payments",),
+        ),
+        HotQuery(
+            "admin: payments of order",
+            lambda p: select(Payment).filter_by(order_id=p["order_id"]),
+            ("payments",),
+        ),
+        HotQuery(
+            "webhook/warehouse: task of order",
+            lambda p: select(WarehouseTask).filter_by(order_id=p["order_id"]).limit(1),
+            ("warehouse_tasks",),
+        ),
+        HotQuery(
+            "stock_reservation: stock of skus",
+            lambda p: select(
+                StockBalance.id, StockBalance.sku, StockBalance.location, StockBalance.on_hand, StockBalance.reserved
+            )
+            .where(StockBalance.sku.in_([p["sku"]]))
+            .order_by(StockBalance.id)
+            .with_for_update(),
+            ("stock_balances",),
+        ),
+        HotQuery(
+            "inventory_ledger: available for products",
+            lambda p: select(Product.id, func.sum(available))
+            .join(StockBalance, StockBalance.sku == Product.sku)
+            .where(Product.id.in_([p["product_id"]]))
+            .group_by(Product.id),
+            ("products", "stock_balances"),
+        ),
+        HotQuery(
+            "inventory_ledger: balance by sku and location",
+            lambda p: select(StockBalance.id).where(
+                StockBalance.sku == p["sku"], StockBalance.location == DEFAULT_LOCATION
+            ),
+            ("stock_balances",),
+        ),
+        HotQuery(
+            "low_stock: state of changed skus",
+            lambda p: select(ReorderPoint.id, ReorderPoint.sku, ReorderPoint.reorder_point, ReorderPoint.is_low)
+            .where(ReorderPoint.sku.in_([p["sku"]]))
+            .order_by(ReorderPoint.id)
+            .with_for_update(),
+            ("reorder_points",),
+        ),
+        HotQuery(
+            "warehouse dashboard/snapshot: low stock skus",
+            lambda p: select(
+                ReorderPoint.sku,
+                func.coalesce(WarehouseProduct.name, Product.name, ReorderPoint.sku).label("name"),
+                ReorderPoint.available,
+                func.coalesce(ReorderPoint.reorder_point, DEFAULT_REORDER_POINT).label("reorder_point"),
+                ReorderPoint.low_since,
+            )
+            .outerjoin(WarehouseProduct, WarehouseProduct.sku == ReorderPoint.sku)
+            .outerjoin(Product, Product.sku == ReorderPoint.sku)
+            .where(ReorderPoint.is_low.is_(True))
+            .order_by(ReorderPoint.available, ReorderPoint.sku)
+            .limit(50),
+            ("reorder_points", "warehouse_products", "products"),
+        ),
+        HotQuery(
+            "stock_reservation: items of order",
+            lambda p: select(OrderItem.product_id, func.sum(OrderItem.quantity))
+            .where(OrderItem.order_id == p["order_id"])
+            .group_by(OrderItem.product_id),
+            ("order_items",),
+        ),
+        HotQuery(
+            "stock_reservation: active reservations of order",
+            lambda p: select(StockReservation.id, StockReservation.balance_id, StockReservation.quantity)
+            .where(StockReservation.order_id == p["order_id"], StockReservation.status == ReservationStatus.ACTIVE)
+            .order_by(StockReservation.balance_id)
+            .with_for_update(of=StockReservation),
+            ("stock_reservations",),
+        ),
+        HotQuery(
+            "account: orders of user",
+            lambda p: select(Order).filter_by(user_id=p["user_id"]).order_by(Order.created_at.desc()).limit(10),
+            ("orders",),
+        ),
+        HotQuery(
+            "admin dashboard: orders today",
+            lambda p: select(func.count(Order.id)).where(Order.created_at >= p["since"]),
+            ("orders",),
+        ),
+        HotQuery(
+            "admin/warehouse: latest orders",
+            lambda p: select(Order).order_by(Order.created_at.desc()).limit(50),
+            ("orders",),
+        ),
+        HotQuery(
+            "warehouse: open orders",
+            lambda p: select(Order)
+            .where(Order.status.in_([OrderStatus.PAID, OrderStatus.PROCESSING]))
+            .order_by(Order.created_at.desc())
+            .limit(100),
+            ("orders",),
+        ),
+        HotQuery(
+            "navbar: unsent alerts",
+            lambda p: select(func.count(Alert.id)).filter_by(is_sent=False),
+            ("alerts",),
+        ),
+        HotQuery(
+            "admin: latest b2b check of user",
+            lambda p: select(B2BCheckResult)
+            .filter_by(user_id=p["user_id"])
+            .order_by(B2BCheckResult.created_at.desc())
+            .limit(1),
+            ("b2b_check_results",),
+        ),
+        HotQuery(
+            "admin dashboard: latest b2b checks",
+            lambda p: select(B2BCheckResult)
+            .options(joinedload(B2BCheckResult.user))
+            .order_by(B2BCheckResult.created_at.desc())
+            .limit(10),
+            ("b2b_check_results",),
+        ),
+        HotQuery(
+            "shop: cart of user",
+            lambda p: select(Cart).filter_by(user_id=p["user_id"]).limit(1),
+            ("carts",),
+        ),
+        HotQuery(
+            "shop: cart line for product",
+            lambda p: select(CartItem).filter_by(cart_id=p["cart_id"], product_id=p["product_id"]).limit(1),
+            ("cart_items",),
+        ),
+        HotQuery(
+            "owner dashboard: upcoming shipments",
+            lambda p: select(Shipment.order_id, Shipment.provider, Shipment.tracking_number, Shipment.eta)
+            .where(Shipment.eta.isnot(None))
+            .order_by(Shipment.eta.asc())
+            .limit(50),
+            ("shipments",),
+        ),
+        HotQuery(
+            "tracking sync: stalest open shipments",
+            lambda p: select(Shipment.id, Shipment.provider, Shipment.tracking_number, Shipment.status)
+            .where(
+                Shipment.provider.in_(list(FETCHERS)),
+                Shipment.tracking_number.isnot(None),
+                Shipment.status.notin_(PRE_DISPATCH_STATUSES + TERMINAL_STATUSES),
+            )
+            .order_by(Shipment.tracking_checked_at)
+            .limit(500),
+            ("shipments",),
+        ),
+        HotQuery(
+            "storefront: product page (keyset)",
+            lambda p: select(Product)
+            .outerjoin(Product.category)
+            .options(contains_eager(Product.category))
+            .where(Product.is_active.is_(True))
+            .order_by(Product.created_at.desc(), Product.id.desc())
+            .limit(49),
+            ("products",),
+        ),
+    ]
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Ziel-DB (Standard: neue SQLite-Tempdatei). NIE die Produktiv-DB!")
+    parser.add_argument("--orders", type=int, default=1_000_000, help="Anzahl Bestellungen (Standard: 1000000)")
+    parser.add_argument("--users", type=int, default=50_000)
+    parser.add_argument("--products", type=int, default=2_000)
+    parser.add_argument("--no-seed", action="store_true", help="Vorhandene Daten verwenden, nichts einfügen")
+    parser.add_argument("--chunk", type=int, default=10_000, help="Zeilen pro Bulk-Insert")
+    return parser.parse_args(argv)
+
+
+def _bulk(conn, table, rows_iter, chunk):
+    batch = []
+    for row in rows_iter:
+        batch.append(row)
+        if len(batch) >= chunk:
+            conn.execute(table.insert(), batch)
+            batch = []
+    if batch:
+        conn.execute(table.insert(), batch)
+
+
+def seed(db, n_orders: int, n_users: int, n_products: int, chunk: int) -> None:
+    from backend.models import (
+        Alert,
+        B2BCheckResult,
+        Category,
+        Order,
+        OrderItem,
+        Payment,
+        Product,
+        ReorderPoint,
+        Shipment,
+        StockBalance,
+        User,
+    )
+    from backend.models.order import Cart, CartItem
+    from backend.models.warehouse import WarehouseTask
+
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+    span = timedelta(days=730).total_seconds()
+
+    def ts():
+        return now - timedelta(seconds=rnd.random() * span)
+
+    statuses = ["new", "paid", "processing", "shipped", "completed", "completed", "completed", "cancelled"]
+    t0 = time.time()
+    with db.engine.begin() as conn:
+        conn.execute(Category.__table__.insert(), [{"name": "Bench", "slug": "bench", "created_at": now, "updated_at": now}])
+        _bulk(conn, User.__table__, (
+            {"email": f"user{i}@bench.local", "password_hash": "x", "role": "b2c", "is_b2b": i % 10 == 0,
+             "is_active": True, "is_confirmed": True, "created_at": ts(), "updated_at": now}
+            for i in range(1, n_users + 1)
+        ), chunk)
+        _bulk(conn, Product.__table__, (
+            {"name": f"Product {i}", "slug": f"bench-product-{i}", "sku": f"BENCH-{i}", "category_id": 1,
+             "price_b2c": 10, "price_b2b": 8,
+             "currency": "EUR", "is_active": i % 20 != 0, "created_at": ts(), "updated_at": now}
+            for i in range(1, n_products + 1)
+        ), chunk)
+        _bulk(conn, StockBalance.__table__, (
+            {"sku": f"BENCH-{i}", "location": "main", "on_hand": rnd.randint(0, 500), "reserved": 0, "updated_at": now}
+            for i in range(1, n_products + 1)
+        ), chunk)
+        _bulk(conn, ReorderPoint.__table__, (
+            {"sku": f"BENCH-{i}", "reorder_point": 20 if i % 7 == 0 else None, "is_low": i % 50 == 0,
+             "available": rnd.randint(0, 20) if i % 50 == 0 else None, "updated_at": now}
+            for i in range(1, n_products + 1)
+        ), chunk)
+        _bulk(conn, Order.__table__, (
+            {"user_id": rnd.randint(1, n_users), "status": rnd.choice(statuses), "total_amount": 10, "currency": "EUR",
+             "is_b2b": False, "created_at": ts(), "updated_at": now}
+            for _ in range(n_orders)
+        ), chunk)
+        _bulk(conn, OrderItem.__table__, (
+            {"order_id": i, "product_id": rnd.randint(1, n_products), "quantity": 1, "unit_price": 10, "currency": "EUR"}
+            for i in range(1, n_orders + 1)
+        ), chunk)
+        _bulk(conn, Payment.__table__, (
+            {"order_id": i, "provider": "stripe", "provider_payment_id": f"pi_{i}", "provider_session_id": f"cs_{i}",
+             "amount": 10, "currency": "EUR", "status": "completed", "created_at": now, "updated_at": now}
+            for i in range(1, n_orders + 1)
+        ), chunk)
+        _bulk(conn, WarehouseTask.__table__, (
+            {"order_id": i, "status": "done", "created_at": now, "updated_at": now}
+            for i in range(1, n_orders + 1, 2)
+        ), chunk)
+        _bulk(conn, Shipment.__table__, (
+            {"order_id": i, "provider": "dpd", "tracking_number": f"DPD-{i}",
+             "status": "delivered" if i % 20 else "in_transit", "eta": ts() if i % 50 == 0 else None,
+             "tracking_checked_at": ts(), "created_at": now, "updated_at": now}
+            for i in range(1, n_orders + 1, 2)
+        ), chunk)
+        _bulk(conn, Alert.__table__, (
+            {"type": "low_stock", "channel": "telegram", "is_sent": i % 100 != 0, "created_at": ts()}
+            for i in range(max(n_orders // 20, 1000))
+        ), chunk)
+        _bulk(conn, B2BCheckResult.__table__, (
+            {"user_id": rnd.randint(1, n_users), "score": rnd.randint(0, 100), "created_at": ts()}
+            for _ in range(max(n_users // 2, 1000))
+        ), chunk)
+        _bulk(conn, Cart.__table__, (
+            {"user_id": i, "created_at": now, "updated_at": now} for i in range(1, n_users + 1, 2)
+        ), chunk)
+        _bulk(conn, CartItem.__table__, (
+            {"cart_id": c, "product_id": rnd.randint(1, n_products), "quantity": 1, "created_at": now, "updated_at": now}
+            for c in range(1, n_users // 2 + 1) for _ in range(3)
+        ), chunk)
+    print(f"Seeded {n_orders} orders / {n_users} users / {n_products} products in {time.time() - t0:.1f}s")
+
+
+def compile_sql(conn, stmt) -> str:
+    """Statement für den Dialekt der Verbindung als SQL mit eingesetzten Werten."""
+    return str(stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+
+
+def explain(conn, query: HotQuery, params: dict) -> tuple[list[str], list[str]]:
+    """Gibt (Plan-Zeilen, Verstöße) zurück."""
+    sql = compile_sql(conn, query.build(params))
+
+    dialect = conn.dialect.name
+    if dialect == "postgresql":
+        rows = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql).scalar()
+        plan = rows if isinstance(rows, list) else json.loads(rows)
+        lines, violations = [], []
+
+        def walk(node, depth=0):
+            relation = node.get("Relation Name")
+            label = node["Node Type"] + (f" on {relation}" if relation else "")
+            if node.get("Index Name"):
+                label += f" using {node['Index Name']}"
+            lines.append("  " * depth + label)
+            if node["Node Type"] == "Seq Scan" and relation in query.tables:
+                violations.append(label)
+            for child in node.get("Plans", []):
+                walk(child, depth + 1)
+
+        walk(plan[0]["Plan"])
+        return lines, violations
+
+    if dialect == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql).fetchall()
+        lines = [row[-1] for row in rows]
+        violations = [
+            line
+            for line in lines
+            if line.startswith("SCAN ")
+            and line.split()[1] in query.tables
+            and "USING INDEX" not in line
+            and "USING COVERING INDEX" not in line
+        ]
+        return lines, violations
+
+    raise SystemExit(f"EXPLAIN-Prüfung für Dialekt {dialect!r} nicht implementiert")
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+
+    database_url = args.database_url
+    if not database_url:
+        fd, path = tempfile.mkstemp(prefix="venookah2_plans_", suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{path}"
+        print(f"Using temporary SQLite database {path}")
+
+    # Muss vor dem Import von backend gesetzt sein (Config liest DATABASE_URL beim Import)
+    os.environ["DATABASE_URL"] = database_url
+
+    from sqlalchemy import text
+
+    from backend.app import create_app
+    from backend.extensions import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        if not args.no_seed:
+            with db.engine.connect() as conn:
+                existing = conn.execute(text("SELECT count(*) FROM orders")).scalar()
+            if existing:
+                print(f"Refusing to seed: orders already contains {existing} rows (use --no-seed)")
+                return 2
+            seed(db, args.orders, args.users, args.products, args.chunk)
+
+        with db.engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+        params = {
+            "pi": "pi_12345",
+            "cs": "cs_12345",
+            "order_id": 12345,
+            "product_id": 42,
+            "sku": "BENCH-42",
+            "user_id": 4242,
+            "cart_id": 21,
+            "since": datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0),
+        }
+
+        queries = hot_queries()
+        failures = 0
+        with db.engine.connect() as conn:
+            for query in queries:
+                lines, violations = explain(conn, query, params)
+                status = "FAIL" if violations else "ok"
+                print(f"[{status:>4}] {query.name}")
+                for line in lines:
+                    print(f"         {line}")
+                failures += bool(violations)
+
+    print(f"\n{len(queries) - failures}/{len(queries)} hot queries use an index")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
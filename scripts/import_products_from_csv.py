@@ -1,55 +1,71 @@
 # file: scripts/import_products_from_csv.py
 
 """
-Import von Produkten aus einer CSV-Datei (MVP-Stub).
+Import von Produkten aus einer CSV-Datei (Streaming, Upsert nach slug).
+
+    python -m scripts.import_products_from_csv products.csv
+    python -m scripts.import_products_from_csv feed.csv --chunk-size 5000 --delimiter ";"
+    python -m scripts.import_products_from_csv feed.csv --dry-run            # nur prüfen
+    python -m scripts.import_products_from_csv feed.csv --start-row 120000   # nach Abbruch fortsetzen
+
+Ungültige Zeilen werden in <datei>.errors.csv (oder --errors) geschrieben.
+Siehe backend/services/product_import.py für die Spalten.
 """
 
-import csv
-from decimal import Decimal
-from pathlib import Path
+import argparse
+import sys
 
 from backend.app import create_app
-from backend.extensions import db
-from backend.models.product import Product, Category
+from backend.services.product_import import import_products
+
+
+def _print_progress(stats: dict) -> None:
+    print(
+        f"  row {stats['next_row']}: {stats['inserted']} inserted, {stats['updated']} updated, "
+        f"{stats['invalid']} invalid — {stats['rows_per_second']:.0f} rows/s",
+        flush=True,
+    )
 
 
-def import_from_csv(csv_path: str):
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv_path", nargs="?", default="products.csv")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Zeilen pro Upsert/Commit")
+    parser.add_argument("--dry-run", action="store_true", help="nur prüfen, nichts schreiben")
+    parser.add_argument("--start-row", type=int, default=0, help="die ersten N Datenzeilen überspringen")
+    parser.add_argument("--errors", help="Datei für ungültige Zeilen (Standard: <datei>.errors.csv)")
+    parser.add_argument("--delimiter", default=",")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
     app = create_app()
     with app.app_context():
-        path = Path(csv_path)
-        if not path.exists():
-            raise FileNotFoundError(path)
-
-        with path.open("r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                slug = row["slug"]
-                name = row["name"]
-                category_slug = row.get("category_slug", "other")
-
-                category = Category.query.filter_by(slug=category_slug).first()
-                if not category:
-                    category = Category(name=category_slug, slug=category_slug)
-                    db.session.add(category)
-                    db.session.flush()
-
-                product = Product.query.filter_by(slug=slug).first()
-                if not product:
-                    product = Product(
-                        name=name,
-                        slug=slug,
-                        category=category,
-                        price_b2c=Decimal(row.get("price_b2c", "0") or "0"),
-                        price_b2b=Decimal(row.get("price_b2b", "0") or "0"),
-                        currency=row.get("currency", "EUR"),
-                        description=row.get("description", ""),
-                        is_active=True,
-                    )
-                    db.session.add(product)
-
-        db.session.commit()
-        print("Import der Produkte abgeschlossen.")
+        try:
+            stats = import_products(
+                args.csv_path,
+                chunk_size=max(1, args.chunk_size),
+                dry_run=args.dry_run,
+                start_row=max(0, args.start_row),
+                error_path=args.errors,
+                delimiter=args.delimiter,
+                progress=_print_progress,
+            )
+        except FileNotFoundError as e:
+            print(f"CSV file not found: {e}")
+            return 2
+
+    mode = " (dry run)" if args.dry_run else ""
+    print(
+        f"Import der Produkte abgeschlossen{mode}: {stats['rows']} rows, {stats['inserted']} inserted, "
+        f"{stats['updated']} updated, {stats['duplicates']} duplicates, {stats['invalid']} invalid, "
+        f"{stats['categories_created']} new categories, {stats['sku_kept']} SKUs kept (stock ledger) in {stats['seconds']}s ({stats['rows_per_second']:.0f} rows/s)"
+    )
+    if stats["error_file"]:
+        print(f"Invalid rows written to {stats['error_file']}")
+    return 0
 
 
 if __name__ == "__main__":
-    import_from_csv("products.csv")
+    sys.exit(main())
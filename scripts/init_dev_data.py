@@ -9,10 +9,11 @@ from decimal import Decimal
 from backend.app import create_app
 from backend.extensions import db
 from backend.models.product import Category, Product
-from backend.models.inventory import StockItem
+from backend.models.inventory import MovementKind, StockBalance
 from backend.models.user import User, UserRole
 from backend.models.warehouse import WarehouseCategory, WarehouseProduct, WarehouseTask, WarehouseTaskStatus
 from backend.models.order import Order, OrderStatus
+from backend.services import inventory_ledger
 
 
 def main():
@@ -70,10 +71,13 @@ def main():
                     name=wpdata["name"],
                     description="Warehouse product for testing.",
                     category=wpdata["category"],
-                    quantity=wpdata["quantity"],
                     location=wpdata["location"],
                 )
                 db.session.add(wp)
+            if not StockBalance.query.filter_by(sku=wpdata["sku"]).first():
+                inventory_ledger.post(
+                    MovementKind.RECEIPT, wpdata["sku"], wpdata["location"], on_hand=wpdata["quantity"], note="dev data"
+                )
 
         db.session.commit()
 
@@ -131,13 +135,8 @@ def main():
                 db.session.add(p)
                 db.session.flush()
 
-                stock = StockItem(
-                    product_id=p.id,
-                    quantity_total=500,
-                    quantity_reserved=0,
-                    location="main",
-                )
-                db.session.add(stock)
+                # SKU = Slug in Großbuchstaben (Product.sku), 500 Stück im Hauptlager
+                inventory_ledger.post(MovementKind.RECEIPT, p.sku, "main", on_hand=500, note="dev data")
 
         db.session.commit()
 
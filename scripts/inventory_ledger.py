@@ -0,0 +1,98 @@
+# file: scripts/inventory_ledger.py
+
+"""
+Verwaltung des Bestandsbuchs (stock_movements -> stock_balances).
+
+    python -m scripts.inventory_ledger rebuild            # Stände neu berechnen, Low-Stock-Zustände abgleichen
+    python -m scripts.inventory_ledger check              # Stände mit Buchungen/Reservierungen vergleichen
+    python -m scripts.inventory_ledger check --repair     # bei Abweichungen neu berechnen
+    python -m scripts.inventory_ledger show VEN-COAL-10KG # Stände und letzte Buchungen einer SKU
+    python -m scripts.inventory_ledger reorder VEN-COAL-10KG 25         # Meldebestand setzen
+    python -m scripts.inventory_ledger reorder VEN-COAL-10KG --default  # zurück auf LOW_STOCK_REORDER_POINT
+
+`check` endet mit Exit-Code 1, wenn Abweichungen gefunden wurden.
+"""
+
+import argparse
+import sys
+
+from sqlalchemy import select
+
+from backend.app import create_app
+from backend.extensions import db
+from backend.models.inventory import StockBalance, StockMovement
+from backend.services import inventory_ledger, low_stock
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    sub.add_parser("rebuild", help="Stände aus den Buchungen neu berechnen")
+
+    check = sub.add_parser("check", help="Stände mit den Buchungen vergleichen")
+    check.add_argument("--repair", action="store_true", help="bei Abweichungen neu berechnen")
+
+    show = sub.add_parser("show", help="Stände und Buchungen einer SKU")
+    show.add_argument("sku")
+    show.add_argument("--limit", type=int, default=20, help="so viele letzte Buchungen")
+
+    reorder = sub.add_parser("reorder", help="Meldebestand einer SKU setzen")
+    reorder.add_argument("sku")
+    reorder.add_argument("reorder_point", type=int, nargs="?")
+    reorder.add_argument("--default", action="store_true", help="Standard-Meldebestand verwenden")
+    return parser.parse_args(argv)
+
+
+def _show(sku: str, limit: int) -> int:
+    balances = StockBalance.query.filter_by(sku=sku).order_by(StockBalance.location).all()
+    if not balances:
+        print(f"no stock for {sku}")
+        return 1
+    for b in balances:
+        print(f"{b.location}: on_hand={b.on_hand} reserved={b.reserved} available={b.available}")
+    point = low_stock.get_reorder_point(sku)
+    print(f"reorder point: {point if point is not None else 'default'}")
+    movements = db.session.execute(
+        select(StockMovement).where(StockMovement.sku == sku).order_by(StockMovement.id.desc()).limit(limit)
+    ).scalars()
+    for m in movements:
+        order = f" order={m.order_id}" if m.order_id else ""
+        print(f"  {m.created_at:%Y-%m-%d %H:%M} {m.location} {m.kind:<11} "
+              f"on_hand {m.delta_on_hand:+d} reserved {m.delta_reserved:+d}{order} {m.note or ''}")
+    return 0
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    app = create_app()
+    with app.app_context():
+        if args.command == "rebuild":
+            print(inventory_ledger.rebuild())
+            print(low_stock.reconcile())
+            return 0
+        if args.command == "show":
+            return _show(args.sku, args.limit)
+        if args.command == "reorder":
+            if args.reorder_point is None and not args.default:
+                print("reorder point or --default required")
+                return 2
+            low_stock.set_reorder_point(args.sku, None if args.default else args.reorder_point)
+            db.session.commit()
+            print(f"{args.sku}: reorder point {'default' if args.default else args.reorder_point}")
+            return 0
+
+        drifts = inventory_ledger.check()
+        for d in drifts:
+            print(f"{d.sku} @ {d.location} {d.field}: expected {d.expected}, got {d.actual}")
+        if not drifts:
+            print("inventory ledger is consistent")
+            return 0
+        if args.repair:
+            print(inventory_ledger.rebuild())
+            print(low_stock.reconcile())
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
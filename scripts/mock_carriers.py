@@ -0,0 +1,203 @@
+# file: scripts/mock_carriers.py
+
+"""
+Lokaler Mock für die Carrier-APIs (DHL Tracking + DPD Login/Tracking).
+
+Jede Tracking-Nummer durchläuft bei jeder Abfrage den nächsten Status
+(pre-transit -> transit -> delivered); Nummern mit "MISSING" sind unbekannt,
+Nummern mit "FAIL" liefern HTTP 500. `--latency` simuliert langsame APIs.
+
+    python -m scripts.mock_carriers serve --port 8099 --latency 0.2
+        -> DHL_BASE_URL=http://127.0.0.1:8099 DPD_BASE_URL=http://127.0.0.1:8099 DHL_API_KEY=mock
+
+    python -m scripts.mock_carriers bench --shipments 2000
+        -> Tracking-Sync gegen den Mock mit einer temporären SQLite-DB (Kennzahlen pro Lauf)
+
+GET /stats liefert die Anzahl der Anfragen je Endpunkt.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+DHL_STEPS = ["pre-transit", "transit", "delivered"]
+DPD_STEPS = ["ACCEPTED", "ON_THE_ROAD", "DELIVERED"]
+
+
+class CarrierState:
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.polls: dict[str, int] = {}
+        self.requests: dict[str, int] = {}
+
+    def hit(self, endpoint: str) -> None:
+        with self.lock:
+            self.requests[endpoint] = self.requests.get(endpoint, 0) + 1
+
+    def next_step(self, tracking_number: str, steps: list[str]) -> str:
+        with self.lock:
+            n = self.polls.get(tracking_number, 0)
+            self.polls[tracking_number] = n + 1
+        return steps[min(n, len(steps) - 1)]
+
+
+def make_handler(state: CarrierState):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _json(self, code: int, body) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                return self._json(200, state.requests)
+            if url.path != "/track/shipments":
+                return self._json(404, {"detail": "not found"})
+
+            state.hit("dhl.track")
+            time.sleep(state.latency)
+            if not self.headers.get("DHL-API-Key"):
+                return self._json(401, {"detail": "missing api key"})
+            numbers = parse_qs(url.query).get("trackingNumber", [""])[0].split(",")
+            if any("FAIL" in tn for tn in numbers):
+                return self._json(500, {"detail": "upstream error"})
+            shipments = [
+                {"id": tn, "status": {"statusCode": state.next_step(tn, DHL_STEPS)}, "events": []}
+                for tn in numbers
+                if tn and "MISSING" not in tn
+            ]
+            if not shipments:
+                return self._json(404, {"detail": "no shipments found"})
+            return self._json(200, {"shipments": shipments})
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            if path.endswith("/LoginService/V2_0/getAuth"):
+                state.hit("dpd.auth")
+                time.sleep(state.latency)
+                return self._json(200, {"token": "mock-token"})
+            if path.endswith("/ShipmentService/V4_4/getTrackingData"):
+                state.hit("dpd.track")
+                time.sleep(state.latency)
+                if self.headers.get("Authorization") != "Bearer mock-token":
+                    return self._json(401, {"detail": "invalid token"})
+                tn = self._body().get("parcelLabelNumber", "")
+                if "FAIL" in tn:
+                    return self._json(500, {"detail": "upstream error"})
+                if "MISSING" in tn:
+                    return self._json(200, {"status": "UNKNOWN", "events": []})
+                return self._json(200, {"status": state.next_step(tn, DPD_STEPS), "events": []})
+            return self._json(404, {"detail": "not found"})
+
+    return Handler
+
+
+def start_server(port: int, latency: float) -> tuple[ThreadingHTTPServer, CarrierState]:
+    state = CarrierState(latency)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def bench(args) -> int:
+    server, state = start_server(0, args.latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    fd, path = tempfile.mkstemp(prefix="venookah2_tracking_", suffix=".db")
+    os.close(fd)
+    # Muss vor dem Import von backend gesetzt sein (Config liest die Umgebung beim Import)
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{path}",
+        "DHL_BASE_URL": base_url,
+        "DPD_BASE_URL": base_url,
+        "DHL_API_KEY": "mock",
+    })
+    if args.rate is not None:
+        os.environ["SHIPPING_SYNC_RATE_DHL"] = os.environ["SHIPPING_SYNC_RATE_DPD"] = str(args.rate)
+
+    from backend.app import create_app
+    from backend.extensions import db
+    from backend.models.shipping import Shipment
+    from backend.services.shipping.tracking_sync import sync_tracking
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        rows = []
+        for i in range(args.shipments):
+            provider = "dhl" if i % 2 else "dpd"
+            # einzelne unbekannte (DHL) und fehlerhafte (DPD) Nummern
+            suffix = "MISSING" if i % 50 == 7 else "FAIL" if i % 50 == 14 else ""
+            rows.append({
+                "order_id": i + 1,
+                "provider": provider,
+                "tracking_number": f"{provider.upper()}-{i}{suffix}",
+                "status": "shipped",
+            })
+        db.session.execute(db.insert(Shipment), rows)
+        db.session.commit()
+        print(f"Seeded {args.shipments} shipments, mock carriers at {base_url}, latency {args.latency}s")
+
+        for run in range(1, args.runs + 1):
+            stats = sync_tracking(limit=args.shipments)
+            print(f"run {run}: {json.dumps(stats)}")
+
+        counts = dict(db.session.execute(db.select(Shipment.status, db.func.count()).group_by(Shipment.status)).all())
+        print(f"statuses: {counts}")
+    print(f"carrier requests: {state.requests}")
+    server.shutdown()
+    return 0
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Mock-Server starten")
+    serve.add_argument("--port", type=int, default=8099)
+    serve.add_argument("--latency", type=float, default=0.0, help="Antwortzeit pro Anfrage (Sekunden)")
+
+    run = sub.add_parser("bench", help="Tracking-Sync gegen den Mock laufen lassen")
+    run.add_argument("--shipments", type=int, default=1000)
+    run.add_argument("--runs", type=int, default=3)
+    run.add_argument("--latency", type=float, default=0.05)
+    run.add_argument("--rate", type=float, help="Anfragen/s je Carrier (Standard: Config, 0 = unbegrenzt)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.command == "bench":
+        return bench(args)
+
+    server, _state = start_server(args.port, args.latency)
+    print(f"Mock carriers listening on http://127.0.0.1:{args.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
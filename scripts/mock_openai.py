@@ -0,0 +1,347 @@
+# file: scripts/mock_openai.py
+
+"""
+Lokaler Fake für OpenAI Chat Completions (mit und ohne `stream`).
+
+Die Antwort besteht aus `--tokens` Wörtern; im Streaming-Modus kommt alle
+`--token-delay` Sekunden ein Chunk (SSE wie bei OpenAI, Abschluss mit [DONE]).
+Eine Nachricht mit "FAIL" liefert HTTP 500, eine mit "CUT" endet mit
+finish_reason "length" (abgeschnitten). /v1/audio/transcriptions liest den
+Upload blockweise und antwortet mit einer Frage, die die empfangenen Bytes nennt.
+
+    python -m scripts.mock_openai serve --port 8098
+        -> OPENAI_BASE_URL=http://127.0.0.1:8098/v1 OPENAI_API_KEY=mock
+
+    python -m scripts.mock_openai check
+        -> /api/chat und /api/chat/stream gegen den Fake prüfen (Streaming,
+           Limits pro Client und pro Prozess, Freigabe bei Verbindungsabbruch,
+           Antwort-Cache, Sprachnachrichten an /api/ai/owner_query)
+
+GET /stats liefert die Anzahl der Anfragen und der abgebrochenen Streams.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeState:
+    def __init__(self, tokens: int, token_delay: float):
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "streams": 0, "aborted": 0, "transcriptions": 0, "transcribed_bytes": 0}
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    def words(self, message: str) -> list[str]:
+        return [f"w{i} " for i in range(self.tokens - 1)] + [f"({len(message)})"]
+
+    @staticmethod
+    def finish_reason(message: str) -> str:
+        return "length" if "CUT" in message else "stop"
+
+
+def make_handler(state: FakeState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _json(self, code: int, body) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                return self._json(200, state.stats)
+            return self._json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            if self.path == "/v1/audio/transcriptions":
+                return self._transcribe()
+            if self.path != "/v1/chat/completions":
+                return self._json(404, {"error": {"message": "not found"}})
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            state.count("requests")
+            if not self.headers.get("Authorization", "").startswith("Bearer "):
+                return self._json(401, {"error": {"message": "missing api key"}})
+            message = (body.get("messages") or [{}])[-1].get("content", "")
+            if "FAIL" in message:
+                return self._json(500, {"error": {"message": "mock failure"}})
+            words = state.words(message)
+
+            if not body.get("stream"):
+                time.sleep(state.token_delay * len(words))
+                return self._json(200, {"choices": [{"message": {"role": "assistant", "content": "".join(words)},
+                                                      "finish_reason": state.finish_reason(message)}]})
+
+            state.count("streams")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for word in words:
+                    time.sleep(state.token_delay)
+                    self._chunk({"choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]})
+                self._chunk({"choices": [{"index": 0, "delta": {}, "finish_reason": state.finish_reason(message)}]})
+                self._chunk("[DONE]")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                state.count("aborted")
+                self.close_connection = True
+
+        def _transcribe(self) -> None:
+            state.count("transcriptions")
+            remaining = int(self.headers.get("Content-Length") or 0)
+            received = 0
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, 65536))
+                if not chunk:
+                    break
+                received += len(chunk)
+                remaining -= len(chunk)
+            state.stats["transcribed_bytes"] = received
+            return self._json(200, {"text": f"Wie viel ist auf Lager? ({received} bytes)"})
+
+        def _chunk(self, payload) -> None:
+            text = payload if isinstance(payload, str) else json.dumps(payload)
+            data = f"data: {text}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def start_server(port: int, tokens: int, token_delay: float) -> tuple[ThreadingHTTPServer, FakeState]:
+    state = FakeState(tokens, token_delay)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def _read_events(response, on_delta=None) -> tuple[str, str | None]:
+    """Liest einen SSE-Stream; gibt (Text, letztes Ereignis) zurück."""
+    text, last_event, event = "", None, None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event: "):
+            event = line[7:]
+        elif line.startswith("data: "):
+            payload = json.loads(line[6:])
+            if payload.get("delta"):
+                text += payload["delta"]
+                if on_delta:
+                    on_delta()
+            last_event = event or "message"
+            event = None
+    return text, last_event
+
+
+def fake_voice_note(seconds: float, size: int = 4096) -> bytes:
+    """Minimale Ogg-Opus-Datei: OpusHead-Seite, Füllbytes, letzte Seite mit Granule-Position."""
+    def page(granule: int, payload: bytes) -> bytes:
+        return (b"OggS\x00\x00" + granule.to_bytes(8, "little", signed=True) + b"\x00" * 12
+                + bytes([1, len(payload)]) + payload)
+
+    head = page(0, b"OpusHead\x01\x01" + (312).to_bytes(2, "little") + (48000).to_bytes(4, "little") + b"\x00\x00\x00")
+    tail = page(312 + int(seconds * 48000), b"\x00" * 16)
+    return head + b"\x00" * max(0, size - len(head) - len(tail)) + tail
+
+
+def check(args) -> int:
+    import requests
+    from werkzeug.serving import make_server
+
+    fake, state = start_server(0, args.tokens, args.token_delay)
+    fd, path = tempfile.mkstemp(prefix="venookah2_chat_", suffix=".db")
+    os.close(fd)
+    # Muss vor dem Import von backend gesetzt sein (Config liest die Umgebung beim Import)
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{path}",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{fake.server_address[1]}/v1",
+        "OPENAI_API_KEY": "mock",
+        "CHAT_MAX_INFLIGHT": "2",
+        "CHAT_CLIENT_MAX_CONCURRENT": "1",
+        "CHAT_CLIENT_RATE_PER_MINUTE": "5",
+        "AUDIO_MAX_BYTES": str(1024 * 1024),
+        "AUDIO_MAX_SECONDS": "120",
+    })
+
+    from backend.ai import answer_cache
+    from backend.app import create_app
+    from backend.extensions import db
+    from backend.services import chat_stream
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    web = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=web.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{web.server_port}"
+    full = args.tokens * args.token_delay
+    failures = []
+    questions = itertools.count(1)
+
+    def post(path: str, ip: str, message: str | None = None, **kwargs):
+        # ohne `message` jedes Mal eine neue Frage, damit der Antwort-Cache nicht greift
+        message = message or f"Frage {next(questions)}"
+        return requests.post(base + path, json={"message": message},
+                             headers={"X-Forwarded-For": ip}, timeout=30, **kwargs)
+
+    try:
+        # 1) Streaming: erstes Token lange vor dem Ende
+        started = time.monotonic()
+        first = []
+        with post("/api/chat/stream", "10.0.0.1", stream=True) as resp:
+            text, last = _read_events(resp, on_delta=lambda: first or first.append(time.monotonic() - started))
+        total = time.monotonic() - started
+        print(f"stream: first token after {first[0]:.2f}s, complete after {total:.2f}s, last event {last!r}")
+        if last != "done" or not text.endswith("(7)") or first[0] > full / 2:
+            failures.append(f"streaming: last={last!r} first={first[0]:.2f}s text={text[-20:]!r}")
+
+        # 2) JSON-Endpunkt bleibt kompatibel
+        resp = post("/api/chat", "10.0.0.2")
+        print(f"json: {resp.status_code} {resp.json()}")
+        if resp.status_code != 200 or not resp.json().get("reply", "").endswith("(7)"):
+            failures.append("json endpoint")
+
+        # 3) pro Client nur ein Chat gleichzeitig, 4) höchstens CHAT_MAX_INFLIGHT pro Prozess
+        with post("/api/chat/stream", "10.0.0.3", stream=True) as open_a, \
+                post("/api/chat/stream", "10.0.0.4", stream=True) as open_b:
+            same_client = post("/api/chat/stream", "10.0.0.3")
+            overloaded = post("/api/chat", "10.0.0.5")
+            print(f"limits: same client -> {same_client.status_code} {same_client.json()}, "
+                  f"third client -> {overloaded.status_code} {overloaded.json()}, inflight {chat_stream.stats()}")
+            if same_client.status_code != 429 or overloaded.status_code != 503:
+                failures.append("concurrency limits")
+            if not overloaded.headers.get("Retry-After"):
+                failures.append("Retry-After header missing")
+            _read_events(open_a)
+            _read_events(open_b)
+
+        # 5) Anfragen pro Minute
+        codes = [post("/api/chat", "10.0.0.6").status_code for _ in range(6)]
+        print(f"rate limit (5/min): {codes}")
+        if codes != [200] * 5 + [429]:
+            failures.append(f"rate limit: {codes}")
+
+        # 6) Client bricht ab -> Upstream geschlossen, Slot frei
+        with post("/api/chat/stream", "10.0.0.7", stream=True) as resp:
+            next(resp.iter_lines())
+        deadline = time.monotonic() + full + 2
+        while time.monotonic() < deadline and (chat_stream.stats()["inflight"] or not state.stats["aborted"]):
+            time.sleep(0.05)
+        print(f"after disconnect: {chat_stream.stats()}, fake: {state.stats}")
+        if chat_stream.stats()["inflight"] or not state.stats["aborted"]:
+            failures.append("slot/upstream not released after client disconnect")
+
+        # 7) Upstream-Fehler -> event: error
+        with post("/api/chat/stream", "10.0.0.8", message="FAIL", stream=True) as resp:
+            _text, last = _read_events(resp)
+        if last != "error":
+            failures.append(f"upstream error: last event {last!r}")
+
+        # 8) Antwort-Cache: Wiederholung und fast gleiche Frage ohne Upstream-Anfrage
+        before = state.stats["requests"]
+        first_reply = post("/api/chat", "10.0.1.1", message="Wie lange dauert die Lieferung?").json()
+        again = post("/api/chat", "10.0.1.2", message="wie lange dauert die lieferung").json()
+        with post("/api/chat/stream", "10.0.1.3", message="Wie lange dauert die Liefferung??", stream=True) as resp:
+            similar, _last = _read_events(resp)
+        cached_requests = state.stats["requests"] - before
+        with app.app_context():
+            answer_cache.invalidate()
+            stats = answer_cache.stats()
+        post("/api/chat", "10.0.1.4", message="Wie lange dauert die Lieferung?")
+        print(f"answer cache: upstream requests {cached_requests} for 3 questions, "
+              f"{state.stats['requests'] - before} after invalidate, {stats}")
+        if cached_requests != 1 or not (first_reply.get("reply") == again.get("reply") == similar):
+            failures.append("answer cache")
+        if state.stats["requests"] - before != 2:
+            failures.append("answer cache invalidation")
+
+        # abgeschnittene Antworten (finish_reason "length") werden nicht gecacht
+        before = state.stats["requests"]
+        post("/api/chat", "10.0.1.5", message="CUT Preise?")
+        post("/api/chat", "10.0.1.6", message="CUT Preise?")
+        with post("/api/chat/stream", "10.0.1.7", message="CUT Lieferzeit?", stream=True) as resp:
+            _read_events(resp)
+        with post("/api/chat/stream", "10.0.1.8", message="CUT Lieferzeit?", stream=True) as resp:
+            _read_events(resp)
+        truncated_requests = state.stats["requests"] - before
+        print(f"truncated replies: upstream requests {truncated_requests} for 2x2 questions")
+        if truncated_requests != 4:
+            failures.append("truncated reply served from the answer cache")
+
+        # 9) Sprachnachrichten: Upload gestreamt, Wiederholung aus dem Transkriptions-Cache, Limits
+        def voice(data: bytes):
+            return requests.post(base + "/api/ai/owner_query", data={"department": "lager"},
+                                 files={"audio": ("voice.ogg", data, "audio/ogg")}, timeout=30)
+
+        note = fake_voice_note(30, size=700 * 1024)
+        replies = [voice(note) for _ in range(2)]
+        too_long = voice(fake_voice_note(300))
+        too_large = voice(fake_voice_note(30, size=2 * 1024 * 1024))
+        print(f"voice: {[r.status_code for r in replies]} transcriptions={state.stats['transcriptions']}, "
+              f"too long -> {too_long.status_code} {too_long.json()}, too large -> {too_large.status_code}")
+        if [r.status_code for r in replies] != [200, 200] or state.stats["transcriptions"] != 1:
+            failures.append("voice note transcription cache")
+        if state.stats["transcribed_bytes"] <= len(note):
+            failures.append("transcription upload incomplete")
+        if too_long.status_code != 413 or too_large.status_code != 413:
+            failures.append("voice note limits")
+    finally:
+        web.shutdown()
+        fake.shutdown()
+        os.unlink(path)
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print("OK" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("serve", "Fake-Server starten"), ("check", "Chat-Endpunkte gegen den Fake prüfen")):
+        cmd = sub.add_parser(name, help=help_text)
+        cmd.add_argument("--tokens", type=int, default=20, help="Wörter pro Antwort")
+        cmd.add_argument("--token-delay", type=float, default=0.05, help="Pause zwischen zwei Chunks (Sekunden)")
+        if name == "serve":
+            cmd.add_argument("--port", type=int, default=8098)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args.command == "check":
+        return check(args)
+
+    server, _state = start_server(args.port, args.tokens, args.token_delay)
+    print(f"Fake OpenAI listening on http://127.0.0.1:{args.port}/v1 (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
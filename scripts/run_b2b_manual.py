@@ -31,7 +31,7 @@ with app.app_context():
             if not u:
                 print('Could not load user ORM instance; aborting manual check')
             else:
-                res = run_b2b_checks_for_user(u)
+                res = run_b2b_checks_for_user(u, force=True)
                 if res is None:
                     print('No result returned')
                 else:
@@ -0,0 +1,59 @@
+# file: scripts/sales_rollup.py
+
+"""
+Verwaltung der Umsatz-Rollups (sales_daily_rollup / sales_daily_totals).
+
+    python -m scripts.sales_rollup rebuild                      # alles neu berechnen (Backfill)
+    python -m scripts.sales_rollup rebuild --from 2026-01-01 --to 2026-01-31
+    python -m scripts.sales_rollup check --days 90              # Abgleich mit den Bestellungen
+    python -m scripts.sales_rollup check --days 90 --repair     # abweichende Tage neu berechnen
+
+`check` endet mit Exit-Code 1, wenn Abweichungen gefunden wurden.
+"""
+
+import argparse
+import sys
+from datetime import date, datetime, timedelta
+
+from backend.app import create_app
+from backend.services import sales_rollup
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = sub.add_parser("rebuild", help="Rollups aus den Bestellungen neu berechnen")
+    rebuild.add_argument("--from", dest="start", type=date.fromisoformat)
+    rebuild.add_argument("--to", dest="end", type=date.fromisoformat)
+
+    check = sub.add_parser("check", help="Rollups mit den Bestellungen vergleichen")
+    check.add_argument("--days", type=int, help="nur die letzten N Tage (Standard: alles)")
+    check.add_argument("--repair", action="store_true", help="Tage mit Abweichungen neu berechnen")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    app = create_app()
+    with app.app_context():
+        if args.command == "rebuild":
+            print(sales_rollup.rebuild(args.start, args.end))
+            return 0
+
+        start = datetime.utcnow().date() - timedelta(days=args.days - 1) if args.days else None
+        mismatches = sales_rollup.check(start=start)
+        for m in mismatches:
+            print(f"{m.day} {m.currency} {'B2B' if m.is_b2b else 'B2C'} {m.field}: expected {m.expected}, got {m.actual}")
+        if not mismatches:
+            print("sales rollup is consistent")
+            return 0
+        if args.repair:
+            for day in sorted({m.day for m in mismatches}):
+                sales_rollup.rebuild(day, day)
+            print(f"rebuilt {len({m.day for m in mismatches})} day(s)")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+# file: scripts/snapshot_check.py
+
+"""
+Snapshot-Dienst (OSINT) gegen einen lokalen HTTP-Server prüfen.
+
+Der Server liefert einige Testseiten: /a (auch als /a?utm_source=x erreichbar),
+/copy-1 und /copy-2 mit identischem Inhalt, /slow (antwortet erst nach
+`--slow` Sekunden). Geprüft werden URL-Cache, Deduplizierung paralleler Aufrufe
+(bei leerem Cache) und gleicher Inhalte, eindeutige Dateinamen und Deadlines;
+ohne Playwright mit dem HTML-Fallback.
+
+    python -m scripts.snapshot_check
+    python -m scripts.snapshot_check --url https://example.com --timeout 15
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+PAGES = {
+    "/a": b"<html><body><h1>Firma A</h1></body></html>",
+    "/copy-1": b"<html><body><h1>Gleiche Seite</h1></body></html>",
+    "/copy-2": b"<html><body><h1>Gleiche Seite</h1></body></html>",
+}
+# /a antwortet verzögert, damit parallele Aufrufe sicher auf denselben laufenden Abruf treffen
+DELAYS = {"/a": 0.3}
+
+
+def start_server(slow: float) -> tuple[ThreadingHTTPServer, dict]:
+    hits: dict[str, int] = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            with lock:
+                hits[path] = hits.get(path, 0) + 1
+            if path == "/slow":
+                time.sleep(slow)
+                body = b"<html><body>langsam</body></html>"
+            else:
+                time.sleep(DELAYS.get(path, 0))
+                body = PAGES.get(path)
+            if body is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, hits
+
+
+def check(args) -> int:
+    from backend.services.b2b_checks.snapshot_service import SnapshotService
+
+    server, hits = start_server(args.slow)
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    directory = tempfile.mkdtemp(prefix="venookah2_snapshots_")
+    service = SnapshotService(directory, contexts=args.contexts)
+    failures = []
+
+    try:
+        started = time.monotonic()
+        first = service.capture(f"{base}/a", timeout=args.timeout)
+        print(f"renderer: {service.renderer}, first snapshot in {time.monotonic() - started:.2f}s")
+
+        # gleiche URL mit Tracking-Parametern -> aus dem Cache, kein Abruf
+        cached = service.capture(f"{base}/a?utm_source=x", timeout=args.timeout)
+        if cached.get("file") != first.get("file") or hits.get("/a") != 1 or not service.stats["cache_hits"]:
+            failures.append(f"URL cache: /a fetched {hits.get('/a')}x")
+
+        # Cache leeren, dann gleiche URL parallel -> ein Abruf, die übrigen warten darauf
+        service.clear_cache()
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            urls = [f"{base}/a?utm_source=x", f"{base}/A".replace("/A", "/a"), f"{base}/a#top"] * 3
+            same = list(pool.map(lambda u: service.capture(u, timeout=args.timeout), urls))
+        if {r.get("file") for r in same} != {first.get("file")} or hits.get("/a") != 2:
+            failures.append(f"URL de-duplication: /a fetched {hits.get('/a')}x")
+        if not service.stats["deduplicated"]:
+            failures.append("URL de-duplication: no concurrent capture joined the running one")
+
+        # gleicher Inhalt unter zwei URLs -> eine Datei
+        copy_1 = service.capture(f"{base}/copy-1", timeout=args.timeout)
+        copy_2 = service.capture(f"{base}/copy-2", timeout=args.timeout)
+        if not (copy_1.get("success") and copy_1.get("file") == copy_2.get("file")):
+            failures.append("content de-duplication")
+        if first.get("file") == copy_1.get("file"):
+            failures.append("different pages share a file name")
+
+        # Deadline
+        started = time.monotonic()
+        slow = service.capture(f"{base}/slow", timeout=1.0)
+        waited = time.monotonic() - started
+        if slow.get("success") or waited > 2.5:
+            failures.append(f"deadline: success={slow.get('success')} after {waited:.2f}s")
+
+        for name, result in (("a", first), ("copy-1", copy_1), ("copy-2", copy_2), ("slow", slow)):
+            print(f"{name}: {json.dumps(result)}")
+        for url in args.url or []:
+            print(f"{url}: {json.dumps(service.capture(url, timeout=args.timeout))}")
+        print(f"files: {sorted(os.listdir(directory))}")
+        print(f"server hits: {hits}, service: {service.stats}")
+    finally:
+        service.stop()
+        server.shutdown()
+
+    for failure in failures:
+        print(f"FAILED: {failure}")
+    print("OK" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contexts", type=int, default=2, help="Browser-Kontexte im Pool")
+    parser.add_argument("--timeout", type=float, default=20.0, help="Deadline pro Snapshot (Sekunden)")
+    parser.add_argument("--slow", type=float, default=5.0, help="Antwortzeit von /slow (Sekunden)")
+    parser.add_argument("--url", action="append", help="zusätzlich diese URL aufnehmen (mehrfach möglich)")
+    return check(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+# file: scripts/startup_profile.py
+
+"""
+Startzeit der App messen: Importzeit pro Modul (`python -X importtime`) und
+Dauer von `create_app()` in einem frischen Prozess, so wie ein Gunicorn-Worker
+oder ein Skript startet. Schwere Clients (Stripe, OpenAI, Playwright, aiogram)
+dürfen dabei nicht geladen werden; sie erscheinen sonst unter "heavy".
+
+    python -m scripts.startup_profile                  # Top 25 Module
+    python -m scripts.startup_profile --top 50 --by-package
+    python -m scripts.startup_profile --runs 5 --max-ms 300   # Gate: Median über dem Limit -> Exit 1
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+
+# Beim Start unerwünscht: nur bei der ersten Nutzung laden
+HEAVY_MODULES = (
+    "stripe", "openai", "playwright", "aiogram", "aiohttp", "alembic", "flask_migrate", "PIL", "bs4", "requests",
+    "backend.ai.whisper_client", "backend.services.prepare_shipment",
+)
+
+PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from backend.app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "create_app_ms": (t2 - t1) * 1000,
+                  "modules": sorted(sys.modules)}))
+"""
+
+
+def _env(database_url: str | None) -> dict:
+    env = dict(os.environ)
+    # Profil ohne Bot-Start und ohne Datenbank-Zugriff
+    env["START_TELEGRAM_BOT"] = "0"
+    if database_url:
+        env["DATABASE_URL"] = database_url
+    return env
+
+
+def run_probe(env: dict, importtime: bool = False) -> tuple[dict, str]:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    proc = subprocess.run(cmd, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr[-2000:])
+    return json.loads(proc.stdout.strip().splitlines()[-1]), proc.stderr
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """Zeilen "import time: self | cumulative | name" -> [(name, self_us, cumulative_us)]."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+def _package(name: str) -> str:
+    parts = name.split(".")
+    # eigene Pakete eine Ebene tiefer, z. B. backend.services
+    return ".".join(parts[:2]) if parts[0] in ("backend", "telegram_bot") else parts[0]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=25, help="so viele Module/Pakete anzeigen")
+    parser.add_argument("--by-package", action="store_true", help="Eigenzeit nach Paket summieren")
+    parser.add_argument("--runs", type=int, default=3, help="Messläufe ohne importtime (Median)")
+    parser.add_argument("--max-ms", type=float, help="Limit für Import + create_app (Median), sonst Exit 1")
+    parser.add_argument("--database-url", help="DATABASE_URL für die Messung (Standard: aus der Umgebung)")
+    args = parser.parse_args(argv)
+
+    env = _env(args.database_url)
+    probe, stderr = run_probe(env, importtime=True)
+    rows = parse_importtime(stderr)
+
+    if args.by_package:
+        totals = Counter()
+        for name, self_us, _ in rows:
+            totals[_package(name)] += self_us
+        print(f"{'self ms':>9}  package")
+        for name, self_us in totals.most_common(args.top):
+            print(f"{self_us / 1000:9.1f}  {name}")
+    else:
+        print(f"{'cum ms':>9} {'self ms':>9}  module")
+        for name, self_us, cum_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+            print(f"{cum_us / 1000:9.1f} {self_us / 1000:9.1f}  {name}")
+
+    heavy = sorted(m for m in probe["modules"] if m in HEAVY_MODULES)
+    print(f"\nmodules loaded: {len(probe['modules'])}, heavy: {', '.join(heavy) or '-'}")
+
+    timings = [run_probe(env)[0] for _ in range(max(1, args.runs))]
+    import_ms = statistics.median(t["import_ms"] for t in timings)
+    create_ms = statistics.median(t["create_app_ms"] for t in timings)
+    total_ms = import_ms + create_ms
+    print(f"import backend.app: {import_ms:.0f} ms, create_app(): {create_ms:.0f} ms, total: {total_ms:.0f} ms "
+          f"(median of {len(timings)})")
+
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"FAILED: startup {total_ms:.0f} ms > {args.max_ms:.0f} ms")
+        return 1
+    if heavy:
+        print(f"FAILED: heavy modules imported at startup: {', '.join(heavy)}")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
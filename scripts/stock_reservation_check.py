@@ -0,0 +1,233 @@
+# file: scripts/stock_reservation_check.py
+
+"""
+Stresstest der Lagerreservierung (services.stock_reservation).
+
+Legt Produkte mit knappem Bestand (teils auf zwei Lagerorte verteilt) und
+deutlich mehr Bestellungen an, als Bestand da ist, und reserviert alle
+Bestellungen aus vielen Threads gleichzeitig — jede Bestellung zweimal
+(doppelte Webhooks). Danach wird die Hälfte der reservierten Bestellungen
+storniert und die andere Hälfte versandt. Geprüft wird:
+
+- kein Überverkauf: reserved <= on_hand für jeden Bestand
+- reserved = Summe der aktiven Reservierungen, Stände = Summe der Buchungen
+- jede Bestellung ist vollständig oder gar nicht reserviert, nie doppelt
+- Storno gibt genau die Mengen der Bestellung frei, Versand bucht sie aus
+- Low-Stock: jede SKU am oder unter dem Meldebestand ist `is_low` und hat
+  genau einen Alert, trotz paralleler Reservierungen (services.low_stock)
+
+    python -m scripts.stock_reservation_check
+    python -m scripts.stock_reservation_check --orders 400 --threads 16
+    python -m scripts.stock_reservation_check --database-url postgresql+psycopg2://...  # leere Test-DB
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+def _parse_args(argv):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", help="Test-Datenbank (Standard: temporäre SQLite-Datei)")
+    parser.add_argument("--products", type=int, default=20)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+
+def seed(db, rnd: random.Random, n_products: int, n_orders: int) -> dict[int, dict[int, int]]:
+    """Legt die Testdaten an; Rückgabe: {order_id: {product_id: qty}}."""
+    from backend.models import Category, Order, OrderItem, Product, User
+    from backend.models.inventory import MovementKind
+    from backend.services import inventory_ledger
+
+    now = datetime.utcnow()
+    needed: dict[int, dict[int, int]] = {}
+    with db.engine.begin() as conn:
+        conn.execute(Category.__table__.insert(), [{"name": "Stress", "slug": "stress", "created_at": now, "updated_at": now}])
+        conn.execute(User.__table__.insert(), [{
+            "email": "stress@bench.local", "password_hash": "x", "role": "b2c", "is_b2b": False,
+            "is_active": True, "is_confirmed": True, "created_at": now, "updated_at": now,
+        }])
+        conn.execute(Product.__table__.insert(), [
+            {"name": f"Stress {i}", "slug": f"stress-{i}", "sku": f"STRESS-{i}", "category_id": 1,
+             "price_b2c": 10, "price_b2b": 8, "currency": "EUR", "is_active": True, "created_at": now, "updated_at": now}
+            for i in range(1, n_products + 1)
+        ])
+        conn.execute(Order.__table__.insert(), [
+            {"user_id": 1, "status": "paid", "total_amount": 10, "currency": "EUR", "is_b2b": False,
+             "created_at": now, "updated_at": now}
+            for _ in range(n_orders)
+        ])
+        items = []
+        for oid in range(1, n_orders + 1):
+            lines = {pid: rnd.randint(1, 4) for pid in rnd.sample(range(1, n_products + 1), rnd.randint(1, 4))}
+            needed[oid] = lines
+            items += [
+                {"order_id": oid, "product_id": pid, "quantity": qty, "unit_price": 10, "currency": "EUR"}
+                for pid, qty in lines.items()
+            ]
+        conn.execute(OrderItem.__table__.insert(), items)
+
+    for pid in range(1, n_products + 1):
+        # jedes dritte Produkt liegt an zwei Lagerorten
+        parts = [rnd.randint(3, 12)] + ([rnd.randint(1, 6)] if pid % 3 == 0 else [])
+        for n, qty in enumerate(parts):
+            inventory_ledger.post(MovementKind.RECEIPT, f"STRESS-{pid}", f"L{n}", on_hand=qty, note="stress seed")
+    db.session.commit()
+    return needed
+
+
+def verify(db, needed: dict[int, dict[int, int]]) -> tuple[list[str], set[int]]:
+    """Prüft die Invarianten; Rückgabe: (Fehler, vollständig reservierte Bestellungen)."""
+    from sqlalchemy import select
+
+    from backend.models.inventory import ReservationStatus, StockBalance, StockReservation
+    from backend.services import inventory_ledger
+
+    errors = [f"ledger drift: {d}" for d in inventory_ledger.check()]
+    with db.engine.connect() as conn:
+        stock = conn.execute(select(StockBalance.id, StockBalance.on_hand, StockBalance.reserved)).all()
+        active = conn.execute(
+            select(StockReservation.order_id, StockReservation.product_id, StockReservation.quantity)
+            .where(StockReservation.status == ReservationStatus.ACTIVE)
+        ).all()
+
+    per_order: dict[int, Counter] = defaultdict(Counter)
+    for order_id, product_id, qty in active:
+        per_order[order_id][product_id] += qty
+    for balance_id, on_hand, reserved in stock:
+        if reserved > on_hand or on_hand < 0:
+            errors.append(f"oversold: balance {balance_id} reserved {reserved} > on hand {on_hand}")
+    for order_id, got in per_order.items():
+        if dict(got) != needed[order_id]:
+            errors.append(f"order {order_id}: reserved {dict(got)} != ordered {needed[order_id]}")
+    return errors, set(per_order)
+
+
+def verify_low_stock(db) -> list[str]:
+    """Ein Alert je knapper SKU, keiner für SKUs, die nie knapp waren."""
+    from sqlalchemy import select
+
+    from backend.models.alert import Alert
+    from backend.models.inventory import ReorderPoint
+    from backend.services import inventory_ledger, low_stock
+
+    default_point, _ = low_stock._settings()
+    with db.engine.connect() as conn:
+        states = conn.execute(select(ReorderPoint.sku, ReorderPoint.reorder_point, ReorderPoint.is_low)).all()
+        payloads = conn.execute(select(Alert.payload).where(Alert.type == low_stock.ALERT_TYPE)).scalars().all()
+    alerts = Counter(payload["sku"] for payload in payloads)
+    available = inventory_ledger.available_by_sku([sku for sku, _, _ in states])
+
+    errors = [f"low stock: {sku} has {n} alerts" for sku, n in alerts.items() if n > 1]
+    for sku, point, is_low in states:
+        point = default_point if point is None else point
+        if available.get(sku, 0) <= point and not (is_low and alerts[sku] == 1):
+            errors.append(f"low stock: {sku} available {available.get(sku, 0)} <= {point}, "
+                          f"is_low={is_low}, alerts={alerts[sku]}")
+    return errors
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    database_url = args.database_url
+    if not database_url:
+        fd, path = tempfile.mkstemp(prefix="venookah2_stock_", suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{path}"
+        print(f"Using temporary SQLite database {path}")
+    # Muss vor dem Import von backend gesetzt sein (Config liest DATABASE_URL beim Import)
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("DB_POOL_SIZE", str(args.threads + 2))
+
+    from backend.app import create_app
+    from backend.extensions import db
+    from backend.models.inventory import StockBalance
+    from backend.models.order import Order, OrderStatus
+    from backend.services import inventory_ledger, stock_reservation
+
+    app = create_app()
+    rnd = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        needed = seed(db, rnd, args.products, args.orders)
+
+    outcomes = Counter()
+    lock = threading.Lock()
+
+    def reserve(order_id: int) -> None:
+        with app.app_context():
+            try:
+                result = "reserved" if stock_reservation.reserve(order_id) else "noop"
+            except stock_reservation.InsufficientStock:
+                result = "insufficient"
+            except Exception as exc:
+                result = f"error:{type(exc).__name__}"
+            finally:
+                db.session.remove()
+        with lock:
+            outcomes[result] += 1
+
+    calls = [oid for oid in needed for _ in range(2)]
+    rnd.shuffle(calls)
+    t0 = time.time()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(reserve, calls))
+    elapsed = time.time() - t0
+    print(f"{len(calls)} reservations from {args.threads} threads in {elapsed:.2f}s: {dict(outcomes)}")
+
+    with app.app_context():
+        errors, reserved_orders = verify(db, needed)
+        if outcomes["reserved"] != len(reserved_orders):
+            errors.append(f"{outcomes['reserved']} successful reservations for {len(reserved_orders)} orders")
+        if not reserved_orders:
+            errors.append("no order could be reserved")
+
+        # Storno der einen, Versand der anderen Hälfte: before_commit-Hook von models.order
+        on_hand_before = sum(b.on_hand for b in StockBalance.query)
+        cancelled = sorted(reserved_orders)[::2]
+        shipped = sorted(reserved_orders - set(cancelled))
+        for oid in cancelled:
+            db.session.get(Order, oid).status = OrderStatus.CANCELLED
+        for oid in shipped:
+            db.session.get(Order, oid).status = OrderStatus.SHIPPED
+        db.session.commit()
+        after, still_reserved = verify(db, needed)
+        errors += after
+        if still_reserved:
+            errors.append(f"cancelled/shipped orders still reserved: {sorted(still_reserved)[:10]}")
+        picked = on_hand_before - sum(b.on_hand for b in StockBalance.query)
+        expected_picked = sum(sum(needed[oid].values()) for oid in shipped)
+        if picked != expected_picked:
+            errors.append(f"shipping picked {picked} units, expected {expected_picked}")
+        print(f"reserved orders: {len(reserved_orders)}, cancelled: {len(cancelled)}, shipped: {len(shipped)} "
+              f"({picked} units picked)")
+        errors += verify_low_stock(db)
+
+        # Neuaufbau aus dem Ledger ändert an konsistenten Ständen nichts
+        before = {(b.sku, b.location): (b.on_hand, b.reserved) for b in StockBalance.query}
+        inventory_ledger.rebuild()
+        db.session.expire_all()
+        if before != {(b.sku, b.location): (b.on_hand, b.reserved) for b in StockBalance.query}:
+            errors.append("rebuild from the ledger changed consistent balances")
+
+    for error in errors[:20]:
+        print(f"  {error}")
+    if errors or any(key.startswith("error:") for key in outcomes):
+        print("FAILED")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
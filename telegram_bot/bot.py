@@ -1,25 +1,45 @@
 # file: telegram_bot/bot.py
 
 """
-MVP-Bot für den Inhaber (derzeit nur /start und /ping).
+MVP-Bot für den Inhaber: Abteilung wählen, dann Text- oder Sprachfragen an das
+Backend (/api/ai/owner_query). Handler laufen nebenläufig; Backend-Anfragen gehen
+asynchron über eine gemeinsame Session (services.backend_client).
+
+Normalerweise läuft der Bot im Web-Prozess (telegram_bot.runtime, Webhook oder
+Polling mit Leader-Wahl). Eigenständig:
+
+    python -m telegram_bot.bot                  # Polling, nur als Inhaber der Polling-Sperre
+    python -m telegram_bot.bot --set-webhook    # TELEGRAM_WEBHOOK_URL bei Telegram anmelden
+    python -m telegram_bot.bot --delete-webhook # zurück zu Polling
 """
 
+import argparse
 import asyncio
+import logging
+import signal
+import sys
 
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import CommandStart, Command
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
-import requests
-import io
+import aiohttp
 import os
-import atexit
-
-_PIDFILE = os.path.join(os.getenv('TEMP', '.'), 'telegram_bot.pid')
+import tempfile
 
 from telegram_bot.config import config
+from telegram_bot.services.backend_client import BackendClient, BackendError
+from telegram_bot.services.department_store import DepartmentStore
 
 bot = Bot(token=config.BOT_TOKEN)
 dp = Dispatcher()
+backend = BackendClient(
+    config.BACKEND_BASE_URL,
+    max_connections=config.BACKEND_MAX_CONNECTIONS,
+    max_inflight=config.BACKEND_MAX_INFLIGHT,
+    timeout=config.BACKEND_TIMEOUT,
+)
+# gemeinsam für alle Prozesse (Tabelle telegram_departments); die App setzt runtime.BotRuntime
+departments = DepartmentStore()
 
 
 @dp.message(CommandStart())
@@ -40,6 +60,20 @@ async def cmd_ping(message: types.Message):
     await message.answer("pong 🟢")
 
 
+async def _ask_backend(message: types.Message, **kwargs) -> None:
+    """Forward a query to `/api/ai/owner_query` and answer with the reply (or the error)."""
+    try:
+        j = await backend.owner_query(await departments.get(message.from_user.id, 'shop'), **kwargs)
+        await message.answer(j.get('reply') or j.get('error') or 'Keine Antwort')
+    except BackendError as e:
+        # include response body for debugging
+        await message.answer(f"Fehler bei der AI-Anfrage: {e.body[:1000]}")
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        await message.answer(f"Fehler bei der AI-Anfrage: {e or type(e).__name__}")
+    except Exception as e:
+        await message.answer(f"Unerwarteter Fehler: {e}")
+
+
 @dp.message(lambda message: getattr(message, 'text', None) is not None)
 async def handle_text(message: types.Message):
     """Handle plain text messages as owner queries if they come from owner id or any user.
@@ -59,121 +93,82 @@ async def handle_text(message: types.Message):
 
     # If user pressed a department button
     if text in department_map:
+        await departments.set(message.from_user.id, department_map[text])
         await message.answer(f"Sie haben die Abteilung gewählt: {text}. Senden Sie eine Sprachnachricht oder eine Textanfrage, und ich werde das Modell befragen.")
-        # store last department in a simple file-based cache per user (for demo)
-        tmpdir = os.getenv('TEMP', '.')
-        path = os.path.join(tmpdir, f'tg_dept_{message.from_user.id}.txt')
-        with open(path, 'w', encoding='utf-8') as f:
-            f.write(department_map[text])
         return
 
-    # Otherwise assume it's a query; try to read stored department
-    tmpdir = os.getenv('TEMP', '.')
-    path = os.path.join(tmpdir, f'tg_dept_{message.from_user.id}.txt')
-    dept = None
-    if os.path.exists(path):
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                dept = f.read().strip()
-        except Exception:
-            dept = None
-
-    payload = {'message': text, 'department': dept or 'shop'}
-    try:
-        resp = requests.post(f"{config.BACKEND_BASE_URL}/api/ai/owner_query", data=payload, timeout=30)
-        try:
-            resp.raise_for_status()
-        except requests.exceptions.HTTPError as he:
-            # include response body for debugging
-            body = he.response.text if getattr(he, 'response', None) is not None else str(he)
-            await message.answer(f"Fehler bei der AI-Anfrage: {body[:1000]}")
-            return
-        j = resp.json()
-        reply = j.get('reply') or j.get('error') or 'Keine Antwort'
-        await message.answer(reply)
-    except requests.exceptions.RequestException as e:
-        await message.answer(f"Fehler bei der AI-Anfrage: {str(e)}")
-    except Exception as e:
-        await message.answer(f"Unerwarteter Fehler: {e}")
+    # Otherwise assume it's a query for the stored department
+    await _ask_backend(message, message=text)
 
 
 @dp.message(lambda message: getattr(message, 'voice', None) is not None or getattr(message, 'audio', None) is not None)
 async def handle_voice(message: types.Message):
     # This handler processes voice (voice notes) and audio files.
-    if not (message.voice or message.audio):
+    media = message.voice or message.audio
+    if media is None:
         return
 
-    # download voice file from Telegram, send to backend as 'audio'
-    file_id = message.voice.file_id
-    try:
-        file = await bot.get_file(file_id)
-        file_path = file.file_path
-        file_bytes = await bot.download_file(file_path)
-    except Exception as ex:
-        await message.answer(f"Sprachnachricht konnte nicht heruntergeladen werden: {ex}")
+    # Telegram reports size and duration up front: reject before downloading anything
+    if media.file_size and media.file_size > config.AUDIO_MAX_BYTES:
+        await message.answer(f"Die Sprachnachricht ist zu groß (max. {config.AUDIO_MAX_BYTES // (1024 * 1024)} MB).")
+        return
+    if media.duration and media.duration > config.AUDIO_MAX_SECONDS:
+        await message.answer(f"Die Sprachnachricht ist zu lang (max. {int(config.AUDIO_MAX_SECONDS)} Sekunden).")
         return
 
-    tmpdir = os.getenv('TEMP', '.')
-    path = os.path.join(tmpdir, f'tg_dept_{message.from_user.id}.txt')
-    dept = None
-    if os.path.exists(path):
-        try:
-            with open(path, 'r', encoding='utf-8') as f:
-                dept = f.read().strip()
-        except Exception:
-            dept = None
-
-    # `file_bytes` may be bytes or a file-like object; normalize to bytes
-    try:
-        if hasattr(file_bytes, 'read'):
-            data_bytes = file_bytes.read()
-        else:
-            data_bytes = file_bytes
-    except Exception:
-        data_bytes = file_bytes
-
-    files = {'audio': ('voice.ogg', io.BytesIO(data_bytes), 'audio/ogg')}
-    data = {'department': dept or 'shop'}
-    # Debug: include summary of outgoing payload in logs for troubleshooting
-    try:
-        current = f"POST {config.BACKEND_BASE_URL}/api/ai/owner_query files={list(files.keys())} dept={data.get('department')} size={len(data_bytes) if data_bytes else 0}"
-    except Exception:
-        current = f"POST {config.BACKEND_BASE_URL}/api/ai/owner_query dept={data.get('department')}"
-    try:
-        resp = requests.post(f"{config.BACKEND_BASE_URL}/api/ai/owner_query", files=files, data=data, timeout=60)
+    # download in chunks into a spooled temp file (on disk above 1 MB) and upload from there
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as audio:
         try:
-            resp.raise_for_status()
-        except requests.exceptions.HTTPError as he:
-            body = he.response.text if getattr(he, 'response', None) is not None else str(he)
-            await message.answer(f"Fehler bei der AI-Anfrage: {body[:1000]}")
+            await bot.download(media, destination=audio)
+        except Exception as ex:
+            await message.answer(f"Sprachnachricht konnte nicht heruntergeladen werden: {ex}")
             return
-        j = resp.json()
-        await message.answer(j.get('reply') or j.get('error') or 'Keine Antwort')
-    except requests.exceptions.RequestException as e:
-        await message.answer(f"Fehler bei der AI-Anfrage: {str(e)}")
-    except Exception as e:
-        await message.answer(f"Unerwarteter Fehler: {e}")
-
-
-async def main():
-    # write PID file so external launchers can detect an already-running bot
+        filename = getattr(media, 'file_name', None) or 'voice.ogg'
+        content_type = getattr(media, 'mime_type', None) or 'audio/ogg'
+        await _ask_backend(message, audio=audio, filename=filename, content_type=content_type)
+
+
+@dp.startup()
+async def on_startup():
+    await backend.start()
+
+
+@dp.shutdown()
+async def on_shutdown():
+    await backend.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--set-webhook", action="store_true", help="Webhook anmelden und beenden")
+    group.add_argument("--delete-webhook", action="store_true", help="Webhook entfernen und beenden")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # die App liefert Konfiguration und job_locks
+    from backend import create_app
+    from telegram_bot import runtime as bot_runtime
+
+    app = create_app()
+    if args.set_webhook:
+        print(bot_runtime.register_webhook(app, force=True))
+        return 0
+    if args.delete_webhook:
+        rt = bot_runtime.get_runtime(app)
+        print(rt.call(rt.bot.delete_webhook(), timeout=30))
+        rt.stop()
+        return 0
+
+    leader = bot_runtime.start_polling_leader(app)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: leader.stop())
     try:
-        with open(_PIDFILE, 'w', encoding='utf-8') as f:
-            f.write(str(os.getpid()))
-    except Exception:
-        pass
-
-    def _cleanup():
-        try:
-            if os.path.exists(_PIDFILE):
-                os.remove(_PIDFILE)
-        except Exception:
-            pass
-
-    atexit.register(_cleanup)
-
-    await dp.start_polling(bot)
+        leader.wait()
+    finally:
+        leader.runtime.stop()
+    return 0
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    sys.exit(main())
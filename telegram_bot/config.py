@@ -9,8 +9,17 @@ load_dotenv()
 
 class BotConfig:
     BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
-    BACKEND_BASE_URL = "http://localhost:5000"
+    BACKEND_BASE_URL = os.getenv("BOT_BACKEND_BASE_URL", "http://localhost:5000")
     OWNER_TELEGRAM_ID = int(os.getenv('OWNER_TELEGRAM_ID')) if os.getenv('OWNER_TELEGRAM_ID') else None
 
+    # Backend-Client: Verbindungen im Pool, gleichzeitige Anfragen, Gesamt-Timeout (Sekunden)
+    BACKEND_MAX_CONNECTIONS = int(os.getenv("BOT_BACKEND_MAX_CONNECTIONS", "20"))
+    BACKEND_MAX_INFLIGHT = int(os.getenv("BOT_BACKEND_MAX_INFLIGHT", "8"))
+    BACKEND_TIMEOUT = float(os.getenv("BOT_BACKEND_TIMEOUT", "90"))
+
+    # Sprachnachrichten vor dem Download ablehnen (gleiche Limits wie im Backend)
+    AUDIO_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", str(20 * 1024 * 1024)))
+    AUDIO_MAX_SECONDS = float(os.getenv("AUDIO_MAX_SECONDS", "600"))
+
 
 config = BotConfig()
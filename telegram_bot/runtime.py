@@ -0,0 +1,377 @@
+# file: telegram_bot/runtime.py
+
+"""
+Bot-Laufzeit im Prozess: ein Dispatcher, ein Event-Loop-Thread, begrenzter Worker-Pool.
+
+- `BotRuntime` startet den Event-Loop des Bots in einem Daemon-Thread; Updates
+  landen in einer Queue mit höchstens `queue_size` Einträgen und werden von
+  `workers` Tasks verarbeitet (`dp.feed_update`)
+- Webhook-Modus: /webhooks/telegram übergibt jedes Update per `submit()`; ist
+  die Queue voll, gibt `submit()` False zurück (Endpunkt antwortet 503,
+  Telegram stellt das Update später erneut zu)
+- Polling-Modus: `PollingLeader` ruft getUpdates nur in dem Prozess auf, der
+  die Sperre "telegram_bot:polling" in job_locks hält (Lease, verlängert alle
+  ttl/3 Sekunden); die übrigen Prozesse warten als Reserve. Geht die Lease
+  verloren, endet das Polling spätestens nach einem getUpdates-Timeout.
+- Zustand, den alle Laufzeiten teilen (gewählte Abteilung), liegt in der
+  Datenbank (services.department_store), nicht im Prozess: im Webhook-Modus
+  hat jeder Web-Worker seine eigene Laufzeit
+- `register_webhook()` meldet TELEGRAM_WEBHOOK_URL bei Telegram an; das
+  erledigt pro Stunde nur ein Prozess (Sperre "telegram_bot:set_webhook").
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+LOCK_POLLING = "telegram_bot:polling"
+LOCK_SET_WEBHOOK = "telegram_bot:set_webhook"
+# getUpdates: Long-Polling-Dauer bei Telegram (Sekunden)
+POLLING_TIMEOUT = 10
+# Wartezeit nach Fehlern beim Polling: verdoppelt bis höchstens 60 Sekunden
+POLLING_BACKOFF = (1.0, 60.0)
+
+
+def bot_mode(config) -> str:
+    """"webhook", "polling" oder "off" (START_TELEGRAM_BOT=0 oder kein Token)."""
+    if os.getenv("START_TELEGRAM_BOT", "1").lower() not in ("1", "true", "yes"):
+        return "off"
+    if not os.getenv("TELEGRAM_BOT_TOKEN"):
+        return "off"
+    mode = (config.get("TELEGRAM_BOT_MODE") or "").lower()
+    if mode in ("webhook", "polling", "off"):
+        return mode
+    return "webhook" if config.get("TELEGRAM_WEBHOOK_URL") else "polling"
+
+
+def webhook_secret(config) -> str:
+    """TELEGRAM_WEBHOOK_SECRET oder, falls leer, ein aus dem Token abgeleiteter Wert (gleich in allen Prozessen)."""
+    secret = config.get("TELEGRAM_WEBHOOK_SECRET") or ""
+    if secret:
+        return secret
+    token = os.getenv("TELEGRAM_BOT_TOKEN", "")
+    return hashlib.sha256(f"webhook:{token}".encode("utf-8")).hexdigest() if token else ""
+
+
+class BotRuntime:
+    def __init__(self, app=None, workers: int = 8, queue_size: int = 100):
+        self.app = app
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.bot = None
+        self.dp = None
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._error: BaseException | None = None
+        self._stats = {"accepted": 0, "rejected": 0, "processed": 0, "failed": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive() and self._ready.is_set()
+
+    def start(self, timeout: float = 10.0) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._ready.clear()
+            self._error = None
+            self._thread = threading.Thread(target=self._run, name="telegram-bot-loop", daemon=True)
+            self._thread.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError("Telegram bot runtime did not start")
+        if self._error is not None:
+            raise RuntimeError("Telegram bot runtime failed to start") from self._error
+
+    def _run(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.loop = loop
+        try:
+            loop.run_until_complete(self._startup())
+        except BaseException as exc:
+            self._error = exc
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            loop.run_until_complete(self._shutdown())
+            loop.close()
+
+    async def _startup(self) -> None:
+        # Import erst hier: Bot() prüft das Token, Handler registrieren sich am Dispatcher
+        from telegram_bot import bot as bot_module
+
+        self.bot, self.dp = bot_module.bot, bot_module.dp
+        if self.app is not None:
+            bot_module.departments.init_app(self.app)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        await self.dp.emit_startup(bot=self.bot, dispatcher=self.dp)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        try:
+            await self.dp.emit_shutdown(bot=self.bot, dispatcher=self.dp)
+        finally:
+            await self.bot.session.close()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self.loop is None:
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        thread.join(timeout)
+
+    async def _worker(self) -> None:
+        while True:
+            update = await self._queue.get()
+            try:
+                if isinstance(update, dict):
+                    await self.dp.feed_raw_update(self.bot, update)
+                else:
+                    await self.dp.feed_update(self.bot, update)
+                self._stats["processed"] += 1
+            except Exception:
+                self._stats["failed"] += 1
+                logger.exception("Telegram update %s failed", getattr(update, "update_id", None)
+                                 or (update.get("update_id") if isinstance(update, dict) else None))
+            finally:
+                self._queue.task_done()
+
+    def _offer(self, update) -> bool:
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            return False
+        self._stats["accepted"] += 1
+        return True
+
+    def submit(self, update: dict, timeout: float = 5.0) -> bool:
+        """Übergibt ein Update (JSON) aus einem beliebigen Thread; False, wenn die Queue voll ist."""
+        if not self.running:
+            return False
+
+        async def _put() -> bool:
+            return self._offer(update)
+
+        return asyncio.run_coroutine_threadsafe(_put(), self.loop).result(timeout)
+
+    def call(self, coro, timeout: float | None = None):
+        """Führt eine Coroutine im Bot-Loop aus und wartet auf das Ergebnis."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def poll(self, keep_polling: Callable[[], bool]) -> None:
+        """getUpdates-Schleife; Updates gehen in dieselbe Queue (wartet, wenn sie voll ist)."""
+        allowed = self.dp.resolve_used_update_types()
+        offset = None
+        delay = POLLING_BACKOFF[0]
+        while keep_polling():
+            try:
+                updates = await self.bot.get_updates(
+                    offset=offset,
+                    timeout=POLLING_TIMEOUT,
+                    allowed_updates=allowed,
+                    request_timeout=POLLING_TIMEOUT + 10,
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("Telegram getUpdates failed, retrying in %.0fs", delay, exc_info=True)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, POLLING_BACKOFF[1])
+                continue
+            delay = POLLING_BACKOFF[0]
+            for update in updates:
+                offset = update.update_id + 1
+                await self._queue.put(update)
+                self._stats["accepted"] += 1
+        if offset is not None:
+            # Offset bestätigen, damit der nächste Leader die Updates nicht erneut erhält
+            try:
+                await self.bot.get_updates(offset=offset, timeout=0, limit=1)
+            except Exception:
+                logger.debug("Could not confirm Telegram update offset", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "workers": self.workers,
+        }
+
+
+class PollingLeader:
+    """Pollt nur, solange dieser Prozess die Sperre LOCK_POLLING hält."""
+
+    def __init__(self, app, runtime: BotRuntime, ttl: float = 60.0, retry: float = 15.0):
+        from backend.services.jobs import worker_id
+
+        self.app = app
+        self.runtime = runtime
+        self.ttl = ttl
+        self.retry = retry
+        self.owner = f"{worker_id()}:telegram"
+        self._leading = False
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def leading(self) -> bool:
+        return self._leading
+
+    def _acquire(self) -> bool:
+        from backend.extensions import db
+        from backend.services.jobs import acquire_lock
+
+        with self.app.app_context():
+            try:
+                return acquire_lock(LOCK_POLLING, self.owner, self.ttl)
+            except Exception:
+                logger.warning("Could not take Telegram polling lease", exc_info=True)
+                return False
+            finally:
+                db.session.remove()
+
+    def _release(self) -> None:
+        from backend.services.jobs import release_lock
+
+        with self.app.app_context():
+            try:
+                release_lock(LOCK_POLLING, self.owner)
+            except Exception:
+                logger.warning("Could not release Telegram polling lease", exc_info=True)
+
+    def start(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run, name="telegram-bot-polling", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = POLLING_TIMEOUT + 5) -> None:
+        self._stop.set()
+        self._leading = False
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def wait(self) -> None:
+        """Blockiert, bis der Leader-Thread beendet ist (Signale bleiben zustellbar)."""
+        while self._thread is not None and self._thread.is_alive():
+            self._thread.join(1)
+
+    def run(self) -> None:
+        """Bewirbt sich um die Lease, pollt als Leader und verlängert sie alle ttl/3 Sekunden."""
+        while not self._stop.is_set():
+            if not self._acquire():
+                self._stop.wait(self.retry)
+                continue
+            logger.info("Telegram polling leader: %s", self.owner)
+            self._leading = True
+            try:
+                self.runtime.start()
+                # ein gesetzter Webhook würde getUpdates blockieren (HTTP 409)
+                self.runtime.call(self.runtime.bot.delete_webhook(), timeout=30)
+                polling = asyncio.run_coroutine_threadsafe(
+                    self.runtime.poll(lambda: self._leading), self.runtime.loop
+                )
+                while not polling.done():
+                    if self._stop.wait(self.ttl / 3) or not self._acquire():
+                        if self._leading:
+                            logger.warning("Telegram polling lease lost or stopping: %s", self.owner)
+                        self._leading = False
+                        break
+                polling.result(POLLING_TIMEOUT + 15)
+            except Exception:
+                logger.exception("Telegram polling stopped with an error")
+                self._stop.wait(self.retry)
+            finally:
+                self._leading = False
+                self._release()
+
+
+_runtime: BotRuntime | None = None
+_leader: PollingLeader | None = None
+_runtime_pid: int | None = None
+_runtime_lock = threading.Lock()
+
+
+def _process_runtime(app) -> BotRuntime:
+    global _runtime, _leader, _runtime_pid
+    with _runtime_lock:
+        if _runtime is None or _runtime_pid != os.getpid():
+            _runtime = BotRuntime(
+                app,
+                workers=int(app.config.get("TELEGRAM_UPDATE_WORKERS", 8)),
+                queue_size=int(app.config.get("TELEGRAM_UPDATE_QUEUE_SIZE", 100)),
+            )
+            _leader = None
+            _runtime_pid = os.getpid()
+        return _runtime
+
+
+def get_runtime(app) -> BotRuntime:
+    """Laufzeit dieses Prozesses (nach einem Fork neu), beim ersten Aufruf gestartet."""
+    runtime = _process_runtime(app)
+    runtime.start()
+    return runtime
+
+
+def start_polling_leader(app) -> PollingLeader:
+    """Startet die Bewerbung um das Polling (Thread); die Laufzeit startet erst als Leader."""
+    global _leader
+    runtime = _process_runtime(app)
+    with _runtime_lock:
+        if _leader is None:
+            _leader = PollingLeader(app, runtime, ttl=float(app.config.get("TELEGRAM_POLLING_LOCK_TTL", 60)))
+        leader = _leader
+    leader.start()
+    return leader
+
+
+def register_webhook(app, force: bool = False) -> bool:
+    """
+    Meldet TELEGRAM_WEBHOOK_URL (mit Secret) bei Telegram an. Ohne `force` nur, wenn
+    dieser Prozess die Sperre LOCK_SET_WEBHOOK bekommt (höchstens einmal pro Stunde).
+    """
+    from backend.services.jobs import acquire_lock, worker_id
+
+    url = app.config.get("TELEGRAM_WEBHOOK_URL")
+    if not url:
+        raise ValueError("TELEGRAM_WEBHOOK_URL is not set")
+    if not force:
+        with app.app_context():
+            if not acquire_lock(LOCK_SET_WEBHOOK, worker_id(), 3600):
+                return False
+    runtime = get_runtime(app)
+    return runtime.call(
+        runtime.bot.set_webhook(
+            url,
+            secret_token=webhook_secret(app.config),
+            allowed_updates=runtime.dp.resolve_used_update_types(),
+            max_connections=int(app.config.get("TELEGRAM_WEBHOOK_MAX_CONNECTIONS", 40)),
+        ),
+        timeout=30,
+    )
+
+
+def stats() -> dict:
+    if _runtime is None or _runtime_pid != os.getpid():
+        return {"running": False}
+    return {**_runtime.stats(), "polling_leader": bool(_leader and _leader.leading)}
@@ -0,0 +1,78 @@
+# file: telegram_bot/services/backend_client.py
+
+"""
+Asynchroner Client für das Backend (/api/ai/owner_query).
+
+Eine gemeinsame `aiohttp.ClientSession` pro Bot-Prozess (Keep-Alive, höchstens
+`max_connections` Verbindungen); ein Semaphor begrenzt gleichzeitige Anfragen,
+damit viele Sprach-/Textfragen parallel laufen, ohne das Backend zu überfahren.
+Audio wird als Datei-Objekt übergeben und blockweise hochgeladen.
+"""
+
+import asyncio
+import json
+import logging
+from typing import BinaryIO
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+
+class BackendError(Exception):
+    """Backend hat mit HTTP-Fehler geantwortet (`status`, Antworttext in `body`)."""
+
+    def __init__(self, status: int, body: str):
+        super().__init__(f"HTTP {status}: {body[:200]}")
+        self.status = status
+        self.body = body
+
+
+class BackendClient:
+    def __init__(self, base_url: str, max_connections: int = 20, max_inflight: int = 8,
+                 timeout: float = 90.0):
+        self.base_url = base_url.rstrip("/")
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._session: aiohttp.ClientSession | None = None
+
+    async def start(self) -> None:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=self.timeout, sock_connect=5),
+            )
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def owner_query(
+        self,
+        department: str,
+        *,
+        message: str | None = None,
+        audio: BinaryIO | None = None,
+        filename: str = "voice.ogg",
+        content_type: str = "audio/ogg",
+    ) -> dict:
+        """Fragt den Inhaber-Assistenten; gibt das JSON der Antwort zurück oder wirft `BackendError`."""
+        await self.start()
+        form = aiohttp.FormData()
+        form.add_field("department", department)
+        if message is not None:
+            form.add_field("message", message)
+        if audio is not None:
+            form.add_field("audio", audio, filename=filename, content_type=content_type)
+
+        async with self._slots:
+            async with self._session.post(f"{self.base_url}/api/ai/owner_query", data=form) as resp:
+                body = await resp.text()
+                if resp.status >= 400:
+                    raise BackendError(resp.status, body)
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise BackendError(resp.status, body)
@@ -0,0 +1,74 @@
+# file: telegram_bot/services/department_store.py
+
+"""
+Gewählte Abteilung pro Telegram-Nutzer.
+
+Gespeichert in der Tabelle telegram_departments (backend.models.TelegramDepartment):
+im Webhook-Modus hat jeder Web-Worker eine eigene Bot-Laufzeit, die Wahl muss
+also für alle Prozesse sichtbar sein. Lesen ist ein Zugriff per Primärschlüssel,
+Schreiben ein Upsert; beides läuft in einem Thread, nicht im Event-Loop.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+logger = logging.getLogger(__name__)
+
+
+class DepartmentStore:
+    def __init__(self, app=None):
+        self.app = app
+
+    def init_app(self, app) -> None:
+        self.app = app
+
+    async def get(self, user_id: int, default: str | None = None) -> str | None:
+        try:
+            department = await asyncio.to_thread(self._get, user_id)
+        except Exception:
+            logger.warning("Could not read department of Telegram user %s", user_id, exc_info=True)
+            return default
+        return department if department is not None else default
+
+    async def set(self, user_id: int, department: str) -> None:
+        await asyncio.to_thread(self._set, user_id, department)
+
+    def _get(self, user_id: int) -> str | None:
+        from backend.extensions import db
+        from backend.models.telegram import TelegramDepartment
+
+        with self.app.app_context(), db.engine.connect() as conn:
+            return conn.execute(
+                select(TelegramDepartment.department).where(TelegramDepartment.telegram_user_id == user_id)
+            ).scalar()
+
+    def _set(self, user_id: int, department: str) -> None:
+        from backend.extensions import db
+        from backend.models.telegram import TelegramDepartment
+
+        row = {"telegram_user_id": user_id, "department": department, "updated_at": datetime.utcnow()}
+        table = TelegramDepartment.__table__
+        with self.app.app_context(), db.engine.begin() as conn:
+            dialect = conn.dialect.name
+            if dialect in ("postgresql", "sqlite"):
+                insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+                stmt = insert(table)
+                conn.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=["telegram_user_id"],
+                        set_={"department": stmt.excluded.department, "updated_at": stmt.excluded.updated_at},
+                    ),
+                    row,
+                )
+                return
+            # generischer Fallback (ohne Upsert-Syntax)
+            updated = conn.execute(
+                update(table).where(table.c.telegram_user_id == user_id)
+                .values(department=department, updated_at=row["updated_at"])
+            ).rowcount
+            if not updated:
+                conn.execute(table.insert(), row)
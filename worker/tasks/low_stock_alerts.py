@@ -1,28 +1,25 @@
 # file: worker/tasks/low_stock_alerts.py
 
 """
-Prüft niedrige Lagerbestände und erzeugt Alerts.
+Gleicht die Low-Stock-Zustände aller SKUs ab (services.low_stock.reconcile).
+
+Kein regelmäßiger Job mehr: Alerts entstehen beim Commit der Bestandsänderung.
+Nur bei Bedarf einreihen, z. B. nach `inventory_ledger rebuild` oder wenn
+LOW_STOCK_REORDER_POINT geändert wurde.
 """
 
-from backend.extensions import db
-from backend.models.inventory import StockItem
-from backend.services.alert_service import create_alert
+import logging
 
+from backend.extensions import db
+from backend.services import low_stock
 
-LOW_STOCK_THRESHOLD = 50  # TODO: in Konfiguration auslagern
+logger = logging.getLogger(__name__)
 
 
 def run():
-    low_stock_items = StockItem.query.filter(
-        StockItem.quantity_total <= LOW_STOCK_THRESHOLD
-    ).all()
-    for item in low_stock_items:
-        payload = {
-            "product_id": item.product_id,
-            "quantity_total": item.quantity_total,
-            "location": item.location,
-        }
-        # TODO: echtes Ziel (Chat-ID des Inhabers)
-        create_alert("low_stock", channel="telegram", target="owner_chat_id", payload=payload)
-
-    db.session.remove()
+    try:
+        result = low_stock.reconcile()
+        logger.info("Low stock reconcile: %s", result)
+        return result
+    finally:
+        db.session.remove()
@@ -0,0 +1,14 @@
+# file: worker/tasks/process_webhook_inbox.py
+
+"""
+Arbeitet die Webhook-Inbox ab (Stripe-Ereignisse, die noch nicht verarbeitet wurden).
+"""
+
+from backend.extensions import db
+from backend.services.payments.webhook_inbox import drain_inbox
+
+
+def run():
+    stats = drain_inbox()
+    db.session.remove()
+    return stats
@@ -4,10 +4,23 @@
 Täglicher Bericht an den Inhaber (zukünftig via KI/Bot).
 """
 
+from datetime import datetime, timedelta
+
+from backend.services import sales_rollup
 from backend.services.report_service import get_sales_summary
 
 
 def run():
+    # nachträglich geänderte (auch ältere) Bestellungen: vorgemerkte Tage neu berechnen
+    for day in sales_rollup.repair_dirty_days():
+        print("[DAILY REPORT] sales rollup dirty, rebuilt", day)
+
+    # Rollup der letzten Tage gegen die Bestellungen prüfen und ggf. reparieren
+    start = datetime.utcnow().date() - timedelta(days=2)
+    for day in sorted({m.day for m in sales_rollup.check(start=start)}):
+        print("[DAILY REPORT] sales rollup mismatch, rebuilding", day)
+        sales_rollup.rebuild(day, day)
+
     summary = get_sales_summary(days=1)
     # TODO: an den Inhaber via Telegram/Signal senden
     print("[DAILY REPORT MOCK]", summary)
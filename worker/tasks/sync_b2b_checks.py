@@ -1,16 +1,17 @@
 # file: worker/tasks/sync_b2b_checks.py
 
 """
-Wiederholte Überprüfung von B2B-Kunden nach Zeitplan (MVP-Platzhalter).
+Wiederholte Überprüfung aller B2B-Kunden nach Zeitplan.
+
+Parallel und in Stapeln über die Prüf-Pipeline; Kunden mit unveränderten Daten
+und frischen Quellen im Cache werden übersprungen.
 """
 
 from backend.extensions import db
-from backend.models.user import User
-from backend.services.b2b_checks.b2b_service import run_b2b_checks_for_user
+from backend.services.b2b_checks.pipeline import verify_users
 
 
 def run():
-    b2b_users = User.query.filter_by(is_b2b=True).all()
-    for u in b2b_users:
-        run_b2b_checks_for_user(u)
+    stats = verify_users()
     db.session.remove()
+    return stats
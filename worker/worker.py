@@ -1,31 +1,67 @@
 # file: worker/worker.py
 
 """
-Worker-Platzhalter.
+Worker: arbeitet die Job-Queue (job_runs) ab, siehe backend/services/jobs.py.
 
-Später kann hier RQ / Celery angebunden werden.
-Vorerst definieren wir ein Pseudo-Interface zum Ausführen von Tasks.
+    python -m worker.worker                     # Dauerbetrieb, alle Queues
+    python -m worker.worker --queues sync,b2b   # nur bestimmte Queues
+    python -m worker.worker --with-scheduler    # zusätzlich periodische Jobs einstellen
+    python -m worker.worker --with-bot          # zusätzlich Telegram-Bot (Polling mit Leader-Wahl)
+    python -m worker.worker --once              # alle periodischen Jobs einmal (z. B. per cron)
+
+Mehrere Worker dürfen parallel laufen; Queue-Limits und Sperren gelten für alle.
 """
 
-from tasks import (
-    sync_b2b_checks,
-    sync_shipping_status,
-    sync_containers,
-    low_stock_alerts,
-    reports_daily,
-)
+import argparse
+import logging
+import os
+import sys
+
+
+def _app():
+    # Worker/Scheduler: Berichts-Timeout statt Storefront-Timeout (database.py)
+    os.environ.setdefault("DB_ROLE", "reports")
+    from backend import create_app
+
+    return create_app()
 
 
 def run_all_once():
     """
-    Einmaliger Lauf aller Tasks (z. B. per cron).
+    Einmaliger Lauf aller periodischen Tasks (z. B. per cron): einstellen, abarbeiten, beenden.
     """
-    sync_b2b_checks.run()
-    sync_shipping_status.run()
-    sync_containers.run()
-    low_stock_alerts.run()
-    reports_daily.run()
+    from backend.services import jobs
+
+    with _app().app_context():
+        jobs.enqueue_periodic()
+        return jobs.run_worker(once=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queues", help="kommagetrennte Queues (Standard: alle aus JOBS_QUEUES)")
+    parser.add_argument("--with-scheduler", action="store_true", help="periodische Jobs im selben Prozess planen")
+    parser.add_argument("--with-bot", action="store_true", help="Telegram-Bot in diesem Prozess starten")
+    parser.add_argument("--once", action="store_true", help="periodische Jobs einmal ausführen und beenden")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"), format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    if args.once:
+        print(run_all_once())
+        return 0
+
+    from backend.services import jobs
+
+    queues = [q.strip() for q in args.queues.split(",") if q.strip()] if args.queues else None
+    app = _app()
+    if args.with_bot:
+        from backend.app import start_telegram_bot
+
+        start_telegram_bot(app)
+    with app.app_context():
+        jobs.run_worker(queues=queues, with_scheduler=args.with_scheduler)
+    return 0
 
 
 if __name__ == "__main__":
-    run_all_once()
+    sys.exit(main())